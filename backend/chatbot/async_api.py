@@ -0,0 +1,89 @@
+# chatbot/async_api.py
+"""
+Async API views for the chatbot.
+
+DRF's @api_view always runs the view synchronously, so under ASGI a chat
+request would still hold a thread while the model answers. ``async_api_view``
+wraps a plain Django async view with the same authentication, permission
+and throttle checks instead: the view receives a DRF Request
+(``request.user``, ``request.data``) and returns ``json_response(...)``.
+APIExceptions the view raises become the same error responses DRF sends.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def json_response(data, status=status.HTTP_200_OK, headers=None):
+    return JsonResponse(data, status=status, headers=headers, encoder=JSONEncoder, safe=False)
+
+
+def handle_exception(request, exc):
+    """The response an APIView's handle_exception gives for ``exc``"""
+    headers = {}
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        header = request.authenticators[0].authenticate_header(request) if request.authenticators else None
+        if header:
+            headers['WWW-Authenticate'] = header
+        else:
+            exc.status_code = status.HTTP_403_FORBIDDEN
+    if getattr(exc, 'wait', None) is not None:
+        headers['Retry-After'] = '%d' % exc.wait
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    return json_response(data, status=exc.status_code, headers=headers or None)
+
+
+def check_request(request, permission_classes, throttle_classes):
+    """Authenticate, check permissions and throttle the way an APIView does; returns an error response or None"""
+    try:
+        user = request.user
+        for permission in permission_classes:
+            if not permission().has_permission(request, None):
+                if user is None or not user.is_authenticated:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied()
+        waits = []
+        for throttle in (throttle_class() for throttle_class in throttle_classes):
+            if not throttle.allow_request(request, None):
+                waits.append(throttle.wait())
+        if waits:
+            raise exceptions.Throttled(max(wait or 0 for wait in waits))
+    except exceptions.APIException as e:
+        return handle_exception(request, e)
+    return None
+
+
+def async_api_view(methods, permission_classes=(IsAuthenticated,), throttle_classes=()):
+    def decorator(view):
+        # CSRF is enforced by SessionAuthentication for cookie logins, as in DRF views
+        @csrf_exempt
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return json_response(
+                    {'detail': f'Method "{request.method}" not allowed.'},
+                    status=status.HTTP_405_METHOD_NOT_ALLOWED,
+                    headers={'Allow': ', '.join(methods)},
+                )
+            drf_request = Request(
+                request,
+                parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES],
+                authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+            )
+            error = await sync_to_async(check_request)(drf_request, permission_classes, throttle_classes)
+            if error is not None:
+                return error
+            try:
+                return await view(drf_request, *args, **kwargs)
+            except exceptions.APIException as e:
+                # e.g. a ParseError from reading request.data
+                return handle_exception(drf_request, e)
+        return wrapper
+    return decorator
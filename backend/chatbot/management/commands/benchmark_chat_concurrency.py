@@ -0,0 +1,158 @@
+# chatbot/management/commands/benchmark_chat_concurrency.py
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from chatbot.services import llm
+from properties.models import Property
+from users.models import User
+
+STUB_BACKEND = 'chatbot.services.llm.StubBackend'
+CITIES = ['Berlin', 'München', 'Hamburg', 'Frankfurt', 'Köln']
+MESSAGES = ['Hello, can you help me?', 'apartments in Berlin under 300000', 'What about something bigger?']
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare how many chat sessions one worker serves at once: a WSGI worker with a fixed thread '
+        'pool versus one ASGI event loop, with a stub LLM of fixed latency on a throwaway database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=64, help='Concurrent chat sessions')
+        parser.add_argument('--messages', type=int, default=2, help='Messages sent by each session, one after another')
+        parser.add_argument('--latency', type=float, default=0.5, help='Stub model latency in seconds')
+        parser.add_argument('--threads', type=int, default=4, help='Threads of the WSGI worker (e.g. gunicorn --threads)')
+
+    def handle(self, *args, **options):
+        fd, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        setup_test_environment()
+        # A file rather than an in-memory database so the WSGI threads can share it
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = path
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(
+                CHATBOT_LLM_BACKEND=STUB_BACKEND,
+                CHATBOT_STUB_LATENCY=options['latency'],
+                CHATBOT_RESPONSE_CACHE_TTL=0,
+            ):
+                self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            if os.path.exists(path):
+                os.remove(path)
+
+    def run(self, options):
+        headers = self.populate(options['sessions'])
+        total = options['sessions'] * options['messages']
+        self.stdout.write(
+            f"{options['sessions']} sessions x {options['messages']} messages, "
+            f"model latency {options['latency']:.2f}s"
+        )
+        self.stdout.write(
+            f"{'worker':>22} {'wall (s)':>9} {'msg/s':>7} {'p50 (s)':>8} {'p95 (s)':>8} "
+            f"{'sessions at once':>17} {'browse (s)':>11}"
+        )
+        results = {}
+        for label, run in (
+            (f"WSGI, {options['threads']} threads", lambda: self.run_wsgi(headers, options)),
+            ('ASGI, 1 event loop', lambda: asyncio.run(self.run_asgi(headers, options))),
+        ):
+            llm.reset_llm()
+            start = time.perf_counter()
+            latencies, browse = run()
+            wall = time.perf_counter() - start
+            peak = llm.get_llm().peak
+            results[label] = peak
+            latencies.sort()
+            self.stdout.write(
+                f"{label:>22} {wall:>9.2f} {total / wall:>7.1f} {statistics.median(latencies):>8.2f} "
+                f"{latencies[int(len(latencies) * 0.95) - 1]:>8.2f} {peak:>17} {browse:>11.2f}"
+            )
+        before, after = results.values()
+        self.stdout.write(f"Concurrent chat sessions per worker: {before} before, {after} after")
+
+    def populate(self, sessions):
+        seller = User.objects.create_user(username='benchmark-seller', role='seller')
+        Property.objects.bulk_create(
+            Property(
+                seller=seller, name=f'Property {i}', description='Bright apartment close to the park',
+                address=f'Hauptstraße {i}', city=CITIES[i % len(CITIES)], property_type='apartment',
+                price=Decimal(150000 + i * 5000), number_of_rooms=1 + i % 5, size=Decimal(40 + i),
+            )
+            for i in range(50)
+        )
+        # One user per session so the per-user chat rate limit doesn't kick in
+        return [
+            {'Authorization': f'Bearer {RefreshToken.for_user(User.objects.create_user(username=f"chat{i}")).access_token}'}
+            for i in range(sessions)
+        ]
+
+    def run_wsgi(self, headers, options):
+        def conversation(session_headers, submitted):
+            client = Client(headers=session_headers)
+            session_id = ''
+            latencies = []
+            for i in range(options['messages']):
+                # The first message also counts the time spent waiting for a free thread
+                start = submitted if i == 0 else time.perf_counter()
+                response = client.post(
+                    reverse('send-chat-message'), {'message': MESSAGES[i % len(MESSAGES)], 'session_id': session_id},
+                    content_type='application/json',
+                )
+                latencies.append(time.perf_counter() - start)
+                session_id = response.json()['session_id']
+            return latencies
+
+        def browse(submitted):
+            Client().get(reverse('property-list-create'))
+            return time.perf_counter() - submitted
+
+        # Every request holds one of the worker's threads until it has its answer
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            futures = [pool.submit(conversation, session_headers, time.perf_counter()) for session_headers in headers]
+            time.sleep(options['latency'] / 2)
+            # Browsing has to wait for a free thread like any other request
+            browse_future = pool.submit(browse, time.perf_counter())
+            latencies = [latency for future in futures for latency in future.result()]
+            return latencies, browse_future.result()
+
+    async def run_asgi(self, headers, options):
+        client = AsyncClient()
+
+        async def conversation(session_headers):
+            session_id = ''
+            latencies = []
+            for i in range(options['messages']):
+                start = time.perf_counter()
+                response = await client.post(
+                    reverse('send-chat-message'), {'message': MESSAGES[i % len(MESSAGES)], 'session_id': session_id},
+                    content_type='application/json', headers=session_headers,
+                )
+                latencies.append(time.perf_counter() - start)
+                session_id = response.json()['session_id']
+            return latencies
+
+        async def browse():
+            await asyncio.sleep(options['latency'] / 2)
+            start = time.perf_counter()
+            await client.get(reverse('property-list-create'))
+            return time.perf_counter() - start
+
+        *conversations, browse_time = await asyncio.gather(
+            *(conversation(session_headers) for session_headers in headers), browse()
+        )
+        return [latency for latencies in conversations for latency in latencies], browse_time
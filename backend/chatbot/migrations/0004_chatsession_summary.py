@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0003_chatmessage_time_to_first_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatsession',
+            name='summarized_until',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='chatsession',
+            name='summary',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
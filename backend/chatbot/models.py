@@ -11,6 +11,8 @@ class ChatSession(models.Model):
     session_id = models.CharField(max_length=100, unique=True)   # Maximum length for session identifier & # Ensures no duplicate session IDs
     created_at = models.DateTimeField(auto_now_add=True)      # Automatically set when session is created
     updated_at = models.DateTimeField(auto_now=True)  # Automatically updated every time session is saved
+    summary = models.TextField(blank=True, default='')  # Rolling summary of the older messages (services/memory.py)
+    summarized_until = models.IntegerField(default=0)  # Id of the last ChatMessage folded into the summary
 
     def __str__(self):
         return f"Chat session for {self.user.username}"
@@ -32,6 +34,7 @@ class ChatMessage(models.Model):
   
     timestamp = models.DateTimeField(auto_now_add=True) # Automatically set when message is created
     response_time = models.FloatField(null=True, blank=True)  # Time taken by AI to respond in seconds  
+    time_to_first_token = models.FloatField(null=True, blank=True)  # Seconds until the first streamed token
 
     class Meta:
         ordering = ['timestamp']  # Default ordering: oldest to newest
@@ -1,6 +1,9 @@
 # chatbot/serializers.py
 from rest_framework import serializers
+from properties.models import Property
+from properties.serializers import PropertyImageSerializer
 from .models import ChatSession, ChatMessage
+from .services.prompt import primary_image
 
 
 class ChatMessageSerializer(serializers.ModelSerializer):
@@ -44,4 +47,26 @@ class ChatRequestSerializer(serializers.Serializer):
     
     # Note: This serializer doesn't create model instances directly
     # It's used to validate the structure of incoming POST/PUT request data
-    # before processing in the view
\ No newline at end of file
+    # before processing in the view
+
+class PropertyCardSerializer(serializers.ModelSerializer):
+    """
+    A property as shown in the chat widget: the listing plus its primary image.
+    Expects rows from chatbot.services.prompt.load(), so it never queries.
+    """
+    seller_name = serializers.CharField(source='seller.username', read_only=True)
+    property_type_display = serializers.CharField(source='get_property_type_display', read_only=True)
+    in_wishlist = serializers.BooleanField(source='is_wishlisted', read_only=True)
+    image = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Property
+        fields = [
+            'id', 'name', 'description', 'address', 'city',
+            'price', 'number_of_rooms', 'size', 'property_type', 'property_type_display',
+            'seller_name', 'in_wishlist', 'image'
+        ]
+
+    def get_image(self, obj):
+        image = primary_image(obj)
+        return PropertyImageSerializer(image, context=self.context).data if image else None
@@ -1,33 +1,24 @@
-import google.generativeai as genai
-from django.conf import settings
 import logging
 import re
 import json
-from properties.models import Property, PropertyImage
+from asgiref.sync import sync_to_async
+from .intent import needs_llm, parse_intent, record
+from .llm import get_llm
+from . import memory, prompt, response_cache, search
 
 logger = logging.getLogger(__name__)
 
 class GeminiChatService:
-    def __init__(self):
-        self.api_key = getattr(settings, 'GEMINI_API_KEY', None)
-        if not self.api_key:
-            raise ValueError("GEMINI_API_KEY not configured in settings")
-        self.configure_gemini()
-    
-    def configure_gemini(self):
-        """Configure Gemini AI"""
+    def __init__(self, llm=None):
+        # The client is shared by the whole process (see services/llm.py); building a service is free
         try:
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel('gemini-2.0-flash')
-            logger.info("Gemini AI configured successfully")
+            self.llm = llm or get_llm()
         except Exception as e:
             logger.error(f"Gemini configuration failed: {str(e)}")
             raise
     
-    def extract_property_criteria(self, user_message):
-        """Extract property search criteria from user message"""
-        try:
-            extraction_prompt = f"""Extract real estate search criteria from this German property search. Return as JSON:
+    def extraction_prompt(self, user_message):
+        return f"""Extract real estate search criteria from this German property search. Return as JSON:
             - max_price (number) - in Euros if mentioned
             - min_price (number) - in Euros  
             - city (string) - German cities like Berlin, Munich, Hamburg, Frankfurt, Cologne
@@ -38,132 +29,130 @@ class GeminiChatService:
             Message: "{user_message}"
             
             Return ONLY valid JSON:"""
-            
-            response = self.model.generate_content(extraction_prompt)
-            criteria_text = response.text.strip()
-            criteria_text = re.sub(r'^```json\s*|\s*```$', '', criteria_text)
-            criteria = json.loads(criteria_text)
-            
-            logger.info(f"Extracted criteria: {criteria}")
-            return criteria
-            
+    
+    def parse_criteria(self, criteria_text):
+        criteria_text = re.sub(r'^```json\s*|\s*```$', '', criteria_text.strip())
+        criteria = json.loads(criteria_text)
+        logger.info(f"Extracted criteria: {criteria}")
+        return criteria
+    
+    def extract_property_criteria(self, user_message):
+        """Extract property search criteria from user message"""
+        try:
+            return self.parse_criteria(self.llm.generate(self.extraction_prompt(user_message)))
         except Exception as e:
             logger.error(f"Criteria extraction failed: {e}")
             return {}
     
-    def search_properties(self, criteria):
-        """Search properties in YOUR German properties database"""
+    async def aextract_property_criteria(self, user_message):
         try:
-            queryset = Property.objects.filter(is_available=True)
-            
-            # Apply filters for German property search
-            if criteria.get('max_price'):
-                queryset = queryset.filter(price__lte=criteria['max_price'])
-            if criteria.get('min_price'):
-                queryset = queryset.filter(price__gte=criteria['min_price'])
-            if criteria.get('city'):
-                # Search for German cities in your database
-                queryset = queryset.filter(city__icontains=criteria['city'])
-            if criteria.get('min_rooms'):
-                queryset = queryset.filter(number_of_rooms__gte=criteria['min_rooms'])
-            if criteria.get('property_type'):
-                queryset = queryset.filter(property_type=criteria['property_type'])
-            if criteria.get('min_size'):
-                queryset = queryset.filter(size__gte=criteria['min_size'])
-            
-            properties = queryset.select_related('seller').prefetch_related('images')[:5]
-            logger.info(f"Found {len(properties)} German properties matching criteria")
-            return properties
-            
+            return self.parse_criteria(await self.llm.agenerate(self.extraction_prompt(user_message)))
+        except Exception as e:
+            logger.error(f"Criteria extraction failed: {e}")
+            return {}
+    
+    def search_properties(self, criteria, text=''):
+        """
+        Search properties in YOUR German properties database (services/search.py).
+        Without criteria ``text`` is matched by meaning against the vector index.
+        """
+        try:
+            return search.search(criteria, text, limit=5)
+        except Exception as e:
+            logger.error(f"Property search failed: {e}")
+            return search.SearchResult()
+    
+    async def asearch_properties(self, criteria, text=''):
+        try:
+            return await search.asearch(criteria, text, limit=5)
         except Exception as e:
             logger.error(f"Property search failed: {e}")
-            return []
+            return search.SearchResult()
     
-    def format_properties_for_ai(self, properties):
+    def format_properties_for_ai(self, properties, total=None, relaxed=()):
         """Format German properties for AI presentation"""
-        if not properties:
-            return "No properties found in Germany matching your criteria."
-        
-        formatted = []
-        for i, prop in enumerate(properties, 1):
-            # Get primary image
-            primary_image = prop.images.filter(is_primary=True).first()
-            image_info = f"📷 [Image available]" if primary_image else ""
-            
-            # Format for German properties in Euros
-            property_info = f"""
-{i}. **{prop.name}**
-   - 💰 Price: {prop.price} €
-   - 📍 Location: {prop.city}, Germany
-   - 🏠 Type: {prop.get_property_type_display()}
-   - 🛏️ Rooms: {prop.number_of_rooms}
-   - 📏 Size: {prop.size} m²
-   - 📝 {prop.description[:100]}...
-   - {image_info}
-"""
-            formatted.append(property_info)
-        
-        return "\n".join(formatted)
+        return prompt.property_context(properties, total, relaxed)
     
-    def generate_response(self, user_message, conversation_history=None):
-        """Generate AI response with German property database integration"""
+    def criteria_for(self, intent):
+        """Parsed criteria; the model is only asked when the parser isn't confident"""
+        criteria = intent.criteria()
+        if needs_llm(intent):
+            intent.used_llm = True
+            extracted = self.extract_property_criteria(intent.message)
+            # Only fill gaps: the parsed values also decide which response-cache bucket applies
+            for key, value in extracted.items():
+                if value not in (None, '') and key not in criteria:
+                    criteria[key] = value
+        return criteria
+    
+    async def acriteria_for(self, intent):
+        criteria = intent.criteria()
+        if needs_llm(intent):
+            intent.used_llm = True
+            extracted = await self.aextract_property_criteria(intent.message)
+            for key, value in extracted.items():
+                if value not in (None, '') and key not in criteria:
+                    criteria[key] = value
+        return criteria
+    
+    def generate_response(self, user_message, conversation_history=None, intent=None, result=None):
+        """
+        Generate AI response with German property database integration.
+        ``intent`` is the parsed search intent of the message and ``result``
+        the services.search.SearchResult the caller already loaded for it, so
+        the reply describes the same properties the caller shows; without one
+        the catalog is searched here.
+        """
         try:
-            # Check if this is a property search query
-            is_property_search = any(keyword in user_message.lower() for keyword in [
-                'property', 'house', 'apartment', 'villa', 'wohnung', 'haus',
-                'buy', 'purchase', 'kaufen', 'find', 'search', 'suchen',
-                'budget', 'price', 'preis', 'cost', 'kosten'
-            ])
+            if intent is None:
+                intent = parse_intent(user_message)
             
-            base_context = """You are EstateAI, a helpful real estate assistant for German properties. 
-            You help users find properties in Germany (Berlin, Munich, Hamburg, Frankfurt, etc.). 
-            All prices are in Euros (€). Be friendly and professional."""
+            if not self.cacheable(conversation_history):
+                reply = self.answer(user_message, conversation_history, intent, result)
+                cache_status = None
+            else:
+                key = response_cache.key_for(intent.message, intent.criteria())
+                reply, cache_status = response_cache.get_or_generate(
+                    key, lambda: self.answer(user_message, conversation_history, intent, result)
+                )
+            record(intent)
             
-            database_results = ""
-            properties_found = False
+            return {
+                'success': True,
+                'response': reply['response'],
+                'properties_found': reply['properties_found'],
+                'cache': cache_status,
+            }
             
-            # If it's a property search, integrate database results
-            if is_property_search:
-                criteria = self.extract_property_criteria(user_message)
-                if criteria:
-                    properties = self.search_properties(criteria)
-                    database_results = self.format_properties_for_ai(properties)
-                    properties_found = len(properties) > 0
-                    
-                    if properties_found:
-                        base_context += f"""
-                        
-IMPORTANT: I found these actual German properties from our database:
-{database_results}
-
-Please present these specific properties to the user. Help them compare options and suggest which might be best for their needs.
-"""
-                    else:
-                        base_context += "\n\nNo German properties found matching your criteria. Suggest adjusting the search parameters or expanding the search to other German cities."
+        except Exception as e:
+            logger.error(f"Generation error: {str(e)}")
+            return {
+                'success': False,
+                'error': f"Sorry, I'm having trouble responding right now. Please try again.",
+                'response': None
+            }
+    
+    async def agenerate_response(self, user_message, conversation_history=None, intent=None, result=None):
+        """Async counterpart of generate_response for the ASGI views"""
+        try:
+            if intent is None:
+                intent = await sync_to_async(parse_intent)(user_message)
             
-            # Build conversation context
-            if conversation_history:
-                history_text = "\n".join([
-                    f"{msg['role']}: {msg['content']}" 
-                    for msg in conversation_history[-4:]
-                ])
-                prompt = f"{base_context}\n\nConversation history:\n{history_text}\n\nUser: {user_message}\nEstateAI:"
+            if not self.cacheable(conversation_history):
+                reply = await self.aanswer(user_message, conversation_history, intent, result)
+                cache_status = None
             else:
-                prompt = f"{base_context}\n\nUser: {user_message}\nEstateAI:"
-            
-            # Generate response
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=1000,
+                key = await sync_to_async(response_cache.key_for)(intent.message, intent.criteria())
+                reply, cache_status = await response_cache.aget_or_generate(
+                    key, lambda: self.aanswer(user_message, conversation_history, intent, result)
                 )
-            )
+            await sync_to_async(record)(intent)
             
             return {
                 'success': True,
-                'response': response.text,
-                'properties_found': properties_found
+                'response': reply['response'],
+                'properties_found': reply['properties_found'],
+                'cache': cache_status,
             }
             
         except Exception as e:
@@ -172,4 +161,99 @@ Please present these specific properties to the user. Help them compare options
                 'success': False,
                 'error': f"Sorry, I'm having trouble responding right now. Please try again.",
                 'response': None
-            }
\ No newline at end of file
+            }
+    
+    def cacheable(self, conversation_history):
+        # Only opening messages are cached: later replies depend on the conversation so far
+        return response_cache.enabled() and not (conversation_history and len(conversation_history) > 1)
+    
+    async def stream_plan(self, user_message, conversation_history=None, intent=None, result=None):
+        """
+        Everything a streamed reply needs before the model is called: the
+        cached reply when there is one, otherwise the prompt and the cache key
+        the finished reply should be stored under.
+        """
+        if intent is None:
+            intent = await sync_to_async(parse_intent)(user_message)
+        cache_key = None
+        if self.cacheable(conversation_history):
+            cache_key = await sync_to_async(response_cache.key_for)(intent.message, intent.criteria())
+            cached = await sync_to_async(response_cache.lookup)(cache_key)
+            if cached is not None:
+                await sync_to_async(record)(intent)
+                return {'cached': cached, 'prompt': None, 'properties_found': cached['properties_found'], 'cache_key': None}
+        prompt, properties_found = await self.abuild_prompt(user_message, conversation_history, intent, result)
+        await sync_to_async(record)(intent)
+        return {'cached': None, 'prompt': prompt, 'properties_found': properties_found, 'cache_key': cache_key}
+    
+    def answer(self, user_message, conversation_history, intent, result=None):
+        """Search the catalog if needed and ask the model for the reply"""
+        prompt, properties_found = self.build_prompt(user_message, conversation_history, intent, result)
+        response_text = self.llm.generate(prompt, temperature=0.7, max_output_tokens=1000)
+        
+        return {
+            'response': response_text,
+            'properties_found': properties_found
+        }
+    
+    async def aanswer(self, user_message, conversation_history, intent, result=None):
+        prompt, properties_found = await self.abuild_prompt(user_message, conversation_history, intent, result)
+        response_text = await self.llm.agenerate(prompt, temperature=0.7, max_output_tokens=1000)
+        
+        return {
+            'response': response_text,
+            'properties_found': properties_found
+        }
+    
+    def build_prompt(self, user_message, conversation_history, intent, result=None):
+        """Prompt for the model and whether catalog results went into it"""
+        criteria = intent.criteria()
+        # If it's a property search and the caller hasn't searched yet, integrate database results
+        if result is None and intent.is_property_search:
+            criteria = self.criteria_for(intent)
+            # Without criteria the message itself is matched against the listings' descriptions
+            result = self.search_properties(criteria, intent.message)
+        return self.prompt_with_results(user_message, conversation_history, result, criteria)
+    
+    async def abuild_prompt(self, user_message, conversation_history, intent, result=None):
+        criteria = intent.criteria()
+        if result is None and intent.is_property_search:
+            criteria = await self.acriteria_for(intent)
+            result = await self.asearch_properties(criteria, intent.message)
+        return self.prompt_with_results(user_message, conversation_history, result, criteria)
+    
+    def prompt_with_results(self, user_message, conversation_history, result, criteria):
+        """An empty ``result`` only goes into the prompt when there were criteria to report as unmatched"""
+        properties = None
+        database_results = ""
+        if result is not None and (criteria or result.properties):
+            properties = result.properties
+            database_results = self.format_properties_for_ai(properties, result.total, result.relaxed)
+        return self.compose_prompt(user_message, conversation_history, properties, database_results)
+    
+    def compose_prompt(self, user_message, conversation_history, properties, database_results):
+        """``properties`` is None when the catalog wasn't searched"""
+        base_context = """You are EstateAI, a helpful real estate assistant for German properties. 
+        You help users find properties in Germany (Berlin, Munich, Hamburg, Frankfurt, etc.). 
+        All prices are in Euros (€). Be friendly and professional."""
+        
+        properties_found = bool(properties)
+        if properties_found:
+            base_context += f"""
+                    
+IMPORTANT: I found these actual German properties from our database:
+{database_results}
+
+Please present these specific properties to the user. Help them compare options and suggest which might be best for their needs.
+"""
+        elif properties is not None:
+            base_context += "\n\nNo German properties found matching your criteria. Suggest adjusting the search parameters or expanding the search to other German cities."
+        
+        # Build conversation context
+        # Rolling summary plus a token-budgeted window of recent turns (services/memory.py)
+        if conversation_history:
+            prompt = f"{base_context}\n\n{memory.render(conversation_history)}\n\nUser: {user_message}\nEstateAI:"
+        else:
+            prompt = f"{base_context}\n\nUser: {user_message}\nEstateAI:"
+        
+        return prompt, properties_found
@@ -0,0 +1,340 @@
+# chatbot/services/intent.py
+"""
+Rule-based search intent for chat messages.
+
+One compiled regex walks the message a single time and yields numbers and
+known phrases (cities, property types, room words, price cues, English and
+German synonyms). A small resolver turns that token stream into search
+criteria plus a confidence score; GeminiChatService only asks the model to
+extract criteria when the confidence is below CHATBOT_INTENT_MIN_CONFIDENCE.
+"""
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Q
+
+from properties.models import Property
+from . import metrics
+
+# Canonical city -> spellings people use for it
+CITIES = {
+    'Berlin': ['berlin'],
+    'München': ['münchen', 'muenchen', 'munich'],
+    'Hamburg': ['hamburg'],
+    'Frankfurt': ['frankfurt am main', 'frankfurt'],
+    'Köln': ['köln', 'koeln', 'cologne'],
+    'Stuttgart': ['stuttgart'],
+    'Düsseldorf': ['düsseldorf', 'duesseldorf', 'dusseldorf'],
+    'Dortmund': ['dortmund'],
+    'Essen': ['essen'],
+    'Leipzig': ['leipzig'],
+    'Bremen': ['bremen'],
+    'Dresden': ['dresden'],
+    'Hannover': ['hannover', 'hanover'],
+    'Nürnberg': ['nürnberg', 'nuernberg', 'nuremberg'],
+    'Meiningen': ['meiningen'],
+}
+
+# Values are Property.PROPERTY_TYPES keys
+PROPERTY_TYPES = {
+    'apartment': ['apartment', 'apartments', 'flat', 'flats', 'studio', 'penthouse', 'loft', 'condo',
+                  'wohnung', 'wohnungen', 'eigentumswohnung', 'etagenwohnung', 'appartement'],
+    'house': ['house', 'houses', 'haus', 'häuser', 'einfamilienhaus', 'reihenhaus', 'doppelhaushälfte'],
+    'villa': ['villa', 'villas', 'villen'],
+    'land': ['land', 'plot', 'plots', 'grundstück', 'grundstücke', 'bauland'],
+    'commercial': ['commercial', 'office', 'offices', 'shop', 'retail', 'büro', 'büros', 'gewerbe',
+                   'gewerbeimmobilie', 'laden'],
+}
+
+PHRASES = {
+    'rooms': ['rooms', 'room', 'bedrooms', 'bedroom', 'beds', 'bed', 'zimmer', 'schlafzimmer', 'räume', 'raum'],
+    'max': ['under', 'below', 'less than', 'up to', 'at most', 'max', 'maximum', 'no more than', 'cheaper than',
+            'unter', 'bis zu', 'höchstens', 'maximal', 'weniger als', 'günstiger als', 'budget of', 'budget'],
+    'min': ['over', 'above', 'more than', 'at least', 'min', 'minimum', 'starting at',
+            'über', 'ab', 'mindestens', 'mehr als'],
+    'from': ['between', 'from', 'zwischen', 'von'],
+    'to': ['to', 'and', 'bis', 'und'],
+    'dash': ['-', '–'],
+    'for': ['for', 'für'],
+    'price_word': ['price', 'prices', 'cost', 'costs', 'preis', 'kosten', 'kaufpreis'],
+    'search': ['property', 'properties', 'buy', 'purchase', 'find', 'search', 'looking for', 'rent', 'real estate',
+               'immobilie', 'immobilien', 'kaufen', 'suchen', 'suche', 'mieten', 'objekt', 'angebot'],
+    'near': ['in', 'near', 'around', 'close to', 'nahe', 'bei', 'um', 'nähe'],
+    'negation': ['not', 'no', 'without', 'except', 'nicht', 'kein', 'keine', 'ohne', 'außer'],
+}
+
+NUMBER_WORDS = {
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7, 'eight': 8,
+    'ein': 1, 'eine': 1, 'eins': 1, 'zwei': 2, 'drei': 3, 'vier': 4, 'fünf': 5, 'sechs': 6, 'sieben': 7, 'acht': 8,
+}
+
+MULTIPLIERS = {'k': 1000, 'tsd': 1000, 'tausend': 1000, 'mio': 1000000, 'million': 1000000, 'millionen': 1000000}
+CURRENCY_UNITS = {'€', 'eur', 'euro'}
+AREA_UNITS = {'m²', 'm2', 'qm', 'sqm', 'quadratmeter', 'square meters', 'square metres'}
+
+# A letter on the other side means we're inside a word; digits are fine ("3zimmer")
+LEFT = r'(?<![^\W\d_])'
+RIGHT = r'(?![^\W\d_])'
+
+NUMBER_PATTERN = (
+    r'(?P<currency>€\s*)?(?P<num>\d+(?:[.,]\d+)*)\s*'
+    r'(?:(?P<unit>k|tsd\.?|tausend|mio\.?|millionen|million|€|eur|euro|m²|m2|qm|sqm|quadratmeter'
+    r'|square met(?:er|re)s)' + RIGHT + ')?'
+)
+CUE_DISTANCE = 2   # a price cue applies to a number at most this many tokens later
+
+VOCAB_TTL = 300
+
+
+class Intent:
+    """Search criteria read from one message."""
+
+    def __init__(self, message=''):
+        self.message = message
+        self.cities = []
+        self.property_type = None
+        self.rooms = None
+        self.min_price = None
+        self.max_price = None
+        self.min_size = None
+        self.is_property_search = False
+        self.confidence = 1.0
+        self.used_llm = False
+
+    def criteria(self):
+        """The same keys extract_property_criteria asks the model for."""
+        criteria = {
+            'city': self.cities[0] if self.cities else None,
+            'property_type': self.property_type,
+            'min_rooms': self.rooms,
+            'min_price': self.min_price,
+            'max_price': self.max_price,
+            'min_size': self.min_size,
+        }
+        return {key: value for key, value in criteria.items() if value is not None}
+
+    def price_filters(self):
+        filters = {}
+        if self.min_price is not None:
+            filters['price__gte'] = self.min_price
+        if self.max_price is not None:
+            filters['price__lte'] = self.max_price
+        return filters
+
+    def city_query(self):
+        """Q matching any spelling of the requested cities."""
+        query = Q()
+        for city in self.cities:
+            query |= city_query(city)
+        return query
+
+    def __repr__(self):
+        return f"Intent({self.criteria()}, confidence={self.confidence})"
+
+
+def canonical_city(city):
+    """The CITIES key for any spelling of a city ('munich' -> 'München'), else ``city`` unchanged."""
+    for canonical, names in CITIES.items():
+        if city.lower() == canonical.lower() or city.lower() in names:
+            return canonical
+    return city
+
+
+def cities_matching(stored_city):
+    """Canonical cities whose city_query() matches a property stored with ``stored_city``."""
+    stored = stored_city.lower()
+    return {
+        canonical for canonical, names in CITIES.items()
+        if any(spelling in stored for spelling in (canonical.lower(), *names))
+    }
+
+
+def city_query(city):
+    spellings = {city.lower(), *CITIES.get(canonical_city(city), ())}
+    query = Q()
+    for spelling in spellings:
+        query |= Q(city__icontains=spelling)
+    return query
+
+
+def parse_number(text):
+    if re.fullmatch(r'\d{1,3}(?:[.,]\d{3})+', text):
+        return float(re.sub(r'[.,]', '', text))   # 300.000 / 300,000
+    try:
+        return float(text.replace(',', '.'))      # 1,5 / 1.5
+    except ValueError:
+        return float(re.sub(r'[.,]', '', text))
+
+
+def whole(value):
+    return int(value) if value == int(value) else value
+
+
+class IntentParser:
+    def __init__(self, extra_cities=()):
+        self.phrases = {}
+        for city, spellings in CITIES.items():
+            for spelling in spellings:
+                self.phrases[spelling] = ('city', city)
+        for city in extra_cities:
+            self.phrases.setdefault(city.lower(), ('city', city))
+        for property_type, words in PROPERTY_TYPES.items():
+            for word in words:
+                self.phrases[word] = ('type', property_type)
+        for kind, words in PHRASES.items():
+            for word in words:
+                self.phrases.setdefault(word, (kind, None))
+        for word, value in NUMBER_WORDS.items():
+            self.phrases[word] = ('number_word', value)
+
+        alternatives = '|'.join(
+            re.escape(phrase).replace(r'\ ', r'\s+') for phrase in sorted(self.phrases, key=len, reverse=True)
+        )
+        self.pattern = re.compile(
+            rf'{NUMBER_PATTERN}|{LEFT}(?P<phrase>{alternatives}){RIGHT}|(?P<word>[^\W\d_]+)',
+            re.IGNORECASE,
+        )
+
+    def tokens(self, message):
+        for match in self.pattern.finditer(message):
+            if match.group('num'):
+                unit = re.sub(r'\s+', ' ', (match.group('unit') or '').rstrip('.').lower())
+                yield {
+                    'kind': 'area' if unit in AREA_UNITS else 'num',
+                    'value': parse_number(match.group('num')),
+                    'multiplier': MULTIPLIERS.get(unit, 1),
+                    'money': bool(match.group('currency')) or unit in CURRENCY_UNITS or unit in MULTIPLIERS,
+                }
+            elif match.group('phrase'):
+                kind, value = self.phrases[re.sub(r'\s+', ' ', match.group('phrase').lower())]
+                yield {'kind': kind, 'value': value}
+            else:
+                word = match.group('word')
+                yield {'kind': 'word', 'value': word, 'capitalized': word[:1].isupper()}
+
+    def parse(self, message):
+        intent = Intent(message or '')
+        tokens = list(self.tokens(intent.message))
+        kinds = [token['kind'] for token in tokens]
+        cue, cue_at = None, None
+        unassigned = 0
+
+        def next_index(i):
+            """Index of the next token, stepping over hyphens ("3-Zimmer-Wohnung")."""
+            i += 1
+            while i < len(tokens) and kinds[i] == 'dash':
+                i += 1
+            return i if i < len(tokens) else None
+
+        def kind_at(i):
+            return kinds[i] if i is not None else None
+
+        i = 0
+        while i < len(tokens):
+            token, kind = tokens[i], kinds[i]
+            following = next_index(i)
+            active_cue = cue if cue_at is not None and i - cue_at <= CUE_DISTANCE else None
+
+            if kind == 'city':
+                if token['value'] not in intent.cities:
+                    intent.cities.append(token['value'])
+            elif kind == 'type':
+                intent.property_type = intent.property_type or token['value']
+            elif kind in ('max', 'min', 'from', 'to'):
+                # A lone "bis"/"to" before a number reads as an upper bound
+                cue, cue_at = ('max' if kind == 'to' else kind), i
+            elif kind == 'negation':
+                intent.confidence -= 0.5
+            elif kind == 'near' and kind_at(following) == 'word' and tokens[following]['capitalized']:
+                # "in Potsdam": most likely a place the vocabulary doesn't know
+                intent.confidence -= 0.5
+            elif kind == 'number_word' and kind_at(following) == 'rooms':
+                intent.rooms = token['value']
+            elif kind == 'area':
+                intent.min_size = whole(token['value'])
+            elif kind == 'num':
+                value = token['value'] * token['multiplier']
+                other = i + 2 if i + 2 < len(tokens) and kinds[i + 1] in ('to', 'dash') else None
+                if other is not None and kinds[other] == 'num':
+                    # "200-300k", "zwischen 200.000 und 300.000", "from 200k to 300k"
+                    high = tokens[other]
+                    multiplier = token['multiplier'] if token['multiplier'] > 1 else high['multiplier']
+                    intent.min_price = whole(token['value'] * multiplier)
+                    intent.max_price = whole(high['value'] * high['multiplier'])
+                    i = other
+                elif kind_at(following) == 'rooms':
+                    intent.rooms = int(value)
+                elif active_cue or token['money'] or kind_at(i - 1 if i else None) in ('for', 'price_word'):
+                    if active_cue in ('min', 'from'):
+                        intent.min_price = whole(value)
+                    else:
+                        intent.max_price = whole(value)
+                elif value >= 1000 and not 1800 <= value <= 2100:
+                    intent.max_price = whole(value)
+                    intent.confidence -= 0.1   # bare number read as a budget
+                else:
+                    unassigned += 1            # "top 5", "built after 1990"
+                cue, cue_at = None, None
+            i += 1
+
+        found = intent.criteria()
+        intent.is_property_search = bool(found) or any(kind in ('search', 'price_word') for kind in kinds)
+        intent.confidence -= 0.4 * unassigned
+        if intent.is_property_search and not found:
+            intent.confidence = min(intent.confidence, 0.5)
+        intent.confidence = round(max(intent.confidence, 0.0), 2)
+        return intent
+
+
+_parser = None
+_parser_built_at = 0
+_parser_lock = threading.Lock()
+
+
+def catalog_cities():
+    return [city for city in Property.objects.values_list('city', flat=True).distinct() if city]
+
+
+def get_parser():
+    """Parser whose vocabulary also covers the cities in the catalog, rebuilt every few minutes."""
+    global _parser, _parser_built_at
+    ttl = getattr(settings, 'CHATBOT_INTENT_VOCAB_TTL', VOCAB_TTL)
+    if _parser is None or time.monotonic() - _parser_built_at > ttl:
+        with _parser_lock:
+            if _parser is None or time.monotonic() - _parser_built_at > ttl:
+                _parser = IntentParser(catalog_cities())
+                _parser_built_at = time.monotonic()
+    return _parser
+
+
+def reset_parser():
+    global _parser
+    with _parser_lock:
+        _parser = None
+
+
+def parse_intent(message):
+    return get_parser().parse(message)
+
+
+def needs_llm(intent):
+    return intent.is_property_search and intent.confidence < getattr(settings, 'CHATBOT_INTENT_MIN_CONFIDENCE', 0.7)
+
+
+def record(intent):
+    metrics.incr('intent_messages')
+    if intent.used_llm:
+        metrics.incr('intent_llm_extractions')
+
+
+def stats():
+    counts = metrics.get_many('intent_messages', 'intent_llm_extractions')
+    served = counts['intent_messages'] - counts['intent_llm_extractions']
+    return {
+        'messages': counts['intent_messages'],
+        'llm_extractions': counts['intent_llm_extractions'],
+        'served_without_llm': served,
+        'share_without_llm': metrics.share(served, counts['intent_messages']),
+    }
@@ -0,0 +1,193 @@
+# chatbot/services/llm.py
+"""
+Process-wide LLM client used by the chatbot.
+
+``get_llm()`` builds the backend named by CHATBOT_LLM_BACKEND once per worker
+process (under a lock, so concurrent first requests don't race) and hands the
+same instance to every request afterwards. The Gemini backend therefore
+configures the SDK and opens its connection a single time, and each message
+only pays for the model call itself. ``StubBackend`` answers locally and is
+meant for tests and benchmarks.
+
+``agenerate`` and ``astream`` are the async counterparts used by the ASGI
+views (chatbot/views.py, chatbot/streaming.py): while the model is thinking
+they only hold the event loop, not a worker thread. ``astream`` yields the
+reply in pieces as the model produces them.
+"""
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = 'chatbot.services.llm.GeminiBackend'
+
+_llm = None
+_llm_lock = threading.Lock()
+
+
+class LLMError(Exception):
+    """Raised by a backend when the model call fails or times out."""
+
+
+class LLMBackend:
+    """
+    Interface every backend implements. ``generate`` returns the reply text;
+    ``timeout`` is in seconds and defaults to CHATBOT_LLM_TIMEOUT.
+    """
+    name = 'base'
+
+    def generate(self, prompt, temperature=0.7, max_output_tokens=1000, timeout=None):
+        raise NotImplementedError
+
+    async def agenerate(self, prompt, temperature=0.7, max_output_tokens=1000, timeout=None):
+        """Backends without an async client run ``generate`` in a thread of its own."""
+        return await sync_to_async(self.generate, thread_sensitive=False)(
+            prompt, temperature=temperature, max_output_tokens=max_output_tokens, timeout=timeout
+        )
+
+    async def astream(self, prompt, temperature=0.7, max_output_tokens=1000, timeout=None):
+        """Async iterator over pieces of the reply. Backends without streaming yield it whole."""
+        yield await self.agenerate(prompt, temperature=temperature, max_output_tokens=max_output_tokens, timeout=timeout)
+
+    def default_timeout(self, timeout):
+        return timeout if timeout is not None else getattr(settings, 'CHATBOT_LLM_TIMEOUT', 30)
+
+
+class GeminiBackend(LLMBackend):
+    name = 'gemini'
+
+    def __init__(self):
+        import google.generativeai as genai
+
+        api_key = getattr(settings, 'GEMINI_API_KEY', None)
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not configured in settings")
+        self.genai = genai
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(getattr(settings, 'CHATBOT_LLM_MODEL', 'gemini-2.0-flash'))
+        logger.info("Gemini AI configured successfully")
+
+    def generation_config(self, temperature, max_output_tokens):
+        return self.genai.types.GenerationConfig(temperature=temperature, max_output_tokens=max_output_tokens)
+
+    def generate(self, prompt, temperature=0.7, max_output_tokens=1000, timeout=None):
+        try:
+            response = self.model.generate_content(
+                prompt,
+                generation_config=self.generation_config(temperature, max_output_tokens),
+                request_options={'timeout': self.default_timeout(timeout)},
+            )
+            return response.text
+        except Exception as e:
+            raise LLMError(str(e)) from e
+
+    async def agenerate(self, prompt, temperature=0.7, max_output_tokens=1000, timeout=None):
+        try:
+            response = await self.model.generate_content_async(
+                prompt,
+                generation_config=self.generation_config(temperature, max_output_tokens),
+                request_options={'timeout': self.default_timeout(timeout)},
+            )
+            return response.text
+        except Exception as e:
+            raise LLMError(str(e)) from e
+
+    async def astream(self, prompt, temperature=0.7, max_output_tokens=1000, timeout=None):
+        try:
+            response = await self.model.generate_content_async(
+                prompt,
+                generation_config=self.generation_config(temperature, max_output_tokens),
+                stream=True,
+                request_options={'timeout': self.default_timeout(timeout)},
+            )
+            async for chunk in response:
+                if chunk.parts:
+                    yield chunk.text
+        except Exception as e:
+            raise LLMError(str(e)) from e
+
+
+class StubBackend(LLMBackend):
+    """
+    Local stand-in for tests and benchmarks. Replies are deterministic and
+    CHATBOT_STUB_LATENCY (seconds) simulates the model's response time; when
+    streaming, that time is spread over the words of the reply.
+    """
+    name = 'stub'
+
+    def __init__(self):
+        self.latency = getattr(settings, 'CHATBOT_STUB_LATENCY', 0)
+        self.calls = 0
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def generate(self, prompt, temperature=0.7, max_output_tokens=1000, timeout=None):
+        with self.tracking():
+            if self.latency:
+                time.sleep(self.latency)
+            return self.reply(prompt, max_output_tokens)
+
+    async def agenerate(self, prompt, temperature=0.7, max_output_tokens=1000, timeout=None):
+        with self.tracking():
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return self.reply(prompt, max_output_tokens)
+
+    async def astream(self, prompt, temperature=0.7, max_output_tokens=1000, timeout=None):
+        with self.tracking():
+            words = self.reply(prompt, max_output_tokens).split(' ')
+            for i, word in enumerate(words):
+                if self.latency:
+                    await asyncio.sleep(self.latency / len(words))
+                yield word if i == 0 else ' ' + word
+
+    @contextmanager
+    def tracking(self):
+        """Count calls and how many are waiting at once (``peak``), for the benchmarks."""
+        with self.lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def reply(self, prompt, max_output_tokens):
+        last_line = prompt.strip().splitlines()[-1] if prompt.strip() else ''
+        return f"[stub] {last_line}"[:max_output_tokens * 4]
+
+
+def get_llm():
+    """The shared backend for this process, created on first use."""
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                backend_class = import_string(getattr(settings, 'CHATBOT_LLM_BACKEND', DEFAULT_BACKEND))
+                _llm = backend_class()
+    return _llm
+
+
+def reset_llm():
+    """Drop the shared backend so the next get_llm() builds a new one."""
+    global _llm
+    with _llm_lock:
+        _llm = None
+
+
+@receiver(setting_changed)
+def reset_llm_on_setting_change(setting, **kwargs):
+    if setting.startswith('CHATBOT_LLM_') or setting in ('GEMINI_API_KEY', 'CHATBOT_STUB_LATENCY'):
+        reset_llm()
@@ -0,0 +1,204 @@
+# chatbot/services/memory.py
+"""
+Conversation memory for the chat prompt.
+
+Quoting the last few turns verbatim makes prompts (and model latency) grow
+with every long answer, and anything older is simply forgotten. Instead a
+prompt gets:
+
+* ``ChatSession.summary`` - a short rolling summary of everything up to
+  ``ChatSession.summarized_until`` (a ChatMessage id), and
+* the newest messages after that, clipped to CHATBOT_HISTORY_MESSAGE_TOKENS
+  each and to CHATBOT_HISTORY_TOKENS together.
+
+Messages that no longer fit the window are folded into the summary by a
+background worker after the turn, so the request never waits for it. Until
+the worker catches up they are left out of the prompt.
+
+Token counts are estimated at four characters per token, which is close
+enough for English and German text to keep prompt sizes stable.
+"""
+import logging
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .llm import get_llm
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+SUMMARY_ROLE = 'summary'
+MAX_FOLDED_MESSAGES = 40   # per summarization call; the rest waits for the next turn
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def history_tokens():
+    return getattr(settings, 'CHATBOT_HISTORY_TOKENS', 800)
+
+
+def message_tokens():
+    return getattr(settings, 'CHATBOT_HISTORY_MESSAGE_TOKENS', 200)
+
+
+def summary_tokens():
+    return getattr(settings, 'CHATBOT_SUMMARY_TOKENS', 250)
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def clip(text, tokens):
+    limit = tokens * CHARS_PER_TOKEN
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + '…'
+
+
+def window(messages):
+    """
+    The newest of ``messages`` (oldest first) that fit the history budget,
+    each clipped. Returns (window, number of older messages left out).
+    """
+    budget = history_tokens()
+    kept = []
+    for message in reversed(messages):
+        content = clip(message.content, message_tokens())
+        cost = estimate_tokens(content)
+        # The newest message always goes in
+        if kept and cost > budget:
+            break
+        kept.append({'role': message.role, 'content': content})
+        budget -= cost
+    kept.reverse()
+    return kept, len(messages) - len(kept)
+
+
+def unsummarized(session):
+    from ..models import ChatMessage
+    return ChatMessage.objects.filter(session=session, id__gt=session.summarized_until).order_by('id')
+
+
+def recent_limit():
+    # Enough rows to fill the budget even with one-word messages, without loading a whole backlog
+    return max(10, history_tokens() // 4)
+
+
+def conversation_history(session):
+    """
+    History for the prompt: the summary (role ``'summary'``) followed by the
+    recent window, oldest first. Also returns whether older messages wait to
+    be folded into the summary.
+    """
+    return with_summary(session, list(unsummarized(session).order_by('-id')[:recent_limit()]))
+
+
+async def aconversation_history(session):
+    return with_summary(session, [message async for message in unsummarized(session).order_by('-id')[:recent_limit()]])
+
+
+def with_summary(session, newest_first):
+    recent, left_out = window(newest_first[::-1])
+    history = [{'role': SUMMARY_ROLE, 'content': session.summary}] if session.summary else []
+    return history + recent, left_out > 0
+
+
+def render(conversation_history):
+    """The history as it goes into the prompt"""
+    summary = [msg['content'] for msg in conversation_history if msg['role'] == SUMMARY_ROLE]
+    turns = [f"{msg['role']}: {msg['content']}" for msg in conversation_history if msg['role'] != SUMMARY_ROLE]
+    parts = []
+    if summary:
+        parts.append("Summary of the earlier conversation:\n" + "\n".join(summary))
+    if turns:
+        parts.append("Conversation history:\n" + "\n".join(turns))
+    return "\n\n".join(parts)
+
+
+def summary_prompt(summary, messages):
+    transcript = "\n".join(f"{message.role}: {clip(message.content, message_tokens() * 2)}" for message in messages)
+    words = summary_tokens() * 3 // 4
+    return f"""You keep the memory of a conversation between a user and EstateAI, an assistant for German real estate.
+Update the summary with the new messages. Keep what matters for later questions: the cities, budget, size,
+rooms and property types the user wants, properties already suggested and the user's opinion of them.
+Leave out greetings and repetition. Use at most {words} words.
+
+Current summary:
+{summary or '(none yet)'}
+
+New messages:
+{transcript}
+
+Updated summary:"""
+
+
+def summarize(session_pk):
+    """
+    Fold the messages that fell out of the recent window into the session's
+    summary. Returns False when there was nothing to fold.
+    """
+    from ..models import ChatSession
+
+    session = ChatSession.objects.filter(pk=session_pk).first()
+    if session is None:
+        return False
+    messages = list(unsummarized(session))
+    _, left_out = window(messages)
+    folded = messages[:min(left_out, MAX_FOLDED_MESSAGES)]
+    if not folded:
+        return False
+
+    summary = get_llm().generate(
+        summary_prompt(session.summary, folded), temperature=0.2, max_output_tokens=summary_tokens()
+    ).strip()
+    # Only if no other worker moved the summary on meanwhile; update() leaves updated_at alone
+    return bool(ChatSession.objects.filter(pk=session.pk, summarized_until=session.summarized_until).update(
+        summary=clip(summary, summary_tokens()),
+        summarized_until=folded[-1].id,
+    ))
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'CHATBOT_SUMMARY_WORKERS', 1),
+                thread_name_prefix='chat-memory',
+            )
+        return _executor
+
+
+def schedule_summary(session_pk):
+    if getattr(settings, 'CHATBOT_SUMMARY_EAGER', False):
+        run_summary(session_pk)
+        return
+    with _pending_lock:
+        # One job per session at a time; the next turn picks up whatever it missed
+        if session_pk in _pending:
+            return
+        _pending.add(session_pk)
+    get_executor().submit(run_in_worker, session_pk)
+
+
+def run_in_worker(session_pk):
+    close_old_connections()
+    try:
+        run_summary(session_pk)
+    finally:
+        with _pending_lock:
+            _pending.discard(session_pk)
+        close_old_connections()
+
+
+def run_summary(session_pk):
+    try:
+        summarize(session_pk)
+    except Exception as e:
+        logger.error(f"Summarizing chat session {session_pk} failed: {e}")
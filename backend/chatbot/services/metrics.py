@@ -0,0 +1,34 @@
+# chatbot/services/metrics.py
+"""
+Counters for the chatbot, kept in the default cache. With the default
+per-process LocMemCache each worker counts on its own; point CACHES at Redis
+(REDIS_URL) for numbers shared by every worker. They survive until the cache
+is cleared.
+"""
+from django.core.cache import cache
+
+PREFIX = 'chatbot:metrics:'
+
+
+def incr(name, amount=1):
+    key = PREFIX + name
+    cache.add(key, 0, None)
+    try:
+        return cache.incr(key, amount)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, amount, None)
+        return amount
+
+
+def get_many(*names):
+    values = cache.get_many([PREFIX + name for name in names])
+    return {name: values.get(PREFIX + name, 0) for name in names}
+
+
+def reset(*names):
+    cache.delete_many([PREFIX + name for name in names])
+
+
+def share(part, total):
+    return round(part / total, 4) if total else None
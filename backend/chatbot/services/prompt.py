@@ -0,0 +1,78 @@
+# chatbot/services/prompt.py
+"""
+Prompt assembly for catalog search results.
+
+One chat turn shows the same properties twice: as a text block in the
+model's prompt and as property cards in the chat widget. Both are built here
+from one list of rows. ``load()`` fetches that list with the seller joined,
+only the primary image prefetched and the user's wishlist status annotated,
+so neither view costs a query per property.
+"""
+from django.db.models import Prefetch
+
+from properties.models import PropertyImage
+
+DESCRIPTION_CHARS = 100
+NO_RESULTS = "No properties found in Germany matching your criteria."
+
+
+def prepare(queryset, user=None):
+    """``queryset`` with everything the context and the cards read, in a fixed number of queries"""
+    return queryset.select_related('seller').prefetch_related(
+        Prefetch('images', queryset=PropertyImage.objects.filter(is_primary=True), to_attr='primary_images')
+    ).with_wishlist_status(user)
+
+
+def load(queryset, user=None):
+    return list(prepare(queryset, user))
+
+
+def primary_image(prop):
+    """The prefetched primary image, or None; never queries"""
+    images = getattr(prop, 'primary_images', None)
+    if images is None:
+        raise ValueError('Load properties with chatbot.services.prompt.load() before assembling a prompt')
+    return images[0] if images else None
+
+
+def property_context(properties, total=None, relaxed=()):
+    """
+    The properties as the model reads them. ``total`` is the number of
+    matches when more were found than shown, ``relaxed`` how the search was
+    loosened to find any (services/search.py).
+    """
+    if not properties:
+        return NO_RESULTS
+
+    formatted = []
+    if relaxed:
+        formatted.append(f"Nothing matched exactly, so the search {'; '.join(relaxed)}.")
+    if total and total > len(properties):
+        formatted.append(f"Found {total} properties, showing the first {len(properties)}:")
+    else:
+        formatted.append(f"Found {len(properties)} properties:")
+    for i, prop in enumerate(properties, 1):
+        lines = [
+            f"{i}. **{prop.name}**",
+            f"   - 💰 Price: {prop.price:,.0f} €",
+            f"   - 📍 Location: {prop.city}, Germany",
+            f"   - 🏠 Type: {prop.get_property_type_display()}",
+            f"   - 🛏️ Rooms: {prop.number_of_rooms}",
+            f"   - 📏 Size: {prop.size} m²",
+        ]
+        if prop.description:
+            description = prop.description[:DESCRIPTION_CHARS]
+            if len(prop.description) > DESCRIPTION_CHARS:
+                description += "..."
+            lines.append(f"   - 📝 {description}")
+        if primary_image(prop):
+            lines.append("   - 📷 [Image available]")
+        formatted.append("\n".join(lines))
+
+    return "\n\n".join(formatted)
+
+
+def property_cards(properties, request=None):
+    """The properties as the chat widget renders them"""
+    from ..serializers import PropertyCardSerializer
+    return PropertyCardSerializer(properties, many=True, context={'request': request}).data
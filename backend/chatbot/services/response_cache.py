@@ -0,0 +1,254 @@
+# chatbot/services/response_cache.py
+"""
+Cache of chatbot replies for questions that come in again.
+
+Entries are keyed on the normalized message, its parsed criteria and the
+version of the catalog slice those criteria read from: the city bucket when
+the message names a city, otherwise the property-type bucket, otherwise the
+whole catalog. Saving or deleting a Property bumps the buckets of its old and
+new city/type (chatbot/signals.py), so only replies that could have listed it
+go stale. The bucket versions are database rows (real_estate/versions.py), so
+a bump reaches every worker; the replies are in the default cache.
+
+Identical questions that arrive together share one model call: within a
+process the followers wait for the leader's result, and across processes (with
+a shared cache such as Redis configured) a cache lock makes the others poll for
+the stored reply instead of calling the model themselves. ``aget_or_generate`` does the same for the async views,
+with the followers awaiting the leader on the event loop.
+"""
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from real_estate import versions
+from . import intent, metrics
+
+PREFIX = 'chatbot:response:'
+VERSION_PREFIX = 'chatbot:catalog:'
+POLL_INTERVAL = 0.05
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+_ainflight = {}
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+
+
+def enabled():
+    return getattr(settings, 'CHATBOT_RESPONSE_CACHE_TTL', 0) > 0
+
+
+def normalize(message):
+    text = unicodedata.normalize('NFKC', message or '').casefold()
+    text = re.sub(r'(?<=\d)[.,](?=\d{3}(?!\d))', '', text)   # 300.000 / 300,000 -> 300000
+    text = re.sub(r'[^\w€²]+', ' ', text)
+    return ' '.join(text.split())
+
+
+def city_bucket(city):
+    return f"city:{normalize(intent.canonical_city(city))}"
+
+
+def bucket_for(criteria):
+    if criteria.get('city'):
+        return city_bucket(criteria['city'])
+    if criteria.get('property_type'):
+        return f"type:{criteria['property_type']}"
+    return 'all'
+
+
+def property_buckets(city, property_type):
+    """
+    Every bucket a property with this city/type belongs to. A stored city
+    lands in the bucket of its own spelling and in that of every canonical
+    city whose search would list it ('Munich' -> München, 'Berlin Mitte' ->
+    Berlin), the same matching as intent.city_query().
+    """
+    buckets = {'all'}
+    if city:
+        buckets.add(city_bucket(city))
+        buckets.update(city_bucket(canonical) for canonical in intent.cities_matching(city))
+    if property_type:
+        buckets.add(f"type:{property_type}")
+    return buckets
+
+
+def catalog_version(bucket):
+    return versions.get(VERSION_PREFIX + bucket)
+
+
+def bump(buckets):
+    versions.bump(VERSION_PREFIX + bucket for bucket in buckets)
+
+
+def key_for(message, criteria):
+    bucket = bucket_for(criteria)
+    payload = json.dumps({
+        'message': normalize(message),
+        'criteria': criteria,
+        'bucket': bucket,
+        'version': catalog_version(bucket),
+        'model': [getattr(settings, 'CHATBOT_LLM_BACKEND', ''), getattr(settings, 'CHATBOT_LLM_MODEL', '')],
+    }, sort_keys=True, default=str)
+    return PREFIX + hashlib.sha256(payload.encode()).hexdigest()
+
+
+def lookup(key):
+    """The stored reply for ``key``, counted as a hit, or None."""
+    value = cache.get(key)
+    if value is not None:
+        record_hit(value, 'hit')
+    return value
+
+
+def store(key, value, seconds):
+    """Store a reply that took ``seconds`` to generate; used by the streaming endpoint."""
+    metrics.incr('response_cache_misses')
+    value = dict(value, latency_ms=int(seconds * 1000))
+    cache.set(key, value, settings.CHATBOT_RESPONSE_CACHE_TTL)
+    return value
+
+
+def get_or_generate(key, generate):
+    """
+    Return ``(value, status)`` where status is 'hit', 'coalesced' or 'miss'.
+    ``generate`` is only called on a miss; if it raises nothing is stored.
+    """
+    value = lookup(key)
+    if value is not None:
+        return value, 'hit'
+
+    with _inflight_lock:
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = _inflight[key] = _Call()
+
+    if not leader:
+        call.done.wait(wait_timeout())
+        if call.value is not None:
+            record_hit(call.value, 'coalesced')
+            return call.value, 'coalesced'
+        return run(key, generate)
+
+    try:
+        value, status = lead(key, generate)
+        call.value = value
+        return value, status
+    finally:
+        call.done.set()
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def lead(key, generate):
+    lock_key = key + ':lock'
+    if not cache.add(lock_key, 1, wait_timeout()):
+        # Another process is asking the model the same question; wait for its reply
+        deadline = time.monotonic() + wait_timeout()
+        while time.monotonic() < deadline and cache.get(lock_key) is not None:
+            time.sleep(POLL_INTERVAL)
+            value = cache.get(key)
+            if value is not None:
+                record_hit(value, 'coalesced')
+                return value, 'coalesced'
+        return run(key, generate)
+    try:
+        return run(key, generate)
+    finally:
+        cache.delete(lock_key)
+
+
+def run(key, generate):
+    started = time.monotonic()
+    value = generate()
+    return store(key, value, time.monotonic() - started), 'miss'
+
+
+async def aget_or_generate(key, generate):
+    """
+    Async counterpart of get_or_generate; ``generate`` returns an awaitable.
+    """
+    value = await sync_to_async(lookup)(key)
+    if value is not None:
+        return value, 'hit'
+
+    loop = asyncio.get_running_loop()
+    call = _ainflight.get((loop, key))
+    if call is not None:
+        try:
+            value = await asyncio.wait_for(asyncio.shield(call), wait_timeout())
+        except asyncio.TimeoutError:
+            value = None
+        if value is not None:
+            await sync_to_async(record_hit)(value, 'coalesced')
+            return value, 'coalesced'
+        return await arun(key, generate)
+
+    call = _ainflight[(loop, key)] = loop.create_future()
+    try:
+        value, status = await alead(key, generate)
+        call.set_result(value)
+        return value, status
+    finally:
+        if not call.done():
+            call.set_result(None)
+        _ainflight.pop((loop, key), None)
+
+
+async def alead(key, generate):
+    lock_key = key + ':lock'
+    if not await cache.aadd(lock_key, 1, wait_timeout()):
+        deadline = time.monotonic() + wait_timeout()
+        while time.monotonic() < deadline and await cache.aget(lock_key) is not None:
+            await asyncio.sleep(POLL_INTERVAL)
+            value = await cache.aget(key)
+            if value is not None:
+                await sync_to_async(record_hit)(value, 'coalesced')
+                return value, 'coalesced'
+        return await arun(key, generate)
+    try:
+        return await arun(key, generate)
+    finally:
+        await cache.adelete(lock_key)
+
+
+async def arun(key, generate):
+    started = time.monotonic()
+    value = await generate()
+    return await sync_to_async(store)(key, value, time.monotonic() - started), 'miss'
+
+
+def record_hit(value, status):
+    metrics.incr('response_cache_hits' if status == 'hit' else 'response_cache_coalesced')
+    metrics.incr('response_cache_saved_ms', value.get('latency_ms', 0))
+
+
+def wait_timeout():
+    return getattr(settings, 'CHATBOT_LLM_TIMEOUT', 30) + 5
+
+
+def stats():
+    counts = metrics.get_many(
+        'response_cache_hits', 'response_cache_coalesced', 'response_cache_misses', 'response_cache_saved_ms'
+    )
+    served = counts['response_cache_hits'] + counts['response_cache_coalesced']
+    return {
+        'hits': counts['response_cache_hits'],
+        'coalesced': counts['response_cache_coalesced'],
+        'misses': counts['response_cache_misses'],
+        'hit_rate': metrics.share(served, served + counts['response_cache_misses']),
+        'saved_seconds': round(counts['response_cache_saved_ms'] / 1000, 2),
+    }
@@ -0,0 +1,177 @@
+# chatbot/services/search.py
+"""
+Natural-language property search for the chatbot.
+
+Parsed criteria (services/intent.py, or the model's extraction) compile into
+one query that also relaxes them. ``relaxations()`` lists looser and looser
+versions of the criteria; the query matches the loosest, tags each row with
+the strictest version it satisfies (``match_tier``) and counts the rows per
+tier with a window function. The best tier present is the result, so a
+search with no exact hits falls back to widened criteria without another
+round trip, and the total comes back with the rows.
+
+Messages without criteria are matched by meaning against the local vector
+index (properties/vectors.py). Until that index is built they fall back to
+ranked full-text search, with rows matching every word ahead of rows
+matching only some.
+"""
+import logging
+from dataclasses import dataclass, field
+
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When, Window
+
+from properties import vectors
+from properties.models import Property
+from properties.search import search_properties, tokenize
+
+from . import prompt
+from .intent import city_query
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 8
+RELAX_FACTOR = 0.2   # price, size and rooms are widened by this much before criteria are dropped
+
+
+@dataclass
+class SearchResult:
+    properties: list = field(default_factory=list)
+    total: int = 0                                # matches in the tier the properties come from
+    relaxed: list = field(default_factory=list)   # how the criteria were loosened, empty for exact matches
+
+
+def criteria_for_intent(intent):
+    """Search criteria of a parsed message, with every city it names"""
+    criteria = intent.criteria()
+    if len(intent.cities) > 1:
+        criteria['city'] = intent.cities
+    return criteria
+
+
+def criteria_q(criteria):
+    q = Q()
+    cities = criteria.get('city')
+    if cities:
+        any_city = Q()
+        for city in [cities] if isinstance(cities, str) else cities:
+            any_city |= city_query(city)
+        q &= any_city
+    if criteria.get('property_type'):
+        q &= Q(property_type=criteria['property_type'])
+    if criteria.get('min_rooms'):
+        q &= Q(number_of_rooms__gte=criteria['min_rooms'])
+    if criteria.get('min_price'):
+        q &= Q(price__gte=criteria['min_price'])
+    if criteria.get('max_price'):
+        q &= Q(price__lte=criteria['max_price'])
+    if criteria.get('min_size'):
+        q &= Q(size__gte=criteria['min_size'])
+    return q
+
+
+def widen(criteria):
+    widened = dict(criteria)
+    if criteria.get('min_price'):
+        widened['min_price'] = round(float(criteria['min_price']) * (1 - RELAX_FACTOR))
+    if criteria.get('max_price'):
+        widened['max_price'] = round(float(criteria['max_price']) * (1 + RELAX_FACTOR))
+    if criteria.get('min_size'):
+        widened['min_size'] = round(float(criteria['min_size']) * (1 - RELAX_FACTOR))
+    if criteria.get('min_rooms'):
+        widened['min_rooms'] = max(1, int(float(criteria['min_rooms'])) - 1)
+    return widened
+
+
+def relaxations(criteria):
+    """
+    ``(criteria, note)`` from strict to loose, each matching everything the
+    previous one does. The location is never dropped; without one the
+    property type is kept instead.
+    """
+    widened = widen(criteria)
+    steps = [(criteria, None), (widened, 'widened the price, size and rooms')]
+    if criteria.get('city'):
+        if criteria.get('property_type'):
+            steps.append(({k: v for k, v in widened.items() if k != 'property_type'}, 'included other property types'))
+        steps.append(({'city': criteria['city']}, 'kept only the location'))
+    elif criteria.get('property_type'):
+        steps.append(({'property_type': criteria['property_type']}, 'kept only the property type'))
+
+    distinct = []
+    for step, note in steps:
+        if not distinct or step != distinct[-1][0]:
+            distinct.append((step, note))
+    return distinct
+
+
+def compile_search(criteria, text='', limit=DEFAULT_LIMIT):
+    """The single query for a search and its relaxation steps"""
+    queryset = Property.objects.filter(is_available=True)
+    steps = [(criteria, None)]
+    if criteria:
+        steps = relaxations(criteria)
+        tiers = [criteria_q(step) for step, _ in steps]
+        queryset = queryset.filter(tiers[-1]).annotate(match_tier=Case(
+            *[When(tier, then=Value(i)) for i, tier in enumerate(tiers[:-1])],
+            default=Value(len(tiers) - 1),
+            output_field=IntegerField(),
+        ))
+        order = ['match_tier', '-created_at']
+    elif tokenize(text) and (hits := vectors.search(text, limit)) is not None:
+        # Semantic retrieval from the local vector index, best match first
+        queryset = queryset.filter(pk__in=[pk for pk, _ in hits]).annotate(
+            match_tier=Value(0, output_field=IntegerField()),
+            similarity_rank=Case(
+                *[When(pk=pk, then=Value(rank)) for rank, (pk, _) in enumerate(hits)],
+                output_field=IntegerField(),
+            ),
+        )
+        order = ['similarity_rank']
+    elif tokenize(text):
+        every_word = search_properties(Property.objects.order_by(), text, match_all=True).values('pk')
+        queryset = search_properties(queryset, text, match_all=False, ranked=True).annotate(
+            match_tier=Value(0, output_field=IntegerField()),
+            all_words=Case(When(pk__in=every_word, then=Value(0)), default=Value(1), output_field=IntegerField()),
+        )
+        order = ['all_words', 'search_rank', '-created_at']
+    else:
+        queryset = queryset.annotate(match_tier=Value(0, output_field=IntegerField()))
+        order = ['-created_at']
+    queryset = queryset.annotate(match_total=Window(Count('pk'), partition_by=[F('match_tier')]))
+    return queryset.order_by(*order), steps
+
+
+def collect(rows, steps):
+    if not rows:
+        return SearchResult()
+    tier = rows[0].match_tier
+    return SearchResult(
+        properties=[row for row in rows if row.match_tier == tier],
+        total=rows[0].match_total,
+        relaxed=[note for _, note in steps[1:tier + 1]],
+    )
+
+
+def search(criteria, text='', limit=DEFAULT_LIMIT, user=None):
+    """
+    Matching available properties, loaded for the prompt assembler
+    (services/prompt.py) with ``user``'s wishlist status.
+    """
+    queryset, steps = compile_search(criteria, text, limit)
+    result = collect(list(prompt.prepare(queryset[:limit], user)), steps)
+    log(criteria, text, result)
+    return result
+
+
+async def asearch(criteria, text='', limit=DEFAULT_LIMIT, user=None):
+    queryset, steps = compile_search(criteria, text, limit)
+    result = collect([row async for row in prompt.prepare(queryset[:limit], user)], steps)
+    log(criteria, text, result)
+    return result
+
+
+def log(criteria, text, result):
+    logger.info(
+        f"Property search {criteria or text!r}: {result.total} matches"
+        + (f", after the search {'; '.join(result.relaxed)}" if result.relaxed else "")
+    )
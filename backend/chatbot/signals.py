@@ -0,0 +1,42 @@
+# chatbot/signals.py
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from properties.models import Property
+from properties.signals import properties_bulk_updated
+
+from .services import response_cache
+
+
+@receiver(post_init, sender=Property)
+def remember_catalog_fields(sender, instance, **kwargs):
+    # Keep the loaded city/type so a save that moves the property also refreshes the old buckets.
+    # Runs for every loaded row, so the buckets themselves are only worked out on save.
+    values = instance.__dict__
+    instance._chat_cache_fields = (values.get('city'), values.get('property_type'))
+
+
+@receiver(post_save, sender=Property)
+def invalidate_cached_replies_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    fields = (instance.city, instance.property_type)
+    buckets = response_cache.property_buckets(*fields)
+    loaded = getattr(instance, '_chat_cache_fields', fields)
+    if loaded != fields:
+        buckets |= response_cache.property_buckets(*loaded)
+    response_cache.bump(buckets)
+    instance._chat_cache_fields = fields
+
+
+@receiver(post_delete, sender=Property)
+def invalidate_cached_replies_on_delete(sender, instance, **kwargs):
+    response_cache.bump(response_cache.property_buckets(instance.city, instance.property_type))
+
+
+@receiver(properties_bulk_updated)
+def invalidate_cached_replies_on_bulk_update(sender, queryset, **kwargs):
+    buckets = set()
+    for city, property_type in queryset.values_list('city', 'property_type').distinct():
+        buckets |= response_cache.property_buckets(city, property_type)
+    response_cache.bump(buckets)
@@ -0,0 +1,147 @@
+# chatbot/streaming.py
+"""
+Streaming variant of send_message over Server-Sent Events.
+
+POST /api/chatbot/send-message/stream/ takes the same body as send-message and
+answers with ``text/event-stream``:
+
+    event: meta   {"session_id", "properties", "properties_count"}
+    event: token  {"text"}                      one per piece of the reply
+    event: done   {"message_id", "response_time", "time_to_first_token", "cache"}
+    event: error  {"error"}                     instead of done if the model fails
+
+The view is async, so under ASGI (real_estate/asgi.py) an open stream waits on
+the event loop instead of holding a worker thread, and each token is flushed
+as soon as the model produces it. Under WSGI Django has to collect the whole
+stream before sending it.
+
+The assistant ChatMessage is saved with its response time and time to first
+token when the stream closes, also when the client disconnects mid-reply.
+"""
+import json
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework import status
+
+from real_estate.throttling import ChatRateThrottle
+
+from .async_api import async_api_view, json_response
+from .models import ChatMessage
+from .serializers import ChatRequestSerializer
+from .services import memory, response_cache
+from .views import prepare_turn
+
+logger = logging.getLogger(__name__)
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+async def start_turn(request, user, message, session_id):
+    turn = await prepare_turn(request, user, message, session_id)
+    turn['llm'] = turn['service'].llm
+    turn['plan'] = await turn['service'].stream_plan(
+        turn['message'], turn['history'], intent=turn['intent'], result=turn['result']
+    )
+    return turn
+
+
+async def finish_turn(turn, reply, response_time, time_to_first_token, complete):
+    """Save the assistant's reply; a complete opening reply also goes into the response cache."""
+    assistant_message = await ChatMessage.objects.acreate(
+        session=turn['session'],
+        role='assistant',
+        content=reply,
+        response_time=round(response_time, 3),
+        time_to_first_token=round(time_to_first_token, 3) if time_to_first_token is not None else None,
+    )
+    await turn['session'].asave()
+    if turn['summarize']:
+        await sync_to_async(memory.schedule_summary)(turn['session'].pk)
+    if complete and turn['plan']['cache_key']:
+        await sync_to_async(response_cache.store)(
+            turn['plan']['cache_key'],
+            {'response': reply, 'properties_found': turn['plan']['properties_found']},
+            response_time,
+        )
+    return assistant_message
+
+
+async def stream_turn(turn):
+    plan = turn['plan']
+    yield sse('meta', {
+        'session_id': turn['session_id'],
+        'properties': turn['properties'],
+        'properties_count': len(turn['properties']),
+    })
+
+    started = time.monotonic()
+    time_to_first_token = None
+    parts = []
+    error = None
+    complete = False
+    assistant_message = None
+    try:
+        if plan['cached'] is not None:
+            time_to_first_token = 0
+            parts.append(plan['cached']['response'])
+            yield sse('token', {'text': plan['cached']['response']})
+        else:
+            async for text in turn['llm'].astream(plan['prompt'], temperature=0.7, max_output_tokens=1000):
+                if not text:
+                    continue
+                if time_to_first_token is None:
+                    time_to_first_token = time.monotonic() - started
+                parts.append(text)
+                yield sse('token', {'text': text})
+        complete = True
+    except Exception as e:
+        logger.error(f"Streaming generation error: {str(e)}")
+        error = "Sorry, I'm having trouble responding right now. Please try again."
+    finally:
+        # Also runs when the client goes away and the server closes the generator
+        response_time = time.monotonic() - started
+        if parts:
+            assistant_message = await finish_turn(turn, ''.join(parts), response_time, time_to_first_token, complete)
+
+    if error:
+        yield sse('error', {'error': error})
+        return
+    yield sse('done', {
+        'message_id': assistant_message.id if assistant_message else None,
+        'response_time': round(response_time, 3),
+        'time_to_first_token': round(time_to_first_token, 3) if time_to_first_token is not None else None,
+        'cache': 'hit' if plan['cached'] is not None else ('miss' if plan['cache_key'] else None),
+    })
+
+
+@async_api_view(['POST'], throttle_classes=[ChatRateThrottle])
+async def send_message_stream(request):
+    """
+    Send a message to the chatbot and stream the AI response token by token
+    """
+    serializer = ChatRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        turn = await start_turn(
+            request, request.user, serializer.validated_data['message'], serializer.validated_data.get('session_id')
+        )
+    except Exception as e:
+        logger.error(f"Unexpected error in send_message_stream: {str(e)}")
+        return json_response({
+            'success': False,
+            'error': f'An unexpected error occurred: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    response = StreamingHttpResponse(stream_turn(turn), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx and similar proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,3 +1,671 @@
-from django.test import TestCase
+import asyncio
+import json
+import shutil
+import tempfile
+import threading
+import time
+import warnings
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import CacheKeyWarning, cache
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from properties import vectors
+from properties.models import Property, PropertyImage, Wishlist
+from real_estate.throttling import ChatRateThrottle
+from users.models import User
+from . import streaming, views
+from .models import ChatMessage, ChatSession
+from .services import intent, llm, memory, prompt, response_cache, search
+from .services.gemini_service import GeminiChatService
+
+STUB_BACKEND = 'chatbot.services.llm.StubBackend'
+
+
+@override_settings(CHATBOT_LLM_BACKEND=STUB_BACKEND)
+class LLMClientTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_one_backend_per_process(self):
+        seen = []
+        threads = [threading.Thread(target=lambda: seen.append(llm.get_llm())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len({id(backend) for backend in seen}), 1)
+        self.assertIs(GeminiChatService().llm, seen[0])
+
+    def test_setting_change_rebuilds_backend(self):
+        first = llm.get_llm()
+        with override_settings(CHATBOT_STUB_LATENCY=0.001):
+            self.assertIsNot(llm.get_llm(), first)
+            self.assertEqual(llm.get_llm().latency, 0.001)
+
+    @override_settings(CHATBOT_LLM_BACKEND=llm.DEFAULT_BACKEND, GEMINI_API_KEY='test-key', CHATBOT_LLM_TIMEOUT=7)
+    def test_gemini_backend_configures_once_and_passes_timeout(self):
+        with mock.patch('google.generativeai.configure') as configure, \
+                mock.patch('google.generativeai.GenerativeModel') as model_class:
+            model_class.return_value.generate_content.return_value.text = 'Hallo'
+            for _ in range(3):
+                self.assertEqual(GeminiChatService().llm.generate('Hi'), 'Hallo')
+        configure.assert_called_once_with(api_key='test-key')
+        model_class.assert_called_once()
+        call = model_class.return_value.generate_content.call_args
+        self.assertEqual(call.kwargs['request_options'], {'timeout': 7})
+
+    def test_send_message_uses_shared_backend(self):
+        user = User.objects.create_user(username='buyer')
+        client = APIClient()
+        client.force_authenticate(user)
+        for text in ('Hello', 'Anything in Berlin?'):
+            response = client.post(reverse('send-chat-message'), {'message': text}, format='json')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(llm.get_llm().calls, 2)
+        self.assertTrue(ChatMessage.objects.filter(role='assistant', content__startswith='[stub]').exists())
+
+
+class IntentParserTests(TestCase):
+    def setUp(self):
+        self.parser = intent.IntentParser(extra_cities=['Casablanca'])
+
+    def test_criteria(self):
+        cases = {
+            'apartments in Berlin under 300000': {'city': 'Berlin', 'property_type': 'apartment', 'max_price': 300000},
+            '3-Zimmer-Wohnung in München bis 450.000 €': {
+                'city': 'München', 'property_type': 'apartment', 'min_rooms': 3, 'max_price': 450000,
+            },
+            'Haus zwischen 200.000 und 350.000 Euro in Köln': {
+                'city': 'Köln', 'property_type': 'house', 'min_price': 200000, 'max_price': 350000,
+            },
+            '2 bedroom flat in munich from 200k to 300k': {
+                'city': 'München', 'property_type': 'apartment', 'min_rooms': 2, 'min_price': 200000, 'max_price': 300000,
+            },
+            'villa with at least 120 m² over 1,5 Mio': {'property_type': 'villa', 'min_size': 120, 'min_price': 1500000},
+            'drei Zimmer in Hamburg': {'city': 'Hamburg', 'min_rooms': 3},
+            'house in casablanca 200-300k': {
+                'city': 'Casablanca', 'property_type': 'house', 'min_price': 200000, 'max_price': 300000,
+            },
+        }
+        for message, expected in cases.items():
+            with self.subTest(message=message):
+                parsed = self.parser.parse(message)
+                self.assertEqual(parsed.criteria(), expected)
+                self.assertTrue(parsed.is_property_search)
+                self.assertFalse(intent.needs_llm(parsed))
+
+    def test_small_talk_is_not_a_search(self):
+        for message in ('Hello, are you working?', 'Thanks for the help!'):
+            with self.subTest(message=message):
+                self.assertFalse(self.parser.parse(message).is_property_search)
+
+    def test_ambiguous_messages_fall_back_to_the_model(self):
+        for message in ('Wohnung in Potsdam', 'houses built after 1990', 'find me a property', 'not in Berlin'):
+            with self.subTest(message=message):
+                self.assertTrue(intent.needs_llm(self.parser.parse(message)))
+
+
+@override_settings(CHATBOT_LLM_BACKEND=STUB_BACKEND)
+class IntentFallbackTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        intent.reset_parser()
+        llm.reset_llm()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='buyer'))
+
+    def send(self, message):
+        response = self.client.post(reverse('send-chat-message'), {'message': message}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_model_called_once_for_clear_messages(self):
+        self.send('apartments in Berlin under 300000')
+        self.assertEqual(llm.get_llm().calls, 1)
+        self.send('find me a property')
+        self.assertEqual(llm.get_llm().calls, 3)
+
+        admin = User.objects.create_user(username='admin', is_staff=True)
+        self.client.force_authenticate(admin)
+        stats = self.client.get(reverse('chatbot-metrics')).json()['intent']
+        self.assertEqual(stats, {
+            'messages': 2, 'llm_extractions': 1, 'served_without_llm': 1, 'share_without_llm': 0.5,
+        })
+
+
+@override_settings(CHATBOT_LLM_BACKEND=STUB_BACKEND, CHATBOT_RESPONSE_CACHE_TTL=600)
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        intent.reset_parser()
+        llm.reset_llm()
+        self.seller = User.objects.create_user(username='seller', role='seller')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='buyer'))
+
+    def add_property(self, city):
+        return Property.objects.create(
+            seller=self.seller, name=f'Flat in {city}', description='Bright', address='Main Street 1', city=city,
+            price=Decimal('250000'), number_of_rooms=2, size=Decimal('60'), property_type='apartment',
+        )
+
+    def ask(self, message):
+        # Every request opens a new session, so each question is an opening message
+        response = self.client.post(reverse('send-chat-message'), {'message': message}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['performance']['cache']
+
+    def test_repeated_question_is_served_from_cache(self):
+        self.assertEqual(self.ask('apartments in Berlin under 300000'), 'miss')
+        self.assertEqual(self.ask('Apartments in berlin under 300.000!'), 'hit')
+        self.assertEqual(llm.get_llm().calls, 1)
+
+    def test_only_matching_property_changes_invalidate(self):
+        self.ask('apartments in Berlin under 300000')
+        self.add_property('Hamburg')
+        self.assertEqual(self.ask('apartments in Berlin under 300000'), 'hit')
+        flat = self.add_property('Berlin')
+        self.assertEqual(self.ask('apartments in Berlin under 300000'), 'miss')
+
+        # Moving a property out of Berlin also refreshes the Berlin replies
+        flat = Property.objects.get(pk=flat.pk)
+        flat.city = 'Leipzig'
+        flat.save()
+        self.assertEqual(self.ask('apartments in Berlin under 300000'), 'miss')
+
+    def test_loading_properties_does_not_work_out_buckets(self):
+        self.add_property('Berlin')
+        with mock.patch.object(response_cache, 'property_buckets', wraps=response_cache.property_buckets) as buckets:
+            list(Property.objects.all())
+            self.assertEqual(buckets.call_count, 0)
+            Property.objects.get().save()
+            self.assertEqual(buckets.call_count, 1)
+
+    def test_alias_spellings_and_districts_invalidate_the_canonical_city(self):
+        question = 'apartments in Munich under 300000'
+        self.ask(question)
+        self.add_property('München')
+        self.assertEqual(self.ask(question), 'miss')
+        self.add_property('MUENCHEN')
+        self.assertEqual(self.ask(question), 'miss')
+
+        self.ask('apartments in Berlin under 300000')
+        self.add_property('Berlin Mitte')
+        self.assertEqual(self.ask('apartments in Berlin under 300000'), 'miss')
+        self.assertEqual(self.ask(question), 'hit')
+
+    def test_catalog_versions_are_shared_database_rows(self):
+        berlin = response_cache.catalog_version('city:berlin')
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', CacheKeyWarning)
+            self.add_property('Berlin Mitte')
+        # Another worker's cache knows nothing of the bump; the versions don't live there
+        cache.clear()
+        self.assertEqual(response_cache.catalog_version('city:berlin'), berlin + 1)
+        self.assertEqual(response_cache.catalog_version('city:berlin mitte'), 1)
+
+    def test_bulk_update_invalidates(self):
+        flat = self.add_property('Berlin')
+        self.ask('apartments in Berlin under 300000')
+        admin = User.objects.create_user(username='admin', is_staff=True)
+        self.client.force_authenticate(admin)
+        self.client.post(reverse('admin-bulk-property-action'), {'property_ids': [flat.id], 'action': 'deactivate'},
+                         format='json')
+        self.assertEqual(self.ask('apartments in Berlin under 300000'), 'miss')
+
+    def test_concurrent_identical_questions_share_one_call(self):
+        calls = []
+
+        def generate():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'response': 'Hallo', 'properties_found': False}
+
+        statuses = []
+        threads = [
+            threading.Thread(target=lambda: statuses.append(response_cache.get_or_generate('k', generate)[1]))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(statuses), ['coalesced'] * 4 + ['miss'])
+
+        stats = response_cache.stats()
+        self.assertEqual((stats['misses'], stats['coalesced'], stats['hit_rate']), (1, 4, 0.8))
+        self.assertGreaterEqual(stats['saved_seconds'], 0.8)
+
+
+@override_settings(CHATBOT_LLM_BACKEND=STUB_BACKEND, CHATBOT_RESPONSE_CACHE_TTL=0, CHATBOT_STUB_LATENCY=0.3)
+class AsyncChatViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        intent.reset_parser()
+        llm.reset_llm()
+        self.user = User.objects.create_user(username='buyer')
+        self.headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+
+    async def send(self, message, session_id=''):
+        response = await self.async_client.post(
+            reverse('send-chat-message'), {'message': message, 'session_id': session_id},
+            content_type='application/json', headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    async def test_concurrent_messages_wait_on_the_model_together(self):
+        started = time.monotonic()
+        replies = await asyncio.gather(*(self.send(f'Hello number {i}') for i in range(10)))
+        elapsed = time.monotonic() - started
+
+        # Ten 0.3s model calls overlap instead of queueing behind each other
+        self.assertEqual(llm.get_llm().peak, 10)
+        self.assertLess(elapsed, 1.5)
+        self.assertTrue(all(reply['success'] for reply in replies))
+        self.assertEqual(await ChatMessage.objects.filter(role='assistant', response_time__gte=0.3).acount(), 10)
+
+    async def test_history_and_sessions(self):
+        reply = await self.send('Hello')
+        await self.send('Anything in Berlin?', reply['session_id'])
+
+        response = await self.async_client.get(
+            reverse('get-chat-history', args=[reply['session_id']]), headers=self.headers
+        )
+        self.assertEqual([message['role'] for message in response.json()['messages']], ['user', 'assistant'] * 2)
+
+        response = await self.async_client.get(reverse('list-chat-sessions'), headers=self.headers)
+        self.assertEqual(response.json()['total_sessions'], 1)
+        self.assertEqual(response.json()['sessions'][0]['message_count'], 4)
+
+        response = await self.async_client.get(reverse('get-chat-history', args=['missing']), headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_messages_are_throttled_per_user(self):
+        with mock.patch.object(ChatRateThrottle, 'THROTTLE_RATES', {'chat': '2/min'}):
+            for _ in range(2):
+                response = await self.async_client.post(
+                    reverse('send-chat-message'), {'message': 'Hello'},
+                    content_type='application/json', headers=self.headers,
+                )
+                self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['RateLimit-Remaining'], '0')
+            self.assertEqual(response['RateLimit-Policy'], '2;w=60')
+            response = await self.async_client.get(reverse('rate-limit-status'), headers=self.headers)
+            self.assertEqual(response.json()['rate_limits']['remaining_requests'], 0)
+
+            response = await self.async_client.post(
+                reverse('send-chat-message-stream'), {'message': 'Hello'},
+                content_type='application/json', headers=self.headers,
+            )
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(llm.get_llm().calls, 2)
+
+    async def test_malformed_body_is_a_bad_request(self):
+        for name in ('send-chat-message', 'send-chat-message-stream'):
+            response = await self.async_client.post(
+                reverse(name), '{"message": ', content_type='application/json', headers=self.headers,
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('JSON parse error', response.json()['detail'])
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.get(reverse('list-chat-sessions'))
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Bearer', response['WWW-Authenticate'])
+
+        response = await self.async_client.get(reverse('send-chat-message'), headers=self.headers)
+        self.assertEqual(response.status_code, 405)
+
+
+@override_settings(CHATBOT_LLM_BACKEND=STUB_BACKEND, CHATBOT_RESPONSE_CACHE_TTL=600)
+class StreamingChatTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        intent.reset_parser()
+        llm.reset_llm()
+        self.user = User.objects.create_user(username='buyer')
+        token = RefreshToken.for_user(self.user).access_token
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    async def stream(self, message, session_id=''):
+        response = await self.async_client.post(
+            reverse('send-chat-message-stream'), {'message': message, 'session_id': session_id},
+            content_type='application/json', headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        events = []
+        for block in body.strip().split('\n\n'):
+            event, data = block.split('\n')
+            events.append((event.removeprefix('event: '), json.loads(data.removeprefix('data: '))))
+        return events
+
+    async def test_tokens_are_streamed_and_reply_saved(self):
+        events = await self.stream('Hello there')
+        kinds = [event for event, _ in events]
+        self.assertEqual(kinds[0], 'meta')
+        self.assertEqual(kinds[-1], 'done')
+        self.assertGreater(kinds.count('token'), 1)
+
+        reply = ''.join(data['text'] for event, data in events if event == 'token')
+        done = events[-1][1]
+        message = await ChatMessage.objects.aget(pk=done['message_id'])
+        self.assertEqual(message.role, 'assistant')
+        self.assertEqual(message.content, reply)
+        self.assertIsNotNone(message.response_time)
+        self.assertLessEqual(message.time_to_first_token, message.response_time)
+        self.assertEqual(await ChatMessage.objects.filter(session__session_id=events[0][1]['session_id']).acount(), 2)
+
+    async def test_repeated_opening_question_is_served_from_cache(self):
+        first = await self.stream('apartments in Berlin under 300000')
+        second = await self.stream('Apartments in berlin under 300.000!')
+        self.assertEqual(first[-1][1]['cache'], 'miss')
+        self.assertEqual(second[-1][1]['cache'], 'hit')
+        self.assertEqual(llm.get_llm().calls, 1)
+
+    async def test_reply_saved_when_client_disconnects(self):
+        request = RequestFactory().post('/')
+        turn = await streaming.start_turn(request, self.user, 'Hello there', '')
+        events = streaming.stream_turn(turn)
+        await anext(events)   # meta
+        first_token = await anext(events)
+        await events.aclose()
+
+        message = await ChatMessage.objects.aget(session=turn['session'], role='assistant')
+        self.assertEqual(message.content, json.loads(first_token.split('data: ')[1])['text'])
+        self.assertIsNotNone(message.time_to_first_token)
+
+    async def test_malformed_body_is_a_bad_request(self):
+        for name in ('send-chat-message', 'send-chat-message-stream'):
+            response = await self.async_client.post(
+                reverse(name), '{"message": ', content_type='application/json', headers=self.headers,
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('JSON parse error', response.json()['detail'])
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.post(
+            reverse('send-chat-message-stream'), {'message': 'Hi'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(CHATBOT_LLM_BACKEND=llm.DEFAULT_BACKEND, GEMINI_API_KEY='test-key')
+    async def test_gemini_backend_streams_chunks(self):
+        async def chunks():
+            for text in ('Hal', 'lo'):
+                yield mock.Mock(parts=[text], text=text)
+
+        with mock.patch('google.generativeai.configure'), \
+                mock.patch('google.generativeai.GenerativeModel') as model_class:
+            model_class.return_value.generate_content_async = mock.AsyncMock(return_value=chunks())
+            backend = llm.get_llm()
+            self.assertEqual([text async for text in backend.astream('Hi')], ['Hal', 'lo'])
+        self.assertTrue(model_class.return_value.generate_content_async.call_args.kwargs['stream'])
+
+
+class PromptAssemblyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        intent.reset_parser()
+        self.seller = User.objects.create_user(username='seller', role='seller')
+        self.buyer = User.objects.create_user(username='buyer')
+        self.request = RequestFactory().get('/')
+        self.request.user = self.buyer
+
+    def add_properties(self, count):
+        for i in range(count):
+            prop = Property.objects.create(
+                seller=self.seller, name=f'Flat {Property.objects.count()}', description='Bright flat ' * 20,
+                address='Hauptstraße 1', city='Berlin', property_type='apartment',
+                price=Decimal('250000'), number_of_rooms=2, size=Decimal('60'),
+            )
+            PropertyImage.objects.create(property=prop, image=f'flat-{prop.pk}-a.jpg', is_primary=True)
+            PropertyImage.objects.create(property=prop, image=f'flat-{prop.pk}-b.jpg')
+        Wishlist.objects.create(user=self.buyer, property=prop)
+
+    def assemble(self):
+        properties = prompt.load(Property.objects.order_by('pk'), self.buyer)
+        return prompt.property_context(properties), prompt.property_cards(properties, self.request)
+
+    def test_context_and_cards_from_the_same_rows(self):
+        self.add_properties(2)
+        context, cards = self.assemble()
+        self.assertTrue(context.startswith('Found 2 properties:'))
+        self.assertIn('1. **Flat 0**', context)
+        self.assertIn('250,000 €', context)
+        self.assertIn('📷 [Image available]', context)
+        self.assertIn('Bright flat Bright', context)
+        self.assertNotIn('Bright flat ' * 20, context)
+
+        self.assertEqual([card['name'] for card in cards], ['Flat 0', 'Flat 1'])
+        self.assertEqual(cards[0]['seller_name'], 'seller')
+        self.assertEqual(cards[0]['property_type_display'], 'Apartment')
+        self.assertEqual([card['in_wishlist'] for card in cards], [False, True])
+        self.assertTrue(cards[0]['image']['image'].endswith('flat-1-a.jpg'))
+        self.assertIn('srcset', cards[0]['image'])
+
+    def test_constant_queries(self):
+        # Properties, primary images and nothing per property
+        self.add_properties(1)
+        with self.assertNumQueries(2):
+            self.assemble()
+        self.add_properties(9)
+        with self.assertNumQueries(2):
+            context, cards = self.assemble()
+        self.assertEqual(len(cards), 10)
+
+    def test_chat_search_and_service_prompt_use_constant_queries(self):
+        self.add_properties(1)
+        service = GeminiChatService(llm=llm.StubBackend())
+        criteria = {'city': 'Berlin'}
+        with self.assertNumQueries(2):
+            service.format_properties_for_ai(service.search_properties(criteria).properties)
+        views.search_for_message(self.request, self.buyer, 'flats in Berlin')
+        with CaptureQueriesContext(connection) as one:
+            views.search_for_message(self.request, self.buyer, 'flats in Berlin')
+        self.add_properties(7)
+        with self.assertNumQueries(2):
+            service.format_properties_for_ai(service.search_properties(criteria).properties)
+        with self.assertNumQueries(len(one)):
+            intent_, result, cards = views.search_for_message(self.request, self.buyer, 'flats in Berlin')
+        self.assertEqual(len(cards), 8)
+        self.assertEqual([prop.name for prop in result.properties], [card['name'] for card in cards])
+
+    @override_settings(CHATBOT_LLM_BACKEND=STUB_BACKEND)
+    def test_chat_turn_prompts_with_the_cards_it_returns(self):
+        self.add_properties(10)
+        llm.reset_llm()
+        prompts = []
+        reply = llm.StubBackend.reply
+
+        def recording_reply(backend, prompt, max_output_tokens):
+            prompts.append(prompt)
+            return reply(backend, prompt, max_output_tokens)
+
+        headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.buyer).access_token}'}
+        with mock.patch.object(llm.StubBackend, 'reply', recording_reply), \
+                mock.patch.object(search, 'search', wraps=search.search) as sync_search, \
+                mock.patch.object(search, 'asearch', wraps=search.asearch) as async_search:
+            response = self.client.post(
+                reverse('send-chat-message'), {'message': 'flats in Berlin'},
+                content_type='application/json', headers=headers,
+            )
+        cards = response.json()['properties']
+
+        # One catalog search per turn, and its results are what the model describes
+        self.assertEqual(sync_search.call_count + async_search.call_count, 1)
+        self.assertEqual(len(prompts), 1)
+        self.assertEqual(prompts[0].count('Found '), 1)
+        self.assertIn(f'Found 10 properties, showing the first {len(cards)}:', prompts[0])
+        for card in cards:
+            self.assertIn(f"**{card['name']}**", prompts[0])
+        self.assertTrue(prompts[0].endswith('User: flats in Berlin\nEstateAI:'))
+
+    def test_no_results(self):
+        self.assertEqual(prompt.property_context([]), prompt.NO_RESULTS)
+        self.assertEqual(prompt.property_cards([]), [])
+
+
+@override_settings(
+    CHATBOT_LLM_BACKEND=STUB_BACKEND, CHATBOT_SUMMARY_EAGER=True,
+    CHATBOT_HISTORY_TOKENS=100, CHATBOT_HISTORY_MESSAGE_TOKENS=40, CHATBOT_SUMMARY_TOKENS=50,
+)
+class ConversationMemoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        intent.reset_parser()
+        llm.reset_llm()
+        self.user = User.objects.create_user(username='buyer')
+        self.headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+
+    def test_window_clips_messages_and_keeps_the_newest_within_budget(self):
+        messages = [ChatMessage(role='user', content=f'{i} ' + 'words ' * 100) for i in range(5)]
+        recent, left_out = memory.window(messages)
+        self.assertEqual(left_out, 3)
+        self.assertEqual([msg['content'][:2] for msg in recent], ['3 ', '4 '])
+        self.assertTrue(all(memory.estimate_tokens(msg['content']) <= 40 for msg in recent))
+
+        recent, left_out = memory.window([ChatMessage(role='user', content='x' * 1000)])
+        self.assertEqual((len(recent), left_out), (1, 0))
+
+    async def test_long_session_keeps_prompt_size_bounded(self):
+        prompts = []
+        reply = llm.StubBackend.reply
+
+        def recording_reply(backend, prompt, max_output_tokens):
+            prompts.append(prompt)
+            return reply(backend, prompt, max_output_tokens)
+
+        session_id = ''
+        with mock.patch.object(llm.StubBackend, 'reply', recording_reply):
+            for i in range(12):
+                response = await self.async_client.post(
+                    reverse('send-chat-message'),
+                    {'message': f'Question {i}: ' + 'tell me more about the neighbourhood ' * 10, 'session_id': session_id},
+                    content_type='application/json', headers=self.headers,
+                )
+                session_id = response.json()['session_id']
+
+        session = await ChatSession.objects.aget(session_id=session_id)
+        self.assertTrue(session.summary)
+        self.assertGreater(session.summarized_until, 0)
+        answers = [prompt for prompt in prompts if prompt.rstrip().endswith('EstateAI:')]
+        summaries = [prompt for prompt in prompts if prompt.rstrip().endswith('Updated summary:')]
+        self.assertEqual(len(answers), 12)
+        self.assertTrue(summaries)
+        self.assertIn('Summary of the earlier conversation:', answers[-1])
+        # The window and the summary are capped, so late prompts stop growing
+        self.assertLessEqual(len(answers[-1]) - len(answers[5]), 4 * 50)
+        self.assertNotIn('Question 0:', answers[-1])
+
+    def test_summary_is_not_overwritten_by_a_stale_worker(self):
+        session = ChatSession.objects.create(user=self.user, session_id='memory')
+        for i in range(6):
+            ChatMessage.objects.create(session=session, role='user', content='words ' * 100)
+
+        def other_worker_finishes_first(*args, **kwargs):
+            ChatSession.objects.filter(pk=session.pk).update(summary='newer', summarized_until=1)
+            return 'stale'
+
+        with mock.patch.object(llm.StubBackend, 'generate', side_effect=other_worker_finishes_first):
+            self.assertFalse(memory.summarize(session.pk))
+        session.refresh_from_db()
+        self.assertEqual(session.summary, 'newer')
+
+
+class PropertySearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        intent.reset_parser()
+        self.seller = User.objects.create_user(username='seller', role='seller')
+
+    def add(self, name, city='Berlin', property_type='apartment', price=250000, rooms=2, size=60, description=''):
+        return Property.objects.create(
+            seller=self.seller, name=name, description=description, address='Hauptstraße 1', city=city,
+            property_type=property_type, price=Decimal(price), number_of_rooms=rooms, size=Decimal(size),
+        )
+
+    def test_exact_matches_with_total_in_one_query(self):
+        for i in range(12):
+            self.add(f'Flat {i}')
+        self.add('Too expensive', price=900000)
+        self.add('Elsewhere', city='Hamburg')
+        # One query for the matches and their total, one for the primary images
+        with self.assertNumQueries(2):
+            result = search.search({'city': 'Berlin', 'max_price': 300000})
+        self.assertEqual(result.total, 12)
+        self.assertEqual(len(result.properties), search.DEFAULT_LIMIT)
+        self.assertEqual(result.relaxed, [])
+        self.assertEqual(result.properties[0].name, 'Flat 11')
+
+    def test_relaxes_step_by_step_without_extra_queries(self):
+        criteria = {'city': 'Berlin', 'property_type': 'apartment', 'max_price': 200000, 'min_rooms': 3}
+        self.add('Other city', city='Hamburg', price=150000, rooms=3)
+        with self.assertNumQueries(1):
+            self.assertEqual(search.search(criteria).properties, [])
+
+        self.add('Berlin house', property_type='house', price=900000, rooms=5)
+        with self.assertNumQueries(2):
+            result = search.search(criteria)
+        self.assertEqual([p.name for p in result.properties], ['Berlin house'])
+        self.assertEqual(result.relaxed[-1], 'kept only the location')
+
+        self.add('Berlin villa', property_type='villa', price=230000, rooms=3)
+        result = search.search(criteria)
+        self.assertEqual([p.name for p in result.properties], ['Berlin villa'])
+        self.assertEqual(result.relaxed, ['widened the price, size and rooms', 'included other property types'])
+
+        self.add('Nearly', price=235000, rooms=2)
+        result = search.search(criteria)
+        self.assertEqual([p.name for p in result.properties], ['Nearly'])
+        self.assertEqual(result.relaxed, ['widened the price, size and rooms'])
+
+        self.add('Exact', price=190000, rooms=3)
+        result = search.search(criteria)
+        self.assertEqual(([p.name for p in result.properties], result.total, result.relaxed), (['Exact'], 1, []))
+
+    def test_chat_message_search(self):
+        self.add('Berlin flat')
+        self.add('Hamburg flat', city='Hamburg')
+        self.add('Köln flat', city='Köln')
+        self.add('Garden house', city='Köln', property_type='house', description='Quiet house with a big garden')
+        self.add('Garden view', city='Köln', property_type='house', description='Overlooks the park')
+
+        result = views.search_properties_by_query('apartments in Berlin or Hamburg')
+        self.assertEqual(sorted(p.name for p in result.properties), ['Berlin flat', 'Hamburg flat'])
+
+        # No criteria: ranked keyword search, every word matching first
+        result = views.search_properties_by_query('big garden')
+        self.assertEqual([p.name for p in result.properties], ['Garden house', 'Garden view'])
+        self.assertEqual(result.total, 2)
+
+        views.search_properties_by_query('apartments in Berlin')
+        with self.assertNumQueries(2):
+            views.search_properties_by_query('apartments in Berlin')
+
+    def test_messages_without_criteria_use_the_vector_index(self):
+        home = self.add('Sunny family house', property_type='house', description='Sunny house for families by the green')
+        self.add('Office floor', property_type='commercial', description='Open-plan office with parking')
+        message = 'bright family home near a park'
+
+        index_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, index_dir, True)
+        with override_settings(PROPERTY_VECTOR_INDEX_DIR=index_dir):
+            vectors.rebuild_index()
+            intent.parse_intent(message)   # loads the catalog cities once
+            with self.assertNumQueries(2):
+                result = views.search_properties_by_query(message)
+            self.assertEqual(result.properties, [home])
+            result = GeminiChatService(llm=llm.StubBackend()).search_properties({}, message)
+            self.assertEqual(result.properties, [home])
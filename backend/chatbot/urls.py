@@ -1,6 +1,6 @@
 # chatbot/urls.py
 from django.urls import path
-from . import views
+from . import streaming, views
 
 # URL patterns for the chatbot application
 # Each path maps a URL endpoint to a specific view function
@@ -8,9 +8,15 @@ urlpatterns = [
     # Send a message to the AI assistant and get a response
     path('send-message/', views.send_message, name='send-chat-message'),
     
+    # Same as send-message, but the reply is streamed as Server-Sent Events (serve via real_estate/asgi.py)
+    path('send-message/stream/', streaming.send_message_stream, name='send-chat-message-stream'),
+    
     # Check the current rate limit status for the user
     path('rate-limit-status/', views.get_rate_limit_status, name='rate-limit-status'),
     
+    # Admin metrics: share of messages answered without the criteria-extraction call
+    path('metrics/', views.chatbot_metrics, name='chatbot-metrics'),
+    
     # Test endpoint to verify Gemini API connectivity (for debugging/administration)
     path('test-gemini/', views.test_gemini, name='test-gemini'),
     
@@ -0,0 +1,96 @@
+# dashboard/analytics.py
+"""
+One place that computes the numbers shown on the admin dashboard and in its
+PDF/Excel exports. The snapshot is cached for a short time so opening the
+dashboard and then exporting both formats only computes it once.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from properties.models import Property
+from users.models import User
+from . import rollups
+
+CACHE_KEY = 'dashboard:analytics_snapshot'
+
+# The exports show longer lists than the dashboard; compute the longest once and slice
+RECENT_PROPERTIES_LIMIT = 50
+MOST_WISHLISTED_LIMIT = 20
+RECENT_USERS_LIMIT = 50
+TOP_CITIES_LIMIT = 10
+
+
+def snapshot_ttl():
+    return getattr(settings, 'DASHBOARD_SNAPSHOT_TTL', 60)
+
+
+class AnalyticsSnapshot:
+    """Point-in-time dashboard statistics shared by the dashboard page, its API and the exports."""
+
+    def __init__(self):
+        self.generated_at = timezone.now()
+
+        # Users by role and seller verifications, one grouped row set each
+        role_counts = rollups.counts('users.role')
+        verification_counts = rollups.counts('verifications.status')
+        self.total_users = sum(role_counts.values())
+        self.total_buyers = role_counts.get(User.Role.BUYER, 0)
+        self.total_sellers = role_counts.get(User.Role.SELLER, 0)
+        self.total_admins = role_counts.get(User.Role.ADMIN, 0)
+        self.verified_sellers = verification_counts.get('approved', 0)
+        self.pending_verifications = verification_counts.get('pending', 0)
+        self.unsubmitted_sellers = max(0, self.total_sellers - (self.verified_sellers + self.pending_verifications))
+
+        # Property distributions, largest first
+        type_totals = rollups.totals('properties.type')
+        self.property_types = sorted(
+            ((label, row.count) for label, row in type_totals.items() if row.count > 0),
+            key=lambda item: item[1], reverse=True,
+        )
+        self.total_properties = sum(count for _, count in self.property_types)
+        self.cities = rollups.top('properties.city', TOP_CITIES_LIMIT)
+        self.rooms = sorted(
+            (int(rooms), count) for rooms, count in rollups.counts('properties.rooms').items() if count > 0
+        )
+        self.total_wishlists = rollups.total_count('wishlists.total')
+
+        # Sums come from the per-type totals; min and max can't, so they are read off the price index
+        price_totals = rollups.combine(type_totals.values())
+        min_price, max_price = rollups.price_range()
+        self.price_stats = {
+            'avg_price': rollups.averages(price_totals)['avg_price'],
+            'max_price': max_price,
+            'min_price': min_price,
+            'total_value': float(price_totals.price_sum),
+        }
+
+        week_ago = self.generated_at - timedelta(days=7)
+        self.new_users_week = rollups.count_since('users.joined', week_ago)
+        self.new_properties_week = rollups.count_since('properties.created', week_ago)
+
+        self.recent_properties = list(
+            Property.objects.select_related('seller').order_by('-created_at')[:RECENT_PROPERTIES_LIMIT]
+        )
+        wishlist_counts = rollups.wishlist_counts([prop.id for prop in self.recent_properties])
+        for prop in self.recent_properties:
+            prop.wishlist_count = wishlist_counts.get(prop.id, 0)
+        self.most_wishlisted = rollups.top_wishlisted_properties(MOST_WISHLISTED_LIMIT)
+        self.recent_users = list(
+            User.objects.select_related('seller_verification').order_by('-date_joined')[:RECENT_USERS_LIMIT]
+        )
+
+
+def get_snapshot(refresh=False):
+    """Return the cached AnalyticsSnapshot, computing it if missing, expired or ``refresh`` is set."""
+    snapshot = None if refresh else cache.get(CACHE_KEY)
+    if snapshot is None:
+        snapshot = AnalyticsSnapshot()
+        cache.set(CACHE_KEY, snapshot, snapshot_ttl())
+    return snapshot
+
+
+def clear_snapshot():
+    cache.delete(CACHE_KEY)
@@ -0,0 +1,386 @@
+# dashboard/exports.py
+"""
+File writers for the dashboard exports. Both take an AnalyticsSnapshot and a
+destination path and stream the document to disk instead of building it in
+memory; dashboard/jobs.py runs them in the background.
+"""
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.utils import get_column_letter
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+PDF_CONTENT_TYPE = 'application/pdf'
+EXCEL_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def export_filename(kind, when):
+    when = timezone.localtime(when).strftime('%Y%m%d_%H%M')
+    if kind == 'pdf':
+        return f"RealEstate_Dashboard_Report_{when}.pdf"
+    return f"RealEstate_Analytics_Export_{when}.xlsx"
+
+
+# ------------------- PDF -------------------
+
+def write_pdf(snapshot, path):
+    """Write the dashboard PDF report for ``snapshot`` to ``path``."""
+    doc = SimpleDocTemplate(
+        path,
+        pagesize=A4,
+        rightMargin=40,
+        leftMargin=40,
+        topMargin=40,
+        bottomMargin=40
+    )
+
+    elements = []
+    styles = getSampleStyleSheet()
+
+    # Professional Header
+    title = Paragraph("REAL ESTATE ANALYTICS REPORT", styles['Title'])
+    elements.append(title)
+
+    # Report metadata
+    date_str = Paragraph(f"Generated on: {timezone.localtime(snapshot.generated_at).strftime('%B %d, %Y at %H:%M')}", styles['Normal'])
+    elements.append(date_str)
+    elements.append(Spacer(1, 25))
+
+    # Get comprehensive data
+    total_users = snapshot.total_users
+    total_buyers = snapshot.total_buyers
+    total_sellers = snapshot.total_sellers
+    total_properties = snapshot.total_properties
+    total_wishlists = snapshot.total_wishlists
+    price_stats = snapshot.price_stats
+    verified_sellers = snapshot.verified_sellers
+    pending_verifications = snapshot.pending_verifications
+    property_types = snapshot.property_types
+    new_users_week = snapshot.new_users_week
+    new_properties_week = snapshot.new_properties_week
+
+    # EXECUTIVE SUMMARY SECTION
+    elements.append(Paragraph("EXECUTIVE SUMMARY", styles['Heading2']))
+
+    summary_data = [
+        ['PLATFORM OVERVIEW', 'STATISTICS'],
+        ['Total Users', f"{total_users:,}"],
+        ['Active Buyers', f"{total_buyers:,}"],
+        ['Verified Sellers', f"{verified_sellers:,}"],
+        ['Total Properties', f"{total_properties:,}"],
+        ['Wishlist Engagements', f"{total_wishlists:,}"],
+        ['New Users (7 days)', f"{new_users_week:,}"],
+        ['New Properties (7 days)', f"{new_properties_week:,}"],
+    ]
+
+    summary_table = Table(summary_data, colWidths=[200, 100])
+    summary_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3b82f6')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f8fafc')),
+        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb')),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8fafc')]),
+    ]))
+    elements.append(summary_table)
+    elements.append(Spacer(1, 20))
+
+    # PRICE ANALYTICS SECTION
+    elements.append(Paragraph("PRICE ANALYTICS", styles['Heading2']))
+
+    price_data = [
+        ['PRICE METRIC', 'AMOUNT (euros)'],
+        ['Average Property Price', f"{price_stats['avg_price'] or 0:,.2f}"],
+        ['Most Expensive Property', f"{price_stats['max_price'] or 0:,.2f}"],
+        ['Most Affordable Property', f"{price_stats['min_price'] or 0:,.2f}"],
+    ]
+
+    price_table = Table(price_data, colWidths=[180, 120])
+    price_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#10b981')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f0fdf4')),
+        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#d1fae5')),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+    ]))
+    elements.append(price_table)
+    elements.append(Spacer(1, 20))
+
+    # PROPERTY TYPE BREAKDOWN SECTION
+    elements.append(Paragraph("PROPERTY TYPE DISTRIBUTION", styles['Heading2']))
+
+    if property_types:
+        property_type_data = [['PROPERTY TYPE', 'COUNT', 'PERCENTAGE']]
+        total_props = sum(count for _, count in property_types)
+
+        for property_type, count in property_types:
+            percentage = (count / total_props * 100) if total_props > 0 else 0
+            property_type_data.append([
+                property_type.title(),
+                str(count),
+                f"{percentage:.1f}%"
+            ])
+
+        property_type_table = Table(property_type_data, colWidths=[120, 60, 80])
+        property_type_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#8b5cf6')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#faf5ff')),
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#ddd6fe')),
+            ('FONTSIZE', (0, 1), (-1, -1), 9),
+        ]))
+        elements.append(property_type_table)
+    else:
+        elements.append(Paragraph("No property type data available", styles['Normal']))
+
+    elements.append(Spacer(1, 20))
+
+    # RECENT PROPERTIES SECTION
+    elements.append(Paragraph("RECENT PROPERTY LISTINGS", styles['Heading2']))
+
+    recent_properties = snapshot.recent_properties[:15]
+
+    if recent_properties:
+        property_data = [['PROPERTY', 'CITY', 'PRICE (euros)', 'TYPE', 'ROOMS', 'WISHLISTS']]
+
+        for prop in recent_properties:
+            property_data.append([
+                prop.name[:20] + '...' if len(prop.name) > 20 else prop.name,
+                prop.city[:12] if prop.city else 'N/A',
+                f"{prop.price:,.2f}",
+                prop.property_type[:8].title(),
+                str(prop.number_of_rooms),
+                str(prop.wishlist_count)
+            ])
+
+        property_table = Table(property_data, colWidths=[100, 60, 70, 50, 40, 50])
+        property_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f59e0b')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 9),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#fffbeb')),
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#fed7aa')),
+            ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#fffbeb')]),
+        ]))
+        elements.append(property_table)
+    else:
+        elements.append(Paragraph("No recent properties available", styles['Normal']))
+
+    elements.append(Spacer(1, 20))
+
+    # SELLER VERIFICATION STATUS
+    elements.append(Paragraph("SELLER VERIFICATION STATUS", styles['Heading2']))
+
+    verification_data = [
+        ['STATUS', 'COUNT'],
+        ['Verified Sellers', str(verified_sellers)],
+        ['Pending Verification', str(pending_verifications)],
+        ['Total Sellers', str(total_sellers)],
+    ]
+
+    verification_table = Table(verification_data, colWidths=[150, 80])
+    verification_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#ef4444')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#fef2f2')),
+        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#fecaca')),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+    ]))
+    elements.append(verification_table)
+
+    # FOOTER
+    elements.append(Spacer(1, 30))
+    elements.append(Paragraph("--- End of Report ---", styles['Normal']))
+    elements.append(Paragraph("Confidential Business Document - For Internal Use Only", styles['Normal']))
+
+    doc.build(elements)
+
+
+# ------------------- EXCEL -------------------
+
+HEADER_FONT = Font(bold=True, color="FFFFFF", size=12)
+TITLE_FONT = Font(bold=True, size=14, color="2c5a77")
+SUBHEADER_FONT = Font(bold=True, color="2c5a77", size=11)
+SUBHEADER_FILL = PatternFill(start_color="e3f2fd", end_color="e3f2fd", fill_type="solid")
+BORDER = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+CENTER = Alignment(horizontal='center', vertical='center')
+MONEY_FORMAT = '#,##0.00'
+
+
+class SheetWriter:
+    """
+    Appends styled rows to a write-only worksheet. Write-only sheets can't be
+    revisited, so column widths are fixed up front rather than measured
+    afterwards by walking every cell.
+    """
+
+    def __init__(self, workbook, title, widths):
+        self.ws = workbook.create_sheet(title)
+        for index, width in enumerate(widths, start=1):
+            self.ws.column_dimensions[get_column_letter(index)].width = width
+
+    def cell(self, value, font=None, fill=None, border=None, alignment=None, number_format=None):
+        cell = WriteOnlyCell(self.ws, value=value)
+        if font:
+            cell.font = font
+        if fill:
+            cell.fill = fill
+        if border:
+            cell.border = border
+        if alignment:
+            cell.alignment = alignment
+        if number_format:
+            cell.number_format = number_format
+        return cell
+
+    def title(self, text):
+        self.ws.append([self.cell(text, font=TITLE_FONT)])
+
+    def note(self, text):
+        self.ws.append([self.cell(text, font=Font(size=10, italic=True))])
+
+    def section(self, text):
+        self.ws.append([])
+        self.ws.append([self.cell(text, font=SUBHEADER_FONT, fill=SUBHEADER_FILL)])
+
+    def header(self, values, color):
+        fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
+        self.ws.append([
+            self.cell(value, font=HEADER_FONT, fill=fill, border=BORDER, alignment=CENTER) for value in values
+        ])
+
+    def row(self, values, money_columns=(), align=True):
+        self.ws.append([
+            self.cell(
+                value,
+                border=BORDER,
+                alignment=CENTER if align else None,
+                number_format=MONEY_FORMAT if index in money_columns else None,
+            )
+            for index, value in enumerate(values)
+        ])
+
+
+def percentage(part, whole):
+    return f"{(part / whole * 100) if whole > 0 else 0:.1f}%"
+
+
+def write_excel(snapshot, path):
+    """Write the dashboard workbook for ``snapshot`` to ``path`` using openpyxl's write-only mode."""
+    wb = Workbook(write_only=True)
+    total_users = snapshot.total_users
+    price_stats = snapshot.price_stats
+
+    # WORKSHEET 1: EXECUTIVE SUMMARY
+    sheet = SheetWriter(wb, "Executive Summary", [26, 12, 26, 14])
+    sheet.title("REAL ESTATE ANALYTICS DASHBOARD - EXECUTIVE SUMMARY")
+    sheet.note(f"Generated on: {timezone.localtime(snapshot.generated_at).strftime('%Y-%m-%d %H:%M')}")
+
+    sheet.section("PLATFORM OVERVIEW")
+    sheet.header(['Metric', 'Count', 'Additional Info', 'Value'], "2c5a77")
+    sheet.row(['Total Users', total_users, 'New Users (7 days)', snapshot.new_users_week])
+    sheet.row(['Buyers', snapshot.total_buyers, 'Buyer Percentage', percentage(snapshot.total_buyers, total_users)])
+    sheet.row(['Sellers', snapshot.total_sellers, 'Verified Sellers', snapshot.verified_sellers])
+    sheet.row(['Admins', snapshot.total_admins, 'Pending Verifications', snapshot.pending_verifications])
+    sheet.row(['Total Properties', snapshot.total_properties, 'New Properties (7 days)', snapshot.new_properties_week])
+    sheet.row(['Wishlist Saves', snapshot.total_wishlists, 'Engagement Rate', percentage(snapshot.total_wishlists, total_users)])
+
+    sheet.section("PRICE ANALYTICS")
+    sheet.header(['Metric', 'Value (euros)'], "10b981")
+    for label, key in [
+        ('Average Property Price', 'avg_price'),
+        ('Most Expensive Property', 'max_price'),
+        ('Most Affordable Property', 'min_price'),
+        ('Total Platform Value', 'total_value'),
+    ]:
+        sheet.row([label, float(price_stats[key] or 0)], money_columns=(1,))
+
+    # WORKSHEET 2: PROPERTY ANALYTICS
+    sheet = SheetWriter(wb, "Property Analytics", [30, 16, 16, 14, 10, 10, 10, 18, 14, 10])
+    sheet.title("PROPERTY ANALYTICS")
+
+    sheet.section("PROPERTY TYPE DISTRIBUTION")
+    sheet.header(['Property Type', 'Count', 'Percentage'], "8b5cf6")
+    total_props = sum(count for _, count in snapshot.property_types)
+    for property_type, count in snapshot.property_types:
+        sheet.row([property_type.title(), count, percentage(count, total_props)])
+
+    sheet.section(f"RECENT PROPERTIES (Last {len(snapshot.recent_properties)})")
+    sheet.header(
+        ['Property Name', 'City', 'Price (euros)', 'Type', 'Rooms', 'Size', 'Wishlists', 'Seller', 'Created Date', 'Status'],
+        "f59e0b",
+    )
+    for prop in snapshot.recent_properties:
+        sheet.row([
+            prop.name,
+            prop.city,
+            float(prop.price),
+            prop.property_type.title(),
+            prop.number_of_rooms,
+            float(prop.size) if prop.size else 0,
+            prop.wishlist_count,
+            prop.seller.username,
+            prop.created_at.strftime('%Y-%m-%d'),
+            'Active' if prop.is_available else 'Inactive',
+        ], money_columns=(2,), align=False)
+
+    sheet.section("MOST WISHLISTED PROPERTIES")
+    sheet.header(['Property Name', 'City', 'Price (euros)', 'Wishlist Count', 'Popularity Score'], "ec4899")
+    for prop in snapshot.most_wishlisted:
+        popularity = (prop.wishlist_count / total_users * 100) if total_users > 0 else 0
+        sheet.row(
+            [prop.name, prop.city, float(prop.price), prop.wishlist_count, f"{popularity:.2f}%"],
+            money_columns=(2,), align=False,
+        )
+
+    # WORKSHEET 3: USER ANALYTICS
+    sheet = SheetWriter(wb, "User Analytics", [20, 25, 10, 16, 12, 20])
+    sheet.title("USER ANALYTICS")
+
+    sheet.section("USER DISTRIBUTION")
+    sheet.header(['Role', 'Count', 'Percentage'], "06b6d4")
+    sheet.row(['Buyers', snapshot.total_buyers, percentage(snapshot.total_buyers, total_users)])
+    sheet.row(['Sellers', snapshot.total_sellers, percentage(snapshot.total_sellers, total_users)])
+    sheet.row(['Admins', snapshot.total_admins, percentage(snapshot.total_admins, total_users)])
+
+    sheet.section(f"RECENT USERS (Last {len(snapshot.recent_users)})")
+    sheet.header(['Username', 'Email', 'Role', 'Phone', 'Join Date', 'Verification Status'], "84cc16")
+    for user in snapshot.recent_users:
+        verification_status = 'Not Seller'
+        if user.role == 'seller':
+            if hasattr(user, 'seller_verification'):
+                verification_status = user.seller_verification.status.title()
+            else:
+                verification_status = 'Not Submitted'
+        sheet.row([
+            user.username,
+            user.email,
+            user.role.title(),
+            user.phone_number or 'N/A',
+            user.date_joined.strftime('%Y-%m-%d'),
+            verification_status,
+        ], align=False)
+
+    wb.save(path)
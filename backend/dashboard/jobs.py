@@ -0,0 +1,156 @@
+# dashboard/jobs.py
+"""
+Background queue for dashboard exports. Jobs are rows in ExportJob and run on
+a small in-process thread pool, so no external broker is needed. Finished
+files are written under DASHBOARD_EXPORT_DIR and removed once they expire.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .analytics import get_snapshot
+from .exports import export_filename, write_excel, write_pdf
+from .models import ExportJob
+
+WRITERS = {
+    ExportJob.Kind.PDF: write_pdf,
+    ExportJob.Kind.EXCEL: write_excel,
+}
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class ExportQueueFull(Exception):
+    """Raised when DASHBOARD_EXPORT_MAX_PENDING jobs are already queued or running."""
+
+
+def export_dir():
+    return getattr(settings, 'DASHBOARD_EXPORT_DIR', os.path.join(settings.BASE_DIR, 'exports'))
+
+
+def export_expiry():
+    return timedelta(seconds=getattr(settings, 'DASHBOARD_EXPORT_EXPIRY', 60 * 60))
+
+
+def export_timeout():
+    return timedelta(seconds=getattr(settings, 'DASHBOARD_EXPORT_TIMEOUT', 10 * 60))
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'DASHBOARD_EXPORT_WORKERS', 2),
+                thread_name_prefix='dashboard-export',
+            )
+        return _executor
+
+
+def submit_export(kind, user=None):
+    """Queue an export of ``kind`` and return its ExportJob."""
+    purge_expired_exports()
+    fail_stale_exports()
+
+    max_pending = getattr(settings, 'DASHBOARD_EXPORT_MAX_PENDING', 10)
+    active = ExportJob.objects.filter(status__in=[ExportJob.Status.PENDING, ExportJob.Status.RUNNING]).count()
+    if active >= max_pending:
+        raise ExportQueueFull(f"{active} exports are already in progress")
+
+    job = ExportJob.objects.create(
+        kind=kind,
+        requested_by=user if user is not None and user.is_authenticated else None,
+        expires_at=timezone.now() + export_expiry(),
+    )
+    if getattr(settings, 'DASHBOARD_EXPORT_EAGER', False):
+        run_export(job.pk)
+        job.refresh_from_db()
+    else:
+        get_executor().submit(run_in_worker, job.pk)
+    return job
+
+
+def run_in_worker(job_id):
+    # Worker threads get their own connections; don't leak them between jobs
+    close_old_connections()
+    try:
+        run_export(job_id)
+    finally:
+        close_old_connections()
+
+
+def run_export(job_id):
+    """Generate the file for one job, recording the outcome on the job row."""
+    started_at = timezone.now()
+    if not ExportJob.objects.filter(pk=job_id, status=ExportJob.Status.PENDING).update(
+        status=ExportJob.Status.RUNNING, started_at=started_at
+    ):
+        return
+    job = ExportJob.objects.get(pk=job_id)
+    partial_path = None
+    try:
+        os.makedirs(export_dir(), exist_ok=True)
+        extension = 'pdf' if job.kind == ExportJob.Kind.PDF else 'xlsx'
+        final_path = os.path.join(export_dir(), f"{job.pk}.{extension}")
+        partial_path = final_path + '.partial'
+
+        snapshot = get_snapshot()
+        WRITERS[job.kind](snapshot, partial_path)
+        os.replace(partial_path, final_path)
+
+        finished_at = timezone.now()
+        ExportJob.objects.filter(pk=job_id).update(
+            status=ExportJob.Status.DONE,
+            file_path=final_path,
+            filename=export_filename(job.kind, snapshot.generated_at),
+            finished_at=finished_at,
+            expires_at=finished_at + export_expiry(),
+        )
+    except Exception as e:
+        logger.exception(f"Export job {job_id} failed: {e}")
+        if partial_path and os.path.exists(partial_path):
+            os.remove(partial_path)
+        ExportJob.objects.filter(pk=job_id).update(
+            status=ExportJob.Status.FAILED, error=str(e), finished_at=timezone.now()
+        )
+
+
+def fail_stale_exports(now=None):
+    """
+    Mark jobs pending or running for longer than DASHBOARD_EXPORT_TIMEOUT as
+    failed. Their worker is gone (the process that queued them restarted), so
+    they would otherwise hold a place in the queue until they expire.
+    Returns the number of jobs marked.
+    """
+    now = now or timezone.now()
+    cutoff = now - export_timeout()
+    stale = ExportJob.objects.filter(
+        Q(status=ExportJob.Status.PENDING, created_at__lt=cutoff)
+        | Q(status=ExportJob.Status.RUNNING, started_at__lt=cutoff)
+    )
+    marked = stale.update(status=ExportJob.Status.FAILED, error='Export did not finish in time', finished_at=now)
+    if marked:
+        logger.warning(f"Marked {marked} stale export job(s) as failed")
+    return marked
+
+
+def purge_expired_exports(now=None):
+    """Delete expired jobs and their files. Returns the number of jobs removed."""
+    expired = ExportJob.objects.filter(expires_at__lt=now or timezone.now())
+    removed = 0
+    for job in expired:
+        if job.file_path and os.path.exists(job.file_path):
+            os.remove(job.file_path)
+        job.delete()
+        removed += 1
+    return removed
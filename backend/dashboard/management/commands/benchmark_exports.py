@@ -0,0 +1,168 @@
+# dashboard/management/commands/benchmark_exports.py
+import gc
+import json
+import os
+import resource
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from dashboard.streaming import iter_export
+from properties.models import Property, Wishlist
+from properties.views import PROPERTY_EXPORT_COLUMNS, WISHLIST_EXPORT_COLUMNS
+from users.models import SellerVerification, User
+from users.views import USER_EXPORT_COLUMNS, _with_verification_status
+
+ALIAS = 'export_benchmark'
+BATCH = 10000
+CITIES = ['Berlin', 'München', 'Hamburg', 'Frankfurt', 'Köln', 'Stuttgart', 'Düsseldorf', 'Leipzig']
+TYPES = ['apartment', 'house', 'villa', 'studio', 'penthouse']
+
+
+def read_status_kb(field):
+    """VmRSS / VmHWM from /proc (Linux); falls back to ru_maxrss."""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def reset_peak_rss():
+    """Reset VmHWM so the next peak reading only covers what runs after this call."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+        return True
+    except OSError:
+        return False
+
+
+class Command(BaseCommand):
+    help = 'Stream a large CSV/NDJSON export from a throwaway SQLite database and report time and peak RSS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000, help='Rows to export')
+        parser.add_argument('--dataset', choices=['properties', 'users', 'wishlists'], default='properties')
+        parser.add_argument('--export-format', choices=['csv', 'ndjson'], default='csv')
+        parser.add_argument('--compare', action='store_true',
+                            help='Also measure building the same rows as one in-memory JSON list')
+
+    def handle(self, *args, **options):
+        fd, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        connections.settings[ALIAS] = connections.configure_settings({
+            DEFAULT_DB_ALIAS: connections.settings[DEFAULT_DB_ALIAS],
+            ALIAS: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path},
+        })[ALIAS]
+        try:
+            self.create_schema()
+            start = time.perf_counter()
+            queryset, columns, transform = getattr(self, f"populate_{options['dataset']}")(options['rows'])
+            self.stdout.write(f"Inserted {options['rows']:,} {options['dataset']} rows in {time.perf_counter() - start:.1f}s")
+
+            self.report('streaming', lambda: self.stream(queryset, columns, options['export_format'], transform))
+            if options['compare']:
+                self.report('materialized', lambda: self.materialize(queryset, columns))
+        finally:
+            connections[ALIAS].close()
+            del connections.settings[ALIAS]
+            os.remove(path)
+
+    def report(self, label, run):
+        gc.collect()
+        baseline = read_status_kb('VmRSS')
+        exact = reset_peak_rss()
+        start = time.perf_counter()
+        written = run()
+        elapsed = time.perf_counter() - start
+        peak = read_status_kb('VmHWM' if exact else 'VmRSS')
+        self.stdout.write(
+            f"{label:>13}: {written / 1024 / 1024:8.1f} MiB in {elapsed:6.1f}s, "
+            f"RSS before {baseline / 1024:6.1f} MiB, peak {peak / 1024:6.1f} MiB "
+            f"(+{(peak - baseline) / 1024:.1f} MiB){'' if exact else ' [peak approximated]'}"
+        )
+
+    def stream(self, queryset, columns, export_format, transform):
+        written = 0
+        with open(os.devnull, 'w') as sink:
+            for chunk in iter_export(queryset, columns, export_format, transform):
+                written += len(chunk.encode())
+                sink.write(chunk)
+        return written
+
+    def materialize(self, queryset, columns):
+        rows = list(queryset.values(*[field for _, field in columns]))
+        return len(json.dumps(rows, default=str).encode())
+
+    def create_schema(self):
+        with connections[ALIAS].schema_editor() as editor:
+            for model in (User, SellerVerification, Property, Wishlist):
+                editor.create_model(model)
+
+    def insert(self, model, objects):
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == BATCH:
+                model.objects.using(ALIAS).bulk_create(batch)
+                batch = []
+        if batch:
+            model.objects.using(ALIAS).bulk_create(batch)
+
+    def make_users(self, count, prefix):
+        now = timezone.now()
+        return (
+            User(
+                username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', password='',
+                role=User.Role.SELLER if i % 3 == 0 else User.Role.BUYER,
+                date_joined=now - timedelta(minutes=i),
+            )
+            for i in range(count)
+        )
+
+    def make_properties(self, count, seller_ids):
+        return (
+            Property(
+                seller_id=seller_ids[i % len(seller_ids)], name=f'Property {i}',
+                description='Bright apartment close to the park', address=f'Hauptstraße {i % 300}',
+                city=CITIES[i % len(CITIES)], property_type=TYPES[i % len(TYPES)],
+                price=Decimal(100000 + (i * 37) % 900000), number_of_rooms=1 + i % 6,
+                size=Decimal(40 + i % 160),
+            )
+            for i in range(count)
+        )
+
+    def populate_properties(self, rows):
+        self.insert(User, self.make_users(100, 'seller'))
+        seller_ids = list(User.objects.using(ALIAS).values_list('id', flat=True))
+        self.insert(Property, self.make_properties(rows, seller_ids))
+        return Property.objects.using(ALIAS).order_by('id'), PROPERTY_EXPORT_COLUMNS, None
+
+    def populate_users(self, rows):
+        self.insert(User, self.make_users(rows, 'user'))
+        sellers = User.objects.using(ALIAS).filter(role=User.Role.SELLER).values_list('id', flat=True)
+        self.insert(SellerVerification, (
+            SellerVerification(user_id=user_id, status='approved' if user_id % 2 else 'pending')
+            for user_id in sellers.iterator(chunk_size=BATCH)
+        ))
+        return User.objects.using(ALIAS).order_by('id'), USER_EXPORT_COLUMNS, _with_verification_status
+
+    def populate_wishlists(self, rows):
+        side = int(rows ** 0.5) + 1
+        self.insert(User, self.make_users(side, 'buyer'))
+        user_ids = list(User.objects.using(ALIAS).values_list('id', flat=True))
+        self.insert(Property, self.make_properties(side, user_ids[:100]))
+        property_ids = list(Property.objects.using(ALIAS).values_list('id', flat=True))
+        self.insert(Wishlist, (
+            Wishlist(user_id=user_ids[i // side], property_id=property_ids[i % side]) for i in range(rows)
+        ))
+        return Wishlist.objects.using(ALIAS).order_by('id'), WISHLIST_EXPORT_COLUMNS, None
@@ -0,0 +1,22 @@
+# dashboard/management/commands/reconcile_rollups.py
+from django.core.management.base import BaseCommand
+
+from dashboard.rollups import reconcile
+
+METRIC_GROUPS = ['properties', 'users', 'verifications', 'wishlists', 'images']
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the analytics rollup tables from the base tables (run periodically, e.g. hourly from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only', nargs='+', choices=METRIC_GROUPS,
+            help='Limit the rebuild to these metric groups',
+        )
+
+    def handle(self, *args, **options):
+        total_rows, bucket_rows = reconcile(metrics=options['only'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {total_rows} totals and {bucket_rows} time buckets')
+        )
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket_start', models.DateTimeField()),
+                ('metric', models.CharField(max_length=50)),
+                ('key', models.CharField(blank=True, default='', max_length=150)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['bucket_start'],
+                'constraints': [models.UniqueConstraint(fields=('granularity', 'metric', 'key', 'bucket_start'), name='metricbucket_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MetricTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=50)),
+                ('key', models.CharField(blank=True, default='', max_length=150)),
+                ('count', models.BigIntegerField(default=0)),
+                ('price_sum', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('size_sum', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('rooms_sum', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['metric', '-count'], name='metrictotal_metric_count_idx')],
+                'constraints': [models.UniqueConstraint(fields=('metric', 'key'), name='metrictotal_metric_key_uniq')],
+            },
+        ),
+    ]
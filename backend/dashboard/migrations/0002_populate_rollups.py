@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+def populate_rollups(apps, schema_editor):
+    from dashboard.rollups import reconcile
+    reconcile(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+        ('properties', '0005_property_hot_filter_indexes'),
+        ('users', '0003_user_profile_picture_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,104 @@
+# dashboard/models.py
+import uuid
+
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class MetricTotal(models.Model):
+    """
+    Running total for one analytics dimension, e.g. ('users.role', 'buyer').
+    Maintained incrementally by dashboard/signals.py and corrected by the
+    reconcile_rollups management command.
+    """
+    metric = models.CharField(max_length=50)
+    key = models.CharField(max_length=150, blank=True, default='')
+    count = models.BigIntegerField(default=0)
+    # Only the property metrics use the sums; they let averages be derived without scanning properties
+    price_sum = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    size_sum = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    rooms_sum = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'key'], name='metrictotal_metric_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['metric', '-count'], name='metrictotal_metric_count_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric}[{self.key}] = {self.count}"
+
+
+class MetricBucket(models.Model):
+    """
+    Hourly or daily count of rows by their timestamp, e.g. properties
+    created between 10:00 and 11:00. Used for "new in the last N days"
+    figures and activity timelines.
+    """
+    HOUR = 'hour'
+    DAY = 'day'
+    GRANULARITY_CHOICES = [
+        (HOUR, 'Hour'),
+        (DAY, 'Day'),
+    ]
+
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES)
+    bucket_start = models.DateTimeField()
+    metric = models.CharField(max_length=50)
+    key = models.CharField(max_length=150, blank=True, default='')
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['granularity', 'metric', 'key', 'bucket_start'],
+                name='metricbucket_uniq',
+            ),
+        ]
+        ordering = ['bucket_start']
+
+    def __str__(self):
+        return f"{self.metric}[{self.key}] {self.granularity} {self.bucket_start:%Y-%m-%d %H:%M} = {self.count}"
+
+
+class ExportJob(models.Model):
+    """
+    A dashboard PDF/Excel export generated in the background by dashboard/jobs.py.
+    The client polls the job by id and downloads the file once it is done.
+    """
+    class Kind(models.TextChoices):
+        PDF = 'pdf', 'PDF'
+        EXCEL = 'excel', 'Excel'
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        RUNNING = 'running', 'Running'
+        DONE = 'done', 'Done'
+        FAILED = 'failed', 'Failed'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='export_jobs'
+    )
+    file_path = models.CharField(max_length=500, blank=True)
+    filename = models.CharField(max_length=200, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='exportjob_status_created_idx'),
+            models.Index(fields=['expires_at'], name='exportjob_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} export {self.id} ({self.status})"
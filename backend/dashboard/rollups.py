@@ -0,0 +1,459 @@
+# dashboard/rollups.py
+"""
+Precomputed analytics rollups.
+
+Every tracked row contributes to a set of running totals (MetricTotal) and
+to the hourly/daily bucket of its timestamps (MetricBucket). Signals apply
+the difference between a row's old and new contributions on save/delete,
+bulk ``update()`` callers diff ``load_snapshots()`` taken before and after
+through ``apply_changes()``. ``reconcile()`` rebuilds everything from the
+base tables so drift from missed signals is corrected periodically.
+
+Admin analytics endpoints read from here instead of running COUNT/GROUP BY
+over the full users, properties and wishlist tables.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.apps import apps as global_apps
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from .models import MetricBucket, MetricTotal
+
+ZERO = Decimal('0')
+
+# Which fields each tracked model snapshots on load, so a save can be diffed against what was counted
+TRACKED_FIELDS = {
+    'properties.Property': (
+        'property_type', 'city', 'is_available', 'number_of_rooms', 'seller_id',
+        'price', 'size', 'created_at', 'updated_at',
+    ),
+    'users.User': ('role', 'date_joined'),
+    'users.SellerVerification': ('status',),
+    'properties.Wishlist': ('property_id', 'created_at'),
+    'properties.PropertyImage': ('property_id',),
+}
+
+
+def _property_contributions(state):
+    price = state['price'] or ZERO
+    size = state['size'] or ZERO
+    rooms = state['number_of_rooms'] or 0
+    totals = [
+        ('properties.type', state['property_type'], price, size, rooms),
+        ('properties.city', state['city'], price, ZERO, 0),
+        ('properties.available', 'true' if state['is_available'] else 'false', ZERO, ZERO, 0),
+        ('properties.rooms', str(rooms), ZERO, ZERO, 0),
+        ('properties.seller', str(state['seller_id']), price, ZERO, 0),
+    ]
+    buckets = [
+        ('properties.created', state['created_at']),
+        ('properties.updated', state['updated_at']),
+    ]
+    return totals, buckets
+
+
+def _user_contributions(state):
+    return [('users.role', state['role'], ZERO, ZERO, 0)], [('users.joined', state['date_joined'])]
+
+
+def _verification_contributions(state):
+    return [('verifications.status', state['status'], ZERO, ZERO, 0)], []
+
+
+def _wishlist_contributions(state):
+    totals = [
+        ('wishlists.total', '', ZERO, ZERO, 0),
+        ('wishlists.property', str(state['property_id']), ZERO, ZERO, 0),
+    ]
+    return totals, [('wishlists.added', state['created_at'])]
+
+
+def _image_contributions(state):
+    totals = [
+        ('images.total', '', ZERO, ZERO, 0),
+        ('images.property', str(state['property_id']), ZERO, ZERO, 0),
+    ]
+    return totals, []
+
+
+CONTRIBUTIONS = {
+    'properties.Property': _property_contributions,
+    'users.User': _user_contributions,
+    'users.SellerVerification': _verification_contributions,
+    'properties.Wishlist': _wishlist_contributions,
+    'properties.PropertyImage': _image_contributions,
+}
+
+
+def model_label(model):
+    return f"{model._meta.app_label}.{model._meta.object_name}"
+
+
+def snapshot(instance):
+    """Return the tracked field values of an instance, or None if any of them is deferred."""
+    fields = TRACKED_FIELDS[model_label(type(instance))]
+    values = instance.__dict__
+    if any(field not in values for field in fields):
+        return None
+    return {field: values[field] for field in fields}
+
+
+def load_snapshot(model, pk):
+    fields = TRACKED_FIELDS[model_label(model)]
+    return model._base_manager.filter(pk=pk).values(*fields).first()
+
+
+def hour_start(value):
+    # Truncate in the current time zone to line up with TruncHour/TruncDay in reconcile()
+    return timezone.localtime(value).replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(value):
+    return timezone.localtime(value).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def apply_change(model, old_state, new_state):
+    """Apply the difference between two snapshots (either may be None) to the rollup tables."""
+    apply_changes(model, [(old_state, new_state)])
+
+
+def load_snapshots(queryset):
+    """{pk: snapshot} for every row of a queryset, e.g. before and after a bulk ``update()``."""
+    fields = TRACKED_FIELDS[model_label(queryset.model)]
+    return {row.pop('pk'): row for row in queryset.order_by().values('pk', *fields)}
+
+
+def apply_changes(model, changes):
+    """
+    Apply ``[(old_state, new_state)]`` for many rows at once; the deltas are
+    summed first, so a bulk update costs one write per metric key it moved.
+    """
+    contribute = CONTRIBUTIONS[model_label(model)]
+    total_deltas = defaultdict(lambda: [0, ZERO, ZERO, 0])
+    bucket_deltas = defaultdict(int)
+
+    for state, sign in (pair for old_state, new_state in changes for pair in ((old_state, -1), (new_state, 1))):
+        if state is None:
+            continue
+        totals, buckets = contribute(state)
+        for metric, key, price, size, rooms in totals:
+            delta = total_deltas[(metric, key)]
+            delta[0] += sign
+            delta[1] += sign * price
+            delta[2] += sign * size
+            delta[3] += sign * rooms
+        for metric, timestamp in buckets:
+            if timestamp is None:
+                continue
+            bucket_deltas[(MetricBucket.HOUR, metric, hour_start(timestamp))] += sign
+            bucket_deltas[(MetricBucket.DAY, metric, day_start(timestamp))] += sign
+
+    for (metric, key), (count, price, size, rooms) in total_deltas.items():
+        if not (count or price or size or rooms):
+            continue
+        if metric == 'images.property':
+            new_count = bump_total(metric, key, count, fetch_count=True)
+            _track_properties_with_images(count, new_count)
+        else:
+            bump_total(metric, key, count, price, size, rooms)
+
+    for (granularity, metric, bucket_start), count in bucket_deltas.items():
+        if count:
+            bump_bucket(granularity, metric, bucket_start, count)
+
+
+def _track_properties_with_images(delta, new_count):
+    # A property starts or stops counting as "with images" when its image count crosses zero
+    if delta > 0 and new_count == delta:
+        bump_total('images.properties', '', 1)
+    elif delta < 0 and new_count <= 0:
+        bump_total('images.properties', '', -1)
+
+
+def bump_total(metric, key, count, price=ZERO, size=ZERO, rooms=0, fetch_count=False):
+    """
+    Atomically add to a running total, creating the row on first use.
+    With ``fetch_count=True`` the resulting count is read back and returned.
+    """
+    changes = {
+        'count': F('count') + count,
+        'price_sum': F('price_sum') + price,
+        'size_sum': F('size_sum') + size,
+        'rooms_sum': F('rooms_sum') + rooms,
+    }
+    rows = MetricTotal.objects.filter(metric=metric, key=key)
+    if not rows.update(**changes):
+        try:
+            with transaction.atomic():
+                MetricTotal.objects.create(
+                    metric=metric, key=key, count=count,
+                    price_sum=price, size_sum=size, rooms_sum=rooms,
+                )
+            return count
+        except IntegrityError:
+            # Another writer created the row first; fall through to the increment
+            rows.update(**changes)
+    if fetch_count:
+        return rows.values_list('count', flat=True).first() or 0
+    return None
+
+
+def bump_bucket(granularity, metric, bucket_start, count, key=''):
+    rows = MetricBucket.objects.filter(
+        granularity=granularity, metric=metric, key=key, bucket_start=bucket_start
+    )
+    if rows.update(count=F('count') + count):
+        return
+    try:
+        with transaction.atomic():
+            MetricBucket.objects.create(
+                granularity=granularity, metric=metric, key=key,
+                bucket_start=bucket_start, count=count,
+            )
+    except IntegrityError:
+        rows.update(count=F('count') + count)
+
+
+# ------------------- READS -------------------
+
+def totals(metric):
+    """Return {key: MetricTotal} for one metric."""
+    return {row.key: row for row in MetricTotal.objects.filter(metric=metric)}
+
+
+def counts(metric):
+    return dict(MetricTotal.objects.filter(metric=metric).values_list('key', 'count'))
+
+
+def total_count(metric):
+    return sum(counts(metric).values())
+
+
+def top(metric, limit):
+    """Return [(key, count), ...] for the highest non-zero totals of a metric."""
+    return list(
+        MetricTotal.objects.filter(metric=metric, count__gt=0)
+        .order_by('-count', 'key')
+        .values_list('key', 'count')[:limit]
+    )
+
+
+def count_since(metric, since):
+    """Rows whose timestamp falls on or after ``since``, at hourly resolution."""
+    result = MetricBucket.objects.filter(
+        granularity=MetricBucket.HOUR, metric=metric, bucket_start__gte=hour_start(since),
+    ).aggregate(total=Sum('count'))
+    return result['total'] or 0
+
+
+def count_before(metric, before):
+    result = MetricBucket.objects.filter(
+        granularity=MetricBucket.HOUR, metric=metric, bucket_start__lt=hour_start(before),
+    ).aggregate(total=Sum('count'))
+    return result['total'] or 0
+
+
+def daily_series(metric, since):
+    """Return [{'date': date, 'count': n}, ...] for days on or after ``since``."""
+    rows = MetricBucket.objects.filter(
+        granularity=MetricBucket.DAY, metric=metric, bucket_start__gte=day_start(since), count__gt=0,
+    ).values_list('bucket_start', 'count')
+    return [{'date': bucket_start.date(), 'count': count} for bucket_start, count in rows]
+
+
+def averages(row):
+    """Average price, size and rooms for a property MetricTotal row."""
+    if row is None or not row.count:
+        return {'avg_price': 0, 'avg_size': 0, 'avg_rooms': 0}
+    return {
+        'avg_price': float(row.price_sum) / row.count,
+        'avg_size': float(row.size_sum) / row.count,
+        'avg_rooms': row.rooms_sum / row.count,
+    }
+
+
+def combine(rows):
+    """Sum several MetricTotal rows into one unsaved row, e.g. all property types."""
+    combined = MetricTotal(count=0, price_sum=ZERO, size_sum=ZERO, rooms_sum=0)
+    for row in rows:
+        combined.count += row.count
+        combined.price_sum += row.price_sum
+        combined.size_sum += row.size_sum
+        combined.rooms_sum += row.rooms_sum
+    return combined
+
+
+def rooms_range():
+    """(fewest, most) rooms of any listing, read off the per-room-count totals; (0, 0) without listings."""
+    rooms = [int(key) for key, count in counts('properties.rooms').items() if count > 0]
+    return (min(rooms), max(rooms)) if rooms else (0, 0)
+
+
+def price_range():
+    """
+    (lowest, highest) listing price, or (0, 0) without listings. Extremes
+    can't be kept as running totals, so each bound is an ORDER BY ... LIMIT 1
+    read off either end of the price index (prop_price_idx).
+    """
+    from properties.models import Property
+
+    prices = Property.objects.values_list('price', flat=True)
+    lowest = prices.order_by('price').first()
+    if lowest is None:
+        return (0, 0)
+    return (float(lowest), float(prices.order_by('-price').first()))
+
+
+def wishlist_counts(property_ids):
+    """Return {property_id: wishlist count} for the given properties."""
+    rows = MetricTotal.objects.filter(
+        metric='wishlists.property', key__in=[str(pk) for pk in property_ids]
+    ).values_list('key', 'count')
+    return {int(key): count for key, count in rows}
+
+
+def top_wishlisted_properties(limit):
+    """Most wishlisted properties, each annotated with ``wishlist_count``, in ranking order."""
+    from properties.models import Property
+
+    ranking = top('wishlists.property', limit)
+    found = Property.objects.select_related('seller').in_bulk([int(key) for key, _ in ranking])
+    result = []
+    for key, count in ranking:
+        prop = found.get(int(key))
+        if prop is not None:
+            prop.wishlist_count = count
+            result.append(prop)
+    return result
+
+
+def top_sellers(limit, role=None):
+    """Sellers with the most listings as (user, MetricTotal) pairs, optionally restricted to a role."""
+    from users.models import User
+
+    # Over-fetch a little so filtering by role still fills the page
+    ranking = list(
+        MetricTotal.objects.filter(metric='properties.seller', count__gt=0)
+        .order_by('-count', 'key')[:limit * 4 if role else limit]
+    )
+    users = User.objects.in_bulk([int(row.key) for row in ranking])
+    result = []
+    for row in ranking:
+        user = users.get(int(row.key))
+        if user is None or (role and user.role != role):
+            continue
+        result.append((user, row))
+        if len(result) == limit:
+            break
+    return result
+
+
+def window_start(period, now):
+    """Map the admin analytics ``period`` query parameter to a start datetime."""
+    days = {'7d': 7, '90d': 90, '1y': 365}.get(period, 30)
+    return now - timedelta(days=days)
+
+
+# ------------------- RECONCILE -------------------
+
+def _grouped(queryset, field, extra=None):
+    annotations = {'row_count': Count('pk')}
+    annotations.update(extra or {})
+    return queryset.order_by().values(field).annotate(**annotations)
+
+
+def reconcile(apps=global_apps, metrics=None):
+    """
+    Recompute rollups from the base tables.
+    ``metrics`` limits the rebuild to the named groups ('properties',
+    'users', 'verifications', 'wishlists', 'images'); all by default.
+    """
+    Property = apps.get_model('properties', 'Property')
+    PropertyImage = apps.get_model('properties', 'PropertyImage')
+    Wishlist = apps.get_model('properties', 'Wishlist')
+    User = apps.get_model('users', 'User')
+    SellerVerification = apps.get_model('users', 'SellerVerification')
+    Total = apps.get_model('dashboard', 'MetricTotal')
+    Bucket = apps.get_model('dashboard', 'MetricBucket')
+
+    groups = set(metrics or ('properties', 'users', 'verifications', 'wishlists', 'images'))
+    new_totals = []
+    new_buckets = []
+    prefixes = []
+
+    def add_totals(metric, rows, field, key=str):
+        for row in rows:
+            new_totals.append(Total(
+                metric=metric,
+                key=key(row[field]),
+                count=row['row_count'],
+                price_sum=row.get('price_total') or ZERO,
+                size_sum=row.get('size_total') or ZERO,
+                rooms_sum=row.get('rooms_total') or 0,
+            ))
+
+    def add_buckets(metric, queryset, field):
+        for granularity, trunc in ((MetricBucket.HOUR, TruncHour), (MetricBucket.DAY, TruncDay)):
+            rows = (
+                queryset.order_by().annotate(bucket=trunc(field))
+                .values('bucket').annotate(row_count=Count('pk'))
+            )
+            for row in rows:
+                if row['bucket'] is not None:
+                    new_buckets.append(Bucket(
+                        granularity=granularity, metric=metric,
+                        bucket_start=row['bucket'], count=row['row_count'],
+                    ))
+
+    if 'properties' in groups:
+        prefixes.append('properties.')
+        properties = Property.objects.all()
+        add_totals('properties.type', _grouped(properties, 'property_type', {
+            'price_total': Sum('price'), 'size_total': Sum('size'), 'rooms_total': Sum('number_of_rooms'),
+        }), 'property_type')
+        add_totals('properties.city', _grouped(properties, 'city', {'price_total': Sum('price')}), 'city')
+        add_totals('properties.available', _grouped(properties, 'is_available'), 'is_available',
+                   key=lambda value: 'true' if value else 'false')
+        add_totals('properties.rooms', _grouped(properties, 'number_of_rooms'), 'number_of_rooms')
+        add_totals('properties.seller', _grouped(properties, 'seller_id', {'price_total': Sum('price')}), 'seller_id')
+        add_buckets('properties.created', properties, 'created_at')
+        add_buckets('properties.updated', properties, 'updated_at')
+
+    if 'users' in groups:
+        prefixes.append('users.')
+        users = User.objects.all()
+        add_totals('users.role', _grouped(users, 'role'), 'role')
+        add_buckets('users.joined', users, 'date_joined')
+
+    if 'verifications' in groups:
+        prefixes.append('verifications.')
+        add_totals('verifications.status', _grouped(SellerVerification.objects.all(), 'status'), 'status')
+
+    if 'wishlists' in groups:
+        prefixes.append('wishlists.')
+        wishlists = Wishlist.objects.all()
+        new_totals.append(Total(metric='wishlists.total', key='', count=wishlists.count()))
+        add_totals('wishlists.property', _grouped(wishlists, 'property_id'), 'property_id')
+        add_buckets('wishlists.added', wishlists, 'created_at')
+
+    if 'images' in groups:
+        prefixes.append('images.')
+        images = PropertyImage.objects.all()
+        per_property = list(_grouped(images, 'property_id'))
+        new_totals.append(Total(metric='images.total', key='', count=images.count()))
+        new_totals.append(Total(metric='images.properties', key='', count=len(per_property)))
+        add_totals('images.property', per_property, 'property_id')
+
+    with transaction.atomic():
+        for prefix in prefixes:
+            Total.objects.filter(metric__startswith=prefix).delete()
+            Bucket.objects.filter(metric__startswith=prefix).delete()
+        Total.objects.bulk_create(new_totals, batch_size=1000)
+        Bucket.objects.bulk_create(new_buckets, batch_size=1000)
+
+    return len(new_totals), len(new_buckets)
@@ -0,0 +1,49 @@
+# dashboard/signals.py
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+
+from properties.models import Property, PropertyImage, Wishlist
+from users.models import SellerVerification, User
+
+from . import rollups
+
+TRACKED_MODELS = (Property, PropertyImage, Wishlist, User, SellerVerification)
+
+
+def remember_state(sender, instance, **kwargs):
+    """Snapshot the counted fields when a row is loaded so its next save can be diffed."""
+    if instance.pk is not None:
+        instance._rollup_state = rollups.snapshot(instance)
+
+
+def load_missing_state(sender, instance, raw=False, **kwargs):
+    # Rows loaded with deferred fields have no snapshot; read the counted values before they change
+    if raw or instance.pk is None or instance._state.adding:
+        return
+    if getattr(instance, '_rollup_state', None) is None:
+        instance._rollup_state = rollups.load_snapshot(sender, instance.pk)
+
+
+def update_rollups_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_state = None if created else getattr(instance, '_rollup_state', None)
+    new_state = rollups.snapshot(instance)
+    if new_state is None:
+        new_state = rollups.load_snapshot(sender, instance.pk)
+    rollups.apply_change(sender, old_state, new_state)
+    instance._rollup_state = new_state
+
+
+def update_rollups_on_delete(sender, instance, **kwargs):
+    old_state = getattr(instance, '_rollup_state', None) or rollups.snapshot(instance)
+    if old_state is not None:
+        rollups.apply_change(sender, old_state, None)
+
+
+def connect():
+    for model in TRACKED_MODELS:
+        uid = f"rollups_{rollups.model_label(model)}"
+        post_init.connect(remember_state, sender=model, dispatch_uid=f"{uid}_init")
+        pre_save.connect(load_missing_state, sender=model, dispatch_uid=f"{uid}_pre_save")
+        post_save.connect(update_rollups_on_save, sender=model, dispatch_uid=f"{uid}_save")
+        post_delete.connect(update_rollups_on_delete, sender=model, dispatch_uid=f"{uid}_delete")
@@ -0,0 +1,88 @@
+# dashboard/streaming.py
+"""
+Constant-memory CSV / NDJSON exports. Rows are read with values_list() and
+iterator(chunk_size=...), encoded and handed to StreamingHttpResponse a
+batch at a time, so nothing holds the full result set.
+"""
+import csv
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object whose write() just returns the line, for csv.writer."""
+    def write(self, value):
+        return value
+
+
+def plain_value(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(rows, headers, chunk_size=CHUNK_SIZE):
+    writer = csv.writer(Echo())
+    yield writer.writerow(headers)
+    batch = []
+    for row in rows:
+        batch.append(writer.writerow(map(plain_value, row)))
+        if len(batch) >= chunk_size:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def iter_ndjson(rows, headers, chunk_size=CHUNK_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(json.dumps(dict(zip(headers, map(plain_value, row)))) + '\n')
+        if len(batch) >= chunk_size:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def iter_export(queryset, columns, export_format, transform=None, chunk_size=CHUNK_SIZE):
+    """
+    Yield the encoded export of ``queryset``. ``columns`` is a list of
+    (header, field lookup) pairs; ``transform`` can rewrite each row tuple.
+    """
+    headers = [header for header, _ in columns]
+    rows = queryset.values_list(*[field for _, field in columns]).iterator(chunk_size=chunk_size)
+    if transform is not None:
+        rows = map(transform, rows)
+    if export_format == 'ndjson':
+        return iter_ndjson(rows, headers, chunk_size)
+    return iter_csv(rows, headers, chunk_size)
+
+
+def export_format_from(request, default='csv'):
+    """Read ?export_format=; returns None when it isn't supported."""
+    export_format = request.GET.get('export_format', default).lower()
+    return export_format if export_format in EXPORT_FORMATS else None
+
+
+def streaming_export_response(queryset, columns, export_format, name, transform=None):
+    response = StreamingHttpResponse(
+        iter_export(queryset, columns, export_format, transform),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    filename = f"{name}_{timezone.localtime().strftime('%Y%m%d_%H%M')}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'no-store'
+    return response
@@ -1,3 +1,345 @@
-from django.test import TestCase
+import os
+import time
+from datetime import timedelta
+from decimal import Decimal
+from tempfile import TemporaryDirectory
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from properties.models import Property, PropertyImage, Wishlist
+from users.models import SellerVerification, User
+from . import analytics, jobs, rollups
+from .analytics import clear_snapshot, get_snapshot
+from .models import ExportJob, MetricBucket, MetricTotal
+
+
+def create_property(seller, **overrides):
+    data = {
+        'name': 'Sample Property',
+        'description': 'A sample property',
+        'address': 'Sample Street 1',
+        'city': 'Berlin',
+        'price': Decimal('250000.00'),
+        'number_of_rooms': 3,
+        'size': Decimal('85.00'),
+        'property_type': 'apartment',
+    }
+    data.update(overrides)
+    return Property.objects.create(seller=seller, **data)
+
+
+def rollup_state():
+    totals = {
+        (row.metric, row.key): (row.count, row.price_sum, row.size_sum, row.rooms_sum)
+        for row in MetricTotal.objects.all() if row.count
+    }
+    buckets = {
+        (row.granularity, row.metric, row.key, row.bucket_start): row.count
+        for row in MetricBucket.objects.all() if row.count
+    }
+    return totals, buckets
+
+
+class RollupMaintenanceTests(TestCase):
+    """Incremental signal updates must land on the same numbers as a full recount."""
+
+    def setUp(self):
+        self.seller = User.objects.create_user(username='seller', password='pass', role='seller')
+        self.buyer = User.objects.create_user(username='buyer', password='pass', role='buyer')
+
+    def assertMatchesReconcile(self):
+        incremental = rollup_state()
+        rollups.reconcile()
+        self.assertEqual(incremental, rollup_state())
+
+    def test_signals_match_reconcile(self):
+        house = create_property(self.seller, property_type='house', city='Hamburg', price=Decimal('500000'))
+        flat = create_property(self.seller)
+        PropertyImage.objects.create(property=house, image='a.jpg', is_primary=True)
+        PropertyImage.objects.create(property=house, image='b.jpg')
+        Wishlist.objects.create(user=self.buyer, property=house)
+        Wishlist.objects.create(user=self.buyer, property=flat)
+        SellerVerification.objects.create(user=self.seller)
+        self.assertMatchesReconcile()
+
+        flat.city = 'Munich'
+        flat.price = Decimal('300000')
+        flat.is_available = False
+        flat.save()
+        house.images.first().delete()
+        self.buyer.role = User.Role.SELLER
+        self.buyer.save()
+        self.seller.seller_verification.status = SellerVerification.VerificationStatus.APPROVED
+        self.seller.seller_verification.save()
+        self.assertMatchesReconcile()
+
+        house.delete()
+        self.assertMatchesReconcile()
+        self.assertEqual(rollups.top('properties.city', 10), [('Munich', 1)])
+        self.assertEqual(rollups.total_count('wishlists.total'), 1)
+
+    def test_update_fields_save_reloads_missing_state(self):
+        prop = create_property(self.seller)
+        stale = Property.objects.only('id').get(pk=prop.pk)
+        stale.city = 'Cologne'
+        stale.save(update_fields=['city'])
+        self.assertMatchesReconcile()
+        self.assertEqual(rollups.counts('properties.city').get('Cologne'), 1)
+
+
+class AdminAnalyticsTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', password='pass', role='admin', is_staff=True, is_superuser=True
+        )
+        self.seller = User.objects.create_user(username='seller', password='pass', role='seller')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        clear_snapshot()
+
+    def add_properties(self, count):
+        for i in range(count):
+            buyer = User.objects.create_user(username=f'buyer{Property.objects.count()}')
+            prop = create_property(self.seller, name=f'Property {i}', city=f'City {i % 3}')
+            PropertyImage.objects.create(property=prop, image=f'{i}.jpg', is_primary=True)
+            Wishlist.objects.create(user=buyer, property=prop)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def assert_constant_queries(self, url):
+        self.add_properties(2)
+        baseline = self.count_queries(url)
+        self.add_properties(6)
+        self.assertEqual(self.count_queries(url), baseline)
+        return self.client.get(url).json()
+
+    def test_dashboard_stats(self):
+        SellerVerification.objects.create(user=self.seller)
+        data = self.client.get('/api/users/admin/stats/').json()
+        self.assertEqual(data['total_users'], 2)
+        self.assertEqual(data['total_sellers'], 1)
+        self.assertEqual(data['pending_verifications'], 1)
+
+    def test_property_performance(self):
+        data = self.assert_constant_queries('/api/properties/admin/analytics/performance/')
+        self.assertEqual(data['qualityMetrics']['properties_with_images'], 8)
+        self.assertEqual(data['qualityMetrics']['properties_without_images'], 0)
+        self.assertEqual(data['ageDistribution']['less_than_week'], 8)
+        self.assertEqual(len(data['highEngagementProperties']), 8)
+
+    def test_property_analytics(self):
+        data = self.assert_constant_queries('/api/properties/admin/analytics/')
+        self.assertEqual(data['overview']['total'], 8)
+        self.assertEqual(data['overview']['new'], 8)
+        self.assertEqual(data['priceStats']['avg_price'], 250000.0)
+        self.assertEqual(data['topSellers'][0]['property_count'], 8)
+        self.assertEqual(sum(day['count'] for day in data['recentActivity']), 8)
+
+    def test_property_analytics_reports_real_extremes(self):
+        self.add_properties(2)
+        create_property(self.seller, price=Decimal('90000'), number_of_rooms=1)
+        create_property(self.seller, price=Decimal('800000'), number_of_rooms=6, is_available=False)
+        buyers = [User.objects.create_user(username=f'fan{i}') for i in range(3)]
+        for buyer in buyers:
+            Wishlist.objects.create(user=buyer, property=Property.objects.get(name='Property 0'))
+        data = self.client.get('/api/properties/admin/analytics/').json()
+        self.assertEqual((data['priceStats']['min_price'], data['priceStats']['max_price']), (90000.0, 800000.0))
+        self.assertEqual((data['roomStats']['min_rooms'], data['roomStats']['max_rooms']), (1, 6))
+        self.assertEqual(data['engagement']['max_wishlists'], 4)
+        user_data = self.client.get('/api/users/admin/analytics/properties/').json()
+        self.assertEqual(user_data['priceStats']['max_price'], 800000.0)
+
+        snapshot = analytics.get_snapshot(refresh=True)
+        self.assertEqual((snapshot.price_stats['min_price'], snapshot.price_stats['max_price']), (90000.0, 800000.0))
+
+        if connection.vendor == 'sqlite':
+            for ordering in ('price', '-price'):
+                plan = Property.objects.order_by(ordering).values_list('price', flat=True)[:1].explain()
+                self.assertIn('prop_price_idx', plan)
+                self.assertNotIn('SCAN properties_property\n', plan + '\n')
+
+    def test_user_analytics(self):
+        data = self.assert_constant_queries('/api/users/admin/analytics/')
+        self.assertEqual(data['propertyMetrics']['total'], 8)
+        self.assertEqual(data['userGrowth']['newUsers'], 10)
+        self.assertEqual(data['engagement']['wishlistAdds'], 8)
+
+    def test_bulk_deactivate_keeps_rollups_in_sync(self):
+        self.add_properties(3)
+        ids = list(Property.objects.values_list('id', flat=True)[:2])
+        with mock.patch.object(rollups, 'reconcile') as reconcile:
+            response = self.client.post(
+                '/api/properties/admin/properties/bulk-action/',
+                {'property_ids': ids, 'action': 'deactivate'}, format='json',
+            )
+        reconcile.assert_not_called()
+        self.assertEqual(response.json()['message'], 'Deactivated 2 properties')
+        self.assertEqual(rollups.counts('properties.available'), {'true': 1, 'false': 2})
+        # Only the affected rows were diffed, yet a full recount agrees (updated_at buckets included)
+        incremental = rollup_state()
+        rollups.reconcile(metrics=['properties'])
+        self.assertEqual(incremental, rollup_state())
+
+    def test_admin_dashboard_page(self):
+        self.add_properties(3)
+        self.client.force_login(self.admin)
+        response = self.client.get('/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_properties'], 3)
+        self.assertEqual(len(response.context['most_wishlisted']), 3)
+
+
+class AnalyticsSnapshotTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', password='pass', role='admin', is_staff=True, is_superuser=True
+        )
+        seller = User.objects.create_user(username='seller', role='seller')
+        create_property(seller, price=Decimal('100000'))
+        create_property(seller, price=Decimal('300000'), property_type='house')
+        self.client.force_login(self.admin)
+        clear_snapshot()
+
+    def test_snapshot_figures(self):
+        snapshot = get_snapshot()
+        self.assertEqual(snapshot.total_users, 2)
+        self.assertEqual(snapshot.property_types, [('apartment', 1), ('house', 1)])
+        self.assertEqual(snapshot.price_stats['min_price'], Decimal('100000'))
+        self.assertEqual(snapshot.price_stats['max_price'], Decimal('300000'))
+        self.assertEqual(snapshot.new_properties_week, 2)
+
+    @override_settings(DASHBOARD_EXPORT_EAGER=True)
+    def test_page_and_exports_share_one_computation(self):
+        with TemporaryDirectory() as export_dir, override_settings(DASHBOARD_EXPORT_DIR=export_dir), \
+                mock.patch.object(analytics.AnalyticsSnapshot, '__init__', autospec=True,
+                                  side_effect=analytics.AnalyticsSnapshot.__init__) as build:
+            self.assertEqual(self.client.get('/dashboard/').status_code, 200)
+            self.assertEqual(self.client.post('/dashboard/export-pdf/').json()['status'], 'done')
+            self.assertEqual(self.client.post('/dashboard/export-excel/').json()['status'], 'done')
+            self.assertEqual(self.client.get('/dashboard/api/').json()['total_properties'], 2)
+        self.assertEqual(build.call_count, 1)
+
+    def test_refresh_recomputes(self):
+        self.assertEqual(get_snapshot().total_properties, 2)
+        create_property(User.objects.get(username='seller'))
+        self.assertEqual(get_snapshot().total_properties, 2)
+        self.assertEqual(get_snapshot(refresh=True).total_properties, 3)
+
+
+class ExportJobTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', role='admin', is_staff=True)
+        seller = User.objects.create_user(username='seller', role='seller')
+        create_property(seller)
+        self.client.force_login(self.admin)
+        clear_snapshot()
+        self.export_dir = TemporaryDirectory()
+        self.addCleanup(self.export_dir.cleanup)
+        settings_override = override_settings(DASHBOARD_EXPORT_EAGER=True, DASHBOARD_EXPORT_DIR=self.export_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def download(self, url):
+        job = self.client.post(url).json()
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual(self.client.get(job['status_url']).json()['status'], 'done')
+        response = self.client.get(job['download_url'])
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def test_pdf_export(self):
+        response, content = self.download('/dashboard/export-pdf/')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn('attachment; filename="RealEstate_Dashboard_Report_', response['Content-Disposition'])
+        self.assertTrue(content.startswith(b'%PDF'))
+
+    def test_excel_export(self):
+        from io import BytesIO
+        from openpyxl import load_workbook
+
+        _, content = self.download('/dashboard/export-excel/')
+        workbook = load_workbook(BytesIO(content))
+        self.assertEqual(workbook.sheetnames, ['Executive Summary', 'Property Analytics', 'User Analytics'])
+        values = [cell.value for row in workbook['Property Analytics'].iter_rows() for cell in row]
+        self.assertIn('Sample Property', values)
+
+    def test_submit_requires_post_and_staff(self):
+        self.assertEqual(self.client.get('/dashboard/export-pdf/').status_code, 405)
+        self.client.force_login(User.objects.get(username='seller'))
+        self.assertEqual(self.client.post('/dashboard/export-pdf/').status_code, 302)
+
+    def test_jobs_are_private_to_their_requester(self):
+        job = self.client.post('/dashboard/export-pdf/').json()
+        other = User.objects.create_user(username='other', role='admin', is_staff=True)
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(job['status_url']).status_code, 404)
+
+    def test_download_before_done_and_after_expiry(self):
+        job = ExportJob.objects.create(
+            kind=ExportJob.Kind.PDF, requested_by=self.admin, expires_at=timezone.now() + timedelta(hours=1)
+        )
+        self.assertEqual(self.client.get(f'/dashboard/exports/{job.pk}/download/').status_code, 409)
+
+        finished = self.client.post('/dashboard/export-pdf/').json()
+        ExportJob.objects.filter(pk=finished['job_id']).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.client.get(finished['download_url']).status_code, 410)
+        path = ExportJob.objects.get(pk=finished['job_id']).file_path
+        self.assertEqual(jobs.purge_expired_exports(), 1)
+        self.assertFalse(os.path.exists(path))
+
+    def test_failed_job_is_logged_and_marked(self):
+        with mock.patch.dict(jobs.WRITERS, {ExportJob.Kind.PDF: mock.Mock(side_effect=OSError('disk full'))}), \
+                self.assertLogs('dashboard.jobs', level='ERROR') as logs:
+            job = self.client.post('/dashboard/export-pdf/').json()
+        self.assertIn('disk full', logs.output[0])
+        self.assertIn('Traceback', logs.output[0])
+        self.assertEqual(ExportJob.objects.get(pk=job['job_id']).status, ExportJob.Status.FAILED)
+
+    @override_settings(DASHBOARD_EXPORT_MAX_PENDING=1)
+    def test_queue_limit(self):
+        ExportJob.objects.create(kind=ExportJob.Kind.PDF, expires_at=timezone.now() + timedelta(hours=1))
+        self.assertEqual(self.client.post('/dashboard/export-excel/').status_code, 429)
+
+    @override_settings(DASHBOARD_EXPORT_MAX_PENDING=2, DASHBOARD_EXPORT_TIMEOUT=60)
+    def test_stale_jobs_are_failed_and_free_the_queue(self):
+        long_ago = timezone.now() - timedelta(minutes=5)
+        expires_at = timezone.now() + timedelta(hours=1)
+        pending = ExportJob.objects.create(kind=ExportJob.Kind.PDF, expires_at=expires_at)
+        running = ExportJob.objects.create(
+            kind=ExportJob.Kind.PDF, status=ExportJob.Status.RUNNING, started_at=long_ago, expires_at=expires_at
+        )
+        ExportJob.objects.filter(pk=pending.pk).update(created_at=long_ago)
+
+        with self.assertLogs('dashboard.jobs', level='WARNING'):
+            job = self.client.post('/dashboard/export-excel/').json()
+        self.assertEqual(job['status'], 'done')
+        for stale in (pending, running):
+            stale.refresh_from_db()
+            self.assertEqual(stale.status, ExportJob.Status.FAILED)
+            self.assertTrue(stale.error)
+
+
+class BackgroundExportTests(TransactionTestCase):
+    def test_worker_thread_generates_file(self):
+        admin = User.objects.create_user(username='admin', role='admin', is_staff=True)
+        self.client.force_login(admin)
+        clear_snapshot()
+        with TemporaryDirectory() as export_dir, override_settings(DASHBOARD_EXPORT_DIR=export_dir):
+            job = self.client.post('/dashboard/export-excel/').json()
+            deadline = time.monotonic() + 30
+            while job['status'] in ('pending', 'running') and time.monotonic() < deadline:
+                time.sleep(0.05)
+                job = self.client.get(job['status_url']).json()
+            self.assertEqual(job['status'], 'done', job['error'])
+            response = self.client.get(job['download_url'])
+            self.assertEqual(response.status_code, 200)
+            response.close()
@@ -7,5 +7,7 @@ urlpatterns = [
     path('api/', views.dashboard_api, name='dashboard-api'),   
     path('export-pdf/', views.export_dashboard_pdf, name='export-pdf'),  
     path('export-excel/', views.export_dashboard_excel, name='export-excel'),  
+    path('exports/<uuid:job_id>/', views.export_status, name='export-status'),
+    path('exports/<uuid:job_id>/download/', views.export_download, name='export-download'),
     
 ]
\ No newline at end of file
@@ -0,0 +1,304 @@
+# properties/geocoding.py
+"""
+Coordinates for property addresses.
+
+``Property.save()`` fills ``latitude``/``longitude``/``location_precision``
+whenever the address or city changes, so the map renders straight from the
+API. Geocoders are pluggable (PROPERTY_GEOCODERS, tried in order, first hit
+wins):
+
+* GazetteerGeocoder - offline, the default and the test backend. It knows
+  German cities by name (with English and ASCII spellings) and postcodes by
+  their two-digit region (data/gazetteer_de.csv).
+* NominatimGeocoder - street-level results from OpenStreetMap, at most one
+  request per second as its usage policy asks.
+
+A save only ever waits for offline geocoders and for the GeocodedAddress
+cache. When online geocoders are configured, the save stores the offline
+answer and a background worker then asks the full chain (so list the online
+ones first) and caches the result, so each distinct address reaches a
+third-party service once.
+``geocode_properties`` backfills existing rows in batches, one lookup per
+distinct address.
+"""
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), 'data', 'gazetteer_de.csv')
+POSTCODE_RE = re.compile(r'(?<!\d)(\d{5})(?!\d)')
+MAX_QUERY_LENGTH = 255
+UMLAUTS = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+
+# From most to least exact
+ADDRESS, POSTCODE, CITY = 'address', 'postcode', 'city'
+PRECISIONS = [(ADDRESS, 'Address'), (POSTCODE, 'Postcode region'), (CITY, 'City')]
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Location:
+    latitude: float
+    longitude: float
+    precision: str
+    provider: str = ''
+
+
+def normalize(text):
+    """Lowercase, umlauts spelled out, accents and punctuation dropped: 'Köln' and 'Koeln' match"""
+    text = (text or '').lower().translate(UMLAUTS)
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(re.sub(r'[^\w/.]+', ' ', text).split())
+
+
+def query_key(address, city):
+    """The cache key of an address; equal for spellings that only differ in case, umlauts or spacing"""
+    key = f'{normalize(address)}|{normalize(city)}'
+    if len(key) > MAX_QUERY_LENGTH:
+        key = key[:MAX_QUERY_LENGTH - 41] + '#' + hashlib.sha1(key.encode()).hexdigest()
+    return key
+
+
+class Geocoder:
+    """Resolves an address to a Location, or None. ``offline`` geocoders may run inside a save."""
+    name = ''
+    offline = True
+
+    def geocode(self, address, city):
+        raise NotImplementedError
+
+
+class GazetteerGeocoder(Geocoder):
+    name = 'gazetteer'
+
+    def geocode(self, address, city):
+        cities, regions = gazetteer()
+        words = normalize(city).split()
+        # 'Berlin-Mitte', 'Köln (Ehrenfeld)', 'Hamburg, Altona' fall back to the city before the district
+        for length in range(len(words), 0, -1):
+            candidate = ' '.join(words[:length])
+            if candidate in cities:
+                return Location(*cities[candidate], CITY, self.name)
+        for postcode in POSTCODE_RE.findall(f'{address} {city}'):
+            if postcode[:2] in regions:
+                return Location(*regions[postcode[:2]], POSTCODE, self.name)
+        return None
+
+
+@lru_cache(maxsize=1)
+def gazetteer():
+    """({normalized city name or alias: (lat, lng)}, {two-digit postcode region: (lat, lng)})"""
+    cities, regions = {}, {}
+    with open(GAZETTEER_PATH, encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            point = (float(row['latitude']), float(row['longitude']))
+            for name in [row['name'], *filter(None, row['aliases'].split('|'))]:
+                cities[normalize(name)] = point
+            for region in filter(None, row['postcode_regions'].split('|')):
+                regions[region] = point
+    return cities, regions
+
+
+class NominatimGeocoder(Geocoder):
+    name = 'nominatim'
+    offline = False
+    _lock = threading.Lock()
+    _last_request = 0.0
+
+    def geocode(self, address, city):
+        url = getattr(settings, 'PROPERTY_GEOCODER_NOMINATIM_URL', 'https://nominatim.openstreetmap.org/search')
+        params = urlencode({'q': f'{address}, {city}', 'countrycodes': 'de', 'format': 'jsonv2', 'limit': 1})
+        request = Request(f'{url}?{params}', headers={
+            'User-Agent': getattr(settings, 'PROPERTY_GEOCODER_USER_AGENT', 'real-estate-backend'),
+        })
+        with NominatimGeocoder._lock:
+            # Usage policy: one request per second per application
+            wait = NominatimGeocoder._last_request + 1.0 - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                with urlopen(request, timeout=10) as response:
+                    results = json.load(response)
+            finally:
+                NominatimGeocoder._last_request = time.monotonic()
+        if not results:
+            return None
+        return Location(float(results[0]['lat']), float(results[0]['lon']), ADDRESS, self.name)
+
+
+@lru_cache(maxsize=None)
+def load_geocoders(paths):
+    return [import_string(path)() for path in paths]
+
+
+def get_geocoders():
+    return load_geocoders(tuple(getattr(settings, 'PROPERTY_GEOCODERS', ['properties.geocoding.GazetteerGeocoder'])))
+
+
+def has_online_geocoders():
+    return any(not geocoder.offline for geocoder in get_geocoders())
+
+
+def resolve(address, city, offline_only=False):
+    """The first answer of the configured geocoders; one failing is logged and skipped"""
+    for geocoder in get_geocoders():
+        if offline_only and not geocoder.offline:
+            continue
+        try:
+            location = geocoder.geocode(address, city)
+        except Exception as e:
+            logger.warning(f"Geocoder {geocoder.name or type(geocoder).__name__} failed for {address!r}, {city!r}: {e}")
+            continue
+        if location is not None:
+            return location
+    return None
+
+
+def cached(keys):
+    """{query key: Location or None for a cached miss} for the cached ones among ``keys``"""
+    from .models import GeocodedAddress
+
+    return {
+        entry.query: entry.location()
+        for entry in GeocodedAddress.objects.filter(query__in=list(keys))
+    }
+
+
+def store(results):
+    """Cache {query key: Location or None}"""
+    from .models import GeocodedAddress
+
+    GeocodedAddress.objects.bulk_create(
+        [GeocodedAddress.from_location(key, location) for key, location in results.items()],
+        update_conflicts=True,
+        unique_fields=['query'],
+        update_fields=['latitude', 'longitude', 'precision', 'provider', 'updated_at'],
+    )
+
+
+def geocode_many(addresses, refresh=False):
+    """
+    {query key: Location or None} for (address, city) pairs, each distinct
+    address resolved once. With online geocoders configured, answers come
+    from and go to the cache (``refresh`` skips reading it).
+    """
+    pending = {}
+    for address, city in addresses:
+        pending.setdefault(query_key(address, city), (address, city))
+    if not has_online_geocoders():
+        return {key: resolve(address, city) for key, (address, city) in pending.items()}
+
+    results = {} if refresh else cached(pending)
+    fresh = {key: resolve(address, city) for key, (address, city) in pending.items() if key not in results}
+    if fresh:
+        store(fresh)
+    return {**results, **fresh}
+
+
+def apply(prop, location):
+    prop.latitude = location.latitude if location else None
+    prop.longitude = location.longitude if location else None
+    prop.location_precision = location.precision if location else ''
+
+
+def needs_geocoding(prop):
+    """Whether ``prop`` is new without coordinates or its address changed since it was loaded"""
+    loaded = getattr(prop, '_loaded_address', None)
+    if loaded is None:
+        return prop._state.adding and prop.latitude is None
+    return loaded != (prop.address, prop.city)
+
+
+def locate(prop):
+    """
+    Fill ``prop``'s coordinates without waiting for a third-party service:
+    from the cache, else from the offline geocoders. Flags the property for
+    a background lookup when online geocoders could do better.
+    """
+    location = None
+    if has_online_geocoders():
+        key = query_key(prop.address, prop.city)
+        hits = cached([key])
+        location = hits.get(key)
+        prop._geocode_pending = key not in hits
+    if location is None:
+        location = resolve(prop.address, prop.city, offline_only=True)
+    apply(prop, location)
+
+
+def geocode_property(property_id):
+    """Ask the full geocoder chain (through the cache) and store the answer if the address is unchanged"""
+    from . import spatial
+    from .models import Property
+
+    row = Property.objects.filter(pk=property_id).values('address', 'city', 'latitude', 'longitude').first()
+    if row is None:
+        return False
+    location = geocode_many([(row['address'], row['city'])])[query_key(row['address'], row['city'])]
+    if location is None:
+        return False
+    # update() rather than save(): the address didn't change, so there is nothing to re-geocode
+    updated = Property.objects.filter(pk=property_id, address=row['address'], city=row['city']).update(
+        latitude=location.latitude, longitude=location.longitude, location_precision=location.precision,
+        updated_at=timezone.now(),
+    )
+    if updated:
+        spatial.relocate([(
+            property_id, spatial.point_of(row['latitude'], row['longitude']),
+            spatial.point_of(location.latitude, location.longitude),
+        )])
+    return bool(updated)
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'PROPERTY_GEOCODE_WORKERS', 1),
+                thread_name_prefix='property-geocoding',
+            )
+        return _executor
+
+
+def schedule_geocode(property_id):
+    if getattr(settings, 'PROPERTY_GEOCODE_EAGER', False):
+        run_geocode(property_id)
+    else:
+        get_executor().submit(run_in_worker, property_id)
+
+
+def run_in_worker(property_id):
+    close_old_connections()
+    try:
+        run_geocode(property_id)
+    finally:
+        close_old_connections()
+
+
+def run_geocode(property_id):
+    try:
+        geocode_property(property_id)
+    except Exception as e:
+        logger.error(f"Geocoding property {property_id} failed: {e}")
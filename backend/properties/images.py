@@ -0,0 +1,198 @@
+# properties/images.py
+"""
+Responsive renditions for PropertyImage uploads.
+
+After an image is saved a worker thread decodes the original once and writes
+AVIF/WebP copies at PROPERTY_IMAGE_WIDTHS next to it, plus a tiny blurred
+WebP placeholder stored inline as a data URI. The rendition names are kept in
+``PropertyImage.renditions`` so the API can hand out a ``srcset`` instead of
+the full-size upload.
+"""
+import base64
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections
+from PIL import Image, ImageFilter, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+MIME_TYPES = {
+    'avif': 'image/avif',
+    'webp': 'image/webp',
+}
+QUALITY = {
+    'avif': 50,
+    'webp': 75,
+}
+PLACEHOLDER_WIDTH = 16
+EXIF_ORIENTATION = 0x0112
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def rendition_widths():
+    return sorted(getattr(settings, 'PROPERTY_IMAGE_WIDTHS', (320, 640, 1024, 1600)))
+
+
+def rendition_formats():
+    """Configured formats this Pillow build can actually encode, best first."""
+    formats = getattr(settings, 'PROPERTY_IMAGE_FORMATS', ('avif', 'webp'))
+    return [fmt for fmt in formats if fmt in MIME_TYPES and features.check(fmt)]
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'PROPERTY_IMAGE_WORKERS', 2),
+                thread_name_prefix='property-images',
+            )
+        return _executor
+
+
+def needs_renditions(image):
+    return bool(image.image) and (image.renditions or {}).get('source') != image.image.name
+
+
+def schedule_renditions(image_id):
+    if getattr(settings, 'PROPERTY_IMAGE_EAGER', False):
+        generate_renditions(image_id)
+    else:
+        get_executor().submit(run_in_worker, image_id)
+
+
+def run_in_worker(image_id):
+    close_old_connections()
+    try:
+        generate_renditions(image_id)
+    except Exception as e:
+        logger.exception(f"Image renditions for {image_id} failed: {e}")
+    finally:
+        close_old_connections()
+
+
+def target_widths(original_width):
+    """Configured widths below the original; never upscale."""
+    widths = [width for width in rendition_widths() if width < original_width]
+    return widths or [original_width]
+
+
+def encode(img, fmt, **options):
+    buffer = BytesIO()
+    img.save(buffer, format=fmt.upper(), quality=QUALITY[fmt], **options)
+    return buffer.getvalue()
+
+
+def make_placeholder(img):
+    height = max(1, round(img.height * PLACEHOLDER_WIDTH / img.width))
+    tiny = img.resize((PLACEHOLDER_WIDTH, height), Image.BILINEAR, reducing_gap=2.0)
+    tiny = tiny.filter(ImageFilter.GaussianBlur(1))
+    buffer = BytesIO()
+    tiny.save(buffer, format='WEBP', quality=30)
+    return 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+def generate_renditions(image_id, force=False):
+    """Write the renditions for one PropertyImage. Returns False when skipped."""
+    from .models import Property, PropertyImage
+
+    image = PropertyImage.objects.filter(pk=image_id).first()
+    if image is None or not image.image or (not force and not needs_renditions(image)):
+        return False
+
+    storage = image.image.storage
+    source_name = image.image.name
+    with image.image.open('rb') as original:
+        img = Image.open(original)
+        width, height = img.size
+        if img.getexif().get(EXIF_ORIENTATION) in (5, 6, 7, 8):
+            width, height = height, width
+        # JPEG can decode straight at a reduced scale, which is most of the work for big photos
+        img.draft('RGB', (rendition_widths()[-1], rendition_widths()[-1]))
+        img = ImageOps.exif_transpose(img)
+        img.load()
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if 'A' in img.getbands() or 'transparency' in img.info else 'RGB')
+
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+    folder = f'properties/renditions/{image.pk}'
+    renditions = {'source': source_name}
+    # Resize from the largest rendition down so each step works on fewer pixels
+    current = img
+    for target in sorted(target_widths(img.width), reverse=True):
+        if target != current.width:
+            size = (target, max(1, round(img.height * target / img.width)))
+            current = current.resize(size, Image.LANCZOS, reducing_gap=3.0)
+        for fmt in rendition_formats():
+            name = storage.save(f'{folder}/{stem}-{target}.{fmt}', ContentFile(encode(current, fmt)))
+            renditions.setdefault(fmt, {})[str(target)] = name
+
+    old_names = rendition_names(image)
+    updated = PropertyImage.objects.filter(pk=image.pk, image=source_name).update(
+        renditions=renditions,
+        placeholder=make_placeholder(img),
+        width=width,
+        height=height,
+    )
+    if updated:
+        Property.objects.filter(pk=image.property_id).touch()
+    delete_files(storage, old_names)
+    return True
+
+
+def rendition_names(image):
+    return [
+        name
+        for fmt in MIME_TYPES
+        for name in ((image.renditions or {}).get(fmt) or {}).values()
+    ]
+
+
+def delete_files(storage, names):
+    for name in names:
+        try:
+            storage.delete(name)
+        except Exception as e:
+            logger.warning(f"Could not delete rendition {name}: {e}")
+
+
+def absolute_url(request, url):
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def srcset(image, fmt, request=None):
+    """'url 320w, url 640w' for one format, or '' before the renditions exist."""
+    by_width = (image.renditions or {}).get(fmt) or {}
+    storage = image.image.storage
+    return ', '.join(
+        f'{absolute_url(request, storage.url(name))} {width}w'
+        for width, name in sorted(by_width.items(), key=lambda item: int(item[0]))
+    )
+
+
+def responsive_fields(image, request=None):
+    """
+    Extra keys for an image payload: ``srcset`` (WebP, for a plain <img>),
+    ``sources`` (one entry per format for <picture>), ``placeholder`` and the
+    original dimensions.
+    """
+    sources = [
+        {'type': MIME_TYPES[fmt], 'srcset': value}
+        for fmt in MIME_TYPES
+        if (value := srcset(image, fmt, request))
+    ]
+    return {
+        'srcset': srcset(image, 'webp', request),
+        'sources': sources,
+        'placeholder': image.placeholder or None,
+        'width': image.width,
+        'height': image.height,
+    }
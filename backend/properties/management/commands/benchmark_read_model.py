@@ -0,0 +1,89 @@
+# properties/management/commands/benchmark_read_model.py
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from properties.readmodel import ColumnarSnapshot
+
+CITIES = ['Berlin', 'München', 'Hamburg', 'Frankfurt', 'Köln', 'Stuttgart', 'Düsseldorf', 'Leipzig', 'Dresden', 'Bremen']
+TYPES = ['apartment', 'house', 'villa', 'land', 'commercial']
+QUERIES = [
+    ('newest first', {}, 'created_at', True),
+    ('city, newest first', {'city': 'Berlin', 'is_available': True}, 'created_at', True),
+    ('city + type + price range, by price', {
+        'city': 'Hamburg', 'property_type': 'house', 'price_min': 300000, 'price_max': 600000,
+    }, 'price', False),
+    ('selective: 8+ rooms in Bremen, by size', {'city': 'Bremen', 'bedrooms': 8}, 'size', True),
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark filter + sort + page latency of the columnar read model over synthetic listings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100000,1000000', help='Comma separated listing counts to benchmark')
+        parser.add_argument('--repeat', type=int, default=50, help='Runs per query')
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--changes', type=int, default=2000, help='Rows changed before timing the merged path')
+
+    def handle(self, *args, **options):
+        for size in [int(size) for size in options['sizes'].split(',')]:
+            self.run_size(size, options)
+
+    def run_size(self, size, options):
+        rng = random.Random(size)
+        start_date = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        rows = [
+            (i, rng.randrange(50_000, 2_000_000, 1000), rng.randrange(20, 400), rng.randint(1, 9),
+             rng.choice(TYPES), rng.choice(CITIES), start_date + timedelta(minutes=i), rng.random() < 0.9)
+            for i in range(1, size + 1)
+        ]
+        start = time.perf_counter()
+        snapshot = ColumnarSnapshot.build(rows)
+        build = time.perf_counter() - start
+        self.stdout.write(
+            f'\n{size} listings: built in {build:.1f}s, {snapshot.nbytes() / 1024 / 1024:.0f} MB\n'
+            f"{'query':<40} {'page 1 p50 (ms)':>16} {'p95 (ms)':>9} {'page 50 p50 (ms)':>17} {'changed p50 (ms)':>17}"
+        )
+
+        timings = {name: self.time_query(snapshot, criteria, field, descending, options)
+                   for name, criteria, field, descending in QUERIES}
+        # Rows changed since the last sort are merged into every page
+        with_changes = ColumnarSnapshot.build(rows)
+        with_changes.apply([
+            (row[0], row[1] * 1.1, *row[2:]) for row in rng.sample(rows, options['changes'])
+        ], [])
+        for name, criteria, field, descending in QUERIES:
+            first, p95, deep = timings[name]
+            changed, _, _ = self.time_query(with_changes, criteria, field, descending, options, deep_pages=0)
+            self.stdout.write(f'{name:<40} {first:>16.2f} {p95:>9.2f} {deep:>17.2f} {changed:>17.2f}')
+
+    def time_query(self, snapshot, criteria, field, descending, options, deep_pages=50):
+        page_size = options['page_size']
+        first = []
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            snapshot.page(criteria, field, descending, None, page_size + 1)
+            first.append((time.perf_counter() - start) * 1000)
+
+        # The cursor of page ``deep_pages``, then time the page after it
+        deep = [0.0]
+        position = None
+        for _ in range(deep_pages):
+            ids = snapshot.page(criteria, field, descending, position, page_size)
+            if not ids:
+                break
+            row = snapshot.row_of[ids[-1]]
+            position = (snapshot.columns[field][row], ids[-1])
+        if deep_pages and position is not None:
+            deep = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                snapshot.page(criteria, field, descending, position, page_size + 1)
+                deep.append((time.perf_counter() - start) * 1000)
+        first.sort()
+        return statistics.median(first), first[int(len(first) * 0.95) - 1], statistics.median(deep)
@@ -0,0 +1,81 @@
+# properties/management/commands/benchmark_vector_search.py
+import itertools
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from properties.vectors import VectorIndex, get_dimensions
+
+CITIES = ['Berlin', 'München', 'Hamburg', 'Frankfurt', 'Köln', 'Stuttgart', 'Düsseldorf', 'Leipzig', 'Dresden', 'Bremen']
+WORDS = [
+    'bright', 'modern', 'family', 'garden', 'balcony', 'renovated', 'quiet', 'central', 'spacious', 'loft',
+    'terrace', 'park', 'villa', 'apartment', 'house', 'penthouse', 'office', 'kitchen', 'parking', 'view',
+    'altbau', 'wohnung', 'haus', 'neubau', 'zentral', 'ruhig', 'hell', 'grün', 'lake', 'river',
+]
+QUERIES = [
+    'bright family home near a park', 'quiet apartment with a balcony', 'penthouse with a view of the river',
+    'helle Wohnung mit Garten', 'modern loft in the city centre', 'spacious house close to the lake',
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark top-k vector search latency over synthetic listings in a throwaway index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000,100000', help='Comma separated listing counts to benchmark')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query')
+        parser.add_argument('--k', type=int, default=8, help='Listings returned per query')
+        parser.add_argument('--dimensions', type=int, default=get_dimensions())
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'listings':>10} {'build (s)':>10} {'size (MB)':>10} {'p50 (ms)':>9} {'p95 (ms)':>9} "
+            f"{'10% pre-filter p50 (ms)':>24}"
+        )
+        for size in [int(size) for size in options['sizes'].split(',')]:
+            self.run_size(size, options)
+
+    def run_size(self, size, options):
+        rng = random.Random(size)
+        filler = [''.join(rng.choices('abcdefghiklmnoprstuw', k=rng.randint(4, 9))) for _ in range(5000)]
+        vocabulary = filler + WORDS
+        weights = list(itertools.accumulate([1.0] * len(filler) + [0.5] * len(WORDS)))
+        # Generated up front so the build time is the index's alone
+        listings = [
+            (i, f"{' '.join(rng.choices(vocabulary, cum_weights=weights, k=3)).title()} in {rng.choice(CITIES)}",
+             ' '.join(rng.choices(vocabulary, cum_weights=weights, k=40)))
+            for i in range(1, size + 1)
+        ]
+        path = tempfile.mkdtemp(prefix='vector-index-')
+        try:
+            index = VectorIndex(path, options['dimensions'])
+            start = time.perf_counter()
+            index.build(listings, size + 1)
+            build = time.perf_counter() - start
+            megabytes = index.vectors.nbytes / 1024 / 1024
+
+            # Pre-filtering: e.g. the ids a city/price filter left over
+            subset = np.sort(rng.sample(range(1, size + 1), size // 10))
+            full, filtered = [], []
+            index.search(QUERIES[0], options['k'])   # map the file before timing
+            for query in QUERIES:
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    index.search(query, options['k'])
+                    full.append((time.perf_counter() - start) * 1000)
+                    start = time.perf_counter()
+                    index.search(query, options['k'], ids=subset)
+                    filtered.append((time.perf_counter() - start) * 1000)
+            full.sort()
+            self.stdout.write(
+                f"{size:>10} {build:>10.1f} {megabytes:>10.1f} {statistics.median(full):>9.2f} "
+                f"{full[int(len(full) * 0.95) - 1]:>9.2f} {statistics.median(filtered):>24.2f}"
+            )
+        finally:
+            index.vectors = None
+            shutil.rmtree(path, ignore_errors=True)
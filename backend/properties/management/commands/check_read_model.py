@@ -0,0 +1,75 @@
+# properties/management/commands/check_read_model.py
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+from properties import readmodel
+from properties.models import Property
+from properties.views import PropertyListCreateView
+
+ORDERINGS = ['', 'price', '-price', 'size', '-size', 'created_at']
+
+
+class Command(BaseCommand):
+    help = 'Compare property list pages from the columnar read model with the ORM path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--samples', type=int, default=30, help='Random filter combinations to compare')
+        parser.add_argument('--pages', type=int, default=3, help='Pages walked per combination')
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.view = PropertyListCreateView.as_view()
+        # Any allowed host, so the absolute next links resolve
+        host = next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost')
+        self.factory = APIRequestFactory(SERVER_NAME=host)
+        mismatches = 0
+        for params in self.sample(options['samples'], random.Random(options['seed'])):
+            params['page_size'] = options['page_size']
+            with override_settings(PROPERTY_READ_MODEL=False):
+                expected = self.walk(params, options['pages'])
+            readmodel.reset()
+            with override_settings(PROPERTY_READ_MODEL=True):
+                actual = self.walk(params, options['pages'])
+            if actual != expected:
+                mismatches += 1
+                self.stdout.write(self.style.ERROR(f'Mismatch for {params}: {actual} != {expected}'))
+        if mismatches:
+            raise CommandError(f'{mismatches} of {options["samples"]} request(s) differ between the read model and the ORM')
+        self.stdout.write(self.style.SUCCESS(f'{options["samples"]} request(s) match the ORM over {options["pages"]} page(s)'))
+
+    def sample(self, count, rng):
+        cities = list(Property.objects.values_list('city', flat=True).distinct()) or ['Berlin']
+        types = [value for value, _ in Property.PROPERTY_TYPES]
+        prices = sorted(Property.objects.values_list('price', flat=True)[:1000]) or [0]
+        for _ in range(count):
+            params = {}
+            if rng.random() < 0.5:
+                params['city'] = rng.choice(cities)
+            if rng.random() < 0.4:
+                params['property_type'] = rng.choice(types)
+            if rng.random() < 0.4:
+                low, high = sorted(rng.sample(prices, 2) if len(prices) > 1 else prices * 2)
+                params['price_min'], params['price_max'] = int(low), int(high)
+            if rng.random() < 0.3:
+                params['bedrooms'] = rng.randint(1, 5)
+            if rng.random() < 0.3:
+                params['is_available'] = rng.choice(['true', 'false'])
+            if ordering := rng.choice(ORDERINGS):
+                params['ordering'] = ordering
+            yield params
+
+    def walk(self, params, pages):
+        """Ids of each page, following the next links"""
+        walked, request = [], self.factory.get('/api/properties/', params)
+        for _ in range(pages):
+            data = self.view(request).data
+            walked.append([item['id'] for item in data['results']])
+            if not data['next']:
+                break
+            request = self.factory.get(data['next'])
+        return walked
@@ -0,0 +1,23 @@
+# properties/management/commands/generate_image_renditions.py
+from django.core.management.base import BaseCommand
+
+from properties.images import generate_renditions
+from properties.models import PropertyImage
+
+
+class Command(BaseCommand):
+    help = 'Generate AVIF/WebP renditions and placeholders for property images that are missing them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate renditions that already exist')
+
+    def handle(self, *args, **options):
+        generated = failed = 0
+        for image_id in PropertyImage.objects.order_by('id').values_list('id', flat=True).iterator():
+            try:
+                if generate_renditions(image_id, force=options['force']):
+                    generated += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f'Image {image_id}: {e}')
+        self.stdout.write(self.style.SUCCESS(f'Generated renditions for {generated} images ({failed} failed)'))
@@ -0,0 +1,49 @@
+# properties/management/commands/geocode_properties.py
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from properties import geocoding, spatial
+from properties.models import Property
+
+
+class Command(BaseCommand):
+    help = 'Fill in coordinates for properties that have none, one geocoder lookup per distinct address'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Geocode every property, not only those without coordinates')
+        parser.add_argument('--refresh', action='store_true', help='Ask the geocoders again instead of the cache')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        queryset = Property.objects.order_by('pk')
+        if not options['all']:
+            queryset = queryset.filter(latitude__isnull=True)
+        located = missed = 0
+        last = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last).only(
+                'pk', 'address', 'city', 'latitude', 'longitude',
+            )[:options['batch_size']])
+            if not batch:
+                break
+            last = batch[-1].pk
+            locations = geocoding.geocode_many(
+                [(prop.address, prop.city) for prop in batch], refresh=options['refresh'],
+            )
+            moves = []
+            now = timezone.now()
+            for prop in batch:
+                location = locations[geocoding.query_key(prop.address, prop.city)]
+                before = spatial.point_of(prop.latitude, prop.longitude)
+                geocoding.apply(prop, location)
+                prop.updated_at = now
+                moves.append((prop.pk, before, spatial.point_of(prop.latitude, prop.longitude)))
+                if location is None:
+                    missed += 1
+                else:
+                    located += 1
+            # bulk_update() rather than save(): the addresses are unchanged. It skips
+            # auto_now, so updated_at is set above to keep conditional GETs honest
+            Property.objects.bulk_update(batch, ['latitude', 'longitude', 'location_precision', 'updated_at'])
+            spatial.relocate(moves)
+        self.stdout.write(self.style.SUCCESS(f'Located {located} properties ({missed} addresses not found)'))
@@ -0,0 +1,18 @@
+# properties/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+
+from properties.models import Property
+from properties.search import fts_enabled, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the property full-text search index from the properties table'
+
+    def handle(self, *args, **options):
+        if not fts_enabled():
+            self.stdout.write('Search index is maintained by the database on this backend; nothing to rebuild.')
+            return
+        rebuild_index()
+        self.stdout.write(
+            self.style.SUCCESS(f'Indexed {Property.objects.count()} properties')
+        )
@@ -0,0 +1,18 @@
+# properties/management/commands/rebuild_spatial_index.py
+from django.core.management.base import BaseCommand
+
+from properties.models import Property
+from properties.spatial import rebuild_index, rtree_enabled
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the R*Tree of property coordinates behind the map from the properties table'
+
+    def handle(self, *args, **options):
+        if not rtree_enabled():
+            self.stdout.write('The map filters on latitude/longitude directly on this backend; nothing to rebuild.')
+            return
+        rebuild_index()
+        self.stdout.write(
+            self.style.SUCCESS(f'Indexed {Property.objects.filter(latitude__isnull=False).count()} properties')
+        )
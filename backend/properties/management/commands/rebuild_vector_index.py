@@ -0,0 +1,17 @@
+# properties/management/commands/rebuild_vector_index.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from properties.vectors import get_index, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the vector index of property names and descriptions used by the chatbot'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {count} available properties in {time.perf_counter() - start:.1f}s ({get_index().path})'
+        ))
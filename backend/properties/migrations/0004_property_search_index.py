@@ -0,0 +1,36 @@
+from django.db import migrations
+
+from properties.search import (
+    FTS_CREATE_SQL, FTS_DROP_SQL, FTS_POPULATE_SQL, POSTGRES_INDEX_NAME, POSTGRES_VECTOR_SQL,
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(FTS_CREATE_SQL)
+        schema_editor.execute(FTS_POPULATE_SQL)
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {POSTGRES_INDEX_NAME} "
+            f"ON properties_property USING gin (({POSTGRES_VECTOR_SQL}))"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(FTS_DROP_SQL)
+    elif vendor == 'postgresql':
+        schema_editor.execute(f"DROP INDEX IF EXISTS {POSTGRES_INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0003_alter_propertyimage_options'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0004_property_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['-created_at'], name='prop_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['seller', '-created_at'], name='prop_seller_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['-created_at'], name='prop_avail_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['city', 'price'], name='prop_avail_city_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['property_type', 'price'], name='prop_avail_type_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['price'], name='prop_avail_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['number_of_rooms', 'price'], name='prop_avail_rooms_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='propertyimage',
+            index=models.Index(fields=['property', 'is_primary'], name='propimage_property_primary_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wishlist',
+            index=models.Index(fields=['property', 'created_at'], name='wishlist_property_created_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0005_property_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertyimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='placeholder',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
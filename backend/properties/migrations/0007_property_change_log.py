@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0006_image_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('property_id', models.IntegerField()),
+                ('changed_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
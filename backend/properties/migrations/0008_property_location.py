@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0007_property_change_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodedAddress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(max_length=255, unique=True)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('precision', models.CharField(blank=True, choices=[('address', 'Address'), ('postcode', 'Postcode region'), ('city', 'City')], max_length=20)),
+                ('provider', models.CharField(blank=True, max_length=50)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Geocoded addresses',
+            },
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='location_precision',
+            field=models.CharField(blank=True, choices=[('address', 'Address'), ('postcode', 'Postcode region'), ('city', 'City')], max_length=20),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+from properties.spatial import RTREE_CREATE_SQL, RTREE_DROP_SQL, RTREE_POPULATE_SQL
+
+
+def create_spatial_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(RTREE_CREATE_SQL)
+        schema_editor.execute(RTREE_POPULATE_SQL)
+
+
+def drop_spatial_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(RTREE_DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0008_property_location'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_spatial_index, drop_spatial_index),
+    ]
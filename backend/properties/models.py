@@ -1,6 +1,32 @@
 # properties/models.py
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
+
+from . import geocoding
+
+
+class PropertyQuerySet(models.QuerySet):
+    def touch(self):
+        """Bump ``updated_at`` without a save, e.g. when the images shown with the properties change."""
+        return self.update(updated_at=timezone.now())
+
+    def with_wishlist_status(self, user):
+        """
+        Annotate each property with ``is_wishlisted`` for the given user.
+        Resolves wishlist membership for the whole page inside the main query
+        instead of one EXISTS lookup per serialized row.
+        """
+        if user is None or not user.is_authenticated:
+            return self.annotate(
+                is_wishlisted=models.Value(False, output_field=models.BooleanField())
+            )
+        return self.annotate(
+            is_wishlisted=models.Exists(
+                Wishlist.objects.filter(user=user, property=models.OuterRef('pk'))
+            )
+        )
+
 
 class Property(models.Model):
     PROPERTY_TYPES = [
@@ -27,14 +53,74 @@ class Property(models.Model):
     is_available = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Filled in from address/city on save by properties/geocoding.py
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    location_precision = models.CharField(max_length=20, choices=geocoding.PRECISIONS, blank=True)
+
+    objects = PropertyQuerySet.as_manager()
     
     class Meta:
         verbose_name_plural = "Properties"
         ordering = ['-created_at']
+        # Matched to PropertyFilter and the chatbot search (chatbot/services/search.py):
+        # listings filter on availability plus city/type and a price range, and sort newest first.
+        # Availability is a partial-index condition because Django renders is_available=True as a
+        # bare column test, which SQLite can't use as the leading equality of a composite index.
+        indexes = [
+            models.Index(fields=['-created_at'], name='prop_created_idx'),
+            models.Index(fields=['seller', '-created_at'], name='prop_seller_created_idx'),
+            models.Index(
+                fields=['-created_at'],
+                condition=models.Q(is_available=True),
+                name='prop_avail_created_idx',
+            ),
+            models.Index(
+                fields=['city', 'price'],
+                condition=models.Q(is_available=True),
+                name='prop_avail_city_price_idx',
+            ),
+            models.Index(
+                fields=['property_type', 'price'],
+                condition=models.Q(is_available=True),
+                name='prop_avail_type_price_idx',
+            ),
+            models.Index(
+                fields=['price'],
+                condition=models.Q(is_available=True),
+                name='prop_avail_price_idx',
+            ),
+            # Cheapest and dearest listing of any availability (dashboard.rollups.price_range)
+            models.Index(fields=['price'], name='prop_price_idx'),
+            models.Index(
+                fields=['number_of_rooms', 'price'],
+                condition=models.Q(is_available=True),
+                name='prop_avail_rooms_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.price} euros"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so save() only geocodes when the address actually changed
+        if 'address' in instance.__dict__ and 'city' in instance.__dict__:
+            instance._loaded_address = (instance.address, instance.city)
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'address', 'city'} & set(update_fields):
+            if geocoding.needs_geocoding(self):
+                geocoding.locate(self)
+                if update_fields is not None:
+                    kwargs['update_fields'] = {*update_fields, 'latitude', 'longitude', 'location_precision'}
+        super().save(*args, **kwargs)
+        if 'address' in self.__dict__ and 'city' in self.__dict__:
+            self._loaded_address = (self.address, self.city)
+
 
 
 # properties/models.py
@@ -47,6 +133,11 @@ class PropertyImage(models.Model):
     image = models.ImageField(upload_to='properties/')
     is_primary = models.BooleanField(default=False)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    # Filled in by properties/images.py after upload: {'source': name, 'webp': {'320': name, ...}, 'avif': {...}}
+    renditions = models.JSONField(default=dict, blank=True)
+    placeholder = models.TextField(blank=True)  # tiny blurred WebP as a data URI
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
     
     def __str__(self):
         return f"Image for {self.property.name}"
@@ -63,6 +154,9 @@ class PropertyImage(models.Model):
     
     class Meta:
         ordering = ['-is_primary', 'uploaded_at']  # Primary images first, then by upload time
+        indexes = [
+            models.Index(fields=['property', 'is_primary'], name='propimage_property_primary_idx'),
+        ]
 
 # properties/models.py - Add this to existing models
 class Wishlist(models.Model):
@@ -81,6 +175,72 @@ class Wishlist(models.Model):
     class Meta:
         unique_together = ['user', 'property']  # Prevent duplicate wishlist items
         verbose_name_plural = "Wishlists"
+        indexes = [
+            # Per-property counts and "most wishlisted" rankings; the unique constraint only leads with user
+            models.Index(fields=['property', 'created_at'], name='wishlist_property_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.property.name}"
+
+
+class PropertyChange(models.Model):
+    """
+    Change log for the columnar read model (properties/readmodel.py): one row
+    per saved or deleted property, written in the same transaction, from which
+    every worker catches its snapshot up. Only written while the read model
+    is enabled.
+    """
+    property_id = models.IntegerField()   # not a foreign key: deletions are logged too
+    changed_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Property {self.property_id} changed at {self.changed_at}"
+
+
+class GeocodedAddress(models.Model):
+    """
+    Geocoder answers by normalized address (geocoding.query_key), so each
+    distinct address reaches an online geocoder once. A row without
+    coordinates records that no geocoder found the address.
+    """
+    query = models.CharField(max_length=255, unique=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    precision = models.CharField(max_length=20, choices=geocoding.PRECISIONS, blank=True)
+    provider = models.CharField(max_length=50, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Geocoded addresses"
+
+    def __str__(self):
+        return self.query
+
+    def location(self):
+        if self.latitude is None:
+            return None
+        return geocoding.Location(self.latitude, self.longitude, self.precision, self.provider)
+
+    @classmethod
+    def from_location(cls, query, location):
+        if location is None:
+            return cls(query=query)
+        return cls(
+            query=query, latitude=location.latitude, longitude=location.longitude,
+            precision=location.precision, provider=location.provider,
+        )
+
+
+class CacheVersion(models.Model):
+    """
+    Invalidation counter for one slice of cached catalog data, e.g. a map
+    region or a chatbot city bucket (real_estate/versions.py). Rows are bumped
+    with a single atomic UPSERT, so every worker process sharing the database
+    sees the same version whatever cache backend it runs.
+    """
+    key = models.CharField(max_length=255, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
 
     def __str__(self):
-        return f"{self.user.username} - {self.property.name}"
\ No newline at end of file
+        return f"{self.key}: {self.version}"
@@ -0,0 +1,37 @@
+# properties/pagination.py
+from real_estate.pagination import KeysetPagination
+
+from . import readmodel
+
+
+class AdminWishlistUserPagination(KeysetPagination):
+    """
+    Keyset pagination over users that have wishlist items. The sort key is
+    chosen with ?ordering= from ORDERINGS; the id tiebreaker keeps pages stable.
+    """
+    ORDERINGS = {
+        '-latest_added': ('-latest_added', '-id'),
+        'latest_added': ('latest_added', 'id'),
+        '-total_items': ('-total_items', '-id'),
+        'total_items': ('total_items', 'id'),
+        'username': ('username', 'id'),
+        '-username': ('-username', '-id'),
+    }
+    ordering = ORDERINGS['-latest_added']
+
+    def get_ordering(self, request, queryset, view):
+        return self.ORDERINGS.get(request.query_params.get('ordering'), self.ordering)
+
+
+class PropertyListPagination(KeysetPagination):
+    """
+    Keyset pagination that picks the page from the columnar read model
+    (properties/readmodel.py) when it is enabled and can answer the request.
+    Cursors and links are the same either way.
+    """
+
+    def fetch_rows(self, queryset, ordering, position, view=None):
+        rows = readmodel.fetch_page(queryset, self.request, view, ordering, position, self.page_size + 1)
+        if rows is None:
+            return super().fetch_rows(queryset, ordering, position, view)
+        return rows
@@ -0,0 +1,407 @@
+# properties/readmodel.py
+"""
+Columnar read model for the public property list.
+
+Off unless PROPERTY_READ_MODEL is set. When on, PropertyListCreateView
+answers plain filter + sort + page requests from an in-memory snapshot
+instead of the database. The snapshot holds one NumPy array per column
+(id, price, size, rooms, type and city codes, created_at, availability),
+and for each sortable field the rows in (value, id) order. A page is the
+next few rows of that order after the cursor that pass the filters, checked
+with boolean masks a chunk at a time. Only the ids of that page go to the
+database, to load the rows the serializer needs. Requests the snapshot can't
+answer (full-text search, orderings on several fields, ?page=N) take the
+ORM path as before, and so does everything when the setting is off.
+
+Keeping it current:
+
+* Saves, deletes and bulk updates of properties append their ids to the
+  PropertyChange log in the same transaction (properties/signals.py).
+* Before each page the snapshot reads the log past its position and reloads
+  just those properties. Rows changed since the sort orders were last built
+  are kept in a small set, merged into each page, and folded back in with a
+  re-sort once there are more than REORDER_FRACTION of them.
+* A snapshot older than PROPERTY_READ_MODEL_MAX_AGE seconds is rebuilt.
+  This picks up QuerySet.update() calls that bypass the signals. The rebuild
+  also prunes log entries older than PROPERTY_READ_MODEL_LOG_RETENTION.
+
+``check_read_model`` compares both paths page by page on a sample of
+requests. ``benchmark_read_model`` times the snapshot on synthetic
+catalogs.
+"""
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('pk', 'price', 'size', 'number_of_rooms', 'property_type', 'city', 'created_at', 'is_available')
+SORT_FIELDS = ('created_at', 'price', 'size')
+# Filters on a sort field, which narrow the stretch of its order a page is looked for in
+RANGES = {'price': ('price_min', 'price_max')}
+# PropertyFilter parameters the snapshot evaluates; any other filter takes the ORM path
+CRITERIA = ('property_type', 'city', 'is_available', 'price_min', 'price_max', 'bedrooms')
+COLUMNS = {
+    'id': np.int64,
+    'price': np.float64,
+    'size': np.float64,
+    'rooms': np.int64,
+    'type': np.int32,
+    'city': np.int32,
+    'created_at': np.int64,   # microseconds since the epoch, UTC
+    'available': bool,
+    'live': bool,             # false once the property is deleted
+    'moved': bool,            # changed since the sort orders were built, so possibly out of place in them
+}
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MIN_CHUNK = 1024
+GROWTH = 1.5
+REORDER_FRACTION = 0.01        # changed rows, as a share of the snapshot, before the sort orders are rebuilt
+MIN_REORDER = 1000
+MAX_CATCH_UP = 10_000          # logged changes beyond which a rebuild is cheaper than catching up
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+def is_enabled():
+    return getattr(settings, 'PROPERTY_READ_MODEL', False)
+
+
+def max_age():
+    return getattr(settings, 'PROPERTY_READ_MODEL_MAX_AGE', 3600)
+
+
+def log_retention():
+    return getattr(settings, 'PROPERTY_READ_MODEL_LOG_RETENTION', 24 * 3600)
+
+
+def database_name():
+    return str(connection.settings_dict['NAME'])
+
+
+def microseconds(value):
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, dt_timezone.utc)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+class ColumnarSnapshot:
+    def __init__(self, capacity=0):
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self.size = 0
+        self.row_of = {}
+        self.codes = {}
+        self.orders = {}          # sort field -> rows in (value, id) order, with those values and ids
+        self.moved = set()        # rows flagged in the 'moved' column
+        self.log_position = 0
+        self.built_at = time.monotonic()
+        self.database = None
+
+    @classmethod
+    def build(cls, rows, log_position=0, database=None):
+        """A snapshot of ``rows`` of FIELDS, sorted and ready to query."""
+        rows = list(rows)
+        snapshot = cls(len(rows))
+        if rows:
+            ids, prices, sizes, rooms, types, cities, created, available = zip(*rows)
+            columns = snapshot.columns
+            columns['id'][:] = ids
+            columns['price'][:] = [float(price) for price in prices]
+            columns['size'][:] = [float(size) for size in sizes]
+            columns['rooms'][:] = rooms
+            columns['type'][:] = [snapshot.code('type', value) for value in types]
+            columns['city'][:] = [snapshot.code('city', value) for value in cities]
+            columns['created_at'][:] = [microseconds(value) for value in created]
+            columns['available'][:] = available
+            columns['live'][:] = True
+            snapshot.size = len(rows)
+            snapshot.row_of = {property_id: row for row, property_id in enumerate(ids)}
+        snapshot.reorder()
+        snapshot.log_position = log_position
+        snapshot.database = database
+        return snapshot
+
+    def code(self, kind, value):
+        return self.codes.setdefault((kind, value), len(self.codes) + 1)
+
+    def nbytes(self):
+        return sum(array.nbytes for array in self.columns.values()) + sum(
+            array.nbytes for arrays in self.orders.values() for array in arrays
+        )
+
+    # ------------------- UPDATES -------------------
+
+    def reorder(self):
+        live = np.flatnonzero(self.columns['live'][:self.size])
+        ids = self.columns['id'][live]
+        for field in SORT_FIELDS:
+            values = self.columns[field][live]
+            order = np.lexsort((ids, values))
+            self.orders[field] = (live[order], values[order], ids[order])
+        self.columns['moved'][:] = False
+        self.moved = set()
+
+    def grow(self, capacity):
+        for name, array in self.columns.items():
+            self.columns[name] = np.concatenate([array, np.zeros(capacity - len(array), dtype=array.dtype)])
+
+    def put(self, property_id, price, size, rooms, property_type, city, created_at, is_available):
+        row = self.row_of.get(property_id)
+        if row is None:
+            if self.size == len(self.columns['id']):
+                self.grow(max(16, math.ceil(self.size * GROWTH)))
+            row = self.size
+            self.size += 1
+            self.row_of[property_id] = row
+        columns = self.columns
+        columns['id'][row] = property_id
+        columns['price'][row] = float(price)
+        columns['size'][row] = float(size)
+        columns['rooms'][row] = rooms
+        columns['type'][row] = self.code('type', property_type)
+        columns['city'][row] = self.code('city', city)
+        columns['created_at'][row] = microseconds(created_at)
+        columns['available'][row] = is_available
+        columns['live'][row] = True
+        # Out of place in the sort orders until the next reorder()
+        columns['moved'][row] = True
+        self.moved.add(row)
+
+    def apply(self, rows, property_ids):
+        """Upsert ``rows`` of FIELDS; the other ``property_ids`` were deleted."""
+        seen = set()
+        for row in rows:
+            self.put(*row)
+            seen.add(row[0])
+        for property_id in set(property_ids) - seen:
+            row = self.row_of.get(property_id)
+            if row is not None:
+                self.columns['live'][row] = False
+        if len(self.moved) > max(MIN_REORDER, self.size * REORDER_FRACTION):
+            self.reorder()
+
+    # ------------------- QUERIES -------------------
+
+    def matches(self, rows, criteria):
+        """Which of ``rows`` pass the PropertyFilter ``criteria``"""
+        columns = self.columns
+        keep = columns['live'][rows]
+        if 'property_type' in criteria:
+            keep &= columns['type'][rows] == self.codes.get(('type', criteria['property_type']), -1)
+        if 'city' in criteria:
+            keep &= columns['city'][rows] == self.codes.get(('city', criteria['city']), -1)
+        if 'is_available' in criteria:
+            keep &= columns['available'][rows] == criteria['is_available']
+        if 'price_min' in criteria:
+            keep &= columns['price'][rows] >= float(criteria['price_min'])
+        if 'price_max' in criteria:
+            keep &= columns['price'][rows] <= float(criteria['price_max'])
+        if 'bedrooms' in criteria:
+            keep &= columns['rooms'][rows] >= float(criteria['bedrooms'])
+        return keep
+
+    def after(self, rows, field, descending, position):
+        """Which of ``rows`` come strictly after ``position`` (value, id) in the ordering"""
+        value, property_id = position
+        values, ids = self.columns[field][rows], self.columns['id'][rows]
+        if descending:
+            return (values < value) | ((values == value) & (ids < property_id))
+        return (values > value) | ((values == value) & (ids > property_id))
+
+    def page(self, criteria, field, descending, position=None, limit=20):
+        """
+        Ids of the first ``limit`` properties matching ``criteria`` after
+        ``position`` (the cursor's (value, id), or None for the first page),
+        ordered on ``field`` and then id in the same direction.
+        """
+        rows = np.concatenate([
+            self.scan(criteria, field, descending, position, limit),
+            self.moved_rows(criteria, field, descending, position),
+        ])
+        ids = self.columns['id']
+        if len(rows) > 1:
+            order = np.lexsort((ids[rows], self.columns[field][rows]))
+            rows = rows[order[::-1] if descending else order]
+        return ids[rows[:limit]].tolist()
+
+    def scan(self, criteria, field, descending, position, limit):
+        """Walk the sort order from the cursor a chunk at a time until ``limit`` rows match"""
+        order, values, ids = self.orders[field]
+        # A range filter on the sort field itself bounds the walk
+        first, last = 0, len(order)
+        minimum, maximum = RANGES.get(field, (None, None))
+        if minimum in criteria:
+            first = np.searchsorted(values, float(criteria[minimum]), 'left')
+        if maximum in criteria:
+            last = np.searchsorted(values, float(criteria[maximum]), 'right')
+        if position is None:
+            start = last if descending else first
+        else:
+            value, property_id = position
+            low, high = np.searchsorted(values, value, 'left'), np.searchsorted(values, value, 'right')
+            start = low + np.searchsorted(ids[low:high], property_id, 'left' if descending else 'right')
+            start = min(max(start, first), last)
+
+        found, count, chunk = [], 0, max(MIN_CHUNK, limit * 4)
+        while count < limit:
+            if descending:
+                if start <= first:
+                    break
+                rows = order[max(first, start - chunk):start][::-1]
+                start -= chunk
+            else:
+                if start >= last:
+                    break
+                rows = order[start:min(start + chunk, last)]
+                start += chunk
+            keep = self.matches(rows, criteria) & ~self.columns['moved'][rows]
+            found.append(rows[keep])
+            count += int(keep.sum())
+            # Selective filters skip most of a chunk, so look further each time
+            chunk *= 2
+        return np.concatenate(found)[:limit] if found else np.zeros(0, dtype=np.int64)
+
+    def moved_rows(self, criteria, field, descending, position):
+        rows = np.fromiter(self.moved, dtype=np.int64, count=len(self.moved))
+        if not len(rows):
+            return rows
+        keep = self.matches(rows, criteria)
+        if position is not None:
+            keep &= self.after(rows, field, descending, position)
+        return rows[keep]
+
+
+# ------------------- PROCESS SNAPSHOT -------------------
+
+def load():
+    from .models import Property, PropertyChange
+
+    # Read the log position first: changes made during the load are replayed, which is harmless
+    log_position = PropertyChange.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    PropertyChange.objects.filter(changed_at__lt=timezone.now() - timedelta(seconds=log_retention())).delete()
+    rows = Property.objects.order_by().values_list(*FIELDS).iterator(chunk_size=5000)
+    return ColumnarSnapshot.build(rows, log_position, database_name())
+
+
+def catch_up(snapshot):
+    """Reload the properties logged since the snapshot's position. False when a rebuild is due instead."""
+    from .models import Property, PropertyChange
+
+    changes = list(
+        PropertyChange.objects.filter(pk__gt=snapshot.log_position).order_by('pk')
+        .values_list('pk', 'property_id')[:MAX_CATCH_UP + 1]
+    )
+    if len(changes) > MAX_CATCH_UP:
+        return False
+    if changes:
+        property_ids = {property_id for _, property_id in changes}
+        snapshot.apply(Property.objects.filter(pk__in=property_ids).order_by().values_list(*FIELDS), property_ids)
+        snapshot.log_position = changes[-1][0]
+    return True
+
+
+def current():
+    """The process's snapshot, caught up with the change log. Call with the lock held."""
+    global _snapshot
+    if (
+        _snapshot is None
+        or _snapshot.database != database_name()
+        or time.monotonic() - _snapshot.built_at > max_age()
+        or not catch_up(_snapshot)
+    ):
+        _snapshot = load()
+    return _snapshot
+
+
+def reset():
+    global _snapshot
+    with _lock:
+        _snapshot = None
+
+
+@receiver(setting_changed)
+def reset_on_setting_change(setting, **kwargs):
+    if setting.startswith('PROPERTY_READ_MODEL'):
+        reset()
+
+
+def log_changes(property_ids):
+    """Append to the change log; call inside the transaction that made the change."""
+    from .models import PropertyChange
+    PropertyChange.objects.bulk_create([PropertyChange(property_id=property_id) for property_id in property_ids])
+
+
+# ------------------- LIST REQUESTS -------------------
+
+def plan(request, view, ordering):
+    """(criteria, sort field, descending) for a list request, or None when only the ORM can answer it"""
+    from .models import Property
+
+    if len(ordering) != 2:
+        return None
+    field, tiebreak = ordering
+    descending = field.startswith('-')
+    field = field.lstrip('-')
+    if field not in SORT_FIELDS or tiebreak != ('-pk' if descending else 'pk'):
+        return None
+
+    filterset_class = getattr(view, 'filterset_class', None)
+    if filterset_class is None:
+        return None
+    filterset = filterset_class(request.query_params, queryset=Property.objects.none(), request=request)
+    if not filterset.is_valid():
+        return None
+    criteria = {}
+    for name, value in filterset.form.cleaned_data.items():
+        if value is None or value == '':
+            continue
+        if name not in CRITERIA:
+            return None
+        criteria[name] = value
+    return criteria, field, descending
+
+
+def position_key(field, position):
+    value, property_id = position
+    if field == 'created_at':
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(value)
+        return microseconds(parsed), int(property_id)
+    return float(value), int(property_id)
+
+
+def fetch_page(queryset, request, view, ordering, position, limit):
+    """
+    The next ``limit`` rows of the filtered ``queryset`` after ``position``
+    in ``ordering``, picked by the snapshot and loaded by id. None when the
+    read model is off or can't answer the request.
+    """
+    if not is_enabled():
+        return None
+    planned = plan(request, view, ordering)
+    if planned is None:
+        return None
+    criteria, field, descending = planned
+    if position is not None:
+        try:
+            position = position_key(field, position)
+        except (TypeError, ValueError):
+            return None
+
+    with _lock:
+        ids = current().page(criteria, field, descending, position, limit)
+    rows = queryset.order_by().in_bulk(ids)
+    # A row the database no longer matches (changed by an update() that skipped the log) is dropped
+    return [rows[property_id] for property_id in ids if property_id in rows]
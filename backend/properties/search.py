@@ -0,0 +1,154 @@
+# properties/search.py
+"""
+Full-text search over Property name, description, address and city.
+
+On SQLite the text lives in an FTS5 virtual table (``properties_property_fts``)
+keyed by the property id and kept in sync by the signals in
+``properties/signals.py``. On PostgreSQL the same API runs against a
+``tsvector`` expression backed by a GIN index. Any other backend falls back
+to the previous ``icontains`` matching.
+"""
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, F, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'properties_property_fts'
+FTS_COLUMNS = ('name', 'description', 'address', 'city')
+
+FTS_CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{', '.join(FTS_COLUMNS)}, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+FTS_POPULATE_SQL = (
+    f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) "
+    f"SELECT id, {', '.join(FTS_COLUMNS)} FROM properties_property"
+)
+FTS_DROP_SQL = f"DROP TABLE IF EXISTS {FTS_TABLE}"
+
+# Column weights for bm25(): a hit in the name or city matters more than one in the description
+FTS_WEIGHTS = (10.0, 1.0, 2.0, 5.0)
+
+POSTGRES_VECTOR_SQL = (
+    "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(city, '') || ' ' || "
+    "coalesce(address, '') || ' ' || coalesce(description, ''))"
+)
+
+POSTGRES_INDEX_NAME = 'properties_property_search_gin'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def tokenize(value):
+    return TOKEN_RE.findall((value or '').lower())
+
+
+def build_match_expression(value, match_all=True):
+    """
+    Turn free text into an FTS5 MATCH expression.
+    Every token is quoted (so user input can't inject FTS syntax) and
+    prefix-matched, so "berl" finds "Berlin" while the user is still typing.
+    """
+    tokens = tokenize(value)
+    if not tokens:
+        return None
+    joiner = ' ' if match_all else ' OR '
+    return joiner.join(f'"{token}"*' for token in tokens)
+
+
+def build_tsquery(value, match_all=True):
+    tokens = tokenize(value)
+    if not tokens:
+        return None
+    joiner = ' & ' if match_all else ' | '
+    return joiner.join(f'{token}:*' for token in tokens)
+
+
+def search_properties(queryset, value, match_all=True, ranked=False):
+    """
+    Filter a Property queryset down to rows matching ``value``.
+    With ``ranked=True`` each row is annotated with ``search_rank``
+    (lower is better) so callers can order by relevance.
+    """
+    if connection.vendor == 'sqlite':
+        expression = build_match_expression(value, match_all)
+        if expression is None:
+            return queryset.none()
+        queryset = queryset.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (expression,)
+        ))
+        if ranked:
+            weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+            queryset = queryset.annotate(search_rank=RawSQL(
+                f"SELECT bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid = properties_property.id",
+                (expression,),
+            ))
+        return queryset
+
+    if connection.vendor == 'postgresql':
+        tsquery = build_tsquery(value, match_all)
+        if tsquery is None:
+            return queryset.none()
+        queryset = queryset.filter(RawSQL(
+            f"{POSTGRES_VECTOR_SQL} @@ to_tsquery('simple', %s)", (tsquery,), output_field=BooleanField()
+        ))
+        if ranked:
+            # ts_rank is "higher is better"; negate it to share the ascending search_rank contract
+            queryset = queryset.annotate(search_rank=RawSQL(
+                f"-ts_rank({POSTGRES_VECTOR_SQL}, to_tsquery('simple', %s))", (tsquery,)
+            ))
+        return queryset
+
+    terms = tokenize(value)
+    if not terms:
+        return queryset.none()
+    combined = Q()
+    for term in terms:
+        term_q = Q()
+        for column in FTS_COLUMNS:
+            term_q |= Q(**{f'{column}__icontains': term})
+        combined = combined & term_q if match_all else combined | term_q
+    queryset = queryset.filter(combined)
+    if ranked:
+        queryset = queryset.annotate(search_rank=-F('id'))
+    return queryset
+
+
+def matching_property_ids(value, match_all=True):
+    """Return a subquery of property ids matching ``value``, for filtering related models."""
+    from .models import Property
+    return search_properties(Property.objects.order_by(), value, match_all).values('id')
+
+
+def index_property(prop):
+    """Insert or refresh the FTS row for a single property."""
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [prop.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) VALUES (%s, %s, %s, %s, %s)",
+            [prop.pk] + [getattr(prop, column) or '' for column in FTS_COLUMNS],
+        )
+
+
+def remove_property(property_id):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [property_id])
+
+
+def rebuild_index():
+    """Clear and repopulate the FTS table from the properties table."""
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(FTS_POPULATE_SQL)
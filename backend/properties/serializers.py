@@ -2,12 +2,18 @@
 from rest_framework import serializers
 from .models import Property, PropertyImage
 from .models import Wishlist  # Add this import
+from .images import responsive_fields
 
 class PropertyImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = PropertyImage
         fields = ['id', 'image', 'is_primary', 'uploaded_at']
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data.update(responsive_fields(instance, self.context.get('request')))
+        return data
+
 # ADD THIS MISSING SERIALIZER
 # properties/serializers.py
 class PropertyCreateSerializer(serializers.ModelSerializer):
@@ -31,11 +37,18 @@ class PropertySerializer(serializers.ModelSerializer):
             'id', 'name', 'description', 'address', 'city', 
             'price', 'number_of_rooms', 'size', 'property_type',
             'is_available', 'seller', 'seller_name', 'images',
-            'in_wishlist', 'created_at', 'updated_at'
+            'in_wishlist', 'latitude', 'longitude', 'location_precision',
+            'created_at', 'updated_at'
         ]
-        read_only_fields = ['seller', 'created_at', 'updated_at']  # Remove 'id' from here
+        read_only_fields = [
+            'seller', 'latitude', 'longitude', 'location_precision', 'created_at', 'updated_at'
+        ]  # Remove 'id' from here
 
     def get_in_wishlist(self, obj):
+        # Use the Exists annotation from PropertyQuerySet.with_wishlist_status when present
+        annotated = getattr(obj, 'is_wishlisted', None)
+        if annotated is not None:
+            return annotated
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return Wishlist.objects.filter(user=request.user, property=obj).exists()
@@ -51,3 +64,26 @@ class WishlistSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'created_at']
 
 
+
+
+class SimilarPropertySerializer(serializers.ModelSerializer):
+    """
+    A compact card for the similar-properties strip, with its match score.
+    Expects ``primary_images`` prefetched and ``similarity``/``breakdown`` set
+    by the view, so it never queries.
+    """
+    in_wishlist = serializers.BooleanField(source='is_wishlisted', read_only=True)
+    image = serializers.SerializerMethodField()
+    similarity = serializers.IntegerField(read_only=True)
+    breakdown = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+
+    class Meta:
+        model = Property
+        fields = [
+            'id', 'name', 'address', 'city', 'price', 'number_of_rooms', 'size',
+            'property_type', 'in_wishlist', 'image', 'similarity', 'breakdown'
+        ]
+
+    def get_image(self, obj):
+        images = obj.primary_images
+        return PropertyImageSerializer(images[0], context=self.context).data if images else None
@@ -0,0 +1,178 @@
+# properties/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import Signal, receiver
+
+from . import geocoding, images, readmodel, search, similarity, spatial, vectors
+from .models import Property, PropertyImage
+
+# Sent after QuerySet.update() on properties, which skips post_save; receivers get ``queryset``
+properties_bulk_updated = Signal()
+
+
+@receiver(post_save, sender=Property)
+def sync_search_index(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep the full-text index in step with the property text fields."""
+    if raw:
+        return
+    if update_fields is not None and not set(update_fields) & set(search.FTS_COLUMNS):
+        return
+    search.index_property(instance)
+
+
+@receiver(post_delete, sender=Property)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.remove_property(instance.pk)
+
+
+VECTOR_FIELDS = {'name', 'description', 'is_available'}
+
+
+@receiver(post_save, sender=Property)
+def sync_vector_index(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Refresh the property's row in the vector index once the save is committed."""
+    if raw:
+        return
+    if update_fields is not None and not set(update_fields) & VECTOR_FIELDS:
+        return
+    transaction.on_commit(lambda: vectors.index_property(instance))
+
+
+@receiver(post_delete, sender=Property)
+def remove_from_vector_index(sender, instance, **kwargs):
+    property_id = instance.pk
+    transaction.on_commit(lambda: vectors.remove_property(property_id))
+
+
+@receiver(properties_bulk_updated)
+def sync_vector_index_on_bulk_update(sender, queryset, **kwargs):
+    rows = list(queryset.values_list('pk', 'name', 'description', 'is_available'))
+
+    def refresh():
+        for property_id, name, description, is_available in rows:
+            vectors.index_property(Property(pk=property_id, name=name, description=description, is_available=is_available))
+    transaction.on_commit(refresh)
+
+
+SIMILARITY_FIELDS = {'price', 'size', 'number_of_rooms', 'property_type', 'city', 'is_available'}
+
+
+@receiver(post_save, sender=Property)
+def sync_similarity(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Refresh the property's row in the similar-properties matrix once the save is committed."""
+    if raw:
+        return
+    if update_fields is not None and not set(update_fields) & SIMILARITY_FIELDS:
+        return
+    transaction.on_commit(lambda: similarity.update_property(instance))
+
+
+@receiver(post_delete, sender=Property)
+def remove_from_similarity(sender, instance, **kwargs):
+    property_id = instance.pk
+    transaction.on_commit(lambda: similarity.remove_property(property_id))
+
+
+@receiver(properties_bulk_updated)
+def sync_similarity_on_bulk_update(sender, queryset, **kwargs):
+    rows = list(queryset.values_list(*similarity.FIELDS))
+
+    def refresh():
+        for property_id, *values in rows:
+            similarity.update_property(Property(pk=property_id, **dict(zip(similarity.FIELDS[1:], values))))
+    transaction.on_commit(refresh)
+
+
+READ_MODEL_FIELDS = {'price', 'size', 'number_of_rooms', 'property_type', 'city', 'created_at', 'is_available'}
+
+
+@receiver(post_save, sender=Property)
+def log_read_model_change(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Log the change for the columnar read model, inside the save's transaction."""
+    if raw or not readmodel.is_enabled():
+        return
+    if update_fields is not None and not set(update_fields) & READ_MODEL_FIELDS:
+        return
+    readmodel.log_changes([instance.pk])
+
+
+@receiver(post_delete, sender=Property)
+def log_read_model_removal(sender, instance, **kwargs):
+    if readmodel.is_enabled():
+        readmodel.log_changes([instance.pk])
+
+
+@receiver(properties_bulk_updated)
+def log_read_model_bulk_update(sender, queryset, **kwargs):
+    if readmodel.is_enabled():
+        readmodel.log_changes(queryset.values_list('pk', flat=True))
+
+
+def map_point(instance):
+    # Deferred coordinates count as missing rather than costing a query
+    return spatial.point_of(instance.__dict__.get('latitude'), instance.__dict__.get('longitude'))
+
+
+@receiver(post_init, sender=Property)
+def remember_map_point(sender, instance, **kwargs):
+    # Keep the loaded coordinates so a save that moves the property also refreshes the old map tiles
+    instance._map_point = map_point(instance)
+
+
+@receiver(post_save, sender=Property)
+def sync_spatial_index(sender, instance, created=False, raw=False, **kwargs):
+    """Move the property in the R*Tree and invalidate the map tiles it left and entered."""
+    if raw:
+        return
+    point = map_point(instance)
+    before = None if created else getattr(instance, '_map_point', None)
+    spatial.relocate([(instance.pk, before, point)])
+    instance._map_point = point
+
+
+@receiver(post_delete, sender=Property)
+def remove_from_spatial_index(sender, instance, **kwargs):
+    spatial.relocate([(instance.pk, map_point(instance), None)])
+
+
+@receiver(properties_bulk_updated)
+def invalidate_map_tiles_on_bulk_update(sender, queryset, **kwargs):
+    points = [
+        (property_id, spatial.point_of(latitude, longitude))
+        for property_id, latitude, longitude in queryset.values_list('pk', 'latitude', 'longitude')
+    ]
+    spatial.relocate([(property_id, point, point) for property_id, point in points])
+
+
+@receiver(post_save, sender=Property)
+def queue_geocoding(sender, instance, raw=False, **kwargs):
+    """Ask the online geocoders for an address the save could only place roughly."""
+    if raw or not getattr(instance, '_geocode_pending', False):
+        return
+    instance._geocode_pending = False
+    property_id = instance.pk
+    transaction.on_commit(lambda: geocoding.schedule_geocode(property_id))
+
+
+@receiver(post_save, sender=PropertyImage)
+@receiver(post_delete, sender=PropertyImage)
+def touch_property_on_image_change(sender, instance, raw=False, **kwargs):
+    """Images are part of the property's responses, so their changes move its ``updated_at`` (and ETags)."""
+    if not raw:
+        Property.objects.filter(pk=instance.property_id).touch()
+
+
+@receiver(post_save, sender=PropertyImage)
+def queue_image_renditions(sender, instance, raw=False, **kwargs):
+    """Build the responsive renditions once the upload is committed."""
+    if raw or not images.needs_renditions(instance):
+        return
+    image_id = instance.pk
+    transaction.on_commit(lambda: images.schedule_renditions(image_id))
+
+
+@receiver(post_delete, sender=PropertyImage)
+def remove_image_renditions(sender, instance, **kwargs):
+    names = images.rendition_names(instance)
+    if names:
+        transaction.on_commit(lambda: images.delete_files(instance.image.storage, names))
@@ -0,0 +1,262 @@
+# properties/similarity.py
+"""
+"Similar properties" as a k-nearest-neighbour search over listing features.
+
+Every available property is one row of an in-memory NumPy feature matrix:
+log price, log size, rooms and log price per m², standardized over the
+catalog so each is measured in the same units, plus integer codes for the
+city and the property type. A query compares one listing against every row
+at once and scores five criteria the way buyers weigh them (location, price,
+size, type, rooms); the score is 0-100 and the top ``k`` are found with
+``argpartition``, so a catalog of 100k listings answers in a few
+milliseconds without touching the database.
+
+The matrix is built lazily from one query. The signals in
+properties/signals.py update single rows as properties are saved; the
+standardization is only recomputed on the next full build. Each worker
+process holds its own matrix, so a process rebuilds it after
+PROPERTY_SIMILARITY_MAX_AGE seconds to pick up what other workers saved.
+"""
+import logging
+import math
+import threading
+import time
+import warnings
+
+import numpy as np
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('pk', 'price', 'size', 'number_of_rooms', 'property_type', 'city', 'is_available')
+PRICE, SIZE, ROOMS, PRICE_PER_M2 = range(4)
+# Points per criterion out of 100, as buyers rank them
+WEIGHTS = {'location': 30, 'price': 25, 'size': 20, 'type': 15, 'rooms': 10}
+CRITERIA = tuple(WEIGHTS)
+FOCUS_BOOST = 3.0       # ?focus=price weighs price this many times more
+BANDWIDTH = 0.35        # standard deviations at which a numeric criterion scores about 2/3
+GROWTH = 1.5
+DTYPE = np.float32
+
+_matrix = None
+_matrix_lock = threading.Lock()
+
+
+def max_age():
+    return getattr(settings, 'PROPERTY_SIMILARITY_MAX_AGE', 300)
+
+
+def database_name():
+    return str(connection.settings_dict['NAME'])
+
+
+def city_key(city):
+    return (city or '').strip().casefold()
+
+
+def features(price, size, rooms):
+    """The raw numeric features of one listing; zero or missing values become NaN."""
+    price = float(price or 0)
+    size = float(size or 0)
+    return (
+        math.log(price) if price > 0 else math.nan,
+        math.log(size) if size > 0 else math.nan,
+        float(rooms) if rooms else math.nan,
+        math.log(price / size) if price > 0 and size > 0 else math.nan,
+    )
+
+
+class FeatureMatrix:
+    def __init__(self, capacity=0):
+        self.lock = threading.Lock()
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.vectors = np.zeros((4, capacity), dtype=DTYPE)   # one feature per row, so columns scan contiguously
+        self.cities = np.zeros(capacity, dtype=np.int32)
+        self.types = np.zeros(capacity, dtype=np.int32)
+        self.live = np.zeros(capacity, dtype=bool)
+        self.row_of = {}
+        self.codes = {}
+        self.size = 0
+        self.mean = np.zeros(4)
+        self.scale = np.ones(4)
+        self.built_at = time.monotonic()
+        self.database = None
+
+    @classmethod
+    def build(cls, rows, database=None):
+        """A matrix of ``rows`` of FIELDS, standardized over the available ones."""
+        rows = [row for row in rows if row[-1]]
+        matrix = cls(len(rows))
+        raw = np.array([features(*row[1:4]) for row in rows]).reshape(-1, 4)
+        matrix.standardize(raw)
+        matrix.size = len(rows)
+        matrix.ids[:] = [row[0] for row in rows]
+        matrix.vectors[:] = matrix.normalized(raw).T
+        matrix.types[:] = [matrix.code(('type', row[4])) for row in rows]
+        matrix.cities[:] = [matrix.code(('city', city_key(row[5]))) for row in rows]
+        matrix.live[:] = True
+        matrix.row_of = {property_id: row for row, property_id in enumerate(matrix.ids.tolist())}
+        matrix.database = database
+        return matrix
+
+    def code(self, value):
+        return self.codes.setdefault(value, len(self.codes) + 1)
+
+    def put(self, property_id, price, size, rooms, property_type, city):
+        row = self.row_of.get(property_id)
+        if row is None:
+            if self.size == len(self.ids):
+                self.grow(max(16, math.ceil(self.size * GROWTH)))
+            row = self.size
+            self.size += 1
+            self.row_of[property_id] = row
+            self.ids[row] = property_id
+        self.vectors[:, row] = self.normalized(np.array(features(price, size, rooms)))
+        self.types[row] = self.code(('type', property_type))
+        self.cities[row] = self.code(('city', city_key(city)))
+        self.live[row] = True
+
+    def grow(self, capacity):
+        # New arrays rather than resizing in place, so a search holding the old ones is unaffected
+        extra = capacity - len(self.ids)
+        self.ids = np.concatenate([self.ids, np.zeros(extra, dtype=np.int64)])
+        self.vectors = np.concatenate([self.vectors, np.zeros((4, extra), dtype=DTYPE)], axis=1)
+        self.cities = np.concatenate([self.cities, np.zeros(extra, dtype=np.int32)])
+        self.types = np.concatenate([self.types, np.zeros(extra, dtype=np.int32)])
+        self.live = np.concatenate([self.live, np.zeros(extra, dtype=bool)])
+
+    def standardize(self, raw):
+        """Centre and scale every feature over ``raw`` (the catalog's), ignoring missing values."""
+        if not len(raw):
+            return
+        with warnings.catch_warnings():
+            # A column with no values at all warns; its mean and scale fall back to 0 and 1
+            warnings.simplefilter('ignore', RuntimeWarning)
+            mean = np.nanmean(raw, axis=0)
+            scale = np.nanstd(raw, axis=0)
+        self.mean = np.nan_to_num(mean)
+        self.scale = np.where(np.isfinite(scale) & (scale > 1e-9), scale, 1.0)
+
+    def update(self, property_id, price, size, rooms, property_type, city, is_available):
+        with self.lock:
+            if is_available:
+                self.put(property_id, price, size, rooms, property_type, city)
+            else:
+                self.discard(property_id)
+
+    def remove(self, property_id):
+        with self.lock:
+            self.discard(property_id)
+
+    def discard(self, property_id):
+        row = self.row_of.get(property_id)
+        if row is not None:
+            self.live[row] = False
+
+    def __len__(self):
+        return int(self.live[:self.size].sum())
+
+    def normalized(self, raw):
+        # Missing values sit at the catalog mean, i.e. neither near nor far
+        return np.nan_to_num((raw - self.mean) / self.scale)
+
+    def nearest(self, prop, k=3, focus=None):
+        """
+        The ``k`` available listings most like ``prop`` (any object with the
+        Property fields), best first, as (property id, score, breakdown).
+        ``focus`` is a criterion to weigh more. ``prop`` itself is left out.
+        """
+        with self.lock:
+            size = self.size
+            ids, vectors, cities, types = self.ids[:size], self.vectors[:, :size], self.cities[:size], self.types[:size]
+            candidates = self.live[:size] & (ids != prop.pk)
+            city = self.codes.get(('city', city_key(prop.city)), -1)
+            property_type = self.codes.get(('type', prop.property_type), -1)
+        k = min(k, int(candidates.sum()))
+        if k <= 0:
+            return []
+
+        query = self.normalized(np.array(features(prop.price, prop.size, prop.number_of_rooms))).astype(DTYPE)
+        squared = np.square(vectors - query[:, None])
+        closeness = np.stack([
+            cities == city,
+            gaussian((squared[PRICE] + squared[PRICE_PER_M2]) / 2),
+            gaussian(squared[SIZE]),
+            types == property_type,
+            gaussian(squared[ROOMS]),
+        ]).astype(DTYPE, copy=False)
+        weights = np.array([WEIGHTS[criterion] * (FOCUS_BOOST if criterion == focus else 1) for criterion in CRITERIA])
+        shares = (weights * 100 / weights.sum()).astype(DTYPE)
+        scores = shares @ closeness
+        scores[~candidates] = -1
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((ids[top], -scores[top]))]
+        points = closeness[:, top] * shares[:, None]
+        return [
+            (int(ids[row]), round(float(scores[row])),
+             {criterion: round(float(points[j, i])) for j, criterion in enumerate(CRITERIA)})
+            for i, row in enumerate(top)
+        ]
+
+
+def gaussian(squared_distance):
+    return np.exp(squared_distance * DTYPE(-1 / (2 * BANDWIDTH ** 2)))
+
+
+def load():
+    from .models import Property
+
+    rows = Property.objects.filter(is_available=True).order_by().values_list(*FIELDS)
+    return FeatureMatrix.build(rows.iterator(chunk_size=2000), database_name())
+
+
+def get_matrix():
+    """The process's matrix, (re)built on first use, when stale or for another database."""
+    global _matrix
+    with _matrix_lock:
+        if (
+            _matrix is None
+            or _matrix.database != database_name()
+            or time.monotonic() - _matrix.built_at > max_age()
+        ):
+            _matrix = load()
+        return _matrix
+
+
+def reset():
+    global _matrix
+    with _matrix_lock:
+        _matrix = None
+
+
+@receiver(setting_changed)
+def reset_on_setting_change(setting, **kwargs):
+    if setting.startswith('PROPERTY_SIMILARITY_'):
+        reset()
+
+
+def update_property(prop):
+    """Refresh one property's row; a no-op until the matrix is first used."""
+    matrix = _matrix
+    if matrix is None:
+        return
+    try:
+        matrix.update(prop.pk, prop.price, prop.size, prop.number_of_rooms, prop.property_type, prop.city, prop.is_available)
+    except Exception as e:
+        # The save is already committed; the next rebuild fixes the row
+        logger.error(f"Similarity update for property {prop.pk} failed: {e}")
+
+
+def remove_property(property_id):
+    matrix = _matrix
+    if matrix is not None:
+        matrix.remove(property_id)
+
+
+def similar(prop, k=3, focus=None):
+    """(property id, score, breakdown) of the ``k`` listings most like ``prop``, best first."""
+    return get_matrix().nearest(prop, k, focus)
@@ -0,0 +1,262 @@
+# properties/spatial.py
+"""
+Spatial index and viewport clustering for the property map.
+
+On SQLite the coordinates live in an R*Tree virtual table
+(``properties_property_rtree``) keyed by the property id and kept in sync by
+the signals in ``properties/signals.py``; other backends fall back to range
+filters on latitude/longitude.
+
+``viewport`` answers a bounding box at a zoom level with one marker per
+128px square of the map: a pin for a lone listing, otherwise a cluster with
+its count and centroid, so a dense viewport stays a few KB however many
+listings it covers. The squares are grouped by Web Mercator tile and every
+tile's markers are cached per filter combination. Cached tiles are keyed on
+a version that a property change bumps (after commit) for the region it
+left and the one it moved to, so a save in Berlin leaves Munich's tiles
+alone; tiles zoomed out further than a region share the ``all`` version.
+The versions are database rows (real_estate/versions.py), so a bump in one
+worker invalidates the region for all of them; the markers themselves are in
+the default cache, which each worker keeps to itself unless CACHES is shared.
+"""
+import hashlib
+import json
+import math
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+
+from real_estate import versions
+
+RTREE_TABLE = 'properties_property_rtree'
+RTREE_CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {RTREE_TABLE} USING rtree(id, min_lat, max_lat, min_lng, max_lng)"
+)
+RTREE_POPULATE_SQL = (
+    f"INSERT INTO {RTREE_TABLE} (id, min_lat, max_lat, min_lng, max_lng) "
+    f"SELECT id, latitude, latitude, longitude, longitude FROM properties_property "
+    f"WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+)
+RTREE_DROP_SQL = f"DROP TABLE IF EXISTS {RTREE_TABLE}"
+
+GRID = 2                    # markers per tile side: one per 128px square of a 256px tile
+MAX_ZOOM = 20
+MAX_TILES = 64              # a large screen at any zoom; more means the client sent a bogus box
+REGION_ZOOM = 8             # cache versions per tile of this zoom, roughly 150km across
+MAX_LATITUDE = 85.0511287798   # where Web Mercator ends
+PRECISION = 5               # decimals of the returned coordinates, about a metre
+
+PREFIX = 'properties:map:'
+VERSION_PREFIX = 'properties:map-version:'
+
+
+def rtree_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def cache_ttl():
+    return getattr(settings, 'PROPERTY_MAP_CACHE_TTL', 600)
+
+
+# ------------------- Index -------------------
+
+def within(queryset, south, west, north, east):
+    """Filter a Property queryset down to rows inside the box."""
+    if rtree_enabled():
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT id FROM {RTREE_TABLE} WHERE max_lat >= %s AND min_lat <= %s AND max_lng >= %s AND min_lng <= %s",
+            (south, north, west, east),
+        ))
+    return queryset.filter(latitude__range=(south, north), longitude__range=(west, east))
+
+
+def index_point(property_id, point):
+    """Insert, move or (for ``point`` None) remove a property's entry."""
+    if not rtree_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {RTREE_TABLE} WHERE id = %s", [property_id])
+        if point is not None:
+            latitude, longitude = point
+            cursor.execute(
+                f"INSERT INTO {RTREE_TABLE} (id, min_lat, max_lat, min_lng, max_lng) VALUES (%s, %s, %s, %s, %s)",
+                [property_id, latitude, latitude, longitude, longitude],
+            )
+
+
+def rebuild_index():
+    """Clear and repopulate the R*Tree from the properties table."""
+    if not rtree_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {RTREE_TABLE}")
+        cursor.execute(RTREE_POPULATE_SQL)
+
+
+def point_of(latitude, longitude):
+    if latitude is None or longitude is None:
+        return None
+    return (latitude, longitude)
+
+
+def relocate(moves):
+    """
+    Re-index ``[(property id, point before, point after)]`` (points are
+    (lat, lng) or None) and, once committed, invalidate the cached tiles of
+    both places. Pass the same point twice for changes that don't move it.
+    """
+    buckets = {'all'}
+    for property_id, before, after in moves:
+        if before != after:
+            index_point(property_id, after)
+        buckets |= point_buckets(before) | point_buckets(after)
+    transaction.on_commit(lambda: bump(buckets))
+
+
+# ------------------- Tiles -------------------
+
+def tile_coordinates(latitude, longitude, zoom):
+    """Fractional Web Mercator tile (x, y) of points; scalars or NumPy arrays."""
+    n = 2.0 ** zoom
+    latitude = np.radians(np.clip(latitude, -MAX_LATITUDE, MAX_LATITUDE))
+    x = (np.asarray(longitude, dtype=float) + 180.0) / 360.0 * n
+    y = (1.0 - np.arcsinh(np.tan(latitude)) / math.pi) / 2.0 * n
+    return x, y
+
+
+def tile_range(south, west, north, east, zoom):
+    """The (x, y) ranges of the tiles covering the box."""
+    last = 2 ** zoom - 1
+    x0, y0 = tile_coordinates(north, west, zoom)
+    x1, y1 = tile_coordinates(south, east, zoom)
+    clamp = lambda value: min(max(int(value), 0), last)  # noqa: E731
+    return range(clamp(x0), clamp(x1) + 1), range(clamp(y0), clamp(y1) + 1)
+
+
+def tile_bounds(zoom, x, y):
+    """(south, west, north, east) of a tile."""
+    n = 2.0 ** zoom
+    latitude = lambda row: math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))  # noqa: E731
+    return latitude(y + 1), x / n * 360.0 - 180.0, latitude(y), (x + 1) / n * 360.0 - 180.0
+
+
+def region_of(zoom, x, y):
+    if zoom < REGION_ZOOM:
+        return 'all'
+    shift = zoom - REGION_ZOOM
+    return f'{x >> shift}:{y >> shift}'
+
+
+def point_buckets(point):
+    if point is None:
+        return set()
+    x, y = tile_coordinates(point[0], point[1], REGION_ZOOM)
+    last = 2 ** REGION_ZOOM - 1
+    return {f'{min(int(x), last)}:{min(int(y), last)}'}
+
+
+def bump(buckets):
+    versions.bump(VERSION_PREFIX + bucket for bucket in buckets)
+
+
+def filters_key(filters):
+    payload = json.dumps({name: str(value) for name, value in filters.items() if value not in (None, '')}, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def tile_keys(tiles, zoom, filters):
+    """{tile: cache key} with each tile's current region version in its key."""
+    regions = {tile: region_of(zoom, *tile) for tile in tiles}
+    current = versions.get_many({VERSION_PREFIX + region for region in regions.values()})
+    digest = filters_key(filters)
+    return {
+        tile: f'{PREFIX}{digest}:{zoom}:{tile[0]}:{tile[1]}:{current[VERSION_PREFIX + region]}'
+        for tile, region in regions.items()
+    }
+
+
+def cluster_tiles(queryset, zoom, tiles):
+    """
+    {tile: [(lat, lng, count, pin)]} for ``tiles``, one entry per occupied
+    128px square; ``pin`` is (id, price, property_type) when the square holds
+    a single listing, else None. Two queries however many tiles.
+    """
+    xs, ys = [x for x, _ in tiles], [y for _, y in tiles]
+    south, west, _, _ = tile_bounds(zoom, min(xs), max(ys))
+    _, _, north, east = tile_bounds(zoom, max(xs), min(ys))
+    rows = np.array(
+        within(queryset.order_by(), south, west, north, east).values_list('id', 'latitude', 'longitude'),
+        dtype=float,
+    ).reshape(-1, 3)
+    clusters = {tile: [] for tile in tiles}
+    if not len(rows):
+        return clusters
+
+    ids, latitudes, longitudes = rows[:, 0].astype(np.int64), rows[:, 1], rows[:, 2]
+    x, y = tile_coordinates(latitudes, longitudes, zoom)
+    cells = GRID * 2 ** zoom
+    column = np.clip((x * GRID).astype(np.int64), 0, cells - 1)
+    row = np.clip((y * GRID).astype(np.int64), 0, cells - 1)
+    # The union box also spans tiles that were already cached
+    wanted = np.isin((column // GRID) * 2 ** zoom + row // GRID, [tx * 2 ** zoom + ty for tx, ty in tiles])
+    keys, first, inverse, counts = np.unique(
+        (column * cells + row)[wanted], return_index=True, return_inverse=True, return_counts=True,
+    )
+    ids, latitudes, longitudes = ids[wanted], latitudes[wanted], longitudes[wanted]
+    mean_latitudes = np.bincount(inverse, weights=latitudes) / counts
+    mean_longitudes = np.bincount(inverse, weights=longitudes) / counts
+
+    lone = ids[first[counts == 1]].tolist()
+    pins = {
+        property_id: (property_id, float(price), property_type)
+        for property_id, price, property_type in queryset.model.objects.filter(pk__in=lone).values_list(
+            'id', 'price', 'property_type'
+        )
+    }
+    for key, index, count, latitude, longitude in zip(keys.tolist(), first.tolist(), counts.tolist(),
+                                                      mean_latitudes.tolist(), mean_longitudes.tolist()):
+        pin = None
+        if count == 1:
+            pin = pins.get(int(ids[index]))
+            if pin is None:
+                continue   # deleted between the two queries
+        clusters[(key // cells // GRID, key % cells // GRID)].append((latitude, longitude, count, pin))
+    return clusters
+
+
+def viewport(queryset, filters, south, west, north, east, zoom):
+    """
+    Markers for a box: {'zoom', 'count', 'clusters': [{lat, lng, count}],
+    'pins': [{id, lat, lng, price, property_type}]}. ``queryset`` is already
+    filtered by ``filters``, which only key the cache. Raises ValueError
+    for a box spanning more than MAX_TILES tiles.
+    """
+    columns, rows = tile_range(south, west, north, east, zoom)
+    if len(columns) * len(rows) > MAX_TILES:
+        raise ValueError(f"The box spans {len(columns) * len(rows)} tiles at zoom {zoom}; zoom in or send a smaller box")
+    keys = tile_keys([(x, y) for x in columns for y in rows], zoom, filters)
+    hits = cache.get_many(keys.values())
+    tiles = {tile: hits[key] for tile, key in keys.items() if key in hits}
+    missing = [tile for tile in keys if tile not in tiles]
+    if missing:
+        fresh = cluster_tiles(queryset, zoom, missing)
+        cache.set_many({keys[tile]: markers for tile, markers in fresh.items()}, cache_ttl())
+        tiles.update(fresh)
+
+    clusters, pins, total = [], [], 0
+    for tile in keys:
+        for latitude, longitude, count, pin in tiles[tile]:
+            # Tiles overhang the box; squares centred outside it wouldn't show
+            if not (south <= latitude <= north and west <= longitude <= east):
+                continue
+            total += count
+            latitude, longitude = round(latitude, PRECISION), round(longitude, PRECISION)
+            if pin is None:
+                clusters.append({'lat': latitude, 'lng': longitude, 'count': count})
+            else:
+                property_id, price, property_type = pin
+                pins.append({'id': property_id, 'lat': latitude, 'lng': longitude, 'price': price, 'property_type': property_type})
+    return {'zoom': zoom, 'count': total, 'clusters': clusters, 'pins': pins}
@@ -1,3 +1,951 @@
-from django.test import TestCase
+import csv
+import json
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from real_estate.pagination import KeysetPagination
+from users.models import User
+from . import geocoding, images, readmodel, similarity, spatial, vectors
+from .models import CacheVersion, GeocodedAddress, Property, PropertyChange, PropertyImage, Wishlist
+from .views import PropertyImageListView
+
+
+def create_property(seller, **overrides):
+    data = {
+        'name': 'Sample Property',
+        'description': 'A sample property',
+        'address': 'Sample Street 1',
+        'city': 'Berlin',
+        'price': Decimal('250000.00'),
+        'number_of_rooms': 3,
+        'size': Decimal('85.00'),
+        'property_type': 'apartment',
+    }
+    data.update(overrides)
+    return Property.objects.create(seller=seller, **data)
+
+
+class WishlistStatusQueryCountTests(TestCase):
+    """The in_wishlist flag must not cost one query per serialized property."""
+
+    def setUp(self):
+        self.seller = User.objects.create_user(username='seller', password='pass', role='seller')
+        self.buyer = User.objects.create_user(username='buyer', password='pass', role='buyer', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.buyer)
+
+    def add_properties(self, count):
+        for i in range(count):
+            prop = create_property(self.seller, name=f'Property {i}')
+            Wishlist.objects.create(user=self.buyer, property=prop)
+
+    def assert_constant_queries(self, url, num_queries, user=None):
+        if user is not None:
+            self.client.force_authenticate(user)
+        self.add_properties(2)
+        with self.assertNumQueries(num_queries):
+            small = self.client.get(url)
+        self.add_properties(5)
+        with self.assertNumQueries(num_queries):
+            large = self.client.get(url)
+        self.assertEqual(small.status_code, 200)
+        self.assertEqual(large.status_code, 200)
+        return large
+
+    def results(self, response):
+        data = response.json()
+        return data['results'] if isinstance(data, dict) else data
+
+    def test_property_list(self):
+        # Page and images, plus the ETag's catalog and wishlist aggregates
+        response = self.assert_constant_queries(reverse('property-list-create'), 4)
+        self.assertTrue(all(item['in_wishlist'] for item in self.results(response)))
+
+    def test_user_properties(self):
+        self.assert_constant_queries(reverse('user-properties'), 2, user=self.seller)
+
+    def test_admin_property_list(self):
+        response = self.assert_constant_queries(reverse('admin-property-list'), 2)
+        self.assertTrue(all(item['in_wishlist'] for item in self.results(response)))
+
+    def test_wishlist_list(self):
+        response = self.assert_constant_queries(reverse('wishlist-list'), 3)
+        self.assertTrue(all(item['property_details']['in_wishlist'] for item in self.results(response)))
+
+    def test_anonymous_list_reports_not_wishlisted(self):
+        self.add_properties(2)
+        self.client.force_authenticate(None)
+        response = self.client.get(reverse('property-list-create'))
+        self.assertFalse(any(item['in_wishlist'] for item in self.results(response)))
+
+
+class PropertySearchTests(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(username='seller', password='pass', role='seller')
+        self.client = APIClient()
+
+    def search(self, value):
+        response = self.client.get(reverse('property-list-create'), {'search': value})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        results = data['results'] if isinstance(data, dict) else data
+        return [item['name'] for item in results]
+
+    def test_prefix_and_diacritic_matching(self):
+        create_property(self.seller, name='Altbau Wohnung', city='München')
+        create_property(self.seller, name='Loft', city='Hamburg')
+        self.assertEqual(self.search('munch'), ['Altbau Wohnung'])
+        self.assertEqual(self.search('altb'), ['Altbau Wohnung'])
+
+    def test_index_follows_updates_and_deletes(self):
+        prop = create_property(self.seller, name='Garden House')
+        self.assertEqual(self.search('garden'), ['Garden House'])
+        prop.name = 'Roof Terrace'
+        prop.save()
+        self.assertEqual(self.search('garden'), [])
+        self.assertEqual(self.search('terrace'), ['Roof Terrace'])
+        prop.delete()
+        self.assertEqual(self.search('terrace'), [])
+
+    def test_name_hits_rank_above_description_hits(self):
+        create_property(self.seller, name='Quiet Flat', description='close to the lake')
+        create_property(self.seller, name='Lake House', description='quiet street')
+        self.assertEqual(self.search('lake'), ['Lake House', 'Quiet Flat'])
+
+    def test_fts_syntax_in_input_is_treated_as_text(self):
+        create_property(self.seller, name='Villa NEAR park')
+        self.assertEqual(self.search('"villa ( NEAR* park'), ['Villa NEAR park'])
+
+
+class PropertyIndexQueryPlanTests(TestCase):
+    """EXPLAIN QUERY PLAN must keep using the hot-path indexes instead of full scans."""
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Query plan assertions are written against SQLite')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        self.assertNotIn('SCAN properties_property\n', plan + '\n')
+
+    def test_default_listing_order(self):
+        self.assertUsesIndex(Property.objects.all()[:20], 'prop_created_idx')
+
+    def test_available_listing_order(self):
+        self.assertUsesIndex(Property.objects.filter(is_available=True)[:20], 'prop_avail_created_idx')
+
+    def test_city_and_price_filter(self):
+        queryset = Property.objects.filter(is_available=True, city='Berlin', price__lte=300000)
+        self.assertUsesIndex(queryset, 'prop_avail_city_price_idx')
+
+    def test_type_and_price_filter(self):
+        queryset = Property.objects.filter(is_available=True, property_type='house', price__gte=100000)
+        self.assertUsesIndex(queryset, 'prop_avail_type_price_idx')
+
+    def test_available_price_range(self):
+        queryset = Property.objects.filter(is_available=True, price__gte=100000, price__lte=200000).order_by('price')
+        self.assertUsesIndex(queryset, 'prop_avail_price_idx')
+
+    def test_seller_listing(self):
+        self.assertUsesIndex(Property.objects.filter(seller_id=1)[:20], 'prop_seller_created_idx')
+
+    def test_cursor_page_seeks_the_index(self):
+        paginator = KeysetPagination()
+        cases = (
+            (Property.objects.all(), ('-created_at', '-pk'), [timezone.now().isoformat(), 10], 'prop_created_idx'),
+            (Property.objects.filter(is_available=True), ('price', 'pk'), ['150000.00', 10], 'prop_avail_price_idx'),
+        )
+        for queryset, ordering, position, index_name in cases:
+            queryset = queryset.order_by(*[paginator.order_expression(field) for field in ordering])
+            plan = queryset.filter(paginator.after_position(ordering, position, Property))[:21].explain()
+            self.assertIn(f'SEARCH properties_property USING INDEX {index_name}', plan)
+
+    def test_primary_image_lookup(self):
+        plan = PropertyImage.objects.filter(property_id=1, is_primary=True).explain()
+        self.assertIn('propimage_property_primary_idx', plan)
+
+    def test_wishlist_counts_per_property(self):
+        plan = Wishlist.objects.filter(property_id=1).order_by('-created_at').explain()
+        self.assertIn('wishlist_property_created_idx', plan)
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pass', role='admin', is_staff=True)
+        self.seller = User.objects.create_user(username='seller', password='pass', role='seller')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def export(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_properties_csv(self):
+        create_property(self.seller, name='Loft, "Mitte"', city='Berlin')
+        create_property(self.seller, name='Villa', city='Hamburg', is_available=False)
+        rows = list(csv.DictReader(self.export(reverse('admin-export-properties')).splitlines()))
+        self.assertEqual([row['name'] for row in rows], ['Loft, "Mitte"', 'Villa'])
+        self.assertEqual(rows[0]['seller_username'], 'seller')
+        self.assertEqual(rows[0]['price'], '250000.00')
+
+    def test_properties_ndjson_with_filters(self):
+        create_property(self.seller, name='Loft', city='Berlin')
+        create_property(self.seller, name='Villa', city='Hamburg')
+        content = self.export(reverse('admin-export-properties'), export_format='ndjson', city='Hamburg')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['name'] for row in rows], ['Villa'])
+        self.assertIs(rows[0]['is_available'], True)
+
+    def test_single_query_regardless_of_row_count(self):
+        for i in range(30):
+            create_property(self.seller, name=f'Property {i}')
+        response = self.client.get(reverse('admin-export-properties'))
+        with self.assertNumQueries(1):
+            content = b''.join(response.streaming_content)
+        self.assertEqual(len(content.splitlines()), 31)
+
+    def test_wishlists_export(self):
+        buyer = User.objects.create_user(username='buyer', password='pass')
+        prop = create_property(self.seller, name='Loft')
+        Wishlist.objects.create(user=buyer, property=prop)
+        Wishlist.objects.create(user=self.admin, property=prop)
+        content = self.export(reverse('admin-export-wishlists'), export_format='ndjson', user_id=buyer.id)
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]['username'], rows[0]['property_name']), ('buyer', 'Loft'))
+
+    def test_rejects_unknown_format_and_non_admins(self):
+        response = self.client.get(reverse('admin-export-properties'), {'export_format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('admin-export-wishlists'), {'user_id': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.client.force_authenticate(self.seller)
+        self.assertEqual(self.client.get(reverse('admin-export-wishlists')).status_code, 403)
+
+
+class AdminAllWishlistsTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pass', role='admin', is_staff=True)
+        self.seller = User.objects.create_user(username='seller', role='seller')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.url = reverse('admin-all-wishlists')
+
+    def add_user_with_items(self, username, count):
+        user = User.objects.create_user(username=username, email=f'{username}@example.com')
+        for i in range(count):
+            prop = create_property(self.seller, name=f'{username} property {i}')
+            PropertyImage.objects.create(property=prop, image=f'{username}-{i}-a.jpg', is_primary=True)
+            PropertyImage.objects.create(property=prop, image=f'{username}-{i}-b.jpg')
+            Wishlist.objects.create(user=user, property=prop)
+        return user
+
+    def test_grouped_per_user_with_primary_image_only(self):
+        self.add_user_with_items('anna', 3)
+        data = self.client.get(self.url).json()
+        self.assertEqual(len(data['results']), 1)
+        entry = data['results'][0]
+        self.assertEqual(entry['user']['username'], 'anna')
+        self.assertEqual(entry['total_items'], 3)
+        self.assertEqual(
+            [item['property']['name'] for item in entry['wishlist_items']],
+            ['anna property 2', 'anna property 1', 'anna property 0'],
+        )
+        images = entry['wishlist_items'][0]['property']['images']
+        self.assertEqual(len(images), 1)
+        self.assertTrue(images[0]['image'].endswith('anna-2-a.jpg'))
+
+    def test_constant_queries_and_items_cap(self):
+        for i in range(3):
+            self.add_user_with_items(f'user{i}', 2)
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+        for i in range(3, 8):
+            self.add_user_with_items(f'user{i}', 4)
+        with self.assertNumQueries(3):
+            data = self.client.get(self.url, {'items_per_user': 2}).json()
+        self.assertTrue(all(len(entry['wishlist_items']) <= 2 for entry in data['results']))
+
+    def test_cursor_pagination_and_ordering(self):
+        for i, count in enumerate([1, 4, 2, 3]):
+            self.add_user_with_items(f'user{i}', count)
+        first = self.client.get(self.url, {'ordering': '-total_items', 'page_size': 2}).json()
+        self.assertEqual([entry['total_items'] for entry in first['results']], [4, 3])
+        second = self.client.get(first['next']).json()
+        self.assertEqual([entry['total_items'] for entry in second['results']], [2, 1])
+        self.assertIsNone(second['next'])
+
+    def test_filter_by_user_and_search(self):
+        anna = self.add_user_with_items('anna', 1)
+        self.add_user_with_items('bert', 1)
+        by_id = self.client.get(self.url, {'user': anna.id}).json()['results']
+        self.assertEqual([entry['user']['username'] for entry in by_id], ['anna'])
+        by_search = self.client.get(self.url, {'search': 'bert@'}).json()['results']
+        self.assertEqual([entry['user']['username'] for entry in by_search], ['bert'])
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(username='seller', role='seller')
+        self.client = APIClient()
+        self.url = reverse('property-list-create')
+        # Several rows share created_at so the id tiebreaker has to keep pages apart
+        stamp = timezone.now()
+        for i in range(7):
+            create_property(self.seller, name=f'Property {i}', price=Decimal(100000 + (i % 3) * 1000))
+        Property.objects.filter(id__in=Property.objects.values('id')[:5]).update(created_at=stamp)
+
+    def walk(self, params):
+        names, url, pages = [], self.url, []
+        data = self.client.get(url, params).json()
+        while True:
+            pages.append(data)
+            names += [item['name'] for item in data['results']]
+            if not data['next']:
+                return names, pages
+            data = self.client.get(data['next']).json()
+
+    def test_pages_through_ties_without_duplicates(self):
+        names, pages = self.walk({'page_size': 2})
+        expected = list(Property.objects.order_by('-created_at', '-id').values_list('name', flat=True))
+        self.assertEqual(names, expected)
+        self.assertEqual(len(pages), 4)
+        self.assertNotIn('count', pages[0])
+        self.assertIsNone(pages[0]['previous'])
+
+    def test_ordering_param_with_ties(self):
+        names, _ = self.walk({'page_size': 3, 'ordering': 'price'})
+        expected = list(Property.objects.order_by('price', 'id').values_list('name', flat=True))
+        self.assertEqual(names, expected)
+
+    def test_ranked_search_pages(self):
+        names, _ = self.walk({'page_size': 2, 'search': 'property'})
+        self.assertEqual(sorted(names), sorted(Property.objects.values_list('name', flat=True)))
+
+    def test_previous_link_returns_same_page(self):
+        first = self.client.get(self.url, {'page_size': 3}).json()
+        second = self.client.get(first['next']).json()
+        back = self.client.get(second['previous']).json()
+        self.assertEqual(back['results'], first['results'])
+
+    @override_settings(API_MAX_PAGE_SIZE=5)
+    def test_page_size_is_capped(self):
+        data = self.client.get(self.url, {'page_size': 1000}).json()
+        self.assertEqual(len(data['results']), 5)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'nonsense'}).status_code, 404)
+
+    def test_deep_page_query_count_is_constant(self):
+        data = self.client.get(self.url, {'page_size': 2}).json()
+        # The ETag's aggregate, the page and its images
+        with self.assertNumQueries(3):
+            self.client.get(data['next'])
+
+    def test_admin_list_accepts_page_numbers(self):
+        admin = User.objects.create_user(username='admin', role='admin', is_staff=True)
+        self.client.force_authenticate(admin)
+        url = reverse('admin-property-list')
+        numbered = self.client.get(url, {'page': 2, 'page_size': 5}).json()
+        self.assertEqual(numbered['count'], 7)
+        self.assertEqual(len(numbered['results']), 2)
+        self.assertIn('next', self.client.get(url).json())
+
+
+
+class ReadModelTests(TestCase):
+    """The columnar read model must page exactly like the ORM path."""
+
+    def setUp(self):
+        self.settings_override = override_settings(PROPERTY_READ_MODEL=True)
+        self.settings_override.enable()
+        self.seller = User.objects.create_user(username='seller', role='seller')
+        self.client = APIClient()
+        self.url = reverse('property-list-create')
+        cities = ['Berlin', 'München', 'Hamburg']
+        types = ['apartment', 'house', 'villa']
+        for i in range(24):
+            create_property(
+                self.seller, name=f'Property {i}', city=cities[i % 3], property_type=types[i % 4 % 3],
+                price=Decimal(200000 + (i % 5) * 50000), size=Decimal(60 + (i % 7) * 15),
+                number_of_rooms=1 + i % 5, is_available=i % 6 != 0,
+            )
+        # Shared created_at values, so the id tiebreaker matters for the default ordering too
+        Property.objects.filter(id__in=Property.objects.values('id')[:10]).update(created_at=timezone.now())
+        readmodel.reset()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        readmodel.reset()
+
+    QUERIES = [
+        {},
+        {'ordering': 'price'},
+        {'ordering': '-size', 'city': 'Berlin'},
+        {'property_type': 'house', 'price_min': 250000, 'price_max': 350000},
+        {'is_available': 'true', 'bedrooms': 3, 'ordering': '-price'},
+        {'ordering': '-price', 'price_min': 250000, 'price_max': 350000},
+        {'city': 'Köln'},
+    ]
+
+    def walk(self, params):
+        pages, data = [], self.client.get(self.url, {'page_size': 4, **params}).json()
+        while True:
+            pages.append(data)
+            if not data['next']:
+                break
+            data = self.client.get(data['next']).json()
+        # And back again from the last page
+        while data['previous']:
+            data = self.client.get(data['previous']).json()
+            pages.append(data)
+        return pages
+
+    def assert_matches_orm(self):
+        for params in self.QUERIES:
+            with self.subTest(params=params):
+                with mock.patch.object(readmodel, 'current', wraps=readmodel.current) as current:
+                    columnar = self.walk(params)
+                self.assertTrue(current.called)
+                with override_settings(PROPERTY_READ_MODEL=False):
+                    self.assertEqual(columnar, self.walk(params))
+
+    def test_pages_match_the_orm(self):
+        self.assert_matches_orm()
+
+    def test_changes_are_caught_up_from_the_change_log(self):
+        self.client.get(self.url)
+        create_property(self.seller, name='Newest', price=Decimal('150000'))
+        moved = Property.objects.get(name='Property 7')
+        moved.price = Decimal('999999')
+        moved.save()
+        Property.objects.get(name='Property 8').delete()
+        self.assertEqual(PropertyChange.objects.filter(property_id=moved.pk).count(), 2)
+        self.assertEqual(self.client.get(self.url).json()['results'][0]['name'], 'Newest')
+        self.assert_matches_orm()
+
+        # Enough changes to rebuild the sort orders
+        with mock.patch.object(readmodel, 'MIN_REORDER', 0):
+            for prop in Property.objects.filter(city='Hamburg'):
+                prop.size += 1
+                prop.save()
+            self.client.get(self.url)
+        self.assertEqual(readmodel._snapshot.moved, set())
+        self.assert_matches_orm()
+
+    def test_search_and_multi_field_ordering_take_the_orm_path(self):
+        with mock.patch.object(readmodel, 'current') as current:
+            self.walk({'search': 'property'})
+            self.walk({'ordering': 'price,size'})
+        current.assert_not_called()
+
+
+def jpeg_upload(name='photo.jpg', size=(1200, 800)):
+    buffer = BytesIO()
+    Image.new('RGB', size, (120, 160, 200)).save(buffer, format='JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+@override_settings(PROPERTY_IMAGE_EAGER=True, PROPERTY_IMAGE_WIDTHS=(320, 640, 1600), PROPERTY_IMAGE_FORMATS=('webp',))
+class ImageRenditionTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.seller = User.objects.create_user(username='seller', role='seller')
+        self.property = create_property(self.seller)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def upload(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            image = PropertyImage.objects.create(property=self.property, image=jpeg_upload(**kwargs), is_primary=True)
+        image.refresh_from_db()
+        return image
+
+    def test_renditions_generated_without_upscaling(self):
+        image = self.upload()
+        self.assertEqual(sorted(image.renditions['webp']), ['320', '640'])
+        self.assertEqual((image.width, image.height), (1200, 800))
+        self.assertTrue(image.placeholder.startswith('data:image/webp;base64,'))
+        storage = image.image.storage
+        with storage.open(image.renditions['webp']['320']) as rendition:
+            self.assertEqual(Image.open(rendition).size, (320, 213))
+
+    def test_serializers_expose_srcset(self):
+        image = self.upload()
+        data = self.client.get(reverse('property-list-create')).json()['results'][0]['images'][0]
+        self.assertRegex(data['srcset'], r'^http://testserver/media/properties/renditions/\d+/photo-320\.webp 320w, .+ 640w$')
+        self.assertEqual(data['sources'], [{'type': 'image/webp', 'srcset': data['srcset']}])
+        self.assertEqual(data['placeholder'], image.placeholder)
+
+    def test_delete_removes_renditions(self):
+        image = self.upload()
+        names = list(image.renditions['webp'].values())
+        with self.captureOnCommitCallbacks(execute=True):
+            image.delete()
+        self.assertFalse(any(image.image.storage.exists(name) for name in names))
+
+    def test_saving_other_fields_does_not_regenerate(self):
+        image = self.upload()
+        with self.captureOnCommitCallbacks() as callbacks:
+            image.is_primary = False
+            image.save()
+        self.assertEqual(callbacks, [])
+
+    def test_worker_failures_are_logged(self):
+        with mock.patch.object(images, 'generate_renditions', side_effect=OSError('disk full')), \
+                self.assertLogs('properties.images', 'ERROR') as logs:
+            images.run_in_worker(42)
+        self.assertIn('Image renditions for 42 failed: disk full', logs.output[0])
+
+        storage = mock.Mock(**{'delete.side_effect': OSError('gone')})
+        with self.assertLogs('properties.images', 'WARNING') as logs:
+            images.delete_files(storage, ['a.webp'])
+        self.assertIn('Could not delete rendition a.webp: gone', logs.output[0])
+
+
+class VectorIndexTests(TestCase):
+    def setUp(self):
+        self.index_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(PROPERTY_VECTOR_INDEX_DIR=self.index_dir)
+        self.settings_override.enable()
+        self.seller = User.objects.create_user(username='seller', role='seller')
+        self.family_home = create_property(
+            self.seller, name='Sunny family house', property_type='house',
+            description='Sunny house for families by the green, close to schools and a playground',
+        )
+        self.altbau = create_property(
+            self.seller, name='Helles Einfamilienhaus', city='München', property_type='house',
+            description='Helles Einfamilienhaus mit Garten in ruhiger Lage',
+        )
+        self.office = create_property(
+            self.seller, name='Office floor', property_type='commercial',
+            description='Open-plan office with underground parking next to the motorway',
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.index_dir, ignore_errors=True)
+
+    def ids(self, hits):
+        return [property_id for property_id, _ in hits]
+
+    def test_not_built_until_rebuilt(self):
+        self.assertIsNone(vectors.search('family home'))
+        self.assertEqual(vectors.rebuild_index(), 3)
+        self.assertEqual(self.ids(vectors.search('office parking')), [self.office.pk])
+
+    def test_ranks_by_meaning_and_prefilters(self):
+        vectors.rebuild_index()
+        hits = vectors.search('bright family home near a park')
+        self.assertEqual(self.ids(hits)[:2], [self.family_home.pk, self.altbau.pk])
+        self.assertNotIn(self.office.pk, self.ids(hits))
+        self.assertEqual(self.ids(vectors.search('bright family home', ids=[self.altbau.pk, self.office.pk])), [self.altbau.pk])
+
+    def test_saves_update_the_index_after_commit(self):
+        vectors.rebuild_index()
+        # Beyond the capacity of the built file, so the index has to grow
+        with self.captureOnCommitCallbacks(execute=True):
+            lake = create_property(self.seller, name='Lake view villa', description='Villa with a view of the lake')
+        self.assertEqual(self.ids(vectors.search('a view of the water'))[0], lake.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            lake.is_available = False
+            lake.save()
+        self.assertNotIn(lake.pk, self.ids(vectors.search('a view of the water')))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.office.delete()
+        self.assertEqual(vectors.search('office parking'), [])
+
+    def test_other_database_leaves_the_index_alone(self):
+        vectors.rebuild_index()
+        with mock.patch.object(vectors, 'database_name', return_value='other.sqlite3'):
+            self.assertIsNone(vectors.search('office parking'))
+            self.assertFalse(vectors.get_index().remove(self.office.pk))
+        self.assertEqual(self.ids(vectors.search('office parking')), [self.office.pk])
+
+
+class SimilarPropertiesTests(TestCase):
+    def setUp(self):
+        similarity.reset()
+        self.client = APIClient()
+        self.seller = User.objects.create_user(username='seller', role='seller')
+        self.flat = create_property(self.seller, name='Flat in Mitte')
+        self.twin = create_property(self.seller, name='Flat in Wedding', price=Decimal('260000'), size=Decimal('88'))
+        self.bigger = create_property(self.seller, name='Larger flat', price=Decimal('390000'), size=Decimal('130'), number_of_rooms=5)
+        self.munich = create_property(self.seller, name='Flat in Munich', city='München', price=Decimal('255000'))
+        self.villa = create_property(
+            self.seller, name='Villa', property_type='house', price=Decimal('1900000'), size=Decimal('400'), number_of_rooms=9
+        )
+        self.sold = create_property(self.seller, name='Sold twin', is_available=False)
+
+    def tearDown(self):
+        similarity.reset()
+
+    def similar(self, prop, **params):
+        response = self.client.get(reverse('property-similar', args=[prop.pk]), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_ranks_nearest_listings_first(self):
+        cards = self.similar(self.flat, limit=5)
+        self.assertEqual([card['id'] for card in cards], [self.twin.pk, self.munich.pk, self.bigger.pk, self.villa.pk])
+        self.assertGreater(cards[0]['similarity'], 80)
+        self.assertEqual(cards[0]['similarity'], sum(cards[0]['breakdown'].values()))
+        self.assertEqual(cards[1]['breakdown']['location'], 0)
+        self.assertEqual(set(cards[0]), {
+            'id', 'name', 'address', 'city', 'price', 'number_of_rooms', 'size',
+            'property_type', 'in_wishlist', 'image', 'similarity', 'breakdown',
+        })
+
+    def test_focus_and_limit(self):
+        self.assertEqual([card['id'] for card in self.similar(self.flat, limit=1)], [self.twin.pk])
+        cards = self.similar(self.twin, focus='location', limit=2)
+        self.assertEqual([card['id'] for card in cards], [self.flat.pk, self.bigger.pk])
+        response = self.client.get(reverse('property-similar', args=[self.flat.pk]), {'focus': 'garden'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(reverse('property-similar', args=[999999])).status_code, 404)
+
+    def test_saves_update_the_matrix_after_commit(self):
+        self.similar(self.flat)
+        with self.captureOnCommitCallbacks(execute=True):
+            closer = create_property(self.seller, name='Flat next door', price=Decimal('250000'))
+        self.assertEqual(self.similar(self.flat, limit=1)[0]['id'], closer.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            closer.is_available = False
+            closer.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.twin.delete()
+        self.assertEqual([card['id'] for card in self.similar(self.flat, limit=2)], [self.munich.pk, self.bigger.pk])
+
+    def test_constant_queries(self):
+        self.similar(self.flat)
+        buyer = User.objects.create_user(username='buyer', role='buyer')
+        Wishlist.objects.create(user=buyer, property=self.twin)
+        self.client.force_authenticate(buyer)
+        # The property, the cards and their primary images; the matrix is already built
+        with self.assertNumQueries(3):
+            cards = self.similar(self.flat, limit=12)
+        self.assertEqual(len(cards), 4)
+        self.assertTrue(cards[0]['in_wishlist'])
+
+
+class FakeStreetGeocoder(geocoding.Geocoder):
+    """An online geocoder that places every address in Berlin and records its calls"""
+    name = 'fake'
+    offline = False
+    calls = []
+
+    def geocode(self, address, city):
+        FakeStreetGeocoder.calls.append((address, city))
+        return geocoding.Location(52.5, 13.4, geocoding.ADDRESS, self.name)
+
+
+class GeocodingTests(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(username='seller', role='seller')
+
+    def test_gazetteer_resolves_cities_aliases_and_postcodes(self):
+        gazetteer = geocoding.GazetteerGeocoder()
+        munich = gazetteer.geocode('Marienplatz 1', 'München')
+        self.assertEqual(munich.precision, geocoding.CITY)
+        self.assertAlmostEqual(munich.latitude, 48.14, places=1)
+        self.assertEqual(gazetteer.geocode('', 'Munich'), munich)
+        self.assertEqual(gazetteer.geocode('', 'MUENCHEN'), munich)
+        self.assertEqual(gazetteer.geocode('', 'Berlin-Mitte'), gazetteer.geocode('', 'Berlin'))
+        region = gazetteer.geocode('Dorfstraße 3, 80999', 'Unterhaching-Süd')
+        self.assertEqual(region.precision, geocoding.POSTCODE)
+        self.assertAlmostEqual(region.latitude, munich.latitude, places=1)
+        self.assertIsNone(gazetteer.geocode('Somewhere 1', 'Atlantis'))
+
+    def test_save_geocodes_only_when_the_address_changes(self):
+        prop = create_property(self.seller, city='Hamburg')
+        self.assertEqual(prop.location_precision, geocoding.CITY)
+        self.assertAlmostEqual(prop.latitude, 53.55, places=1)
+
+        prop = Property.objects.get(pk=prop.pk)
+        with mock.patch.object(geocoding, 'resolve', wraps=geocoding.resolve) as resolve:
+            prop.price = Decimal('300000')
+            prop.save()
+            prop.name = 'Renamed'
+            prop.save(update_fields=['name'])
+            resolve.assert_not_called()
+
+            prop.city = 'Köln'
+            prop.save(update_fields=['city'])
+            resolve.assert_called_once()
+        prop.refresh_from_db()
+        self.assertAlmostEqual(prop.latitude, 50.94, places=1)
+
+        prop.city = 'Atlantis'
+        prop.save()
+        prop.refresh_from_db()
+        self.assertIsNone(prop.latitude)
+        self.assertEqual(prop.location_precision, '')
+
+    @override_settings(
+        PROPERTY_GEOCODERS=['properties.tests.FakeStreetGeocoder', 'properties.geocoding.GazetteerGeocoder'],
+        PROPERTY_GEOCODE_EAGER=True,
+    )
+    def test_online_geocoders_run_after_commit_once_per_address(self):
+        FakeStreetGeocoder.calls = []
+        with self.captureOnCommitCallbacks(execute=True):
+            first = create_property(self.seller, address='Hauptstraße 5', city='Leipzig')
+        # Saved with the gazetteer's answer, refined once the save is committed
+        self.assertEqual(first.location_precision, geocoding.CITY)
+        first.refresh_from_db()
+        self.assertEqual((first.latitude, first.location_precision), (52.5, geocoding.ADDRESS))
+
+        # Another spelling of the same address comes straight from the cache
+        with self.captureOnCommitCallbacks(execute=True):
+            second = create_property(self.seller, address='Hauptstrasse  5', city='leipzig')
+        self.assertEqual((second.latitude, second.location_precision), (52.5, geocoding.ADDRESS))
+        self.assertEqual(FakeStreetGeocoder.calls, [('Hauptstraße 5', 'Leipzig')])
+
+    def test_backfill_command(self):
+        props = [create_property(self.seller, city=city) for city in ['Dresden', 'Dresden', 'Atlantis']]
+        Property.objects.update(latitude=None, longitude=None, location_precision='')
+        out = StringIO()
+        with mock.patch.object(geocoding, 'resolve', wraps=geocoding.resolve) as resolve:
+            call_command('geocode_properties', '--batch-size', '2', stdout=out)
+        # One lookup per distinct address and batch: Dresden twice in the first, Atlantis in the second
+        self.assertEqual(resolve.call_count, 2)
+        self.assertIn('Located 2 properties (1 addresses not found)', out.getvalue())
+        self.assertEqual(
+            list(Property.objects.filter(pk__in=[p.pk for p in props]).order_by('pk').values_list('location_precision', flat=True)),
+            [geocoding.CITY, geocoding.CITY, ''],
+        )
+        self.assertFalse(GeocodedAddress.objects.exists())   # offline answers aren't cached
+
+
+class PropertyMapTests(TestCase):
+    GERMANY = {'bbox': '5.5,47,15.5,55.2', 'zoom': 6}
+    MUNICH = {'bbox': '11.5,48.1,11.65,48.17', 'zoom': 12}
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.seller = User.objects.create_user(username='seller', role='seller')
+        self.berlin = [
+            create_property(
+                self.seller, name=f'Berlin {i}', latitude=52.515 + i * 0.005, longitude=13.39 + i * 0.01,
+                price=Decimal(200000 + i * 100000),
+            )
+            for i in range(3)
+        ]
+        self.munich = create_property(self.seller, city='München', latitude=48.137, longitude=11.575)
+
+    def tearDown(self):
+        cache.clear()
+
+    def markers(self, **params):
+        response = self.client.get(reverse('property-map'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_clusters_zoomed_out_and_pins_zoomed_in(self):
+        markers = self.markers(**self.GERMANY)
+        self.assertEqual(markers['count'], 4)
+        self.assertEqual([cluster['count'] for cluster in markers['clusters']], [3])
+        self.assertAlmostEqual(markers['clusters'][0]['lat'], 52.52, places=3)
+        self.assertEqual(markers['pins'], [{
+            'id': self.munich.pk, 'lat': 48.137, 'lng': 11.575, 'price': 250000.0, 'property_type': 'apartment',
+        }])
+
+        zoomed = self.markers(bbox='13.37,52.50,13.43,52.54', zoom=15)
+        self.assertEqual(zoomed['clusters'], [])
+        self.assertEqual(sorted(pin['id'] for pin in zoomed['pins']), [prop.pk for prop in self.berlin])
+
+        self.assertEqual(self.markers(**self.GERMANY, price_max=250000)['count'], 2)
+        for params in [{}, {'bbox': '13,52,14', 'zoom': 6}, {'bbox': '14,52,13,53', 'zoom': 6},
+                       {'bbox': '-180,-85,180,85', 'zoom': 10}, {**self.GERMANY, 'price_max': 'cheap'}]:
+            self.assertEqual(self.client.get(reverse('property-map'), params).status_code, 400, params)
+
+    def test_tiles_stay_cached_until_their_region_changes(self):
+        self.markers(**self.GERMANY)
+        self.markers(**self.MUNICH)
+        # Cached tiles only cost the read of their region versions
+        with self.assertNumQueries(2):
+            self.markers(**self.GERMANY)
+            self.markers(**self.MUNICH)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.berlin[0].delete()
+        with self.assertNumQueries(1):
+            self.markers(**self.MUNICH)
+        self.assertEqual(self.markers(**self.GERMANY)['count'], 3)
+        # The versions are shared rows, not entries of this worker's cache
+        berlin_region = spatial.point_buckets((self.berlin[1].latitude, self.berlin[1].longitude)).pop()
+        self.assertEqual(CacheVersion.objects.get(key=spatial.VERSION_PREFIX + berlin_region).version, 1)
+
+        # Geocoded to Munich's centre: leaves Berlin's tiles and enters Munich's
+        with self.captureOnCommitCallbacks(execute=True):
+            self.berlin[1].city = 'München'
+            self.berlin[1].save()
+        self.assertEqual(self.markers(**self.MUNICH)['count'], 2)
+        self.assertEqual(self.markers(bbox='13.37,52.50,13.43,52.54', zoom=15)['count'], 1)
+
+    def test_dense_viewport_stays_small(self):
+        Property.objects.bulk_create([
+            Property(
+                seller=self.seller, name=f'Flat {i}', description='', address='', city='Berlin', price=Decimal(300000),
+                number_of_rooms=2, size=Decimal(60), latitude=52.4 + (i % 50) * 0.005, longitude=13.2 + (i // 50) * 0.008,
+            )
+            for i in range(2000)
+        ])
+        spatial.rebuild_index()
+        response = self.client.get(reverse('property-map'), {'bbox': '13.0,52.3,13.8,52.7', 'zoom': 10})
+        self.assertEqual(response.json()['count'], 2003)
+        self.assertLess(len(response.content), 4096)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.client = APIClient()
+        self.seller = User.objects.create_user(username='seller', role='seller')
+        self.buyer = User.objects.create_user(username='buyer', role='buyer')
+        self.property = create_property(self.seller, name='Flat in Mitte')
+        self.other = create_property(self.seller, name='House in Pankow', property_type='house')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def revalidate(self, url, response, **params):
+        return self.client.get(url, params, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_detail(self):
+        url = reverse('property-detail', args=[self.property.pk])
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('no-cache', first['Cache-Control'])
+        with self.assertNumQueries(1):
+            again = self.revalidate(url, first)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again['ETag'], first['ETag'])
+        self.assertEqual(again.content, b'')
+        since = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(since.status_code, 304)
+
+        # A new image is part of the body, so it changes the validators too
+        PropertyImage.objects.create(property=self.property, image=jpeg_upload())
+        changed = self.revalidate(url, first)
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(len(changed.json()['images']), 1)
+
+        # Per-user: signed in, the wishlist state is part of the ETag and Last-Modified is left out
+        self.client.force_authenticate(self.buyer)
+        mine = self.client.get(url)
+        self.assertNotEqual(mine['ETag'], changed['ETag'])
+        self.assertNotIn('Last-Modified', mine)
+        self.assertIn('private', mine['Cache-Control'])
+        Wishlist.objects.create(user=self.buyer, property=self.property)
+        wishlisted = self.revalidate(url, mine)
+        self.assertEqual(wishlisted.status_code, 200)
+        self.assertTrue(wishlisted.json()['in_wishlist'])
+        self.assertEqual(self.client.get(reverse('property-detail', args=[999999])).status_code, 404)
+
+    def test_list_and_filter_options(self):
+        url = reverse('property-list-create')
+        first = self.client.get(url, {'property_type': 'house'})
+        self.assertEqual(len(first.json()['results']), 1)
+        self.assertNotIn('Last-Modified', first)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.revalidate(url, first, property_type='house').status_code, 304)
+        # Another page or filter is another body
+        self.assertEqual(self.revalidate(url, first, property_type='apartment').status_code, 200)
+
+        # Saving a listed property raises max(updated_at); deleting one lowers the count
+        self.other.price = Decimal('500000')
+        self.other.save()
+        second = self.revalidate(url, first, property_type='house')
+        self.assertEqual(second.status_code, 200)
+        create_property(self.seller, name='Old house', property_type='house')
+        Property.objects.filter(name='Old house').delete()
+        self.assertEqual(self.revalidate(url, second, property_type='house').status_code, 304)
+        self.other.delete()
+        self.assertEqual(self.revalidate(url, second, property_type='house').json()['results'], [])
+
+        self.client.force_authenticate(self.buyer)
+        mine = self.client.get(url)
+        with self.assertNumQueries(2):
+            self.assertEqual(self.revalidate(url, mine).status_code, 304)
+        Wishlist.objects.create(user=self.buyer, property=self.property)
+        self.assertTrue(self.revalidate(url, mine).json()['results'][0]['in_wishlist'])
+
+        filters_url = reverse('property-filters')
+        options = self.client.get(filters_url)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.revalidate(filters_url, options).status_code, 304)
+        create_property(self.seller, city='Hamburg')
+        self.assertIn('Hamburg', self.revalidate(filters_url, options).json()['cities'])
+
+    def test_bulk_action_changes_validators(self):
+        detail_url = reverse('property-detail', args=[self.property.pk])
+        list_url = reverse('property-list-create')
+        detail = self.client.get(detail_url)
+        listing = self.client.get(list_url)
+        admin = User.objects.create_user(username='admin', role='admin', is_staff=True)
+        self.client.force_authenticate(admin)
+        response = self.client.post(reverse('admin-bulk-property-action'), {
+            'property_ids': [self.property.pk], 'action': 'deactivate',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        # update() skips auto_now, so the action has to move updated_at itself
+        self.client.force_authenticate(None)
+        changed = self.revalidate(detail_url, detail)
+        self.assertEqual(changed.status_code, 200)
+        self.assertFalse(changed.json()['is_available'])
+        self.assertEqual(self.revalidate(list_url, listing).status_code, 200)
+
+    def test_geocoding_changes_validators(self):
+        url = reverse('property-detail', args=[self.property.pk])
+        first = self.client.get(url)
+        with override_settings(PROPERTY_GEOCODERS=['properties.tests.FakeStreetGeocoder']):
+            self.assertTrue(geocoding.geocode_property(self.property.pk))
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+    def test_image_list(self):
+        factory = APIRequestFactory()
+        view = PropertyImageListView.as_view()
+
+        def get(**headers):
+            request = factory.get(f'/api/properties/{self.property.pk}/images/', **headers)
+            force_authenticate(request, self.buyer)
+            return view(request, property_id=self.property.pk)
+
+        image = PropertyImage.objects.create(property=self.property, image=jpeg_upload())
+        first = get()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(get(HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        self.assertEqual(get(HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304)
+        # Primary switches don't touch uploaded_at but still change the body
+        image.is_primary = True
+        image.save()
+        self.assertEqual(get(HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
 
-# Create your tests here.
@@ -4,6 +4,8 @@ from . import views
 urlpatterns = [
     path('', views.PropertyListCreateView.as_view(), name='property-list-create'),
     path('<int:pk>/', views.PropertyDetailView.as_view(), name='property-detail'),
+    path('<int:pk>/similar/', views.similar_properties, name='property-similar'),
+    path('map/', views.property_map, name='property-map'),
     path('my-properties/', views.UserPropertiesView.as_view(), name='user-properties'),
     path('<int:property_id>/images/', views.PropertyImageView.as_view(), name='property-images'),
     path('filters/options/', views.property_filters, name='property-filters'),
@@ -23,6 +25,8 @@ urlpatterns = [
     path('admin/properties/stats/', views.admin_property_stats, name='admin-property-stats'),
     path('admin/properties/bulk-action/', views.admin_bulk_property_action, name='admin-bulk-property-action'),
     path('admin/properties/filters/', views.admin_property_filters, name='admin-property-filters'),
+    path('admin/properties/export/', views.admin_export_properties, name='admin-export-properties'),
+    path('admin/wishlists/export/', views.admin_export_wishlists, name='admin-export-wishlists'),
     path('admin/wishlists/stats/', views.admin_wishlist_stats, name='admin-wishlist-stats'),
     path('admin/wishlists/', views.admin_all_wishlists, name='admin-all-wishlists'),
     path('admin/users/<int:user_id>/wishlist/', views.admin_user_wishlist, name='admin-user-wishlist'),
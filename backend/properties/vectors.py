@@ -0,0 +1,344 @@
+# properties/vectors.py
+"""
+Local vector index over property names and descriptions.
+
+Full-text search only finds the words of a query; "bright family home near a
+park" misses "Sunny house for families by the green". Here every text is
+turned into a hashed feature vector - words, word pairs, character 4-grams
+(so "famil" links family/families/Familie) and a small English/German concept
+map (park, garden and grün share a concept) - and a query is ranked against
+all listings by cosine similarity in one matrix-vector product. Everything
+runs on the CPU with NumPy; there is no model to download.
+
+Files in PROPERTY_VECTOR_INDEX_DIR:
+
+* ``vectors.f32`` - a memory-mapped float32 matrix, row ``i`` holding the
+  L2-normalized vector of property ``i`` (zero when it is missing or not
+  available). Every worker process maps the same file, so a row written by
+  one is seen by all of them.
+* ``idf.npy`` - query-side term weights from the last full build.
+* ``meta.json`` - dimensions and the database the index was built from.
+  The index is only read or written for that database, so a test or
+  benchmark database can't leave rows in the real index.
+
+``rebuild_vector_index`` builds it; afterwards the signals in
+properties/signals.py keep rows in step as properties are saved.
+"""
+import json
+import logging
+import math
+import os
+import re
+import threading
+import unicodedata
+import zlib
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+VERSION = 1
+DTYPE = np.float32
+MIN_SCORE = 0.08        # below this a listing shares little more than hash collisions with the query
+NAME_WEIGHT = 2.0       # words in the name count double
+GROWTH = 1.5
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'at', 'by', 'for', 'from', 'i', 'in', 'is', 'it', 'me', 'my', 'near', 'of', 'on',
+    'or', 'show', 'some', 'something', 'the', 'to', 'with', 'want', 'looking', 'find',
+    'am', 'auf', 'bei', 'das', 'der', 'die', 'ein', 'eine', 'einen', 'im', 'in', 'mit', 'nahe', 'und', 'zum', 'zur',
+}
+# Words that mean much the same for a buyer, in English and German (diacritics folded)
+CONCEPTS = {
+    'green': ['park', 'parks', 'garden', 'gardens', 'green', 'nature', 'garten', 'grun', 'grune', 'natur', 'trees'],
+    'family': ['family', 'families', 'kids', 'children', 'school', 'schools', 'familie', 'familien', 'kinder', 'schule'],
+    'bright': ['bright', 'light', 'sunny', 'sunlit', 'hell', 'helle', 'hellen', 'sonnig', 'lichtdurchflutet'],
+    'house': ['home', 'house', 'houses', 'haus', 'einfamilienhaus', 'reihenhaus', 'townhouse', 'villa', 'bungalow'],
+    'apartment': ['apartment', 'apartments', 'flat', 'flats', 'wohnung', 'wohnungen', 'loft', 'penthouse', 'condo'],
+    'quiet': ['quiet', 'calm', 'peaceful', 'silent', 'ruhig', 'ruhige', 'ruhigen', 'idyllic', 'idyllisch'],
+    'modern': ['modern', 'renovated', 'new', 'refurbished', 'neu', 'neubau', 'saniert', 'renoviert', 'moderne'],
+    'central': ['central', 'centre', 'center', 'downtown', 'zentral', 'zentrum', 'innenstadt', 'city'],
+    'outdoor': ['balcony', 'terrace', 'patio', 'balkon', 'terrasse', 'loggia', 'rooftop'],
+    'view': ['view', 'views', 'panorama', 'blick', 'aussicht', 'skyline'],
+    'spacious': ['spacious', 'large', 'big', 'huge', 'roomy', 'gross', 'grosse', 'geraumig', 'weitlaufig'],
+    'water': ['lake', 'river', 'sea', 'waterfront', 'see', 'fluss', 'meer', 'ufer', 'canal', 'kanal'],
+    'transit': ['metro', 'subway', 'train', 'station', 'tram', 'bus', 'u', 'bahn', 'ubahn', 'sbahn', 'bahnhof'],
+}
+CONCEPT_OF = {word: concept for concept, words in CONCEPTS.items() for word in words}
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def fold(text):
+    text = (text or '').lower()
+    if text.isascii():
+        return text
+    text = unicodedata.normalize('NFKD', text.replace('ß', 'ss'))
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+def words(text):
+    return [word for word in WORD_RE.findall(fold(text)) if word not in STOP_WORDS]
+
+
+@lru_cache(maxsize=100_000)
+def word_features(word, dimensions):
+    """
+    Hashed (indices, signed weights) of one word: the word itself, its
+    character 4-grams and its concept. Cached, since listings reuse words.
+    """
+    features = [(f'w:{word}', 1.0)]
+    padded = f'<{word}>'
+    features += [(f'g:{padded[i:i + 4]}', 0.25) for i in range(len(padded) - 3)]
+    if word in CONCEPT_OF:
+        features.append((f'c:{CONCEPT_OF[word]}', 1.5))
+    indices, weights = [], []
+    for feature, weight in features:
+        index, sign = bucket(feature, dimensions)
+        indices.append(index)
+        weights.append(sign * weight)
+    return indices, weights
+
+
+def bucket(feature, dimensions):
+    """Stable across processes, unlike hash(); the top bit picks the sign so collisions tend to cancel."""
+    value = zlib.crc32(feature.encode())
+    return value % dimensions, 1.0 if value & 0x80000000 else -1.0
+
+
+def encode(text, name='', dimensions=None):
+    """The L2-normalized vector of a listing (``name`` weighs more) or a query."""
+    dimensions = dimensions or get_dimensions()
+    indices, weights = [], []
+    for field, field_weight in ((text, 1.0), (name, NAME_WEIGHT)):
+        tokens = words(field)
+        # Sublinear term frequency: the tenth "modern" adds little
+        for word, count in Counter(tokens).items():
+            word_indices, word_weights = word_features(word, dimensions)
+            scale = field_weight * (1 + math.log(count))
+            indices += word_indices
+            weights += [weight * scale for weight in word_weights]
+        for (first, second), count in Counter(zip(tokens, tokens[1:])).items():
+            index, sign = bucket(f'b:{first} {second}', dimensions)
+            indices.append(index)
+            weights.append(sign * 0.5 * field_weight * (1 + math.log(count)))
+    if not indices:
+        return np.zeros(dimensions, dtype=DTYPE)
+    vector = np.bincount(indices, weights, minlength=dimensions).astype(DTYPE)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def get_dimensions():
+    return getattr(settings, 'PROPERTY_VECTOR_DIMENSIONS', 512)
+
+
+def database_name():
+    return str(connection.settings_dict['NAME'])
+
+
+class VectorIndex:
+    def __init__(self, path, dimensions):
+        self.path = path
+        self.dimensions = dimensions
+        self.lock = threading.Lock()
+        self.vectors = None
+        self.idf = None
+        self.stamp = None
+
+    @property
+    def vectors_path(self):
+        return os.path.join(self.path, 'vectors.f32')
+
+    @property
+    def meta_path(self):
+        return os.path.join(self.path, 'meta.json')
+
+    @property
+    def idf_path(self):
+        return os.path.join(self.path, 'idf.npy')
+
+    def is_built(self):
+        """Built for this database with the configured dimensions."""
+        try:
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return (
+            meta.get('version') == VERSION
+            and meta.get('dimensions') == self.dimensions
+            and meta.get('database') == database_name()
+            and os.path.exists(self.vectors_path)
+        )
+
+    def row_bytes(self):
+        return self.dimensions * np.dtype(DTYPE).itemsize
+
+    def refresh(self):
+        """(Re)map the files when another process rebuilt or grew them. Returns False if not built."""
+        if not self.is_built():
+            self.vectors = None
+            return False
+        stat = os.stat(self.vectors_path)
+        stamp = (stat.st_ino, stat.st_size)
+        if self.vectors is None or stamp != self.stamp:
+            rows = stat.st_size // self.row_bytes()
+            self.vectors = np.memmap(self.vectors_path, dtype=DTYPE, mode='r+', shape=(rows, self.dimensions)) if rows else None
+            self.idf = np.load(self.idf_path) if os.path.exists(self.idf_path) else np.ones(self.dimensions, dtype=DTYPE)
+            self.stamp = stamp
+        return True
+
+    def grow(self, rows):
+        """Make room for row ``rows - 1``; the file is only ever extended, so concurrent growers agree."""
+        with open(self.vectors_path, 'r+b') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() < rows * self.row_bytes():
+                f.truncate(math.ceil(rows * GROWTH) * self.row_bytes())
+        self.stamp = None
+        self.refresh()
+
+    def set(self, property_id, vector):
+        """Write one row; a no-op when the index isn't built for this database."""
+        with self.lock:
+            if not self.refresh():
+                return False
+            if self.vectors is None or property_id >= len(self.vectors):
+                if not vector.any():
+                    return True
+                self.grow(property_id + 1)
+            self.vectors[property_id] = vector
+        return True
+
+    def add(self, property_id, name, description):
+        return self.set(property_id, encode(description, name, self.dimensions))
+
+    def remove(self, property_id):
+        return self.set(property_id, np.zeros(self.dimensions, dtype=DTYPE))
+
+    def build(self, rows, capacity):
+        """
+        Replace the index with ``rows`` of (id, name, description); ``capacity``
+        is the highest id plus one. The new files are swapped in atomically.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = self.vectors_path + '.tmp'
+        vectors = np.memmap(tmp_path, dtype=DTYPE, mode='w+', shape=(max(1, capacity), self.dimensions))
+        document_frequency = np.zeros(self.dimensions, dtype=np.int64)
+        count = 0
+        for property_id, name, description in rows:
+            vector = encode(description, name, self.dimensions)
+            vectors[property_id] = vector
+            document_frequency += vector != 0
+            count += 1
+        vectors.flush()
+        del vectors
+        idf = (np.log((1 + count) / (1 + document_frequency)) + 1).astype(DTYPE)
+        np.save(self.idf_path + '.tmp.npy', idf)
+        with self.lock:
+            # Unmap the old file first; Windows can't replace a mapped file
+            self.vectors = None
+            self.stamp = None
+            os.replace(self.idf_path + '.tmp.npy', self.idf_path)
+            os.replace(tmp_path, self.vectors_path)
+            with open(self.meta_path + '.tmp', 'w') as f:
+                json.dump({'version': VERSION, 'dimensions': self.dimensions, 'database': database_name()}, f)
+            os.replace(self.meta_path + '.tmp', self.meta_path)
+            self.refresh()
+        return count
+
+    def search(self, text, k=10, ids=None):
+        """
+        The ``k`` listings closest to ``text`` as (property id, score), best
+        first. ``ids`` restricts the search to those properties, e.g. the ids
+        of a filtered queryset. None when the index isn't built.
+        """
+        with self.lock:
+            if not self.refresh():
+                return None
+            vectors = self.vectors
+            idf = self.idf
+        if vectors is None:
+            return []
+        query = encode(text, dimensions=self.dimensions) * idf
+        norm = np.linalg.norm(query)
+        if not norm:
+            return []
+        query /= norm
+
+        if ids is None:
+            candidates = None
+            scores = vectors @ query
+        else:
+            candidates = np.fromiter(ids, dtype=np.int64)
+            candidates = candidates[(candidates >= 0) & (candidates < len(vectors))]
+            scores = vectors[candidates] @ query
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        top = top[scores[top] >= MIN_SCORE]
+        found = top if candidates is None else candidates[top]
+        return [(int(property_id), float(score)) for property_id, score in zip(found, scores[top])]
+
+
+def get_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            path = getattr(settings, 'PROPERTY_VECTOR_INDEX_DIR', os.path.join(settings.BASE_DIR, 'vector_index'))
+            _index = VectorIndex(str(path), get_dimensions())
+        return _index
+
+
+def reset_index():
+    global _index
+    with _index_lock:
+        _index = None
+
+
+@receiver(setting_changed)
+def reset_index_on_setting_change(setting, **kwargs):
+    if setting.startswith('PROPERTY_VECTOR_'):
+        reset_index()
+
+
+def index_property(prop):
+    """Refresh one property's row: its text when available, nothing otherwise."""
+    try:
+        if prop.is_available:
+            get_index().add(prop.pk, prop.name, prop.description)
+        else:
+            get_index().remove(prop.pk)
+    except Exception as e:
+        # The save is already committed; the next rebuild fixes the row
+        logger.error(f"Vector index update for property {prop.pk} failed: {e}")
+
+
+def remove_property(property_id):
+    try:
+        get_index().remove(property_id)
+    except Exception as e:
+        logger.error(f"Vector index removal of property {property_id} failed: {e}")
+
+
+def rebuild_index():
+    from .models import Property
+
+    available = Property.objects.filter(is_available=True).order_by()
+    capacity = (Property.objects.order_by('-pk').values_list('pk', flat=True).first() or 0) + 1
+    return get_index().build(available.values_list('pk', 'name', 'description').iterator(chunk_size=2000), capacity)
+
+
+def search(text, k=10, ids=None):
+    """Top-k (property id, score) for ``text``, or None when the index isn't built for this database."""
+    return get_index().search(text, k, ids)
@@ -7,15 +7,25 @@ from django_filters.rest_framework import DjangoFilterBackend
 from users.models import User  # Add this import
 from django.db import models  # Add this import
 from .models import Property, PropertyImage
-from .serializers import PropertySerializer, PropertyCreateSerializer, PropertyImageSerializer,WishlistSerializer
+from .serializers import PropertySerializer, PropertyCreateSerializer, PropertyImageSerializer,WishlistSerializer, SimilarPropertySerializer
 from .permissions import IsVerifiedSellerOrReadOnly, IsPropertyOwnerOrReadOnly, IsVerifiedSeller
+from .search import search_properties, matching_property_ids
+from . import similarity, spatial
+from .images import responsive_fields
+from .signals import properties_bulk_updated
+from dashboard import rollups
+from dashboard.streaming import export_format_from, streaming_export_response
+from real_estate.conditional import ConditionalGetMixin, Validators, conditional_get
+from .pagination import AdminWishlistUserPagination, PropertyListPagination
 from .models import Property, PropertyImage, Wishlist  # Add Wishlist
  # Add WishlistSerializer
  ###Admin
 from rest_framework.permissions import IsAdminUser
  # properties/views.py - Add this import at the top
  # properties/views.py - Add these analytics views
+from django.db import transaction
 from django.db.models import Count, Avg, Q, F, Sum
+from django.db.models.functions import RowNumber
 from django_filters import rest_framework as django_filters
 from django.contrib.auth import get_user_model
 
@@ -23,9 +33,13 @@ from django.contrib.auth import get_user_model
  
  # Add these imports at the top if not already there
  
+import logging
+
 from django.utils import timezone
 from datetime import timedelta
 
+logger = logging.getLogger(__name__)
+
 class PropertyFilter(django_filters.FilterSet):
     price_min = django_filters.NumberFilter(field_name="price", lookup_expr='gte')
     price_max = django_filters.NumberFilter(field_name="price", lookup_expr='lte')
@@ -37,20 +51,49 @@ class PropertyFilter(django_filters.FilterSet):
         fields = ['property_type', 'city', 'is_available']
     
     def filter_search(self, queryset, name, value):
-        return queryset.filter(
-            models.Q(name__icontains=value) |
-            models.Q(description__icontains=value) |
-            models.Q(address__icontains=value) |
-            models.Q(city__icontains=value)
-        )
+        if not value.strip():
+            return queryset
+        return search_properties(queryset, value, ranked=True)
 
-class PropertyListCreateView(generics.ListCreateAPIView):
-    queryset = Property.objects.all()
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+
+class SearchRankOrderingFilter(filters.OrderingFilter):
+    """
+    Order full-text search results by relevance unless the client asked
+    for an explicit ordering.
+    """
+    def get_default_ordering(self, view):
+        search = view.request.query_params.get('search', '').strip()
+        if search:
+            return ['search_rank', '-created_at']
+        return super().get_default_ordering(view)
+
+
+def wishlist_state(user):
+    """(size, latest addition) of the user's wishlist, which every add and remove changes"""
+    if not user.is_authenticated:
+        return []
+    state = Wishlist.objects.filter(user=user).aggregate(count=Count('id'), latest=models.Max('created_at'))
+    return [state['count'], state['latest']]
+
+
+class PropertyListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
+    filter_backends = [DjangoFilterBackend, SearchRankOrderingFilter]
     filterset_class = PropertyFilter  # Use the custom filter class
-    search_fields = ['name', 'description', 'address', 'city']
     ordering_fields = ['price', 'created_at', 'size']
     ordering = ['-created_at']
+    pagination_class = PropertyListPagination   # columnar read model when PROPERTY_READ_MODEL is on
+
+    def get_queryset(self):
+        return Property.objects.select_related('seller').prefetch_related('images').with_wishlist_status(self.request.user)
+
+    def get_validators(self):
+        # Any save (image changes touch updated_at too) raises the max; any deletion lowers the count
+        filterset = PropertyFilter(self.request.query_params, queryset=Property.objects.order_by())
+        if not filterset.is_valid():
+            return None
+        catalog = filterset.qs.aggregate(count=Count('id'), updated=models.Max('updated_at'))
+        user = self.request.user
+        return Validators([catalog['count'], catalog['updated'], *wishlist_state(user)], private=user.is_authenticated)
     
     def get_permissions(self):
         if self.request.method == 'POST':
@@ -72,17 +115,32 @@ class PropertyListCreateView(generics.ListCreateAPIView):
 
 
 
-class PropertyDetailView(generics.RetrieveUpdateDestroyAPIView):
+class PropertyDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Property.objects.all()
     serializer_class = PropertySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsPropertyOwnerOrReadOnly]
 
+    def get_validators(self):
+        user = self.request.user
+        row = Property.objects.filter(pk=self.kwargs['pk']).with_wishlist_status(user).values(
+            'updated_at', 'is_wishlisted'
+        ).first()
+        if row is None:
+            return None
+        # Wishlist removals leave no timestamp, so signed-in users only get the ETag
+        private = user.is_authenticated
+        return Validators(
+            [row['updated_at'], row['is_wishlisted']],
+            last_modified=None if private else row['updated_at'],
+            private=private,
+        )
+
 class UserPropertiesView(generics.ListAPIView):
     serializer_class = PropertySerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Property.objects.filter(seller=self.request.user)
+        return Property.objects.filter(seller=self.request.user).select_related('seller').prefetch_related('images').with_wishlist_status(self.request.user)
 
 class PropertyImageView(generics.CreateAPIView):
     queryset = PropertyImage.objects.all()
@@ -97,8 +155,14 @@ class PropertyImageView(generics.CreateAPIView):
             raise permissions.PermissionDenied("You don't own this property")
         serializer.save(property=property_obj)
 
+def property_filters_validators(request):
+    catalog = Property.objects.aggregate(count=Count('id'), updated=models.Max('updated_at'))
+    return Validators([catalog['count'], catalog['updated']])
+
+
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
+@conditional_get(property_filters_validators)
 def property_filters(request):
     """
     Get available filter options for properties
@@ -113,13 +177,87 @@ def property_filters(request):
     })
 
 
+SIMILAR_DEFAULT_LIMIT = 3
+SIMILAR_MAX_LIMIT = 12
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def similar_properties(request, pk):
+    """
+    The available listings most like property ``pk``, best first, as compact
+    cards with a 0-100 ``similarity`` and its ``breakdown`` per criterion.
+    ``?limit=`` (default 3, at most 12); ``?focus=`` one of location, price,
+    size, type or rooms to weigh that criterion more.
+    """
+    prop = generics.get_object_or_404(Property.objects.only(*similarity.FIELDS), pk=pk)
+    focus = request.query_params.get('focus') or None
+    if focus is not None and focus not in similarity.CRITERIA:
+        return Response(
+            {"error": f"focus must be one of: {', '.join(similarity.CRITERIA)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        limit = int(request.query_params.get('limit', SIMILAR_DEFAULT_LIMIT))
+    except ValueError:
+        limit = SIMILAR_DEFAULT_LIMIT
+    limit = max(1, min(limit, SIMILAR_MAX_LIMIT))
+
+    matches = similarity.similar(prop, limit, focus)
+    cards = Property.objects.filter(pk__in=[property_id for property_id, _, _ in matches]).prefetch_related(
+        models.Prefetch('images', queryset=PropertyImage.objects.filter(is_primary=True), to_attr='primary_images')
+    ).with_wishlist_status(request.user).in_bulk()
+    results = []
+    for property_id, score, breakdown in matches:
+        # Deleted since the matrix last saw it
+        if property_id in cards:
+            card = cards[property_id]
+            card.similarity, card.breakdown = score, breakdown
+            results.append(card)
+    return Response(SimilarPropertySerializer(results, many=True, context={'request': request}).data)
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def property_map(request):
+    """
+    Map markers for a viewport: ``?bbox=west,south,east,north`` (as Leaflet's
+    ``getBounds().toBBoxString()``) and ``?zoom=`` (0-20), plus any of the
+    property list filters. Returns ``clusters`` (count and centroid) and
+    ``pins`` (single listings) at most one per 128px square of the map.
+    """
+    try:
+        west, south, east, north = (float(value) for value in request.query_params.get('bbox', '').split(','))
+        zoom = int(request.query_params.get('zoom', ''))
+    except ValueError:
+        return Response(
+            {"error": "bbox (west,south,east,north) and zoom are required"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not (-180 <= west < east <= 180 and -90 <= south < north <= 90 and 0 <= zoom <= spatial.MAX_ZOOM):
+        return Response(
+            {"error": f"bbox must be a box in degrees with west < east and south < north, zoom 0-{spatial.MAX_ZOOM}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    filterset = PropertyFilter(request.query_params, queryset=Property.objects.all())
+    if not filterset.is_valid():
+        return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        markers = spatial.viewport(filterset.qs, filterset.form.cleaned_data, south, west, north, east, zoom)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(markers)
+
 # properties/views.py - Fix the WishlistListView
 class WishlistListView(generics.ListCreateAPIView):
     serializer_class = WishlistSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Wishlist.objects.filter(user=self.request.user).select_related('property')
+        # Prefetch the properties with wishlist status, seller and images so the nested serializer stays query-free
+        properties = Property.objects.select_related('seller').prefetch_related('images').with_wishlist_status(self.request.user)
+        return Wishlist.objects.filter(user=self.request.user).prefetch_related(
+            models.Prefetch('property', queryset=properties)
+        )
 
     def perform_create(self, serializer):
         property_id = self.request.data.get('property')
@@ -194,7 +332,7 @@ def check_wishlist_status(request, property_id):
 
 
 # properties/views.py - Update PropertyImageListView
-class PropertyImageListView(generics.ListCreateAPIView):
+class PropertyImageListView(ConditionalGetMixin, generics.ListCreateAPIView):
     serializer_class = PropertyImageSerializer
     permission_classes = [permissions.IsAuthenticated, IsPropertyOwnerOrReadOnly]
 
@@ -202,6 +340,13 @@ class PropertyImageListView(generics.ListCreateAPIView):
         property_id = self.kwargs['property_id']
         return PropertyImage.objects.filter(property_id=property_id)
 
+    def get_validators(self):
+        # Every image upload, edit, deletion and rendition touches the property's updated_at
+        updated_at = Property.objects.filter(pk=self.kwargs['property_id']).values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            return None
+        return Validators([updated_at], last_modified=updated_at, private=True)
+
     def perform_create(self, serializer):
         property_id = self.kwargs['property_id']
         property_obj = Property.objects.get(id=property_id)
@@ -311,9 +456,10 @@ class AdminPropertyListView(generics.ListAPIView):
     search_fields = ['name', 'description', 'address', 'city', 'seller__username', 'seller__email']
     ordering_fields = ['price', 'created_at', 'size', 'number_of_rooms']
     ordering = ['-created_at']
+    allow_page_numbers = True  # ?page=N for numbered admin tables, cursor otherwise
 
     def get_queryset(self):
-        queryset = Property.objects.all().select_related('seller').prefetch_related('images')
+        queryset = Property.objects.all().select_related('seller').prefetch_related('images').with_wishlist_status(self.request.user)
         
         # Additional filters for admin
         status_filter = self.request.query_params.get('status', None)
@@ -399,12 +545,15 @@ def admin_bulk_property_action(request):
     
     properties = Property.objects.filter(id__in=property_ids)
     
-    if action == 'activate':
-        properties.update(is_available=True)
-        message = f"Activated {properties.count()} properties"
-    elif action == 'deactivate':
-        properties.update(is_available=False)
-        message = f"Deactivated {properties.count()} properties"
+    if action in ('activate', 'deactivate'):
+        with transaction.atomic():
+            # update() skips the rollup signals, so apply the affected rows' difference by hand
+            before = rollups.load_snapshots(properties.select_for_update())
+            properties.update(is_available=action == 'activate', updated_at=timezone.now())
+            after = rollups.load_snapshots(properties)
+            rollups.apply_changes(Property, [(state, after.get(pk)) for pk, state in before.items()])
+        properties_bulk_updated.send(sender=Property, queryset=properties)
+        message = f"{'Activated' if action == 'activate' else 'Deactivated'} {len(before)} properties"
     elif action == 'delete':
         count = properties.count()
         # Delete associated images first
@@ -415,6 +564,65 @@ def admin_bulk_property_action(request):
     
     return Response({"message": message})
 
+PROPERTY_EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('name', 'name'),
+    ('property_type', 'property_type'),
+    ('city', 'city'),
+    ('address', 'address'),
+    ('price', 'price'),
+    ('number_of_rooms', 'number_of_rooms'),
+    ('size', 'size'),
+    ('is_available', 'is_available'),
+    ('seller_id', 'seller_id'),
+    ('seller_username', 'seller__username'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+]
+
+WISHLIST_EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('user_id', 'user_id'),
+    ('username', 'user__username'),
+    ('user_email', 'user__email'),
+    ('property_id', 'property_id'),
+    ('property_name', 'property__name'),
+    ('property_city', 'property__city'),
+    ('property_price', 'property__price'),
+    ('created_at', 'created_at'),
+]
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def admin_export_properties(request):
+    """
+    Stream every property (optionally narrowed with the PropertyFilter
+    params) as CSV or NDJSON: ?export_format=csv|ndjson
+    """
+    export_format = export_format_from(request)
+    if export_format is None:
+        return Response({"error": "export_format must be csv or ndjson"}, status=status.HTTP_400_BAD_REQUEST)
+    queryset = PropertyFilter(request.GET, queryset=Property.objects.order_by('id')).qs
+    return streaming_export_response(queryset, PROPERTY_EXPORT_COLUMNS, export_format, 'properties')
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def admin_export_wishlists(request):
+    """Stream every wishlist row as CSV or NDJSON, optionally for one ?user_id="""
+    export_format = export_format_from(request)
+    if export_format is None:
+        return Response({"error": "export_format must be csv or ndjson"}, status=status.HTTP_400_BAD_REQUEST)
+    queryset = Wishlist.objects.order_by('id')
+    user_id = request.GET.get('user_id')
+    if user_id:
+        try:
+            queryset = queryset.filter(user_id=int(user_id))
+        except ValueError:
+            return Response({"error": "user_id must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+    return streaming_export_response(queryset, WISHLIST_EXPORT_COLUMNS, export_format, 'wishlists')
+
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def admin_property_filters(request):
@@ -483,70 +691,103 @@ def admin_wishlist_stats(request):
     except Exception as e:
         return Response({'error': str(e)}, status=500)
 
+def _absolute_url(request, file_field):
+    if not file_field:
+        return None
+    try:
+        return request.build_absolute_uri(file_field.url)
+    except Exception as e:
+        logger.warning(f"Error building file URL: {e}")
+        return None
+
+
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def admin_all_wishlists(request):
-    """Get all wishlists with user and property details"""
-    wishlists = Wishlist.objects.select_related('user', 'property').prefetch_related('property__images').all()
-    
-    # Group by user
-    user_wishlists = {}
-    for wishlist in wishlists:
-        user_id = wishlist.user.id
-        if user_id not in user_wishlists:
-            # FIX: Use absolute URL for profile picture
-            profile_picture_url = None
-            if wishlist.user.profile_picture:
-                try:
-                    profile_picture_url = request.build_absolute_uri(wishlist.user.profile_picture.url)
-                except Exception as e:
-                    print(f"Error building profile picture URL: {e}")
-                    profile_picture_url = None
-            
-            user_wishlists[user_id] = {
+    """
+    Users with wishlist items, one page at a time. Grouping, counts and
+    sorting happen in SQL and only each property's primary image is loaded.
+
+    Query params: ordering (-latest_added, latest_added, -total_items,
+    total_items, username, -username), user (id), search (username/email),
+    items_per_user (default 10, max 50), page_size, cursor.
+    """
+    try:
+        users = User.objects.filter(wishlist__isnull=False).annotate(
+            total_items=Count('wishlist'),
+            latest_added=models.Max('wishlist__created_at'),
+        )
+        user_id = request.GET.get('user')
+        if user_id:
+            users = users.filter(id=user_id)
+        search = request.GET.get('search', '').strip()
+        if search:
+            users = users.filter(Q(username__icontains=search) | Q(email__icontains=search))
+        
+        paginator = AdminWishlistUserPagination()
+        page = paginator.paginate_queryset(users, request)
+        
+        try:
+            items_per_user = min(max(int(request.GET.get('items_per_user', 10)), 1), 50)
+        except ValueError:
+            items_per_user = 10
+        
+        # Newest items per user on this page, cut to items_per_user in SQL
+        items = Wishlist.objects.filter(user_id__in=[user.id for user in page]).annotate(
+            position=models.Window(
+                RowNumber(),
+                partition_by=[F('user_id')],
+                order_by=[F('created_at').desc(), F('id').desc()],
+            )
+        ).filter(position__lte=items_per_user).select_related('property').prefetch_related(
+            models.Prefetch(
+                'property__images',
+                queryset=PropertyImage.objects.filter(is_primary=True),
+                to_attr='primary_images',
+            )
+        ).order_by('user_id', 'position')
+        
+        items_by_user = {}
+        for wishlist in items:
+            items_by_user.setdefault(wishlist.user_id, []).append({
+                'id': wishlist.id,
+                'property': {
+                    'id': wishlist.property.id,
+                    'name': wishlist.property.name,
+                    'price': str(wishlist.property.price),
+                    'city': wishlist.property.city,
+                    'property_type': wishlist.property.property_type,
+                    'images': [
+                        {
+                            'id': image.id,
+                            'image': _absolute_url(request, image.image),
+                            'is_primary': True,
+                            **responsive_fields(image, request),
+                        }
+                        for image in wishlist.property.primary_images
+                    ]
+                },
+                'added_at': wishlist.created_at.isoformat()
+            })
+        
+        results = [
+            {
                 'user': {
-                    'id': wishlist.user.id,
-                    'username': wishlist.user.username,
-                    'email': wishlist.user.email,
-                    'profile_picture_url': profile_picture_url,
+                    'id': user.id,
+                    'username': user.username,
+                    'email': user.email,
+                    'profile_picture_url': _absolute_url(request, user.profile_picture),
                 },
-                'wishlist_items': [],
-                'total_items': 0
+                'wishlist_items': items_by_user.get(user.id, []),
+                'total_items': user.total_items,
+                'latest_added': user.latest_added.isoformat() if user.latest_added else None,
             }
-        
-        # FIX: Use absolute URLs for property images
-        property_images = []
-        for image in wishlist.property.images.all():
-            try:
-                image_url = request.build_absolute_uri(image.image.url)
-                property_images.append({
-                    'id': image.id,
-                    'image': image_url,  # This is now an absolute URL
-                    'is_primary': image.is_primary
-                })
-            except Exception as e:
-                print(f"Error building property image URL: {e}")
-                continue
-        
-        user_wishlists[user_id]['wishlist_items'].append({
-            'id': wishlist.id,
-            'property': {
-                'id': wishlist.property.id,
-                'name': wishlist.property.name,
-                'price': str(wishlist.property.price),
-                'city': wishlist.property.city,
-                'property_type': wishlist.property.property_type,
-                'images': property_images  # Now contains absolute URLs
-            },
-            'added_at': wishlist.created_at.isoformat()
-        })
-        user_wishlists[user_id]['total_items'] += 1
-    
-    # Sort wishlist items by created_at (newest first) for each user
-    for user_data in user_wishlists.values():
-        user_data['wishlist_items'].sort(key=lambda x: x['added_at'], reverse=True)
+            for user in page
+        ]
+        return paginator.get_paginated_response(results)
     
-    return Response(list(user_wishlists.values()))
+    except Exception as e:
+        return Response({'error': str(e)}, status=500)
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
@@ -586,7 +827,8 @@ def admin_user_wishlist(request, user_id):
                 property_images.append({
                     'id': image.id,
                     'image': image_url,  # This is now an absolute URL
-                    'is_primary': image.is_primary
+                    'is_primary': image.is_primary,
+                    **responsive_fields(image, request),
                 })
             except Exception as e:
                 print(f"Error building property image URL: {e}")
@@ -706,8 +948,7 @@ def admin_all_property_images(request):
         
         if search:
             images = images.filter(
-                Q(property__name__icontains=search) |
-                Q(property__city__icontains=search) |
+                Q(property_id__in=matching_property_ids(search)) |
                 Q(property__seller__username__icontains=search)
             )
         
@@ -734,6 +975,7 @@ def admin_all_property_images(request):
             images_data.append({
                 'id': image.id,
                 'image_url': image_url,
+                **responsive_fields(image, request),
                 'is_primary': image.is_primary,
                 'uploaded_at': image.uploaded_at,
                 'property': {
@@ -831,8 +1073,7 @@ def admin_properties_without_images(request):
         search = request.GET.get('search', '')
         if search:
             properties = properties.filter(
-                Q(name__icontains=search) |
-                Q(city__icontains=search) |
+                Q(id__in=matching_property_ids(search)) |
                 Q(seller__username__icontains=search)
             )
         
@@ -918,112 +1159,73 @@ def admin_property_analytics(request):
         # Get time range from query params
         time_range = request.GET.get('period', '30d')
         
-        # Calculate date range
         end_date = timezone.now()
-        if time_range == '7d':
-            start_date = end_date - timedelta(days=7)
-        elif time_range == '90d':
-            start_date = end_date - timedelta(days=90)
-        elif time_range == '1y':
-            start_date = end_date - timedelta(days=365)
-        else:  # 30d default
-            start_date = end_date - timedelta(days=30)
-
-        # Basic property stats
-        total_properties = Property.objects.count()
-        active_properties = Property.objects.filter(is_available=True).count()
-        new_properties = Property.objects.filter(created_at__gte=start_date).count()
+        start_date = rollups.window_start(time_range, end_date)
+
+        # Basic property stats (from the precomputed rollups)
+        type_totals = rollups.totals('properties.type')
+        total_properties = sum(row.count for row in type_totals.values())
+        active_properties = rollups.counts('properties.available').get('true', 0)
+        new_properties = rollups.count_since('properties.created', start_date)
         
         # Property type distribution
-        properties_by_type = Property.objects.values('property_type').annotate(
-            count=Count('id'),
-            avg_price=Avg('price'),
-            avg_size=Avg('size')
-        )
+        properties_by_type = [
+            dict(property_type=property_type, count=row.count, **rollups.averages(row))
+            for property_type, row in type_totals.items() if row.count > 0
+        ]
         
         # City distribution
-        properties_by_city = Property.objects.values('city').annotate(
-            count=Count('id'),
-            avg_price=Avg('price')
-        ).order_by('-count')[:10]
-        
-        # Price statistics - handle None values
-        price_aggregation = Property.objects.aggregate(
-            min_price=Avg('price'),
-            max_price=Avg('price'),
-            avg_price=Avg('price'),
-            total_value=Sum('price')
-        )
+        city_totals = rollups.totals('properties.city')
+        properties_by_city = [
+            {'city': city, 'count': count, 'avg_price': rollups.averages(city_totals[city])['avg_price']}
+            for city, count in rollups.top('properties.city', 10)
+        ]
         
+        # Price, room and size statistics from the per-type sums
+        overall_totals = rollups.combine(type_totals.values())
+        overall = rollups.averages(overall_totals)
+        
+        min_price, max_price = rollups.price_range()
         price_stats = {
-            'min_price': float(price_aggregation['min_price']) if price_aggregation['min_price'] else 0,
-            'max_price': float(price_aggregation['max_price']) if price_aggregation['max_price'] else 0,
-            'avg_price': float(price_aggregation['avg_price']) if price_aggregation['avg_price'] else 0,
-            'total_value': float(price_aggregation['total_value']) if price_aggregation['total_value'] else 0
+            'min_price': min_price,
+            'max_price': max_price,
+            'avg_price': overall['avg_price'],
+            'total_value': float(overall_totals.price_sum)
         }
         
-        # Room statistics
-        room_aggregation = Property.objects.aggregate(
-            avg_rooms=Avg('number_of_rooms'),
-            max_rooms=Avg('number_of_rooms'),
-            min_rooms=Avg('number_of_rooms')
-        )
-        
+        min_rooms, max_rooms = rollups.rooms_range()
         room_stats = {
-            'avg_rooms': float(room_aggregation['avg_rooms']) if room_aggregation['avg_rooms'] else 0,
-            'max_rooms': float(room_aggregation['max_rooms']) if room_aggregation['max_rooms'] else 0,
-            'min_rooms': float(room_aggregation['min_rooms']) if room_aggregation['min_rooms'] else 0
+            'avg_rooms': overall['avg_rooms'],
+            'max_rooms': max_rooms,
+            'min_rooms': min_rooms
         }
         
-        # Size statistics
-        size_aggregation = Property.objects.aggregate(
-            avg_size=Avg('size'),
-            max_size=Avg('size'),
-            min_size=Avg('size')
-        )
-        
+        # Sizes are only summed per type, so there is no min/max to report
         size_stats = {
-            'avg_size': float(size_aggregation['avg_size']) if size_aggregation['avg_size'] else 0,
-            'max_size': float(size_aggregation['max_size']) if size_aggregation['max_size'] else 0,
-            'min_size': float(size_aggregation['min_size']) if size_aggregation['min_size'] else 0
+            'avg_size': overall['avg_size'],
         }
         
         # Wishlist engagement
-        wishlist_aggregation = Property.objects.annotate(
-            wishlist_count=Count('wishlisted_by')
-        ).aggregate(
-            total_wishlists=Sum('wishlist_count'),
-            avg_wishlists_per_property=Avg('wishlist_count'),
-            max_wishlists=Avg('wishlist_count')
-        )
-        
+        total_wishlists = rollups.total_count('wishlists.total')
+        avg_wishlists = total_wishlists / total_properties if total_properties else 0
+        most_wishlisted = rollups.top('wishlists.property', 1)
         wishlist_stats = {
-            'total_wishlists': wishlist_aggregation['total_wishlists'] or 0,
-            'avg_wishlists_per_property': float(wishlist_aggregation['avg_wishlists_per_property']) if wishlist_aggregation['avg_wishlists_per_property'] else 0,
-            'max_wishlists': float(wishlist_aggregation['max_wishlists']) if wishlist_aggregation['max_wishlists'] else 0
+            'total_wishlists': total_wishlists,
+            'avg_wishlists_per_property': avg_wishlists,
+            'max_wishlists': most_wishlisted[0][1] if most_wishlisted else 0
         }
         
         # Top performing properties (by wishlist count)
-        top_properties = Property.objects.annotate(
-            wishlist_count=Count('wishlisted_by')
-        ).order_by('-wishlist_count')[:10]
+        top_properties = rollups.top_wishlisted_properties(10)
         
         # Seller performance
-        top_sellers = User.objects.filter(
-            role=User.Role.SELLER, 
-            properties__isnull=False
-        ).annotate(
-            property_count=Count('properties'),
-            total_value=Sum('properties__price'),
-            avg_price=Avg('properties__price')
-        ).order_by('-property_count')[:5]
+        top_sellers = rollups.top_sellers(5, role=User.Role.SELLER)
         
         # Recent activity
-        recent_activity = Property.objects.filter(
-            created_at__gte=start_date
-        ).values('created_at__date').annotate(
-            count=Count('id')
-        ).order_by('created_at__date')
+        recent_activity = [
+            {'created_at__date': day['date'], 'count': day['count']}
+            for day in rollups.daily_series('properties.created', start_date)
+        ]
         
         analytics_data = {
             'period': f"Last {time_range}",
@@ -1037,8 +1239,8 @@ def admin_property_analytics(request):
                 {
                     'property_type': item['property_type'],
                     'count': item['count'],
-                    'avg_price': float(item['avg_price']) if item['avg_price'] else 0,
-                    'avg_size': float(item['avg_size']) if item['avg_size'] else 0
+                    'avg_price': item['avg_price'],
+                    'avg_size': item['avg_size']
                 }
                 for item in properties_by_type
             ],
@@ -1046,7 +1248,7 @@ def admin_property_analytics(request):
                 {
                     'city': item['city'],
                     'count': item['count'],
-                    'avg_price': float(item['avg_price']) if item['avg_price'] else 0
+                    'avg_price': item['avg_price']
                 }
                 for item in properties_by_city
             ],
@@ -1072,13 +1274,13 @@ def admin_property_analytics(request):
                     'id': seller.id,
                     'username': seller.username,
                     'email': seller.email,
-                    'property_count': seller.property_count,
-                    'total_value': float(seller.total_value) if seller.total_value else 0,
-                    'avg_price': float(seller.avg_price) if seller.avg_price else 0
+                    'property_count': row.count,
+                    'total_value': float(row.price_sum),
+                    'avg_price': rollups.averages(row)['avg_price']
                 }
-                for seller in top_sellers
+                for seller, row in top_sellers
             ],
-            'recentActivity': list(recent_activity)
+            'recentActivity': recent_activity
         }
         
         return Response(analytics_data)
@@ -1136,26 +1338,18 @@ def debug_property_data(request):
 def admin_property_performance(request):
     """Detailed property performance metrics"""
     try:
-        # Get total properties count safely
-        total_properties = Property.objects.count()
+        # Counts come from the precomputed rollups
+        total_properties = rollups.total_count('properties.type')
         
         # Properties with highest engagement (wishlists)
-        high_engagement = Property.objects.annotate(
-            wishlist_count=Count('wishlisted_by')
-        ).filter(wishlist_count__gt=0).order_by('-wishlist_count')[:20]
+        high_engagement = rollups.top_wishlisted_properties(20)
         
-        # Properties without images
-        properties_without_images = Property.objects.filter(
-            images__isnull=True
-        ).count()
-        
-        # Properties with images (distinct count)
-        properties_with_images = Property.objects.filter(
-            images__isnull=False
-        ).distinct().count()
+        # Properties with images (distinct count) and without
+        properties_with_images = rollups.counts('images.properties').get('', 0)
+        properties_without_images = total_properties - properties_with_images
         
         # Total property images count
-        total_images = PropertyImage.objects.count()
+        total_images = rollups.total_count('images.total')
         
         # Calculate average images per property safely
         avg_images_per_property = total_images / total_properties if total_properties > 0 else 0
@@ -1166,25 +1360,19 @@ def admin_property_performance(request):
         ).distinct().count()
         
         # Properties by availability status
-        availability_stats = Property.objects.values('is_available').annotate(
-            count=Count('id')
-        )
+        availability_stats = [
+            {'is_available': key == 'true', 'count': count}
+            for key, count in rollups.counts('properties.available').items() if count > 0
+        ]
         
         # Property age analysis
         now = timezone.now()
+        less_than_3_months = rollups.count_since('properties.created', now - timedelta(days=90))
         property_age_stats = {
-            'less_than_week': Property.objects.filter(
-                created_at__gte=now - timedelta(days=7)
-            ).count(),
-            'less_than_month': Property.objects.filter(
-                created_at__gte=now - timedelta(days=30)
-            ).count(),
-            'less_than_3_months': Property.objects.filter(
-                created_at__gte=now - timedelta(days=90)
-            ).count(),
-            'older_than_3_months': Property.objects.filter(
-                created_at__lt=now - timedelta(days=90)
-            ).count()
+            'less_than_week': rollups.count_since('properties.created', now - timedelta(days=7)),
+            'less_than_month': rollups.count_since('properties.created', now - timedelta(days=30)),
+            'less_than_3_months': less_than_3_months,
+            'older_than_3_months': total_properties - less_than_3_months
         }
         
         performance_data = {
@@ -1234,35 +1422,24 @@ def admin_analytics(request):
         # Get time range from query params
         time_range = request.GET.get('period', '30d')
         
-        # Calculate date range
         end_date = timezone.now()
-        if time_range == '7d':
-            start_date = end_date - timedelta(days=7)
-        elif time_range == '90d':
-            start_date = end_date - timedelta(days=90)
-        elif time_range == '1y':
-            start_date = end_date - timedelta(days=365)
-        else:  # 30d default
-            start_date = end_date - timedelta(days=30)
-
-        # User analytics
-        total_users = User.objects.count()
-        total_buyers = User.objects.filter(role=User.Role.BUYER).count()
-        total_sellers = User.objects.filter(role=User.Role.SELLER).count()
-        new_users = User.objects.filter(date_joined__gte=start_date).count()
+        start_date = rollups.window_start(time_range, end_date)
+
+        # User analytics (from the precomputed rollups)
+        role_counts = rollups.counts('users.role')
+        total_users = sum(role_counts.values())
+        total_buyers = role_counts.get(User.Role.BUYER, 0)
+        total_sellers = role_counts.get(User.Role.SELLER, 0)
+        new_users = rollups.count_since('users.joined', start_date)
         
         # Calculate user growth rate
-        previous_period_users = User.objects.filter(
-            date_joined__lt=start_date
-        ).count()
+        previous_period_users = total_users - new_users
         user_growth_rate = ((total_users - previous_period_users) / previous_period_users * 100) if previous_period_users > 0 else 0
 
-        # Property analytics - import Property model
-        from properties.models import Property, Wishlist, PropertyImage
-        
-        total_properties = Property.objects.count()
-        active_properties = Property.objects.filter(is_available=True).count()
-        new_properties = Property.objects.filter(created_at__gte=start_date).count()
+        # Property analytics
+        total_properties = rollups.total_count('properties.type')
+        active_properties = rollups.counts('properties.available').get('true', 0)
+        new_properties = rollups.count_since('properties.created', start_date)
         
         # Property views (placeholder)
         total_property_views = 0
@@ -1275,18 +1452,16 @@ def admin_analytics(request):
         revenue_growth_rate = 0
         
         # Engagement analytics
-        total_wishlist_items = Wishlist.objects.count()
-        new_wishlist_items = Wishlist.objects.filter(created_at__gte=start_date).count()
+        total_wishlist_items = rollups.total_count('wishlists.total')
+        new_wishlist_items = rollups.count_since('wishlists.added', start_date)
         
         # User demographics
-        top_locations = Property.objects.values('city').annotate(
-            count=Count('id')
-        ).order_by('-count')[:5]
+        top_locations = [
+            {'city': city, 'count': count} for city, count in rollups.top('properties.city', 5)
+        ]
         
         # Top performing properties
-        top_properties = Property.objects.annotate(
-            wishlist_count=Count('wishlisted_by')
-        ).order_by('-wishlist_count')[:5]
+        top_properties = rollups.top_wishlisted_properties(5)
         
         analytics_data = {
             'period': f"Last {time_range}",
@@ -1328,7 +1503,7 @@ def admin_analytics(request):
             'userDemographics': {
                 'buyers': total_buyers,
                 'sellers': total_sellers,
-                'verifiedSellers': SellerVerification.objects.filter(status='approved').count(),
+                'verifiedSellers': rollups.counts('verifications.status').get('approved', 0),
                 'topLocations': [
                     {
                         'city': loc['city'],
@@ -3,6 +3,13 @@ ASGI config for real_estate project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Run it with an ASGI server, e.g. ``uvicorn real_estate.asgi:application``, to
+serve the async chatbot views (chatbot/views.py, chatbot/streaming.py): while
+they wait for the model they don't tie up a worker thread, and streamed
+tokens are flushed as they arrive. The WSGI app serves the same URLs, but
+each chat request then holds a thread and the stream is buffered.
+``manage.py benchmark_chat_concurrency`` compares the two.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -0,0 +1,95 @@
+# real_estate/conditional.py
+"""
+Conditional GET for read endpoints.
+
+A view describes its response with cheap Validators, typically one
+aggregate query over the rows it would serialize, and a request whose
+``If-None-Match`` (or, without one, ``If-Modified-Since``) still matches
+gets a bodiless 304 before the queryset is ever evaluated.
+
+The ETag hashes the view's parts together with the absolute request URL
+(query string, host and scheme all change the body) and the negotiated
+media type. Per-user responses add the user id to it and are sent as
+``Cache-Control: private``. ``Last-Modified`` is only sent when a timestamp
+alone captures every change to the body; ``no-cache`` makes clients
+revalidate on every use, which is where the 304 pays off.
+
+The property views validate on ``Property.updated_at``, which ``auto_now``
+only sets on save(). Every ``QuerySet.update()`` or ``bulk_update()`` on
+Property must therefore set ``updated_at=timezone.now()`` itself (or call
+``.touch()``), or clients keep getting 304s for a stale copy.
+"""
+import hashlib
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import wraps
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+@dataclass
+class Validators:
+    parts: list = field(default_factory=list)   # anything JSON-serializable (str() for the rest)
+    last_modified: datetime = None
+    private: bool = False
+
+
+def make_etag(request, validators):
+    user = request.user
+    payload = json.dumps([
+        request.build_absolute_uri(),
+        getattr(request, 'accepted_media_type', None),
+        user.pk if validators.private and user.is_authenticated else None,
+        validators.parts,
+    ], default=str)
+    return quote_etag(hashlib.sha1(payload.encode()).hexdigest())
+
+
+def conditional_response(request, validators, respond):
+    """``respond()``'s response, or a 304 when the client's copy still matches ``validators``."""
+    if validators is None:
+        return respond()
+    etag = make_etag(request, validators)
+    last_modified = int(validators.last_modified.timestamp()) if validators.last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = respond()
+    if response.status_code not in (200, 304):
+        return response
+    response.headers['ETag'] = etag
+    if last_modified is not None:
+        response.headers['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, no_cache=True, **({'private': True} if validators.private else {}))
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Answers GET with a 304 when ``get_validators()`` still matches the
+    client's copy. ``get_validators()`` returns Validators, or None to skip
+    the check (e.g. so the normal path can return its 404 or 400).
+    """
+
+    def get_validators(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        respond = super().get
+        return conditional_response(request, self.get_validators(), lambda: respond(request, *args, **kwargs))
+
+
+def conditional_get(get_validators):
+    """The function-view form of ConditionalGetMixin; place it below ``@api_view``."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            return conditional_response(
+                request, get_validators(request, *args, **kwargs), lambda: view(request, *args, **kwargs)
+            )
+        return wrapper
+    return decorator
@@ -0,0 +1,250 @@
+# real_estate/pagination.py
+"""
+Default pagination for every list endpoint.
+
+KeysetPagination pages on the full ordering tuple, (created_at, id) by
+default: the cursor stores the sort values of the last row and the next
+page is fetched with a "rows after (a, b)" filter, which an index can seek
+to directly. Unlike OFFSET the cost stays O(page) however deep the client
+goes. Views that set ``allow_page_numbers = True`` also accept ?page=N for
+admin screens that need numbered pages.
+"""
+import json
+from base64 import b64decode, b64encode
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def max_page_size():
+    return getattr(settings, 'API_MAX_PAGE_SIZE', 100)
+
+
+def cursor_value(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    return value
+
+
+class OffsetPagination(PageNumberPagination):
+    """Opt-in ?page=N pagination, capped like the keyset pagination."""
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+
+    @property
+    def max_page_size(self):
+        return max_page_size()
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on the whole ordering tuple.
+
+    The ordering comes from the view's OrderingFilter when it has one, then
+    the queryset's own order_by(), the model's Meta.ordering and finally
+    ``default_ordering``. The primary key
+    is always appended so every position in the ordering is unique.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_query_param = 'page'
+    default_ordering = ('-created_at',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.page_size = api_settings.PAGE_SIZE or 20
+        self.offset_paginator = None
+
+    # ------------------- PAGE -------------------
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if getattr(view, 'allow_page_numbers', False) and self.page_query_param in request.query_params:
+            self.offset_paginator = OffsetPagination()
+            return self.offset_paginator.paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        position, backwards = self.decode_cursor(request)
+
+        ordering = self.reverse(self.ordering) if backwards else self.ordering
+        rows = self.fetch_rows(queryset, ordering, position, view)
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if backwards:
+            rows.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = rows
+        return rows
+
+    def fetch_rows(self, queryset, ordering, position, view=None):
+        """Up to page_size + 1 rows strictly after ``position`` (None: from the start) in ``ordering``"""
+        queryset = queryset.order_by(*[self.order_expression(field) for field in ordering])
+        if position is not None:
+            queryset = queryset.filter(self.after_position(ordering, position, queryset.model))
+        return list(queryset[:self.page_size + 1])
+
+    def get_paginated_response(self, data):
+        if self.offset_paginator is not None:
+            return self.offset_paginator.get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(requested, 1), max_page_size())
+
+    # ------------------- ORDERING -------------------
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if hasattr(backend, 'get_ordering'):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering:
+            ordering = [field for field in queryset.query.order_by if isinstance(field, str)]
+        if not ordering:
+            ordering = [field for field in queryset.model._meta.ordering if isinstance(field, str)]
+        if not ordering:
+            model_fields = {field.name for field in queryset.model._meta.get_fields()}
+            ordering = [field for field in self.default_ordering if field.lstrip('-') in model_fields]
+
+        ordering = [field for field in ordering if field != '?']
+        names = {field.lstrip('-') for field in ordering}
+        if not names & {'pk', 'id', queryset.model._meta.pk.name}:
+            descending = bool(ordering) and ordering[0].startswith('-')
+            ordering.append('-pk' if descending else 'pk')
+        return tuple(ordering)
+
+    @staticmethod
+    def reverse(ordering):
+        return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+    @staticmethod
+    def order_expression(field):
+        # NULLs go last on descending fields and first on ascending ones, so that
+        # reversing the ordering for a previous page keeps their position consistent
+        if field.startswith('-'):
+            return F(field[1:]).desc(nulls_last=True)
+        return F(field).asc(nulls_first=True)
+
+    @staticmethod
+    def nullable(model, name):
+        """Whether the ordering field ``name`` can hold NULL; unknown names (annotations) are assumed to."""
+        if name == 'pk':
+            return False
+        nullable = False
+        try:
+            for part in name.split('__'):
+                field = model._meta.get_field(part)
+                nullable = nullable or field.null
+                model = field.related_model
+        except (FieldDoesNotExist, AttributeError):
+            return True
+        return nullable
+
+    def after_position(self, ordering, position, model):
+        """
+        Rows strictly after ``position`` in ``ordering``: (a > x) OR (a = x AND b > y) ...
+
+        The IS NULL branches are only emitted for nullable fields, and the whole
+        condition is prefixed with a plain a >= x (a <= x when descending) so the
+        index on the leading field can seek to the cursor instead of scanning.
+        """
+        condition = Q(pk__in=[])
+        equal_so_far = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            descending = field.startswith('-')
+            nullable = self.nullable(model, name)
+            if value is None:
+                # Only non-NULLs follow a NULL on an ascending field; nothing follows it on a descending one
+                after = Q(**{f'{name}__isnull': False}) if not descending else Q(pk__in=[])
+                equal = Q(**{f'{name}__isnull': True})
+            else:
+                after = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+                if descending and nullable:
+                    after |= Q(**{f'{name}__isnull': True})
+                equal = Q(**{name: value})
+            condition |= equal_so_far & after
+            equal_so_far &= equal
+
+        field, value = ordering[0], position[0]
+        name = field.lstrip('-')
+        descending = field.startswith('-')
+        # NULLs sort after every value on a descending field, so a bound would drop them
+        if value is not None and not (descending and self.nullable(model, name)):
+            condition = Q(**{f"{name}__{'lte' if descending else 'gte'}": value}) & condition
+        return condition
+
+    # ------------------- CURSOR -------------------
+
+    def position_of(self, row):
+        values = []
+        for field in self.ordering:
+            value = row
+            for part in field.lstrip('-').split('__'):
+                value = getattr(value, part, None)
+            values.append(cursor_value(value))
+        return values
+
+    def encode_cursor(self, position, backwards):
+        payload = json.dumps({'p': position, 'r': int(backwards)}, separators=(',', ':'))
+        return replace_query_param(self.base_url, self.cursor_query_param, b64encode(payload.encode()).decode())
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(b64decode(encoded.encode()))
+            position, backwards = payload['p'], bool(payload['r'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, backwards
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.position_of(self.page[-1]), backwards=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.position_of(self.page[0]), backwards=True)
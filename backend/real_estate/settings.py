@@ -18,6 +18,23 @@ ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
 
 # API key for Gemini-based chatbot feature
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', 'your-gemini-api-key-here')
+
+# Chatbot LLM client (chatbot/services/llm.py), shared by every request in a worker process
+CHATBOT_LLM_BACKEND = os.getenv('CHATBOT_LLM_BACKEND', 'chatbot.services.llm.GeminiBackend')
+CHATBOT_LLM_MODEL = 'gemini-2.0-flash'
+CHATBOT_LLM_TIMEOUT = 30      # seconds per model call
+CHATBOT_STUB_LATENCY = 0      # simulated seconds per call for chatbot.services.llm.StubBackend
+CHATBOT_INTENT_MIN_CONFIDENCE = 0.7   # below this the model is asked to extract the search criteria
+CHATBOT_INTENT_VOCAB_TTL = 300        # seconds before catalog cities are reloaded into the parser
+CHATBOT_RESPONSE_CACHE_TTL = 60 * 60  # seconds a reply to an opening question is reused; 0 disables
+
+# Conversation memory (chatbot/services/memory.py): rolling summary plus recent turns
+CHATBOT_HISTORY_TOKENS = 800          # budget for the recent turns quoted in a prompt
+CHATBOT_HISTORY_MESSAGE_TOKENS = 200  # longer messages are clipped in the prompt
+CHATBOT_SUMMARY_TOKENS = 250          # length cap of a session's summary
+CHATBOT_SUMMARY_WORKERS = 1
+CHATBOT_SUMMARY_EAGER = False         # summarize inline instead of in the background (tests, debugging)
+
 # ------------------- EMAIL SETTINGS -------------------
 
 # Use Gmail’s SMTP server to send emails (verification, notifications, etc.)
@@ -77,6 +94,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
+    'real_estate.throttling.RateLimitHeadersMiddleware',
 ]
 
 # ------------------- URLS, TEMPLATES, WSGI -------------------
@@ -186,7 +204,74 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'real_estate.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
+    # Per user (chat) or per client address (login, register); see real_estate/throttling.py
+    'DEFAULT_THROTTLE_RATES': {
+        'chat': '30/min',
+        'login': '10/min',
+        'register': '10/hour',
+    },
 }
+
+# Cache for chatbot replies and their single-flight locks, map tiles and the dashboard snapshot.
+# Without REDIS_URL each worker process keeps its own LocMemCache: still correct, since invalidation
+# versions are database rows (real_estate/versions.py), but entries and locks aren't shared. Set
+# REDIS_URL (e.g. redis://localhost:6379/1, needs the redis package) to share them between workers.
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+if os.getenv('REDIS_URL'):
+    CACHES['default'] = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': os.getenv('REDIS_URL')}
+
+# Where rate-limit counters live: 'database' (one atomic UPSERT per request, shared by every worker
+# on the same database) or 'cache' (the RATE_LIMIT_CACHE alias; use Redis/Memcached across hosts)
+RATE_LIMIT_STORE = os.getenv('RATE_LIMIT_STORE', 'database')
+RATE_LIMIT_CACHE = 'default'
+
+# Upper bound for ?page_size= on paginated list endpoints
+API_MAX_PAGE_SIZE = 100
+
+# Seconds the admin dashboard statistics are cached and shared between the page and its exports
+DASHBOARD_SNAPSHOT_TTL = 60
+
+# Background PDF/Excel exports (dashboard/jobs.py)
+DASHBOARD_EXPORT_DIR = os.path.join(BASE_DIR, 'exports')
+DASHBOARD_EXPORT_WORKERS = 2         # exports generated at the same time
+DASHBOARD_EXPORT_MAX_PENDING = 10    # queued + running jobs before new ones are refused
+DASHBOARD_EXPORT_EXPIRY = 60 * 60    # seconds a finished file stays downloadable
+DASHBOARD_EXPORT_TIMEOUT = 10 * 60   # seconds before an unfinished job is given up as failed
+DASHBOARD_EXPORT_EAGER = False       # run exports inline (tests, debugging)
+
+# Responsive renditions of property photos (properties/images.py)
+PROPERTY_IMAGE_WIDTHS = (320, 640, 1024, 1600)
+PROPERTY_IMAGE_FORMATS = ('avif', 'webp')   # skipped when Pillow can't encode them
+PROPERTY_IMAGE_WORKERS = 2
+PROPERTY_IMAGE_EAGER = False                # generate inline (tests, debugging)
+
+# Vector index of property texts for the chatbot (properties/vectors.py, rebuild_vector_index)
+PROPERTY_VECTOR_INDEX_DIR = os.path.join(BASE_DIR, 'vector_index')
+PROPERTY_VECTOR_DIMENSIONS = 512            # changing it needs a rebuild
+
+# Similar-properties matrix (properties/similarity.py); each worker rebuilds its copy after this many
+# seconds to pick up properties saved by other workers
+PROPERTY_SIMILARITY_MAX_AGE = 300
+
+# Columnar read model for the public property list (properties/readmodel.py, check_read_model)
+PROPERTY_READ_MODEL = os.getenv('PROPERTY_READ_MODEL', '') == '1'
+PROPERTY_READ_MODEL_MAX_AGE = 3600                 # seconds before a worker rebuilds its snapshot
+PROPERTY_READ_MODEL_LOG_RETENTION = 24 * 3600      # seconds of change log kept; must exceed the max age
+
+# Property coordinates (properties/geocoding.py, geocode_properties). Geocoders are tried in order;
+# put 'properties.geocoding.NominatimGeocoder' first for street-level results, looked up in the background
+PROPERTY_GEOCODERS = ['properties.geocoding.GazetteerGeocoder']
+PROPERTY_GEOCODER_NOMINATIM_URL = 'https://nominatim.openstreetmap.org/search'
+PROPERTY_GEOCODER_USER_AGENT = os.getenv('PROPERTY_GEOCODER_USER_AGENT', 'real-estate-backend')  # Nominatim asks for a contact
+PROPERTY_GEOCODE_WORKERS = 1                # Nominatim allows one request per second anyway
+PROPERTY_GEOCODE_EAGER = False              # look up inline (tests, debugging)
+
+# Map clusters (properties/spatial.py, rebuild_spatial_index): seconds a tile's markers stay cached;
+# property changes invalidate the affected tiles sooner
+PROPERTY_MAP_CACHE_TTL = 600
+
 # ------------------- JWT CONFIGURATION 
 # JWT Settings
 SIMPLE_JWT = {
@@ -203,6 +288,8 @@ CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:3000",
 ]
 CORS_ALLOW_CREDENTIALS = True
+# Let the frontend read rate-limit state from throttled responses
+CORS_EXPOSE_HEADERS = ['Retry-After', 'RateLimit-Limit', 'RateLimit-Remaining', 'RateLimit-Reset', 'RateLimit-Policy']
 
 # CSRF settings
 CSRF_TRUSTED_ORIGINS = [
@@ -0,0 +1,232 @@
+# real_estate/throttling.py
+"""
+Rate limiting shared by every worker process.
+
+DRF's stock throttles keep a request history in the default cache and do a
+get-then-set on it, which is neither atomic nor shared when the cache is a
+per-process LocMemCache. Here each limit is a sliding window counter: hits
+are counted per fixed window with an atomic increment, and the previous
+window's count is weighted by how much of it still overlaps the last
+``duration`` seconds.
+
+Counters live in RATE_LIMIT_STORE:
+
+* ``'database'`` - the users.RateLimitCounter table, bumped with one UPSERT
+  statement, so every worker using the same database shares it (SQLite is
+  fine on a single host);
+* ``'cache'`` - the RATE_LIMIT_CACHE cache alias via add()/incr(), which is
+  atomic on Redis or Memcached.
+
+Responses of throttled views carry ``RateLimit-Limit``, ``RateLimit-Remaining``,
+``RateLimit-Reset`` and ``RateLimit-Policy`` (added by RateLimitHeadersMiddleware),
+and a 429 also carries ``Retry-After``.
+"""
+import math
+import random
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.throttling import SimpleRateThrottle
+
+CLEANUP_CHANCE = 0.01
+
+
+@dataclass
+class Decision:
+    allowed: bool
+    limit: int
+    duration: int
+    count: float      # weighted hits in the last ``duration`` seconds, this one included if allowed
+    reset: int        # seconds until the current window ends
+    retry_after: int  # seconds until a denied request would be allowed, 0 if allowed
+
+    @property
+    def remaining(self):
+        return max(0, math.floor(self.limit - self.count))
+
+    def headers(self):
+        return {
+            'RateLimit-Limit': str(self.limit),
+            'RateLimit-Remaining': str(self.remaining),
+            'RateLimit-Reset': str(self.retry_after if not self.allowed else self.reset),
+            'RateLimit-Policy': f'{self.limit};w={self.duration}',
+        }
+
+
+class DatabaseStore:
+    """Counters in users.RateLimitCounter; each increment is one atomic statement."""
+
+    def __init__(self):
+        from users.models import RateLimitCounter
+        self.table = connection.ops.quote_name(RateLimitCounter._meta.db_table)
+        self.key = connection.ops.quote_name('key')
+
+    def incr(self, key, expires_at, now):
+        table = self.table
+        with connection.cursor() as cursor:
+            # Insert-or-increment in one statement: concurrent workers can't lose each other's hits
+            cursor.execute(
+                f"INSERT INTO {table} ({self.key}, hits, expires_at) VALUES (%s, 1, %s) "
+                f"ON CONFLICT ({self.key}) DO UPDATE SET hits = {table}.hits + 1 RETURNING hits",
+                [key, expires_at],
+            )
+            hits = cursor.fetchone()[0]
+            if random.random() < CLEANUP_CHANCE:
+                cursor.execute(f"DELETE FROM {table} WHERE expires_at < %s", [now])
+        return hits
+
+    def decr(self, key):
+        with connection.cursor() as cursor:
+            cursor.execute(f"UPDATE {self.table} SET hits = hits - 1 WHERE {self.key} = %s AND hits > 0", [key])
+
+    def get(self, key):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT hits FROM {self.table} WHERE {self.key} = %s", [key])
+            row = cursor.fetchone()
+        return row[0] if row else 0
+
+
+class CacheStore:
+    """Counters in a cache shared by all workers, e.g. Redis or Memcached."""
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def incr(self, key, expires_at, now):
+        timeout = max(1, math.ceil(expires_at - now))
+        self.cache.add(key, 0, timeout)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Expired between add() and incr()
+            self.cache.add(key, 1, timeout)
+            return 1
+
+    def decr(self, key):
+        try:
+            self.cache.decr(key)
+        except ValueError:
+            pass
+
+    def get(self, key):
+        return self.cache.get(key, 0)
+
+
+def get_store():
+    if getattr(settings, 'RATE_LIMIT_STORE', 'database') == 'cache':
+        return CacheStore(getattr(settings, 'RATE_LIMIT_CACHE', 'default'))
+    return DatabaseStore()
+
+
+def hit(key, limit, duration, store=None, now=None):
+    """Count one request against ``key`` and decide whether it may go through."""
+    store = store or get_store()
+    now = time.time() if now is None else now
+    window = int(now // duration)
+    elapsed = now - window * duration
+    current_key = f'{key}:{window}'
+
+    current = store.incr(current_key, (window + 2) * duration, now)
+    previous = store.get(f'{key}:{window - 1}')
+    overlap = 1 - elapsed / duration
+    count = previous * overlap + current
+    if count <= limit:
+        return Decision(True, limit, duration, count, math.ceil(duration - elapsed), 0)
+
+    # Don't let refused requests use up the window
+    store.decr(current_key)
+    current -= 1
+    return Decision(
+        False, limit, duration, previous * overlap + current, math.ceil(duration - elapsed),
+        retry_after(limit, duration, elapsed, previous, current),
+    )
+
+
+def peek(key, limit, duration, store=None, now=None):
+    """The state of ``key`` without counting a request."""
+    store = store or get_store()
+    now = time.time() if now is None else now
+    window = int(now // duration)
+    elapsed = now - window * duration
+    count = store.get(f'{key}:{window - 1}') * (1 - elapsed / duration) + store.get(f'{key}:{window}')
+    return Decision(count + 1 <= limit, limit, duration, count, math.ceil(duration - elapsed), 0)
+
+
+def retry_after(limit, duration, elapsed, previous, current):
+    """Seconds until the weighted count leaves room for one more request."""
+    if current + 1 <= limit and previous:
+        # Wait for enough of the previous window to slide out
+        wait = duration * (1 - (limit - current - 1) / previous) - elapsed
+    else:
+        # This window alone is full: wait for the next one, where it becomes the previous window
+        wait = duration - elapsed
+        if current:
+            wait += max(0, duration * (1 - (limit - 1) / current))
+    return max(1, math.ceil(round(wait, 6)))
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """
+    DRF throttle on the shared sliding window counters. Rates come from
+    REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'][scope], e.g. '30/min'.
+    """
+    decision = None
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        return f'throttle:{self.scope}:{ident}'
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        self.decision = hit(key, self.num_requests, self.duration)
+        # Picked up by RateLimitHeadersMiddleware; with several throttles the one with least room wins
+        underlying = getattr(request, '_request', request)
+        current = getattr(underlying, 'rate_limit', None)
+        if current is None or self.decision.remaining <= current.remaining:
+            underlying.rate_limit = self.decision
+        return self.decision.allowed
+
+    def wait(self):
+        return self.decision.retry_after if self.decision else None
+
+    def status(self, request, view=None):
+        """Current usage for ``request`` without counting it"""
+        return peek(self.get_cache_key(request, view), self.num_requests, self.duration)
+
+
+class ChatRateThrottle(SlidingWindowRateThrottle):
+    scope = 'chat'
+
+
+class LoginRateThrottle(SlidingWindowRateThrottle):
+    scope = 'login'
+
+    def get_cache_key(self, request, view):
+        # Per client address: the caller isn't logged in yet
+        return f'throttle:{self.scope}:ip:{self.get_ident(request)}'
+
+
+class RegisterRateThrottle(LoginRateThrottle):
+    scope = 'register'
+
+
+class RateLimitHeadersMiddleware(MiddlewareMixin):
+    """Adds the RateLimit-* headers of the throttle that checked the request."""
+
+    def process_response(self, request, response):
+        decision = getattr(request, 'rate_limit', None)
+        if decision is not None:
+            for header, value in decision.headers().items():
+                response.headers.setdefault(header, value)
+        return response
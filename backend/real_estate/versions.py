@@ -0,0 +1,46 @@
+# real_estate/versions.py
+"""
+Invalidation versions for cached catalog data.
+
+Cached chatbot replies and map tiles are keyed on the current version of
+the catalog slice they were built from, and a property change bumps the
+versions of the slices it touched, so stale entries are simply never read
+again. The versions live in the properties.CacheVersion table rather than
+in the cache: with the default per-process LocMemCache a version bumped in
+one worker would be invisible to the others, which would go on serving
+their stale entries. Every worker sharing the database sees the same row.
+
+The cached payloads themselves stay in the default cache; point CACHES at
+Redis (REDIS_URL) to share them between workers as well.
+"""
+from django.db import connection
+
+
+def get_many(keys):
+    """{key: version} for ``keys``; 0 for keys that were never bumped."""
+    from properties.models import CacheVersion
+
+    keys = list(keys)
+    found = dict(CacheVersion.objects.filter(key__in=keys).values_list('key', 'version'))
+    return {key: found.get(key, 0) for key in keys}
+
+
+def get(key):
+    return get_many([key])[key]
+
+
+def bump(keys):
+    """Increment the versions of ``keys``, one atomic statement per key."""
+    from properties.models import CacheVersion
+
+    keys = sorted(set(keys))   # one lock order for concurrent writers
+    if not keys:
+        return
+    table = connection.ops.quote_name(CacheVersion._meta.db_table)
+    key = connection.ops.quote_name('key')
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {table} ({key}, version) VALUES (%s, 1) "
+            f"ON CONFLICT ({key}) DO UPDATE SET version = {table}.version + 1",
+            [[name] for name in keys],
+        )
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_profile_picture_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitCounter',
+            fields=[
+                ('key', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('expires_at', models.FloatField(db_index=True)),
+            ],
+        ),
+    ]
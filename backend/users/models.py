@@ -82,4 +82,17 @@ class SellerVerification(models.Model):
         Some third-party packages or templates might expect 'date_joined' field.
         This provides backward compatibility with standard Django User model.
         """
-        return self.created_at
\ No newline at end of file
+        return self.created_at
+
+class RateLimitCounter(models.Model):
+    """
+    Request counter for one rate-limit window (real_estate/throttling.py).
+    Rows are bumped with a single atomic UPSERT, so every worker process
+    sharing the database sees the same counts.
+    """
+    key = models.CharField(max_length=255, primary_key=True)
+    hits = models.PositiveIntegerField(default=0)
+    expires_at = models.FloatField(db_index=True)  # Unix time after which the row can be deleted
+
+    def __str__(self):
+        return f"{self.key}: {self.hits}"
@@ -1,3 +1,121 @@
+import csv
+import threading
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from real_estate import throttling
+from .models import SellerVerification, User
+
+
+class UserExportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pass', role='admin', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def export(self, **params):
+        response = self.client.get(reverse('admin-export-users'), params)
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode()
+        return list(csv.DictReader(content.splitlines()))
+
+    def test_verification_status_column(self):
+        approved = User.objects.create_user(username='approved', role='seller')
+        SellerVerification.objects.create(user=approved, status=SellerVerification.VerificationStatus.APPROVED)
+        User.objects.create_user(username='unsubmitted', role='seller')
+        User.objects.create_user(username='buyer', role='buyer')
+
+        statuses = {row['username']: row['verification_status'] for row in self.export()}
+        self.assertEqual(statuses, {'admin': '', 'approved': 'approved', 'unsubmitted': 'not_submitted', 'buyer': ''})
+
+    def test_role_filter(self):
+        User.objects.create_user(username='seller', role='seller')
+        self.assertEqual([row['username'] for row in self.export(role='seller')], ['seller'])
+
+
+class AdminUserListPaginationTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', role='admin', is_staff=True)
+        for i in range(4):
+            User.objects.create_user(username=f'user{i}')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.url = reverse('admin-user-list')
+
+    def test_cursor_by_default(self):
+        first = self.client.get(self.url, {'page_size': 3}).json()
+        second = self.client.get(first['next']).json()
+        usernames = [user['username'] for user in first['results'] + second['results']]
+        self.assertEqual(sorted(usernames), ['admin', 'user0', 'user1', 'user2', 'user3'])
+        self.assertIsNone(second['next'])
+
+    def test_page_numbers_on_request(self):
+        data = self.client.get(self.url, {'page': 1, 'page_size': 2}).json()
+        self.assertEqual(data['count'], 5)
+        self.assertEqual(len(data['results']), 2)
+
+
+class RateLimitTests(TestCase):
+    def test_sliding_window(self):
+        store = throttling.DatabaseStore()
+        allowed = [throttling.hit('k', 3, 60, store=store, now=600 + i).allowed for i in range(4)]
+        self.assertEqual(allowed, [True, True, True, False])
+
+        # Half-way into the next window the 3 earlier hits still weigh 1.5
+        self.assertTrue(throttling.hit('k', 3, 60, store=store, now=690).allowed)
+        denied = throttling.hit('k', 3, 60, store=store, now=691)
+        self.assertFalse(denied.allowed)
+        self.assertEqual(store.get('k:11'), 1)   # refused requests aren't counted
+        self.assertEqual(denied.retry_after, 9)
+        self.assertTrue(throttling.hit('k', 3, 60, store=store, now=700).allowed)
+
+    def test_cache_store_counts_the_same(self):
+        results = {}
+        for name, store in (('database', throttling.DatabaseStore()), ('cache', throttling.CacheStore('default'))):
+            cache.clear()
+            results[name] = [throttling.hit(f'{name}-k', 2, 60, store=store, now=60.5 + i).allowed for i in range(3)]
+        self.assertEqual(results['database'], results['cache'])
+
+    def test_login_throttled_per_client_address(self):
+        client = APIClient()
+        for _ in range(10):
+            response = client.post(reverse('login'), {'username': 'nobody', 'password': 'wrong'}, format='json')
+            self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['RateLimit-Remaining'], '0')
+        self.assertEqual(response['RateLimit-Policy'], '10;w=60')
+
+        response = client.post(reverse('login'), {'username': 'nobody', 'password': 'wrong'}, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(response['RateLimit-Reset'], response['Retry-After'])
+
+        other = APIClient(REMOTE_ADDR='10.0.0.2')
+        response = other.post(reverse('login'), {'username': 'nobody', 'password': 'wrong'}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_registration_throttled(self):
+        client = APIClient()
+        statuses = [client.post(reverse('register'), {}, format='json').status_code for _ in range(11)]
+        self.assertEqual(statuses, [400] * 10 + [429])
+
+
+    def test_concurrent_hits_never_pass_the_limit(self):
+        cache.clear()
+        store = throttling.CacheStore('default')
+        allowed = []
+
+        def worker():
+            for _ in range(10):
+                allowed.append(throttling.hit('concurrent', 25, 60, store=store, now=120.0).allowed)
 
-# Create your tests here.
+        threads = [threading.Thread(target=worker) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(allowed.count(True), 25)
+        self.assertEqual(len(allowed), 60)
+        self.assertEqual(store.get('concurrent:2'), 25)
@@ -34,6 +34,7 @@ urlpatterns = [
     path('admin/bulk-users/', views.admin_bulk_user_actions, name='admin-bulk-users'),
     path('admin/bulk-verifications/', views.admin_bulk_verification_actions, name='admin-bulk-verifications'),
     path('admin/users/<int:user_id>/full/', views.admin_user_full_detail, name='admin-user-full-detail'),
+    path('admin/users/export/', views.admin_export_users, name='admin-export-users'),
     path('admin/verifications/stats/', views.admin_verifications_stats, name='admin-verifications-stats'),
     path('admin/verifications/bulk-action/', views.admin_verifications_bulk_action, name='admin-verifications-bulk-action'),
 
@@ -1,7 +1,7 @@
 # users/views.py
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from django.contrib.auth import authenticate
 from rest_framework_simplejwt.tokens import RefreshToken 
 from django.contrib.auth import get_user_model
@@ -33,10 +33,14 @@ from django.db.models import Count, Avg, Q, F
 from django.utils import timezone
 from datetime import timedelta
 from properties.models import Property, PropertyImage, Wishlist
+from dashboard import rollups
+from dashboard.streaming import export_format_from, streaming_export_response
+from real_estate.throttling import LoginRateThrottle, RegisterRateThrottle
 
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([RegisterRateThrottle])
 def register_user(request):
     try:
         serializer = UserRegistrationSerializer(data=request.data)
@@ -81,6 +85,7 @@ def confirm_email(request):
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([LoginRateThrottle])
 def login_user(request):
     username_or_email = request.data.get('username')
     password = request.data.get('password')
@@ -387,6 +392,7 @@ class IsAdminUser(permissions.BasePermission):
 class AdminUserListView(generics.ListCreateAPIView):
     serializer_class = AdminUserSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminUser]
+    allow_page_numbers = True  # ?page=N for numbered admin tables, cursor otherwise
     
     def get_queryset(self):
         queryset = User.objects.all().order_by('-date_joined')
@@ -448,6 +454,7 @@ class AdminUserDetailView(generics.RetrieveUpdateDestroyAPIView):
 class AdminSellerVerificationListView(generics.ListAPIView):
     serializer_class = AdminSellerVerificationSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminUser]
+    allow_page_numbers = True  # ?page=N for numbered admin tables, cursor otherwise
     
     def get_queryset(self):
         queryset = SellerVerification.objects.all().select_related('user').order_by('-submitted_at')
@@ -486,29 +493,17 @@ class AdminSellerVerificationDetailView(generics.RetrieveUpdateAPIView):
 @permission_classes([permissions.IsAuthenticated, IsAdminUser])
 def admin_dashboard_stats(request):
     """Get dashboard statistics for admin"""
-    total_users = User.objects.count()
-    total_buyers = User.objects.filter(role=User.Role.BUYER).count()
-    total_sellers = User.objects.filter(role=User.Role.SELLER).count()
-    total_admins = User.objects.filter(role=User.Role.ADMIN).count()
-    
-    pending_verifications = SellerVerification.objects.filter(
-        status=SellerVerification.VerificationStatus.PENDING
-    ).count()
-    approved_verifications = SellerVerification.objects.filter(
-        status=SellerVerification.VerificationStatus.APPROVED
-    ).count()
-    rejected_verifications = SellerVerification.objects.filter(
-        status=SellerVerification.VerificationStatus.REJECTED
-    ).count()
+    role_counts = rollups.counts('users.role')
+    verification_counts = rollups.counts('verifications.status')
     
     stats = {
-        'total_users': total_users,
-        'total_buyers': total_buyers,
-        'total_sellers': total_sellers,
-        'total_admins': total_admins,
-        'pending_verifications': pending_verifications,
-        'approved_verifications': approved_verifications,
-        'rejected_verifications': rejected_verifications,
+        'total_users': sum(role_counts.values()),
+        'total_buyers': role_counts.get(User.Role.BUYER, 0),
+        'total_sellers': role_counts.get(User.Role.SELLER, 0),
+        'total_admins': role_counts.get(User.Role.ADMIN, 0),
+        'pending_verifications': verification_counts.get(SellerVerification.VerificationStatus.PENDING, 0),
+        'approved_verifications': verification_counts.get(SellerVerification.VerificationStatus.APPROVED, 0),
+        'rejected_verifications': verification_counts.get(SellerVerification.VerificationStatus.REJECTED, 0),
     }
     
     serializer = AdminStatsSerializer(stats)
@@ -584,6 +579,8 @@ def admin_bulk_verification_actions(request):
             reviewed_at=timezone.now(),
             admin_notes=admin_notes
         )
+        # update() skips the rollup signals, so recount verification statuses
+        rollups.reconcile(metrics=['verifications'])
         message = f'{verifications.count()} verifications rejected successfully'
     
     else:
@@ -630,6 +627,50 @@ def admin_user_full_detail(request, user_id):
     except User.DoesNotExist:
         return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
     
+USER_EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('username', 'username'),
+    ('email', 'email'),
+    ('first_name', 'first_name'),
+    ('last_name', 'last_name'),
+    ('role', 'role'),
+    ('phone_number', 'phone_number'),
+    ('email_verified', 'email_verified'),
+    ('is_active', 'is_active'),
+    ('is_staff', 'is_staff'),
+    ('date_joined', 'date_joined'),
+    ('last_login', 'last_login'),
+    ('verification_status', 'seller_verification__status'),
+]
+ROLE_COLUMN = 5
+
+
+def _with_verification_status(row):
+    # Sellers without a SellerVerification row haven't submitted documents yet
+    if row[-1] is None:
+        status_label = 'not_submitted' if row[ROLE_COLUMN] == User.Role.SELLER else ''
+        return row[:-1] + (status_label,)
+    return row
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated, IsAdminUser])
+def admin_export_users(request):
+    """
+    Stream every user with their seller verification status as CSV or
+    NDJSON: ?export_format=csv|ndjson, optionally filtered by ?role=
+    """
+    export_format = export_format_from(request)
+    if export_format is None:
+        return Response({"error": "export_format must be csv or ndjson"}, status=status.HTTP_400_BAD_REQUEST)
+    queryset = User.objects.order_by('id')
+    role = request.GET.get('role')
+    if role:
+        queryset = queryset.filter(role=role)
+    return streaming_export_response(
+        queryset, USER_EXPORT_COLUMNS, export_format, 'users', transform=_with_verification_status
+    )
+
 ####admin verification
 
 
@@ -762,33 +803,24 @@ def admin_analytics(request):
         # Get time range from query params
         time_range = request.GET.get('period', '30d')
         
-        # Calculate date range
         end_date = timezone.now()
-        if time_range == '7d':
-            start_date = end_date - timedelta(days=7)
-        elif time_range == '90d':
-            start_date = end_date - timedelta(days=90)
-        elif time_range == '1y':
-            start_date = end_date - timedelta(days=365)
-        else:  # 30d default
-            start_date = end_date - timedelta(days=30)
-
-        # User analytics
-        total_users = User.objects.count()
-        total_buyers = User.objects.filter(role=User.Role.BUYER).count()
-        total_sellers = User.objects.filter(role=User.Role.SELLER).count()
-        new_users = User.objects.filter(date_joined__gte=start_date).count()
+        start_date = rollups.window_start(time_range, end_date)
+
+        # User analytics (from the precomputed rollups)
+        role_counts = rollups.counts('users.role')
+        total_users = sum(role_counts.values())
+        total_buyers = role_counts.get(User.Role.BUYER, 0)
+        total_sellers = role_counts.get(User.Role.SELLER, 0)
+        new_users = rollups.count_since('users.joined', start_date)
         
         # Calculate user growth rate
-        previous_period_users = User.objects.filter(
-            date_joined__lt=start_date
-        ).count()
+        previous_period_users = total_users - new_users
         user_growth_rate = ((total_users - previous_period_users) / previous_period_users * 100) if previous_period_users > 0 else 0
 
         # Property analytics
-        total_properties = Property.objects.count()
-        active_properties = Property.objects.filter(is_available=True).count()
-        new_properties = Property.objects.filter(created_at__gte=start_date).count()
+        total_properties = rollups.total_count('properties.type')
+        active_properties = rollups.counts('properties.available').get('true', 0)
+        new_properties = rollups.count_since('properties.created', start_date)
         
         # Property views (you'll need to implement view tracking)
         total_property_views = 0  # Placeholder - implement view tracking
@@ -801,18 +833,16 @@ def admin_analytics(request):
         revenue_growth_rate = 0
         
         # Engagement analytics
-        total_wishlist_items = Wishlist.objects.count()
-        new_wishlist_items = Wishlist.objects.filter(created_at__gte=start_date).count()
+        total_wishlist_items = rollups.total_count('wishlists.total')
+        new_wishlist_items = rollups.count_since('wishlists.added', start_date)
         
         # User demographics
-        top_locations = Property.objects.values('city').annotate(
-            count=Count('id')
-        ).order_by('-count')[:5]
+        top_locations = [
+            {'city': city, 'count': count} for city, count in rollups.top('properties.city', 5)
+        ]
         
         # Top performing properties
-        top_properties = Property.objects.annotate(
-            wishlist_count=Count('wishlisted_by')
-        ).order_by('-wishlist_count')[:5]
+        top_properties = rollups.top_wishlisted_properties(5)
         
         analytics_data = {
             'period': f"Last {time_range}",
@@ -854,7 +884,7 @@ def admin_analytics(request):
             'userDemographics': {
                 'buyers': total_buyers,
                 'sellers': total_sellers,
-                'verifiedSellers': SellerVerification.objects.filter(status='approved').count(),
+                'verifiedSellers': rollups.counts('verifications.status').get('approved', 0),
                 'topLocations': [
                     {
                         'city': loc['city'],
@@ -880,36 +910,44 @@ def admin_analytics(request):
 def admin_property_analytics(request):
     """Detailed property analytics"""
     try:
-        # Property statistics
-        properties_by_type = Property.objects.values('property_type').annotate(
-            count=Count('id'),
-            avg_price=Avg('price'),
-            avg_size=Avg('size')
-        )
+        # Property statistics (from the precomputed rollups)
+        type_totals = rollups.totals('properties.type')
+        properties_by_type = [
+            {
+                'property_type': property_type,
+                'count': row.count,
+                'avg_price': rollups.averages(row)['avg_price'],
+                'avg_size': rollups.averages(row)['avg_size'],
+            }
+            for property_type, row in type_totals.items() if row.count > 0
+        ]
         
-        properties_by_city = Property.objects.values('city').annotate(
-            count=Count('id'),
-            avg_price=Avg('price')
-        ).order_by('-count')[:10]
+        city_totals = rollups.totals('properties.city')
+        properties_by_city = [
+            {'city': city, 'count': count, 'avg_price': rollups.averages(city_totals[city])['avg_price']}
+            for city, count in rollups.top('properties.city', 10)
+        ]
         
         # Price statistics
-        price_stats = Property.objects.aggregate(
-            min_price=Avg('price'),
-            max_price=Avg('price'),
-            avg_price=Avg('price')
-        )
+        avg_price = rollups.averages(rollups.combine(type_totals.values()))['avg_price']
+        min_price, max_price = rollups.price_range()
+        price_stats = {
+            'min_price': min_price,
+            'max_price': max_price,
+            'avg_price': avg_price
+        }
         
         # Recent activity
         week_ago = timezone.now() - timedelta(days=7)
-        recent_properties = Property.objects.filter(created_at__gte=week_ago).count()
+        recent_properties = rollups.count_since('properties.created', week_ago)
         
         property_data = {
-            'byType': list(properties_by_type),
-            'byCity': list(properties_by_city),
+            'byType': properties_by_type,
+            'byCity': properties_by_city,
             'priceStats': price_stats,
             'recentActivity': {
                 'newProperties': recent_properties,
-                'updatedProperties': Property.objects.filter(updated_at__gte=week_ago).count()
+                'updatedProperties': rollups.count_since('properties.updated', week_ago)
             }
         }
         
@@ -926,32 +964,32 @@ def admin_property_analytics(request):
 def admin_user_analytics(request):
     """Detailed user analytics"""
     try:
-        # User growth over time
-        user_growth = User.objects.extra({
-            'date': "date(date_joined)"
-        }).values('date').annotate(
-            count=Count('id')
-        ).order_by('date')[-30:]  # Last 30 days
+        month_ago = timezone.now() - timedelta(days=30)
+        
+        # User growth over time (daily rollups for the last 30 days)
+        user_growth = [
+            {'date': day['date'].isoformat(), 'count': day['count']}
+            for day in rollups.daily_series('users.joined', month_ago)
+        ]
         
         # User role distribution
-        role_distribution = User.objects.values('role').annotate(
-            count=Count('id')
-        )
+        role_counts = rollups.counts('users.role')
+        role_distribution = [
+            {'role': role, 'count': count} for role, count in role_counts.items() if count > 0
+        ]
         
         # User activity
         active_users = User.objects.filter(
-            last_login__gte=timezone.now() - timedelta(days=30)
+            last_login__gte=month_ago
         ).count()
         
         user_data = {
-            'growthTimeline': list(user_growth),
-            'roleDistribution': list(role_distribution),
+            'growthTimeline': user_growth,
+            'roleDistribution': role_distribution,
             'activity': {
                 'activeUsers': active_users,
-                'totalUsers': User.objects.count(),
-                'newUsersThisMonth': User.objects.filter(
-                    date_joined__gte=timezone.now() - timedelta(days=30)
-                ).count()
+                'totalUsers': sum(role_counts.values()),
+                'newUsersThisMonth': rollups.count_since('users.joined', month_ago)
             }
         }
         
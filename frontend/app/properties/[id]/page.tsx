@@ -612,6 +612,7 @@ export default function PropertyDetailPage() {
               <RealMap 
                 address={property.address} 
                 city={property.city} 
+                location={property.location}
                 className="w-full"
               />
             </motion.div>
@@ -19,8 +19,8 @@ export default function PropertiesPage() {
   const [showFilters, setShowFilters] = useState(true)
   const [filters, setFilters] = useState<Filters>({})
   const [viewMode, setViewMode] = useState<"grid" | "list">("grid")
-  const [page, setPage] = useState(1)
-  const [hasMore, setHasMore] = useState(true)
+  // `next` cursor of the listing; null once every page is loaded
+  const [nextPage, setNextPage] = useState<string | null>(null)
   const [searchQuery, setSearchQuery] = useState("")
 
   const { user, isAuthenticated } = useAuth()
@@ -28,8 +28,8 @@ export default function PropertiesPage() {
   const lastPropertyRef = useRef<HTMLDivElement>(null)
 
   // --- Simple Load Properties Function ---
-  const loadProperties = useCallback(async (pageNum = 1, append = false) => {
-    if (pageNum === 1) setIsLoading(true)
+  const loadProperties = useCallback(async (cursor: string | null = null) => {
+    if (!cursor) setIsLoading(true)
     else setIsLoadingMore(true)
 
     try {
@@ -81,14 +81,14 @@ export default function PropertiesPage() {
 
       //console.log("🔍 Loading properties with filters:", apiFilters)
 
-      const newProperties = await propertiesApi.getProperties(apiFilters)
-      
-      setProperties(prev => append ? [...prev, ...newProperties] : newProperties)
-      setHasMore(newProperties.length === 9)
+      const page = await propertiesApi.getProperties(apiFilters, cursor)
+
+      setProperties(prev => cursor ? [...prev, ...page.results] : page.results)
+      setNextPage(page.next)
     } catch (error) {
       console.error("❌ Failed to load properties:", error)
       setProperties([])
-      setHasMore(false)
+      setNextPage(null)
     } finally {
       setIsLoading(false)
       setIsLoadingMore(false)
@@ -98,18 +98,18 @@ export default function PropertiesPage() {
   // --- Initial Load & Filter/Search Change ---
   useEffect(() => {
     //console.log("🔄 Filters or search changed, reloading properties")
-    setPage(1)
-    loadProperties(1, false)
+    setNextPage(null)
+    loadProperties()
   }, [filters, searchQuery, loadProperties])
 
   // --- Infinite Scroll ---
   useEffect(() => {
-    if (isLoading || isLoadingMore || !hasMore) return
+    if (isLoading || isLoadingMore || !nextPage) return
 
     observer.current = new IntersectionObserver(
       entries => {
-        if (entries[0].isIntersecting && hasMore) {
-          setPage(prev => prev + 1)
+        if (entries[0].isIntersecting) {
+          loadProperties(nextPage)
         }
       },
       { threshold: 0.1 }
@@ -120,15 +120,7 @@ export default function PropertiesPage() {
     }
 
     return () => observer.current?.disconnect()
-  }, [isLoading, isLoadingMore, hasMore, properties])
-
-  // --- Load More on Page Change ---
-  useEffect(() => {
-    if (page > 1) {
-      console.log("📄 Loading more properties, page:", page)
-      loadProperties(page, true)
-    }
-  }, [page, loadProperties])
+  }, [isLoading, isLoadingMore, nextPage, properties, loadProperties])
 
   // --- Clear All Filters ---
   const clearAllFilters = () => {
@@ -3,10 +3,12 @@
 import { useEffect, useRef, useState } from 'react'
 import { MapPin, Navigation, ExternalLink } from "lucide-react"
 import { Button } from "@/components/ui/button"
+import type { PropertyLocation } from "@/types/property"
 
 interface RealMapProps {
   address: string
   city: string
+  location?: PropertyLocation | null
   className?: string
 }
 
@@ -15,7 +17,7 @@ interface Coordinates {
   lng: number
 }
 
-export function RealMap({ address, city, className = "" }: RealMapProps) {
+export function RealMap({ address, city, location, className = "" }: RealMapProps) {
   const mapRef = useRef<HTMLDivElement>(null)
   const mapInstance = useRef<any>(null)
   const [coordinates, setCoordinates] = useState<Coordinates | null>(null)
@@ -23,9 +25,10 @@ export function RealMap({ address, city, className = "" }: RealMapProps) {
   const [error, setError] = useState<string | null>(null)
   
   const fullAddress = `${address}, ${city}`
+  const isExact = location?.precision === 'address'
   const encodedQuery = encodeURIComponent(fullAddress)
 
-  // Fallback coordinates based on city (used if geocoding fails)
+  // Fallback coordinates based on city (used if the backend couldn't geocode the address)
   const getCityCoords = (cityName: string): Coordinates => {
     const cityLower = cityName.toLowerCase()
     if (cityLower.includes('berlin')) return { lat: 52.5200, lng: 13.4050 }
@@ -41,50 +44,17 @@ export function RealMap({ address, city, className = "" }: RealMapProps) {
     return { lat: 52.5200, lng: 13.4050 } // Default to Berlin
   }
 
-  // Geocode the address to get exact coordinates
+  // Coordinates come geocoded with the property; only unplaced addresses fall back to the city list
   useEffect(() => {
-    const geocodeAddress = async () => {
-      try {
-        setIsLoading(true)
-        setError(null)
-
-        // Use OpenStreetMap Nominatim API for geocoding (free)
-        const response = await fetch(
-          `https://nominatim.openstreetmap.org/search?format=json&q=${encodedQuery}&limit=1`
-        )
-        
-        if (!response.ok) {
-          throw new Error('Geocoding service unavailable')
-        }
-        
-        const data = await response.json()
-        
-        if (data && data.length > 0) {
-          const { lat, lon } = data[0]
-          setCoordinates({
-            lat: parseFloat(lat),
-            lng: parseFloat(lon)
-          })
-        } else {
-          // Use fallback coordinates instead of throwing error
-          console.log('Address not found, using city center coordinates')
-          setError('Exact address not found. Showing approximate location.')
-          const fallbackCoords = getCityCoords(city)
-          setCoordinates(fallbackCoords)
-        }
-      } catch (err) {
-        console.error('Geocoding error:', err)
-        setError('Could not find exact location. Showing city center.')
-        // Fallback to city center coordinates
-        const fallbackCoords = getCityCoords(city)
-        setCoordinates(fallbackCoords)
-      } finally {
-        setIsLoading(false)
-      }
+    if (location) {
+      setCoordinates({ lat: location.lat, lng: location.lng })
+      setError(location.precision === 'address' ? null : 'Exact address not found. Showing approximate location.')
+    } else {
+      setCoordinates(getCityCoords(city))
+      setError('Could not find exact location. Showing city center.')
     }
-
-    geocodeAddress()
-  }, [address, city, encodedQuery])
+    setIsLoading(false)
+  }, [location?.lat, location?.lng, location?.precision, city])
 
   // Initialize map once we have coordinates
   useEffect(() => {
@@ -110,7 +80,7 @@ export function RealMap({ address, city, className = "" }: RealMapProps) {
         // Initialize map with coordinates
         mapInstance.current = L.map(mapRef.current!).setView(
           [coordinates.lat, coordinates.lng], 
-          16 // Zoom closer for exact address
+          isExact ? 16 : 12 // Zoom closer for exact address
         )
 
         // Add OpenStreetMap tiles
@@ -163,7 +133,7 @@ export function RealMap({ address, city, className = "" }: RealMapProps) {
           color: '#dc2626',
           fillColor: '#fecaca',
           fillOpacity: 0.2,
-          radius: 50, // 50 meter radius around the exact location
+          radius: isExact ? 50 : 1500, // 50 meter radius around the exact location
         }).addTo(mapInstance.current)
 
       } catch (error) {
@@ -181,7 +151,7 @@ export function RealMap({ address, city, className = "" }: RealMapProps) {
         mapInstance.current = null
       }
     }
-  }, [coordinates, address, city])
+  }, [coordinates, isExact, address, city])
 
   const googleMapsUrl = `https://www.google.com/maps/search/?api=1&query=${encodedQuery}`
 
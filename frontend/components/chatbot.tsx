@@ -51,15 +51,6 @@ interface ChatSession {
   properties?: Property[]
 }
 
-interface ApiResponse {
-  success: boolean
-  session_id: string
-  response: string
-  conversation: ChatSession
-  properties?: Property[]
-  error?: string
-}
-
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000/api"
 
 export function Chatbot() {
@@ -232,26 +223,76 @@ export function Chatbot() {
         )
       }
 
-      const response = await fetch(`${API_BASE_URL}/chatbot/send-message/`, {
+      const response = await fetch(`${API_BASE_URL}/chatbot/send-message/stream/`, {
         method: "POST",
         headers: getAuthHeaders(),
         credentials: "include",
         body: JSON.stringify({ message: userMessage, session_id: currentSessionId || "" }),
       })
 
-      if (!response.ok) throw new Error(`Error: ${response.status}`)
-
-      const data: ApiResponse = await response.json()
+      if (response.status === 429) {
+        throw new Error(`Too many messages. Please try again in ${response.headers.get("Retry-After") || "a few"} seconds.`)
+      }
+      if (!response.ok || !response.body) throw new Error(`Error: ${response.status}`)
+
+      // The reply arrives as Server-Sent Events: meta, then token after token, then done
+      const replyId = `stream-${Date.now()}`
+      let streamedSessionId = currentSessionId
+      const updateSession = (update: (session: ChatSession) => ChatSession) =>
+        setSessions(prev => prev.map(session => session.session_id === streamedSessionId ? update(session) : session))
+
+      const handleEvent = (event: string, data: any) => {
+        if (event === "meta") {
+          streamedSessionId = data.session_id
+          const reply: Message = { id: replyId, role: "assistant", content: "", timestamp: new Date().toISOString() }
+          setSessions(prev => {
+            const existing = prev.find(s => s.session_id === data.session_id)
+            const messages = existing ? existing.messages : [tempMessage]
+            const session: ChatSession = existing
+              ? { ...existing, messages: [...messages, reply], properties: data.properties || [] }
+              : {
+                  id: data.session_id,
+                  session_id: data.session_id,
+                  created_at: new Date().toISOString(),
+                  updated_at: new Date().toISOString(),
+                  messages: [...messages, reply],
+                  properties: data.properties || [],
+                }
+            return [session, ...prev.filter(s => s.session_id !== data.session_id)]
+          })
+          if (!currentSessionId) setActiveSessionId(data.session_id)
+        } else if (event === "token") {
+          setAssistantTyping(false)
+          updateSession(session => ({
+            ...session,
+            messages: session.messages.map(msg => msg.id === replyId ? { ...msg, content: msg.content + data.text } : msg),
+          }))
+        } else if (event === "done") {
+          updateSession(session => ({
+            ...session,
+            messages: session.messages.map(msg => msg.id === replyId && data.message_id ? { ...msg, id: data.message_id } : msg),
+            updated_at: new Date().toISOString(),
+          }))
+        } else if (event === "error") {
+          throw new Error(data.error || "Failed to send message")
+        }
+      }
 
-      if (data.success) {
-        const updatedSession = { ...data.conversation, properties: data.properties || [] }
-        setSessions(prev => {
-          const otherSessions = prev.filter(s => s.session_id !== data.session_id)
-          return [updatedSession, ...otherSessions]
-        })
-        if (!currentSessionId) setActiveSessionId(data.session_id)
-      } else {
-        throw new Error(data.error || "Failed to send message")
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      let buffer = ""
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+        let boundary
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+          const block = buffer.slice(0, boundary)
+          buffer = buffer.slice(boundary + 2)
+          const event = block.match(/^event: (.*)$/m)?.[1]
+          const data = block.match(/^data: (.*)$/m)?.[1]
+          if (event && data) handleEvent(event, JSON.parse(data))
+        }
       }
     } catch (err) {
       setError(err instanceof Error ? err.message : "Failed to send")
@@ -55,8 +55,9 @@ export function BuyerDashboard() {
   const [isLoadingWishlist, setIsLoadingWishlist] = useState(false)
   const [searchQuery, setSearchQuery] = useState("")
   const [sortBy, setSortBy] = useState<"price" | "date" | "status">("date")
-  const [page, setPage] = useState(1)
-  const [hasMore, setHasMore] = useState(true)
+  // `next` cursor of the wishlist; null once every page is loaded
+  const [nextPage, setNextPage] = useState<string | null>(null)
+  const [isLoadingMore, setIsLoadingMore] = useState(false)
   const [quickViewProperty, setQuickViewProperty] = useState<Property | null>(null)
   const [isPulling, setIsPulling] = useState(false)
   const pullRef = useRef<HTMLDivElement>(null)
@@ -102,23 +103,23 @@ export function BuyerDashboard() {
   }, [isPulling])
 
   useEffect(() => {
-    if (inView && hasMore && !isLoadingWishlist) {
-      loadWishlist(page + 1)
+    if (inView && nextPage && !isLoadingWishlist && !isLoadingMore) {
+      loadWishlist(nextPage)
     }
-  }, [inView, page, hasMore])
+  }, [inView, nextPage])
 
   const handleRefresh = useCallback(() => {
-    setPage(1)
+    setNextPage(null)
     setSavedProperties([])
     loadProfile()
-    loadWishlist(1)
+    loadWishlist()
     toast({ title: "Refreshing...", description: "Updating your data" })
   }, [])
 
   useEffect(() => {
     if (isAuthenticated) {
       loadProfile()
-      loadWishlist(1)
+      loadWishlist()
     } else {
       setIsLoading(false)
     }
@@ -143,22 +144,23 @@ export function BuyerDashboard() {
     return () => document.removeEventListener("keydown", down)
   }, [handleRefresh, theme, setTheme])
 
-  const loadWishlist = async (pageNum: number = 1) => {
-    if (pageNum === 1) setIsLoadingWishlist(true)
+  const loadWishlist = async (cursor: string | null = null) => {
+    if (cursor) setIsLoadingMore(true)
+    else setIsLoadingWishlist(true)
     try {
-      const wishlist = await propertiesApi.getWishlist(pageNum)
-      if (pageNum === 1) {
-        setSavedProperties(wishlist)
+      const wishlist = await propertiesApi.getWishlist(cursor)
+      if (cursor) {
+        setSavedProperties(prev => [...prev, ...wishlist.results])
       } else {
-        setSavedProperties(prev => [...prev, ...wishlist])
+        setSavedProperties(wishlist.results)
       }
-      setHasMore(wishlist.length === 12)
-      setPage(pageNum)
+      setNextPage(wishlist.next)
     } catch (error) {
       console.error("[v0] Failed to load wishlist:", error)
       toast({ title: "Error", description: "Failed to load", variant: "destructive" })
     } finally {
-      if (pageNum === 1) setIsLoadingWishlist(false)
+      if (cursor) setIsLoadingMore(false)
+      else setIsLoadingWishlist(false)
     }
   }
 
@@ -458,7 +460,7 @@ export function BuyerDashboard() {
         {/* Stats */}
         <div className="grid grid-cols-1 sm:grid-cols-3 gap-4 mb-10">
           {[
-            { title: "Saved", value: savedProperties.length, sub: "Wishlist", icon: Heart },
+            { title: "Saved", value: `${savedProperties.length}${nextPage ? '+' : ''}`, sub: "Wishlist", icon: Heart },
             
           ].map((stat, i) => (
             <motion.div key={i} initial={{ opacity: 0, y: 20 }} animate={{ opacity: 1, y: 0 }} transition={{ delay: i * 0.1 }}>
@@ -517,7 +519,7 @@ export function BuyerDashboard() {
             </div>
 
             <AnimatePresence>
-              {isLoadingWishlist && page === 1 ? (
+              {isLoadingWishlist ? (
                 <div className="grid sm:grid-cols-2 lg:grid-cols-3 gap-5">
                   {[...Array(6)].map((_, i) => (
                     <Card key={i}>
@@ -595,7 +597,7 @@ export function BuyerDashboard() {
                       </Card>
                     </motion.div>
                   ))}
-                  {hasMore && (
+                  {nextPage && (
                     <div ref={loadMoreRef} className="col-span-full flex justify-center py-4">
                       <Loader2 className="h-6 w-6 animate-spin text-primary" />
                     </div>
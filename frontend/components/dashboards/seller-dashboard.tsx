@@ -45,6 +45,10 @@ export function SellerDashboard() {
   const { toast } = useToast() 
   const [myListings, setMyListings] = useState<Property[]>([])
   const [savedProperties, setSavedProperties] = useState<Property[]>([])
+  // `next` cursors of the two lists; null once everything is loaded
+  const [nextListingsPage, setNextListingsPage] = useState<string | null>(null)
+  const [nextWishlistPage, setNextWishlistPage] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState<"listings" | "saved" | null>(null)
   const [isLoading, setIsLoading] = useState(true)
   const [isLoadingWishlist, setIsLoadingWishlist] = useState(false)
   const [deletePropertyId, setDeletePropertyId] = useState<string | null>(null)
@@ -125,7 +129,8 @@ export function SellerDashboard() {
     try {
       setIsLoadingWishlist(true)
       const wishlist = await propertiesApi.getWishlist()
-      setSavedProperties(wishlist)
+      setSavedProperties(wishlist.results)
+      setNextWishlistPage(wishlist.next)
     } catch (error) {
       console.error("[v0] Failed to load wishlist:", error)
       toast({ title: "Error", description: "Failed to load saved properties", variant: "destructive" })
@@ -134,6 +139,21 @@ export function SellerDashboard() {
     }
   }
 
+  const loadMoreWishlist = async () => {
+    if (!nextWishlistPage) return
+    try {
+      setLoadingMore("saved")
+      const wishlist = await propertiesApi.getWishlist(nextWishlistPage)
+      setSavedProperties(prev => [...prev, ...wishlist.results])
+      setNextWishlistPage(wishlist.next)
+    } catch (error) {
+      console.error("[v0] Failed to load more saved properties:", error)
+      toast({ title: "Error", description: "Failed to load more saved properties", variant: "destructive" })
+    } finally {
+      setLoadingMore(null)
+    }
+  }
+
   const handleRemoveFromWishlist = async (propertyId: string, e: React.MouseEvent) => {
     e.preventDefault()
     e.stopPropagation()
@@ -222,7 +242,8 @@ export function SellerDashboard() {
     try {
       setIsLoading(true)
       const properties = await propertiesApi.getMyProperties()
-      setMyListings(properties)
+      setMyListings(properties.results)
+      setNextListingsPage(properties.next)
     } catch (error) {
       console.error("[v0] Failed to load properties:", error)
       toast({ title: "Error", description: "Failed to load your listings", variant: "destructive" })
@@ -231,6 +252,21 @@ export function SellerDashboard() {
     }
   }
 
+  const loadMoreProperties = async () => {
+    if (!nextListingsPage) return
+    try {
+      setLoadingMore("listings")
+      const properties = await propertiesApi.getMyProperties(nextListingsPage)
+      setMyListings(prev => [...prev, ...properties.results])
+      setNextListingsPage(properties.next)
+    } catch (error) {
+      console.error("[v0] Failed to load more properties:", error)
+      toast({ title: "Error", description: "Failed to load more listings", variant: "destructive" })
+    } finally {
+      setLoadingMore(null)
+    }
+  }
+
   const handleDeleteProperty = async () => {
     if (!deletePropertyId) return
     try {
@@ -291,8 +327,8 @@ export function SellerDashboard() {
       {/* Stats */}
       <div className="grid grid-cols-2 md:grid-cols-4 gap-4 mb-10">
         {[
-          { title: "Active", value: activeListings, sub: `${myListings.length} total`, icon: Home },
-          { title: "Saved", value: savedProperties.length, sub: "Wishlist", icon: Heart },
+          { title: "Active", value: activeListings, sub: `${myListings.length}${nextListingsPage ? '+' : ''} total`, icon: Home },
+          { title: "Saved", value: `${savedProperties.length}${nextWishlistPage ? '+' : ''}`, sub: "Wishlist", icon: Heart },
           
         ].map((stat, i) => (
           <motion.div
@@ -452,6 +488,14 @@ export function SellerDashboard() {
               ))}
             </div>
           )}
+          {nextListingsPage && !isLoading && (
+            <div className="flex justify-center">
+              <Button variant="outline" onClick={loadMoreProperties} disabled={loadingMore === "listings"}>
+                {loadingMore === "listings" && <Loader2 className="mr-2 h-4 w-4 animate-spin" />}
+                Load more
+              </Button>
+            </div>
+          )}
         </TabsContent>
 
         {/* Saved Properties */}
@@ -539,6 +583,14 @@ export function SellerDashboard() {
               ))}
             </div>
           )}
+          {nextWishlistPage && !isLoadingWishlist && (
+            <div className="flex justify-center">
+              <Button variant="outline" onClick={loadMoreWishlist} disabled={loadingMore === "saved"}>
+                {loadingMore === "saved" && <Loader2 className="mr-2 h-4 w-4 animate-spin" />}
+                Load more
+              </Button>
+            </div>
+          )}
         </TabsContent>
 
         {/* Profile - UPDATED WITH PROFILE PICTURE */}
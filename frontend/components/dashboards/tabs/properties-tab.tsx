@@ -51,8 +51,10 @@ interface PropertyImage {
 export function PropertiesTab() {
   const { user, isAuthenticated } = useAuth()
   const [properties, setProperties] = useState<Property[]>([])
+  const [nextPage, setNextPage] = useState<string | null>(null)
   const [loading, setLoading] = useState({
     properties: false,
+    more: false,
     filters: false,
     stats: false,
     export: false
@@ -420,8 +422,9 @@ export function PropertiesTab() {
     
     setLoading(prev => ({ ...prev, properties: true }))
     try {
-      const data = await adminPropertiesApi.getProperties(searchQuery, typeFilter, cityFilter, statusFilter)
-      setProperties(data)
+      const page = await adminPropertiesApi.getProperties(searchQuery, typeFilter, cityFilter, statusFilter)
+      setProperties(page.results)
+      setNextPage(page.next)
     } catch (error: any) {
       console.error("❌ Failed to fetch properties:", error)
       toast({
@@ -434,6 +437,27 @@ export function PropertiesTab() {
     }
   }, [isAuthenticated, searchQuery, typeFilter, cityFilter, statusFilter])
 
+  // Append the next page of the current search
+  const loadMoreProperties = async () => {
+    if (!nextPage) return
+
+    setLoading(prev => ({ ...prev, more: true }))
+    try {
+      const page = await adminPropertiesApi.getProperties(searchQuery, typeFilter, cityFilter, statusFilter, nextPage)
+      setProperties(prev => [...prev, ...page.results])
+      setNextPage(page.next)
+    } catch (error: any) {
+      console.error("❌ Failed to load more properties:", error)
+      toast({
+        title: "Error",
+        description: error.message || "Failed to load more properties",
+        variant: "destructive",
+      })
+    } finally {
+      setLoading(prev => ({ ...prev, more: false }))
+    }
+  }
+
   // Fetch filters and stats using adminPropertiesApi
   const fetchFiltersAndStats = useCallback(async () => {
     if (!isAuthenticated) return
@@ -598,7 +622,7 @@ export function PropertiesTab() {
         <div>
           <h2 className="text-2xl font-bold">Properties Management</h2>
           <p className="text-muted-foreground">
-            {properties.length} propert{properties.length !== 1 ? 'ies' : 'y'} found
+            {properties.length}{nextPage ? '+' : ''} propert{properties.length !== 1 ? 'ies' : 'y'} found
             {(typeFilter !== 'all' || cityFilter !== 'all' || statusFilter !== 'all') && ' (filtered)'}
             {selectedProperties.length > 0 && ` • ${selectedProperties.length} selected`}
           </p>
@@ -998,6 +1022,14 @@ export function PropertiesTab() {
               )}
             </TableBody>
           </Table>
+          {nextPage && !loading.properties && (
+            <div className="flex justify-center pt-4">
+              <Button variant="outline" onClick={loadMoreProperties} disabled={loading.more}>
+                {loading.more && <Loader2 className="h-4 w-4 mr-2 animate-spin" />}
+                Load more
+              </Button>
+            </div>
+          )}
         </CardContent>
       </Card>
 
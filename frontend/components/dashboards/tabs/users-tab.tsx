@@ -9,6 +9,7 @@ import { Input } from "@/components/ui/input"
 import { useAuth } from "@/contexts/auth-context"
  
 import { usersApi } from '@/lib/api/users'; // Adjust the path as needed
+import { fetchPage, type Page } from "@/lib/api/pagination"
 import { Separator } from "@/components/ui/separator"
 import { 
   Users, Home, DollarSign, TrendingUp, Search, MoreVertical, 
@@ -81,16 +82,34 @@ interface UserFullDetail extends User {
 // FIX: Get API URL with fallback
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'
 
+// Totals by role, from the precomputed rollups rather than the loaded pages
+interface UserStats {
+  total_users: number
+  total_buyers: number
+  total_sellers: number
+  total_admins: number
+}
+
 // API functions
 const adminApi = {
-  async getUsers(token: string, search?: string, role?: string): Promise<User[]> {
+  // One page of users; pass the previous page's `next` as `cursor` to continue
+  async getUsers(token: string, search?: string, role?: string, cursor?: string | null): Promise<Page<User>> {
     const params = new URLSearchParams()
     if (search) params.append('search', search)
     if (role && role !== 'all') params.append('role', role)
     
-    const url = `${API_BASE_URL}/api/users/admin/users/?${params}`
+    const url = cursor || `${API_BASE_URL}/api/users/admin/users/?${params}`
     
-    const response = await fetch(url, {
+    return fetchPage<User>(url, {
+      headers: {
+        'Authorization': `Bearer ${token}`,
+        'Content-Type': 'application/json',
+      },
+    }, 'Failed to fetch users')
+  },
+
+  async getUserStats(token: string): Promise<UserStats> {
+    const response = await fetch(`${API_BASE_URL}/api/users/admin/stats/`, {
       headers: {
         'Authorization': `Bearer ${token}`,
         'Content-Type': 'application/json',
@@ -98,11 +117,10 @@ const adminApi = {
     })
     
     if (!response.ok) {
-      throw new Error(`Failed to fetch users: ${response.status}`)
+      throw new Error(`Failed to fetch user stats: ${response.status}`)
     }
     
-    const data = await response.json()
-    return Array.isArray(data) ? data : data.results || []
+    return response.json()
   },
 
   async getUserFullDetail(token: string, userId: number): Promise<UserFullDetail> {
@@ -163,8 +181,11 @@ export function UsersTab() {
   const [searchQuery, setSearchQuery] = useState("")
   const [activeTab, setActiveTab] = useState("users")
   const [users, setUsers] = useState<User[]>([])
+  const [nextPage, setNextPage] = useState<string | null>(null)
+  const [stats, setStats] = useState<UserStats | null>(null)
   const [loading, setLoading] = useState({
     users: false,
+    more: false,
     userDetail: false
   })
   const [roleFilter, setRoleFilter] = useState<string>("all")
@@ -269,7 +290,6 @@ const exportToPDF = async () => {
 
     const stats = [
       { label: 'Total Users', value: userStats.totalUsers },
-      { label: 'Active Users', value: userStats.activeUsers },
       { label: 'Buyers', value: userStats.totalBuyers },
       { label: 'Sellers', value: userStats.totalSellers },
       { label: 'Admins', value: userStats.totalAdmins }
@@ -411,7 +431,6 @@ const exportToExcel = async () => {
       ['STATISTICS'],
       ['Metric', 'Count'],
       ['Total Users', userStats.totalUsers],
-      ['Active Users', userStats.activeUsers],
       ['Buyers', userStats.totalBuyers],
       ['Sellers', userStats.totalSellers],
       ['Admins', userStats.totalAdmins],
@@ -500,7 +519,6 @@ const exportToPNG = async () => {
 
       const stats = [
         { label: 'Total Users', value: userStats.totalUsers, color: '#3b82f6' },
-        { label: 'Active Users', value: userStats.activeUsers, color: '#10b981' },
         { label: 'Buyers', value: userStats.totalBuyers, color: '#f59e0b' },
         { label: 'Sellers', value: userStats.totalSellers, color: '#ef4444' },
         { label: 'Admins', value: userStats.totalAdmins, color: '#8b5cf6' }
@@ -617,8 +635,13 @@ const exportToPNG = async () => {
     
     setLoading(prev => ({ ...prev, users: true }))
     try {
-      const data = await adminApi.getUsers(token, searchQuery, roleFilter)
-      setUsers(data)
+      const [page, statsData] = await Promise.all([
+        adminApi.getUsers(token, searchQuery, roleFilter),
+        adminApi.getUserStats(token),
+      ])
+      setUsers(page.results)
+      setNextPage(page.next)
+      setStats(statsData)
     } catch (error: any) {
       console.error("[v0] Failed to fetch users:", error)
       toast({
@@ -631,6 +654,27 @@ const exportToPNG = async () => {
     }
   }, [token, searchQuery, roleFilter])
 
+  // Append the next page of the current search
+  const loadMoreUsers = async () => {
+    if (!token || !nextPage) return
+
+    setLoading(prev => ({ ...prev, more: true }))
+    try {
+      const page = await adminApi.getUsers(token, searchQuery, roleFilter, nextPage)
+      setUsers(prev => [...prev, ...page.results])
+      setNextPage(page.next)
+    } catch (error: any) {
+      console.error("[v0] Failed to load more users:", error)
+      toast({
+        title: "Error",
+        description: error.message || "Failed to load more users",
+        variant: "destructive",
+      })
+    } finally {
+      setLoading(prev => ({ ...prev, more: false }))
+    }
+  }
+
   // Fetch user full details
   const fetchUserDetail = async (userId: number) => {
     if (!token) return
@@ -777,22 +821,13 @@ const exportToPNG = async () => {
     )
   }
 
-  // Calculate basic stats from users data
-  const userStats = useMemo(() => {
-    const totalUsers = users.length
-    const totalBuyers = users.filter(u => u.role === 'buyer').length
-    const totalSellers = users.filter(u => u.role === 'seller').length
-    const totalAdmins = users.filter(u => u.role === 'admin').length
-    const activeUsers = users.filter(u => u.is_active).length
-    
-    return {
-      totalUsers,
-      totalBuyers,
-      totalSellers,
-      totalAdmins,
-      activeUsers
-    }
-  }, [users])
+  // Basic stats for every user, not just the loaded pages
+  const userStats = useMemo(() => ({
+    totalUsers: stats?.total_users ?? 0,
+    totalBuyers: stats?.total_buyers ?? 0,
+    totalSellers: stats?.total_sellers ?? 0,
+    totalAdmins: stats?.total_admins ?? 0,
+  }), [stats])
 
   // Load data when tab changes
   useEffect(() => {
@@ -884,7 +919,7 @@ const handleDeleteUser = async (userId: number, username: string) => {
           { 
             title: "Total Users", 
             value: userStats.totalUsers, 
-            sub: `${userStats.activeUsers} active`, 
+            sub: "Registered accounts", 
             icon: Users,
             loading: loading.users
           },
@@ -948,7 +983,7 @@ const handleDeleteUser = async (userId: number, username: string) => {
               <h2 className="text-2xl font-bold">User Management</h2>
               
               <p className="text-muted-foreground">
-                {users.length} user{users.length !== 1 ? 's' : ''} found
+                {users.length}{nextPage ? '+' : ''} user{users.length !== 1 ? 's' : ''} found
                 {roleFilter !== 'all' && ` (filtered by ${roleFilter})`}
               </p>
             </div>
@@ -1349,6 +1384,14 @@ const handleDeleteUser = async (userId: number, username: string) => {
                   )}
                 </TableBody>
               </Table>
+              {nextPage && !loading.users && (
+                <div className="flex justify-center pt-4">
+                  <Button variant="outline" onClick={loadMoreUsers} disabled={loading.more}>
+                    {loading.more && <Loader2 className="h-4 w-4 mr-2 animate-spin" />}
+                    Load more
+                  </Button>
+                </div>
+              )}
             </CardContent>
             
           </Card>
@@ -22,8 +22,10 @@ import { VerificationDetailModal } from "../modals/verification-detail-modal"
 export function VerificationsTab() {
   const { user, isAuthenticated } = useAuth()
   const [verifications, setVerifications] = useState<SellerVerification[]>([])
+  const [nextPage, setNextPage] = useState<string | null>(null)
   const [loading, setLoading] = useState({
     verifications: false,
+    more: false,
     stats: false,
     export: false
   })
@@ -374,7 +376,7 @@ export function VerificationsTab() {
     setLoading(prev => ({ ...prev, verifications: true }))
     try {
       console.log("🔄 Starting to fetch verifications...")
-      const data = await adminVerificationsApi.getVerifications(statusFilter)
+      const { results: data, next } = await adminVerificationsApi.getVerifications(statusFilter)
       console.log("📦 Raw data from API:", data)
       
       // Check the first verification to see user data
@@ -384,6 +386,7 @@ export function VerificationsTab() {
       }
       
       setVerifications(data)
+      setNextPage(next)
       console.log("✅ Verifications set in state")
     } catch (error: any) {
       console.error("❌ Failed to fetch verifications:", error)
@@ -397,6 +400,27 @@ export function VerificationsTab() {
     }
   }, [isAuthenticated, statusFilter])
 
+  // Append the next page for the current status filter
+  const loadMoreVerifications = async () => {
+    if (!nextPage) return
+
+    setLoading(prev => ({ ...prev, more: true }))
+    try {
+      const page = await adminVerificationsApi.getVerifications(statusFilter, nextPage)
+      setVerifications(prev => [...prev, ...page.results])
+      setNextPage(page.next)
+    } catch (error: any) {
+      console.error("❌ Failed to load more verifications:", error)
+      toast({
+        title: "Error",
+        description: error.message || "Failed to load more verifications",
+        variant: "destructive",
+      })
+    } finally {
+      setLoading(prev => ({ ...prev, more: false }))
+    }
+  }
+
   // Fetch stats
   const fetchStats = useCallback(async () => {
     if (!isAuthenticated) return
@@ -570,7 +594,7 @@ export function VerificationsTab() {
         <div>
           <h2 className="text-2xl font-bold">Seller Verifications</h2>
           <p className="text-muted-foreground">
-            {verifications.length} verification{verifications.length !== 1 ? 's' : ''} found
+            {verifications.length}{nextPage ? '+' : ''} verification{verifications.length !== 1 ? 's' : ''} found
             {statusFilter !== 'all' && ' (filtered)'}
             {selectedVerifications.length > 0 && ` • ${selectedVerifications.length} selected`}
           </p>
@@ -832,6 +856,14 @@ export function VerificationsTab() {
               )}
             </TableBody>
           </Table>
+          {nextPage && !loading.verifications && (
+            <div className="flex justify-center pt-4">
+              <Button variant="outline" onClick={loadMoreVerifications} disabled={loading.more}>
+                {loading.more && <Loader2 className="h-4 w-4 mr-2 animate-spin" />}
+                Load more
+              </Button>
+            </div>
+          )}
         </CardContent>
       </Card>
 
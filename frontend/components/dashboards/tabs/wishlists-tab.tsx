@@ -15,7 +15,8 @@ import {
   Download,
   FileText,
   Table as TableIcon,
-  Image
+  Image,
+  Loader2
 } from "lucide-react"
 import { toast } from "@/hooks/use-toast"
 import { UserWishlistModal } from "../modals/user-wishlist-modal"
@@ -23,8 +24,11 @@ import { UserWishlistModal } from "../modals/user-wishlist-modal"
 export function WishlistsTab() {
   const { isAuthenticated } = useAuth()
   const [wishlists, setWishlists] = useState<UserWishlist[]>([])
+  // `next` cursor of the user list; null once every page is loaded
+  const [nextPage, setNextPage] = useState<string | null>(null)
   const [loading, setLoading] = useState({
     wishlists: false,
+    more: false,
     stats: false,
     export: false
   })
@@ -378,9 +382,9 @@ export function WishlistsTab() {
     
     setLoading(prev => ({ ...prev, wishlists: true }))
     try {
-      const data = await adminWishlistsApi.getAllWishlists()
-      console.log("✅ Fetched wishlists:", data)
-      setWishlists(data)
+      const page = await adminWishlistsApi.getWishlists()
+      setWishlists(page.results)
+      setNextPage(page.next)
     } catch (error: any) {
       console.error("❌ Failed to fetch wishlists:", error)
       toast({
@@ -393,6 +397,26 @@ export function WishlistsTab() {
     }
   }, [isAuthenticated])
 
+  const loadMoreWishlists = async () => {
+    if (!nextPage) return
+
+    setLoading(prev => ({ ...prev, more: true }))
+    try {
+      const page = await adminWishlistsApi.getWishlists(nextPage)
+      setWishlists(prev => [...prev, ...page.results])
+      setNextPage(page.next)
+    } catch (error: any) {
+      console.error("❌ Failed to load more wishlists:", error)
+      toast({
+        title: "Error",
+        description: error.message || "Failed to load more wishlists",
+        variant: "destructive",
+      })
+    } finally {
+      setLoading(prev => ({ ...prev, more: false }))
+    }
+  }
+
   // Fetch stats
   const fetchStats = useCallback(async () => {
     if (!isAuthenticated) return
@@ -504,7 +528,7 @@ export function WishlistsTab() {
         <div>
           <h2 className="text-2xl font-bold">Wishlists Management</h2>
           <p className="text-muted-foreground">
-            {filteredWishlists.length} wishlist{filteredWishlists.length !== 1 ? 's' : ''} found
+            {filteredWishlists.length}{nextPage ? '+' : ''} wishlist{filteredWishlists.length !== 1 ? 's' : ''} found
             {searchQuery && ' (filtered)'}
           </p>
         </div>
@@ -716,6 +740,14 @@ export function WishlistsTab() {
               )}
             </TableBody>
           </Table>
+          {nextPage && !loading.wishlists && (
+            <div className="flex justify-center pt-4">
+              <Button variant="outline" onClick={loadMoreWishlists} disabled={loading.more}>
+                {loading.more && <Loader2 className="h-4 w-4 mr-2 animate-spin" />}
+                Load more
+              </Button>
+            </div>
+          )}
         </CardContent>
       </Card>
 
@@ -5,7 +5,7 @@ import { PropertyCard } from "@/components/property-card"
 import { Button } from "@/components/ui/button"
 import { Badge } from "@/components/ui/badge"
 import { propertiesApi } from "@/lib/api/properties"
-import type { Property } from "@/types/property"
+import type { Property, SimilarProperty } from "@/types/property"
 import { motion, AnimatePresence } from "framer-motion"
 import { Sparkles, MapPin, Euro, Ruler, Home, Search, RefreshCw, Zap, Filter, Target, Building, Bed } from "lucide-react"
 
@@ -29,11 +29,22 @@ const THRESHOLDS = [
   { value: 60, label: "Elite", color: "from-primary to-primary/90" },
 ] as const
 
+// The criterion each filter asks the server to weigh more
+const FOCUS: Record<FilterType, string | undefined> = {
+  comprehensive: undefined,
+  location: "location",
+  price: "price",
+  size: "size",
+  type: "type",
+}
+
+const CANDIDATES = 12
+
 // ─────────────────────────────────────
 // MAIN COMPONENT
 // ─────────────────────────────────────
 export function SimilarProperties({ currentProperty, className = "" }: { currentProperty: Property; className?: string }) {
-  const [properties, setProperties] = useState<Property[]>([])
+  const [matches, setMatches] = useState<SimilarProperty[]>([])
   const [isLoading, setIsLoading] = useState(true)
   const [noResults, setNoResults] = useState(false)
   const [filter, setFilter] = useState<FilterType>("comprehensive")
@@ -41,67 +52,6 @@ export function SimilarProperties({ currentProperty, className = "" }: { current
   const [isMounted, setIsMounted] = useState(false)
   const abortRef = useRef<AbortController | null>(null)
 
-  const calculateSimilarity = (p: Property) => {
-    let score = 0
-    const breakdown = {
-      location: 0,
-      price: 0,
-      size: 0,
-      type: 0,
-      bedrooms: 0
-    }
-
-    if (p.city === currentProperty.city) {
-      score += 30
-      breakdown.location = 30
-    }
-
-    const priceDiff = Math.abs(p.price - currentProperty.price) / currentProperty.price
-    if (priceDiff <= 0.1) {
-      score += 25
-      breakdown.price = 25
-    } else if (priceDiff <= 0.2) {
-      score += 20
-      breakdown.price = 20
-    } else if (priceDiff <= 0.3) {
-      score += 15
-      breakdown.price = 15
-    } else if (priceDiff <= 0.5) {
-      score += 10
-      breakdown.price = 10
-    }
-
-    const sizeDiff = Math.abs(p.squareMeters - currentProperty.squareMeters) / currentProperty.squareMeters
-    if (sizeDiff <= 0.1) {
-      score += 20
-      breakdown.size = 20
-    } else if (sizeDiff <= 0.2) {
-      score += 15
-      breakdown.size = 15
-    } else if (sizeDiff <= 0.3) {
-      score += 10
-      breakdown.size = 10
-    }
-
-    if (p.type === currentProperty.type) {
-      score += 15
-      breakdown.type = 15
-    }
-
-    if (p.bedrooms === currentProperty.bedrooms) {
-      score += 10
-      breakdown.bedrooms = 10
-    } else if (Math.abs(p.bedrooms - currentProperty.bedrooms) === 1) {
-      score += 5
-      breakdown.bedrooms = 5
-    }
-
-    return {
-      total: Math.min(100, score),
-      breakdown
-    }
-  }
-
   const getScoreColor = (score: number) => {
     if (score >= 80) return "bg-primary text-primary-foreground"
     if (score >= 60) return "bg-primary/90 text-primary-foreground"
@@ -120,48 +70,19 @@ export function SimilarProperties({ currentProperty, className = "" }: { current
       setIsLoading(true)
       setNoResults(false)
 
-      const filters: any = { exclude: currentProperty.id }
-      
-      switch (type) {
-        case "location":
-          filters.city = currentProperty.city
-          break
-        case "price":
-          const priceRange = currentProperty.price * 0.3
-          filters.price_min = Math.round(Math.max(0, currentProperty.price - priceRange))
-          filters.price_max = Math.round(currentProperty.price + priceRange)
-          break
-        case "size":
-          const sizeRange = currentProperty.squareMeters * 0.3
-          filters.size_min = Math.round(Math.max(0, currentProperty.squareMeters - sizeRange))
-          filters.size_max = Math.round(currentProperty.squareMeters + sizeRange)
-          break
-        case "type":
-          filters.property_type = currentProperty.type
-          break
-        case "comprehensive":
-          filters.city = currentProperty.city
-          const comprehensivePriceRange = currentProperty.price * 0.5
-          filters.price_min = Math.round(Math.max(0, currentProperty.price - comprehensivePriceRange))
-          filters.price_max = Math.round(currentProperty.price + comprehensivePriceRange)
-          break
-      }
-
-      const data = await propertiesApi.getProperties(filters, { signal: ctrl.signal })
+      // Ranked on the server; a few extra candidates so the match level can still pick 3
+      const ranked = await propertiesApi.getSimilarProperties(currentProperty.id, {
+        limit: CANDIDATES,
+        focus: FOCUS[type],
+        signal: ctrl.signal,
+      })
 
       if (!isMounted) return
 
-      const ranked = data
-        .filter(p => p.id !== currentProperty.id)
-        .map(p => ({ property: p, similarity: calculateSimilarity(p) }))
-        .sort((a, b) => b.similarity.total - a.similarity.total)
-
-      const aboveThreshold = ranked.filter(x => x.similarity.total >= threshold)
-      const final = (aboveThreshold.length > 0 ? aboveThreshold : ranked)
-        .slice(0, 3)
-        .map(x => x.property)
+      const aboveThreshold = ranked.filter(x => x.similarity >= threshold)
+      const final = (aboveThreshold.length > 0 ? aboveThreshold : ranked).slice(0, 3)
 
-      setProperties(final)
+      setMatches(final)
       setNoResults(final.length === 0)
     } catch (err: any) {
       if (isMounted && err.name !== "AbortError") {
@@ -299,7 +220,7 @@ export function SimilarProperties({ currentProperty, className = "" }: { current
     )
   }
 
-  const hasFallbackMatches = properties.some(p => calculateSimilarity(p).total < threshold)
+  const hasFallbackMatches = matches.some(m => m.similarity < threshold)
 
   return (
     <section className={`mt-12 ${className}`}>
@@ -385,9 +306,8 @@ export function SimilarProperties({ currentProperty, className = "" }: { current
         {/* Properties Grid */}
         <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
           <AnimatePresence mode="popLayout">
-            {properties.map((property, index) => {
-              const similarity = calculateSimilarity(property)
-              const scoreColor = getScoreColor(similarity.total)
+            {matches.map(({ property, similarity, breakdown }, index) => {
+              const scoreColor = getScoreColor(similarity)
               
               return (
                 <motion.div
@@ -404,7 +324,7 @@ export function SimilarProperties({ currentProperty, className = "" }: { current
                     <div className="absolute top-3 left-3 z-10">
                       <Badge className={`${scoreColor} font-bold text-xs px-2 py-1 shadow-lg border-0 flex items-center gap-1`}>
                         <Target className="h-3 w-3" />
-                        {similarity.total}% Match
+                        {similarity}% Match
                       </Badge>
                     </div>
 
@@ -420,37 +340,37 @@ export function SimilarProperties({ currentProperty, className = "" }: { current
                       <div className="space-y-2">
                         <div className="flex items-center justify-between text-xs">
                           <span className="text-muted-foreground">Overall Similarity</span>
-                          <span className="font-semibold text-foreground">{similarity.total}%</span>
+                          <span className="font-semibold text-foreground">{similarity}%</span>
                         </div>
                         
                         <div className="space-y-1">
-                          {similarity.breakdown.location > 0 && (
+                          {breakdown.location > 0 && (
                             <div className="flex items-center justify-between text-xs">
                               <div className="flex items-center gap-1">
                                 <MapPin className="h-3 w-3 text-green-500" />
                                 <span className="text-foreground">Location</span>
                               </div>
-                              <span className="font-medium text-foreground">+{similarity.breakdown.location}%</span>
+                              <span className="font-medium text-foreground">+{breakdown.location}%</span>
                             </div>
                           )}
                           
-                          {similarity.breakdown.price > 0 && (
+                          {breakdown.price > 0 && (
                             <div className="flex items-center justify-between text-xs">
                               <div className="flex items-center gap-1">
                                 <Euro className="h-3 w-3 text-blue-500" />
                                 <span className="text-foreground">Price</span>
                               </div>
-                              <span className="font-medium text-foreground">+{similarity.breakdown.price}%</span>
+                              <span className="font-medium text-foreground">+{breakdown.price}%</span>
                             </div>
                           )}
                           
-                          {similarity.breakdown.size > 0 && (
+                          {breakdown.size > 0 && (
                             <div className="flex items-center justify-between text-xs">
                               <div className="flex items-center gap-1">
                                 <Ruler className="h-3 w-3 text-purple-500" />
                                 <span className="text-foreground">Size</span>
                               </div>
-                              <span className="font-medium text-foreground">+{similarity.breakdown.size}%</span>
+                              <span className="font-medium text-foreground">+{breakdown.size}%</span>
                             </div>
                           )}
                         </div>
@@ -1,7 +1,9 @@
 // Admin-specific properties API functions
+import { fetchPage, type Page } from "./pagination"
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000/api'
 export const adminPropertiesApi = {
-  async getProperties(search?: string, typeFilter?: string, cityFilter?: string, statusFilter?: string): Promise<any[]> {
+  // One page of properties; pass the previous page's `next` as `cursor` to continue
+  async getProperties(search?: string, typeFilter?: string, cityFilter?: string, statusFilter?: string, cursor?: string | null): Promise<Page<any>> {
     try {
       const token = localStorage.getItem('access_token')
       if (!token) {
@@ -24,22 +26,20 @@ export const adminPropertiesApi = {
         queryParams.append('status', statusFilter) // 'active' or 'inactive'
       }
 
-      const response = await fetch(`${API_BASE_URL}/properties/admin/properties/?${queryParams.toString()}`, {
-        method: 'GET',
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${token}`,
+      const page = await fetchPage(
+        cursor || `${API_BASE_URL}/properties/admin/properties/?${queryParams.toString()}`,
+        {
+          method: 'GET',
+          headers: {
+            'Content-Type': 'application/json',
+            'Authorization': `Bearer ${token}`,
+          },
         },
-      })
-      
-      if (!response.ok) {
-        throw new Error(`Failed to fetch admin properties: ${response.statusText}`)
-      }
-      
-      const properties = await response.json()
+        'Failed to fetch admin properties',
+      )
       
       // Return raw data for admin dashboard (no transformation needed)
-      return properties
+      return page
     } catch (error) {
       console.error('Error fetching admin properties:', error)
       throw error
@@ -61,24 +61,8 @@ export const adminPropertiesApi = {
       })
       
       if (!response.ok) {
-        // Fallback: calculate stats from properties
-        console.log("Admin stats endpoint failed, calculating from properties...")
-        const properties = await this.getProperties()
-        
-        const totalProperties = properties.length
-        const activeProperties = properties.filter((p: any) => p.is_available).length
-        const recentProperties = properties.filter((p: any) => {
-          const oneWeekAgo = new Date()
-          oneWeekAgo.setDate(oneWeekAgo.getDate() - 7)
-          return new Date(p.created_at) > oneWeekAgo
-        }).length
-        
-        return {
-          total_properties: totalProperties,
-          active_properties: activeProperties,
-          inactive_properties: totalProperties - activeProperties,
-          recent_properties: recentProperties
-        }
+        // Counting client-side would mean downloading every property; fall back to the defaults below
+        throw new Error(`Failed to fetch admin stats: ${response.statusText}`)
       }
       
       return response.json()
@@ -1,3 +1,4 @@
+import { fetchPage, type Page } from "./pagination"
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000/api'
 
 
@@ -53,7 +54,8 @@ export const adminVerificationsApi = {
 
  
 // In lib/api/adminVerifications.ts, update the getVerifications function:
-async getVerifications(status?: string): Promise<SellerVerification[]> {
+// One page of verifications; pass the previous page's `next` as `cursor` to continue
+async getVerifications(status?: string, cursor?: string | null): Promise<Page<SellerVerification>> {
   try {
     const token = localStorage.getItem('access_token')
     if (!token) {
@@ -65,23 +67,21 @@ async getVerifications(status?: string): Promise<SellerVerification[]> {
       params.append('status', status)
     }
 
-    const response = await fetch(`${API_BASE_URL}/users/admin/verifications/?${params.toString()}`, {
-      method: 'GET',
-      headers: {
-        'Content-Type': 'application/json',
-        'Authorization': `Bearer ${token}`,
+    const { results: data, next } = await fetchPage(
+      cursor || `${API_BASE_URL}/users/admin/verifications/?${params.toString()}`,
+      {
+        method: 'GET',
+        headers: {
+          'Content-Type': 'application/json',
+          'Authorization': `Bearer ${token}`,
+        },
       },
-    })
-    
-    if (!response.ok) {
-      throw new Error(`Failed to fetch verifications: ${response.statusText}`)
-    }
-    
-    const data = await response.json()
+      'Failed to fetch verifications',
+    )
     console.log("✅ Raw API data received:", data)
     
     // Transform the data to match our frontend structure
-    return data.map((item: any) => {
+    const verifications = data.map((item: any) => {
       // Use user_details if available, otherwise use user object
       const userData = item.user_details || item.user || {}
       
@@ -111,6 +111,7 @@ async getVerifications(status?: string): Promise<SellerVerification[]> {
         admin_notes: item.admin_notes || '',
       }
     })
+    return { results: verifications, next }
   } catch (error) {
     console.error('Error fetching verifications:', error)
     throw error
@@ -133,16 +134,8 @@ async getVerifications(status?: string): Promise<SellerVerification[]> {
       })
       
       if (!response.ok) {
-        // Fallback: calculate stats from verifications
-        console.log("Stats endpoint failed, calculating from verifications...")
-        const verifications = await this.getVerifications()
-        
-        return {
-          total_verifications: verifications.length,
-          pending_verifications: verifications.filter(v => v.status === 'pending').length,
-          approved_verifications: verifications.filter(v => v.status === 'approved').length,
-          rejected_verifications: verifications.filter(v => v.status === 'rejected').length,
-        }
+        // Counting client-side would need every page; report the defaults instead
+        throw new Error(`Failed to fetch verification stats: ${response.statusText}`)
       }
       
       const data = await response.json()
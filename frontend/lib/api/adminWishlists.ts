@@ -1,3 +1,5 @@
+import { fetchPage, type Page } from './pagination'
+
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000/api'
 
 // Types
@@ -27,6 +29,7 @@ export interface UserWishlist {
   }
   wishlist_items: WishlistItem[]
   total_items: number
+  latest_added?: string
 }
 
 export interface WishlistStats {
@@ -74,26 +77,24 @@ async getWishlistStats(): Promise<WishlistStats> {
     }
   },
 
-  async getAllWishlists(): Promise<UserWishlist[]> {
+  // One page of users; pass the previous page's `next` as `cursor` to continue
+  async getWishlists(cursor?: string | null): Promise<Page<UserWishlist>> {
     try {
       const token = localStorage.getItem('access_token')
       if (!token) {
         throw new Error('Not authenticated')
       }
 
-      // Updated URL - using properties admin wishlists
-      const response = await fetch(`${API_BASE_URL}/properties/admin/wishlists/`, {
-        method: 'GET',
-        headers: {
-          'Authorization': `Bearer ${token}`,
+      return await fetchPage<UserWishlist>(
+        cursor || `${API_BASE_URL}/properties/admin/wishlists/`,
+        {
+          method: 'GET',
+          headers: {
+            'Authorization': `Bearer ${token}`,
+          },
         },
-      })
-      
-      if (!response.ok) {
-        throw new Error(`Failed to fetch wishlists: ${response.statusText}`)
-      }
-      
-      return await response.json()
+        'Failed to fetch wishlists',
+      )
     } catch (error) {
       console.error('Error fetching wishlists:', error)
       throw error
@@ -0,0 +1,21 @@
+// List endpoints are cursor-paginated ({ next, previous, results }).
+// Callers fetch one page and keep `next` (an absolute URL, null on the last page)
+// to request the following page when the user asks for more.
+export interface Page<T> {
+  results: T[]
+  next: string | null
+}
+
+export async function fetchPage<T = any>(url: string, init: RequestInit, errorMessage: string): Promise<Page<T>> {
+  const response = await fetch(url, init)
+  if (!response.ok) {
+    throw new Error(`${errorMessage}: ${response.statusText || response.status}`)
+  }
+
+  const data = await response.json()
+  // Plain array responses are a single, complete page
+  if (Array.isArray(data)) {
+    return { results: data, next: null }
+  }
+  return { results: data.results || [], next: data.next || null }
+}
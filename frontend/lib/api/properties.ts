@@ -1,5 +1,6 @@
 // lib/api/properties.ts
-import type { Property, PropertyFormData, PropertyFilters, PropertySearchResponse } from "@/types/property"
+import type { Property, PropertyFormData, PropertyFilters, PropertySearchResponse, SimilarProperty } from "@/types/property"
+import { fetchPage, type Page } from "./pagination"
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000/api'
 
@@ -10,6 +11,12 @@ const safeParseFloat = (value: any): number => {
   return isNaN(num) ? 0 : num
 }
 
+// Coordinates geocoded by the backend from the address, or null when it couldn't place it
+const transformLocation = (property: any): Property['location'] => {
+  if (property.latitude === null || property.latitude === undefined) return null
+  return { lat: property.latitude, lng: property.longitude, precision: property.location_precision }
+}
+
 interface WishlistResponse {
   message: string;
   in_wishlist: boolean;
@@ -54,7 +61,8 @@ export const propertiesApi = {
 
 
 // lib/api/properties.ts - UPDATE THE getProperties FUNCTION
-async getProperties(filters?: any): Promise<Property[]> {
+// One page of results; pass the previous page's `next` as `cursor` to continue
+async getProperties(filters?: any, cursor?: string | null): Promise<Page<Property>> {
   try {
     // Build query parameters from filters
     const queryParams = new URLSearchParams()
@@ -77,6 +85,9 @@ async getProperties(filters?: any): Promise<Property[]> {
     if (filters?.bedrooms) {
       queryParams.append('bedrooms', filters.bedrooms.toString()) // Use 'bedrooms' to match your Django filter
     }
+    if (filters?.page_size) {
+      queryParams.append('page_size', filters.page_size.toString())
+    }
 
     // Remove page and limit from query params since your Django backend doesn't use them
     // Your backend handles pagination differently
@@ -94,19 +105,14 @@ async getProperties(filters?: any): Promise<Property[]> {
       headers['Authorization'] = `Bearer ${token}`
     }
 
-    const response = await fetch(`${API_BASE_URL}/properties/?${queryParams.toString()}`, {
-      method: 'GET',
-      headers: headers,
-    })
-    
-    if (!response.ok) {
-      throw new Error(`Failed to fetch properties: ${response.statusText}`)
-    }
-    
-    const properties = await response.json()
+    const { results, next } = await fetchPage(
+      cursor || `${API_BASE_URL}/properties/?${queryParams.toString()}`,
+      { method: 'GET', headers: headers },
+      'Failed to fetch properties',
+    )
     
     // Transform the backend response to match your frontend Property type
-    return properties.map((property: any) => ({
+    const properties = results.map((property: any) => ({
       id: property.id.toString(),
       name: property.name,
       description: property.description,
@@ -127,7 +133,9 @@ async getProperties(filters?: any): Promise<Property[]> {
       createdAt: property.created_at,
       updatedAt: property.updated_at,
       inWishlist: property.in_wishlist,
+      location: transformLocation(property),
     }))
+    return { results: properties, next }
   } catch (error) {
     console.error('Error fetching properties:', error)
     throw error
@@ -181,6 +189,7 @@ async getProperties(filters?: any): Promise<Property[]> {
         createdAt: property.created_at || new Date().toISOString(),
         updatedAt: property.updated_at || new Date().toISOString(),
         inWishlist: property.in_wishlist || false,
+        location: transformLocation(property),
       }
     } catch (error) {
       console.error('Error fetching property:', error)
@@ -302,6 +311,7 @@ async createProperty(data: any, images: {file: File, is_primary: boolean}[] = []
       createdAt: propertyData.created_at || new Date().toISOString(),
       updatedAt: propertyData.updated_at || new Date().toISOString(),
       inWishlist: propertyData.in_wishlist || false,
+      location: transformLocation(propertyData),
     }
   } catch (error) {
     console.error('Error creating property:', error)
@@ -374,6 +384,7 @@ async updateProperty(id: string, data: any): Promise<Property> {
       createdAt: property.created_at,
       updatedAt: property.updated_at,
       inWishlist: property.in_wishlist || false,
+      location: transformLocation(property),
     }
   } catch (error) {
     console.error('Error updating property:', error)
@@ -407,35 +418,85 @@ async updateProperty(id: string, data: any): Promise<Property> {
 
 
 
+  // Ranked on the server; focus weighs one criterion (location, price, size, type, rooms) more
+  async getSimilarProperties(
+    id: string,
+    { limit = 3, focus, signal }: { limit?: number; focus?: string; signal?: AbortSignal } = {},
+  ): Promise<SimilarProperty[]> {
+    const queryParams = new URLSearchParams({ limit: limit.toString() })
+    if (focus) {
+      queryParams.append('focus', focus)
+    }
+
+    const token = localStorage.getItem('access_token')
+    const headers: HeadersInit = {
+      'Content-Type': 'application/json',
+    }
+    if (token) {
+      headers['Authorization'] = `Bearer ${token}`
+    }
+
+    const response = await fetch(`${API_BASE_URL}/properties/${id}/similar/?${queryParams.toString()}`, {
+      method: 'GET',
+      headers: headers,
+      signal,
+    })
+    if (!response.ok) {
+      throw new Error(`Failed to fetch similar properties: ${response.statusText}`)
+    }
+
+    const cards = await response.json()
+    // Compact cards: no description or seller, one (primary) image
+    return cards.map((card: any) => ({
+      property: {
+        id: card.id.toString(),
+        name: card.name,
+        description: '',
+        address: card.address,
+        city: card.city,
+        price: safeParseFloat(card.price),
+        bedrooms: card.number_of_rooms,
+        squareMeters: safeParseFloat(card.size),
+        type: card.property_type,
+        status: 'active',
+        images: transformImages(card.image ? [card.image] : []),
+        seller: { id: '', name: '' },
+        createdAt: '',
+        updatedAt: '',
+        inWishlist: card.in_wishlist || false,
+      },
+      similarity: card.similarity,
+      breakdown: card.breakdown,
+    }))
+  },
+
   async getFeaturedProperties(): Promise<Property[]> {
-    // For now, just get all properties and return first few as featured
-    const properties = await this.getProperties()
-    return properties.slice(0, 3)
+    // For now, the newest few properties are featured: one small page
+    const { results } = await this.getProperties({ page_size: 3 })
+    return results
   },
 
-  async getMyProperties(): Promise<Property[]> {
+  async getMyProperties(cursor?: string | null): Promise<Page<Property>> {
     try {
       const token = localStorage.getItem('access_token')
       if (!token) {
         throw new Error('Not authenticated')
       }
 
-      const response = await fetch(`${API_BASE_URL}/properties/my-properties/`, {
-        method: 'GET',
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${token}`,
+      const { results, next } = await fetchPage(
+        cursor || `${API_BASE_URL}/properties/my-properties/`,
+        {
+          method: 'GET',
+          headers: {
+            'Content-Type': 'application/json',
+            'Authorization': `Bearer ${token}`,
+          },
         },
-      })
-      
-      if (!response.ok) {
-        throw new Error(`Failed to fetch user properties: ${response.statusText}`)
-      }
-      
-      const properties = await response.json()
+        'Failed to fetch user properties',
+      )
       
       // Transform the backend response
-      return properties.map((property: any) => ({
+      const properties = results.map((property: any) => ({
         id: property.id.toString(),
         name: property.name,
         description: property.description,
@@ -456,7 +517,9 @@ async updateProperty(id: string, data: any): Promise<Property> {
         createdAt: property.created_at,
         updatedAt: property.updated_at,
         inWishlist: property.in_wishlist || false,
+        location: transformLocation(property),
       }))
+      return { results: properties, next }
     } catch (error) {
       console.error('Error fetching user properties:', error)
       throw error
@@ -522,29 +585,27 @@ async updateProperty(id: string, data: any): Promise<Property> {
     }
   },
  
-async getWishlist(): Promise<Property[]> {
+async getWishlist(cursor?: string | null): Promise<Page<Property>> {
   try {
     const token = localStorage.getItem('access_token')
     if (!token) {
       throw new Error('Not authenticated')
     }
 
-    const response = await fetch(`${API_BASE_URL}/properties/wishlist/`, {
-      method: 'GET',
-      headers: {
-        'Authorization': `Bearer ${token}`,
-        'Content-Type': 'application/json',
+    const { results, next } = await fetchPage(
+      cursor || `${API_BASE_URL}/properties/wishlist/`,
+      {
+        method: 'GET',
+        headers: {
+          'Authorization': `Bearer ${token}`,
+          'Content-Type': 'application/json',
+        },
       },
-    })
-    
-    if (!response.ok) {
-      throw new Error(`Failed to fetch wishlist: ${response.statusText}`)
-    }
-    
-    const wishlistItems = await response.json()
+      'Failed to fetch wishlist',
+    )
     
     // Transform the wishlist response to match your Property type
-    return wishlistItems.map((item: any) => {
+    const properties = results.map((item: any) => {
       const property = item.property_details || item.property
       return {
         id: property.id.toString(),
@@ -569,6 +630,7 @@ async getWishlist(): Promise<Property[]> {
         inWishlist: true, // Always true since these are from wishlist
       }
     })
+    return { results: properties, next }
   } catch (error) {
     console.error('Error fetching wishlist:', error)
     throw error
@@ -80,8 +80,6 @@ export interface PropertyAnalyticsData {
   }
   sizeStats: {
     avg_size: number
-    max_size: number
-    min_size: number
   }
   engagement: {
     total_wishlists: number
@@ -26,9 +26,32 @@ export interface Property {
   createdAt: string
   updatedAt: string
   inWishlist: boolean
+  location?: PropertyLocation | null
+}
+
+// Where the backend placed the address; 'postcode' and 'city' are approximate
+export interface PropertyLocation {
+  lat: number
+  lng: number
+  precision: 'address' | 'postcode' | 'city'
 }
 
  
+// Points per criterion from GET /properties/<id>/similar/, adding up to the similarity (0-100)
+export interface SimilarityBreakdown {
+  location: number
+  price: number
+  size: number
+  type: number
+  rooms: number
+}
+
+export interface SimilarProperty {
+  property: Property
+  similarity: number
+  breakdown: SimilarityBreakdown
+}
+
 export interface PropertyImage {
   id: string
   url: string